@@ -1,11 +1,23 @@
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.contrib.admin.options import IncorrectLookupParameters
+from django.contrib.admin.views.main import ERROR_FLAG, ORDER_VAR
 from django.contrib.auth.admin import UserAdmin
+from django.shortcuts import redirect, render
+from django.urls import path, reverse
+
+from core.uploads import RejeicoesUploadMixin, rejeicoes
+
+from .busca import buscar_usuarios
+from .exportacao import resposta_exportacao
+from .forms import ImportacaoUsuariosForm
 from .models import Usuario
 
 class UsuarioAdmin(UserAdmin):
     list_display = ('username', 'email', 'first_name', 'last_name', 'tipo_usuario', 'ativo')
     list_filter = ('is_staff', 'is_superuser', 'tipo_usuario', 'ativo')
     search_fields = ('username', 'first_name', 'last_name', 'email', 'cpf')
+    ordering = ('first_name', 'last_name')
+    actions = ['exportar_csv', 'exportar_ndjson']
     
     fieldsets = UserAdmin.fieldsets + (
         ('Informações ACJogos-RJ', {
@@ -15,4 +27,86 @@ class UsuarioAdmin(UserAdmin):
         }),
     )
 
+    def get_form(self, request, obj=None, **kwargs):
+        # foto_perfil recusada pelo StreamingUploadHandler vira erro do campo em vez de sumir
+        form = super().get_form(request, obj, **kwargs)
+        return type(form.__name__, (RejeicoesUploadMixin, form), {'uploads_rejeitados': rejeicoes(request)})
+
+    def get_search_results(self, request, queryset, search_term):
+        # Busca textual ranqueada (accounts/busca.py) no lugar dos cinco icontains
+        if not search_term:
+            return queryset, False
+        resultados = buscar_usuarios(search_term, queryset)
+        if ORDER_VAR not in request.GET:
+            # O changelist ordena antes de buscar; a relevância passa à frente do nome
+            resultados = resultados.order_by('-busca_rank', *queryset.query.order_by)
+        return resultados, False
+
+    def get_urls(self):
+        return [
+            path('importar/', self.admin_site.admin_view(self.importar_view),
+                 name='accounts_usuario_importar'),
+            path('exportar/', self.admin_site.admin_view(self.exportar_view),
+                 name='accounts_usuario_exportar'),
+        ] + super().get_urls()
+
+    @admin.action(description='Exportar selecionados (CSV)')
+    def exportar_csv(self, request, queryset):
+        return resposta_exportacao(request, queryset, 'csv')
+
+    @admin.action(description='Exportar selecionados (NDJSON)')
+    def exportar_ndjson(self, request, queryset):
+        return resposta_exportacao(request, queryset, 'ndjson')
+
+    def exportar_view(self, request):
+        """Exporta tudo o que o changelist mostraria com os mesmos filtros e busca"""
+        if not self.has_view_permission(request):
+            return redirect('admin:index')
+        parametros = request.GET.copy()
+        formato = parametros.pop('formato', ['csv'])[-1]
+        request.GET = parametros
+        try:
+            changelist = self.get_changelist_instance(request)
+            queryset = changelist.get_queryset(request)
+        except IncorrectLookupParameters:
+            # Filtro inválido na URL: volta para o changelist com o aviso de erro, como o próprio admin faz
+            return redirect(f'{reverse("admin:accounts_usuario_changelist")}?{ERROR_FLAG}=1')
+        return resposta_exportacao(request, queryset, formato)
+
+    def importar_view(self, request):
+        if not self.has_add_permission(request):
+            return redirect('admin:accounts_usuario_changelist')
+        erros = []
+        form = ImportacaoUsuariosForm(request.POST or None, request.FILES or None)
+        if request.method == 'POST' and form.is_valid():
+            # Só aqui: a importação puxa os validadores do localflavor, csv e o pool de threads,
+            # que nenhum worker precisa carregar no boot
+            from .importacao import importar_usuarios, ler_arquivo
+
+            arquivo = form.cleaned_data['arquivo']
+            try:
+                resultado = importar_usuarios(
+                    ler_arquivo(arquivo.file, arquivo.name),
+                    registrar_erro=lambda numero, campo, erro: erros.append((numero, campo, erro)),
+                )
+            except ImportError:
+                messages.error(request, 'Para importar XLSX instale o openpyxl.')
+            else:
+                nivel = messages.WARNING if resultado.erros else messages.SUCCESS
+                messages.add_message(request, nivel, (
+                    f'{resultado.importados} usuários importados, {resultado.erros} linhas com erro '
+                    f'({resultado.linhas_por_segundo:.0f} linhas/s).'
+                ))
+                if not erros:
+                    return redirect('admin:accounts_usuario_changelist')
+        context = {
+            **self.admin_site.each_context(request),
+            'title': 'Importar usuários',
+            'opts': self.model._meta,
+            'form': form,
+            'erros': erros[:200],
+            'total_erros': len(erros),
+        }
+        return render(request, 'admin/accounts/usuario/importar.html', context)
+
 admin.site.register(Usuario, UsuarioAdmin)
@@ -0,0 +1,210 @@
+"""
+Busca de membros (Usuario) usada pelo UsuarioAdmin e pelo diretório de membros.
+
+No PostgreSQL a busca usa a coluna `busca_vetor` (tsvector mantido por trigger,
+ver migrações 0006 e 0009) com a configuração `pt_unaccent`. Nos demais
+bancos (SQLite no desenvolvimento e nos testes) usa um índice invertido em
+memória, mantido pelos sinais de Usuario (accounts/signals.py), e a consulta
+fica com os BUSCA_MAX_CANDIDATOS membros de maior rank.
+
+Em ambos os casos o queryset retornado vem anotado com `busca_rank`.
+"""
+import bisect
+import heapq
+import re
+import threading
+import unicodedata
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import BooleanField, Case, FloatField, Value, When
+from django.db.models.expressions import RawSQL
+
+# Mesmos pesos padrão do ts_rank do PostgreSQL (D, C, B, A)
+PESOS = {'A': 1.0, 'B': 0.4, 'C': 0.2, 'D': 0.1}
+CAMPOS_PESO = {
+    'first_name': 'A', 'last_name': 'A', 'nome_social': 'A',
+    'username': 'B', 'nick_discord': 'B',
+    'email': 'C',
+    'cpf': 'D',
+}
+
+
+def normalizar(texto):
+    """Minúsculas e sem acentos"""
+    texto = unicodedata.normalize('NFKD', texto or '')
+    return ''.join(c for c in texto if not unicodedata.combining(c)).lower()
+
+
+def tokens(texto):
+    return re.findall(r'\w+', normalizar(texto))
+
+
+def tokens_da_busca(termo):
+    """
+    Tokens do termo digitado, no mesmo formato do índice.
+
+    O CPF é indexado só com dígitos, num token só: um pedaço do termo feito só
+    de dígitos e pontuação ("123.456.789-00", "123.456") vira um token com os
+    dígitos. E-mails são indexados quebrados em palavras, como o resto do termo.
+    """
+    resultado = []
+    for pedaco in termo.split():
+        if re.fullmatch(r'[\d.\-/]+', pedaco):
+            digitos = re.sub(r'\D', '', pedaco)
+            if digitos:
+                resultado.append(digitos)
+        else:
+            resultado.extend(tokens(pedaco))
+    return resultado
+
+
+class IndiceMemoria:
+    """Índice invertido token -> {pk: peso} com busca por prefixo"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._postings = {}
+        self._tokens_por_pk = {}
+        self._ordenados = []
+        self._construido = False
+
+    def invalidar(self):
+        with self._lock:
+            self._postings.clear()
+            self._tokens_por_pk.clear()
+            self._ordenados = []
+            self._construido = False
+
+    def _garantir(self):
+        if self._construido:
+            return
+        from .models import Usuario
+        campos = ['pk', *CAMPOS_PESO]
+        with self._lock:
+            if self._construido:
+                return
+            for valores in Usuario.objects.values(*campos).iterator(chunk_size=2000):
+                self._adicionar(valores.pop('pk'), valores)
+            self._ordenados = sorted(self._postings)
+            self._construido = True
+
+    def _tokens_do_usuario(self, valores):
+        resultado = {}
+        for campo, classe in CAMPOS_PESO.items():
+            valor = valores.get(campo) or ''
+            if campo == 'cpf':
+                valor = re.sub(r'\D', '', valor)
+            for token in tokens(valor):
+                resultado[token] = max(resultado.get(token, 0.0), PESOS[classe])
+        return resultado
+
+    def _adicionar(self, pk, valores):
+        self._indexar(pk, self._tokens_do_usuario(valores))
+
+    def _indexar(self, pk, novos):
+        for token, peso in novos.items():
+            self._postings.setdefault(token, {})[pk] = peso
+        self._tokens_por_pk[pk] = set(novos)
+
+    def _remover(self, pk):
+        for token in self._tokens_por_pk.pop(pk, ()):
+            posting = self._postings.get(token)
+            if posting is not None:
+                posting.pop(pk, None)
+
+    def atualizar(self, usuario):
+        """Reindexa um usuário (chamado no post_save)"""
+        if not self._construido:
+            return
+        novos = self._tokens_do_usuario({campo: getattr(usuario, campo) for campo in CAMPOS_PESO})
+        with self._lock:
+            self._remover(usuario.pk)
+            for token in novos:
+                if token not in self._postings:
+                    bisect.insort(self._ordenados, token)
+            self._indexar(usuario.pk, novos)
+
+    def remover(self, pk):
+        """Retira um usuário do índice (chamado no post_delete)"""
+        if not self._construido:
+            return
+        with self._lock:
+            self._remover(pk)
+
+    def buscar(self, termo):
+        """Retorna {pk: rank}; todos os tokens do termo precisam casar (AND)"""
+        self._garantir()
+        termos = tokens_da_busca(termo)
+        if not termos:
+            return {}
+        # Sob o lock: o atualizar() dos sinais mexe nas mesmas estruturas em outras threads
+        with self._lock:
+            return self._buscar(termos)
+
+    def _buscar(self, termos):
+        resultado = None
+        for termo_token in termos:
+            pontos = {}
+            inicio = bisect.bisect_left(self._ordenados, termo_token)
+            for token in self._ordenados[inicio:]:
+                if not token.startswith(termo_token):
+                    break
+                for pk, peso in self._postings.get(token, {}).items():
+                    pontos[pk] = max(pontos.get(pk, 0.0), peso)
+            if resultado is None:
+                resultado = pontos
+            else:
+                resultado = {pk: resultado[pk] + peso for pk, peso in pontos.items() if pk in resultado}
+            if not resultado:
+                return {}
+        return resultado
+
+
+indice_memoria = IndiceMemoria()
+
+
+def usa_postgres():
+    return connection.vendor == 'postgresql'
+
+
+def _tsquery(termo):
+    # Somente caracteres de palavra chegam ao to_tsquery, então não há sintaxe para escapar
+    return ' & '.join(f'{token}:*' for token in tokens_da_busca(termo))
+
+
+def buscar_usuarios(termo, queryset=None):
+    """Filtra `queryset` pelo termo e anota `busca_rank` (maior = mais relevante)"""
+    from .models import Usuario
+    if queryset is None:
+        queryset = Usuario.objects.all()
+    termo = (termo or '').strip()
+    if not termo:
+        return queryset.annotate(busca_rank=Value(0.0, output_field=FloatField()))
+
+    if usa_postgres():
+        consulta = _tsquery(termo)
+        if not consulta:
+            return queryset.none()
+        vetor = f'"{Usuario._meta.db_table}"."busca_vetor"'
+        return queryset.annotate(
+            busca_casa=RawSQL(f"{vetor} @@ to_tsquery('pt_unaccent', %s)", [consulta],
+                              output_field=BooleanField()),
+            busca_rank=RawSQL(f"ts_rank({vetor}, to_tsquery('pt_unaccent', %s))", [consulta],
+                              output_field=FloatField()),
+        ).filter(busca_casa=True)
+
+    ranks = indice_memoria.buscar(termo)
+    if not ranks:
+        return queryset.none()
+    if len(ranks) > settings.BUSCA_MAX_CANDIDATOS:
+        # Empate no rank: fica o pk menor, para o corte ser o mesmo a cada busca
+        ranks = dict(heapq.nlargest(settings.BUSCA_MAX_CANDIDATOS, ranks.items(),
+                                    key=lambda item: (item[1], -item[0])))
+    return queryset.filter(pk__in=ranks).annotate(
+        busca_rank=Case(
+            *[When(pk=pk, then=Value(rank)) for pk, rank in ranks.items()],
+            default=Value(0.0),
+            output_field=FloatField(),
+        )
+    )
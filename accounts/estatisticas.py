@@ -0,0 +1,133 @@
+"""
+Estatísticas de membros pré-calculadas (ContadorMembros).
+
+Cada membro conta uma vez em cada dimensão: tipo_usuario, estado, ativo e mês
+de associação (AAAA-MM). Os sinais de Usuario aplicam só a diferença entre os
+valores antigos e novos (UPDATE total = total ± 1), e `recalcular` refaz tudo
+com GROUP BY para corrigir o que passou por fora dos sinais (bulk_create,
+QuerySet.update). O dashboard monta o resumo a partir de uma única consulta.
+"""
+from collections import Counter
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+from django.db.models.functions import TruncMonth
+
+from .models import ContadorMembros, Usuario
+
+CAMPOS = ('tipo_usuario', 'estado', 'ativo', 'data_associacao')
+MESES_NO_DASHBOARD = 12
+
+
+def chaves(valores):
+    """(dimensão, valor) em que um membro com esses valores é contado"""
+    resultado = [
+        ('tipo_usuario', valores['tipo_usuario']),
+        ('estado', valores['estado']),
+        ('ativo', '1' if valores['ativo'] else '0'),
+    ]
+    if valores['data_associacao']:
+        resultado.append(('mes_associacao', valores['data_associacao'].strftime('%Y-%m')))
+    return resultado
+
+
+def valores_de(usuario):
+    return {campo: getattr(usuario, campo) for campo in CAMPOS}
+
+
+def aplicar(deltas):
+    """Soma cada delta ao contador correspondente, criando os que ainda não existem"""
+    for (dimensao, valor), delta in deltas.items():
+        if not delta:
+            continue
+        contadores = ContadorMembros.objects.filter(dimensao=dimensao, valor=valor)
+        if contadores.update(total=F('total') + delta):
+            continue
+        try:
+            with transaction.atomic():
+                ContadorMembros.objects.create(dimensao=dimensao, valor=valor, total=delta)
+        except IntegrityError:
+            # Outro processo criou a linha entre o UPDATE e o INSERT
+            contadores.update(total=F('total') + delta)
+
+
+def registrar_alteracao(antes, depois):
+    """Aplica a mudança de um membro; `antes`/`depois` são valores_de() ou None"""
+    deltas = Counter()
+    if antes is not None:
+        deltas.subtract(chaves(antes))
+    if depois is not None:
+        deltas.update(chaves(depois))
+    aplicar(deltas)
+
+
+def contagens_reais():
+    """Contagens atuais direto da tabela de usuários (quatro GROUP BYs)"""
+    reais = Counter()
+    for campo in ('tipo_usuario', 'estado'):
+        for linha in Usuario.objects.order_by().values(campo).annotate(n=Count('pk')):
+            reais[(campo, linha[campo])] = linha['n']
+    for linha in Usuario.objects.order_by().values('ativo').annotate(n=Count('pk')):
+        reais[('ativo', '1' if linha['ativo'] else '0')] = linha['n']
+    meses = (Usuario.objects.filter(data_associacao__isnull=False).order_by()
+             .annotate(mes=TruncMonth('data_associacao')).values('mes').annotate(n=Count('pk')))
+    for linha in meses:
+        reais[('mes_associacao', linha['mes'].strftime('%Y-%m'))] = linha['n']
+    return reais
+
+
+def recalcular(corrigir=True):
+    """
+    Compara os contadores com as contagens reais e, se `corrigir`, regrava os divergentes.
+
+    Os contadores ficam travados (select_for_update) durante a contagem, então um
+    sinal concorrente espera e soma o seu delta depois do valor corrigido.
+    Retorna a lista de (dimensão, valor, armazenado, real) que divergiam.
+    """
+    with transaction.atomic():
+        armazenados = {
+            (c.dimensao, c.valor): c
+            for c in ContadorMembros.objects.select_for_update()
+        }
+        reais = contagens_reais()
+        divergencias = []
+        for chave in sorted(set(armazenados) | set(reais)):
+            contador = armazenados.get(chave)
+            armazenado = contador.total if contador else 0
+            real = reais.get(chave, 0)
+            if armazenado == real:
+                continue
+            divergencias.append((*chave, armazenado, real))
+            if not corrigir:
+                continue
+            if contador is None:
+                ContadorMembros.objects.create(dimensao=chave[0], valor=chave[1], total=real)
+            elif real:
+                ContadorMembros.objects.filter(pk=contador.pk).update(total=real)
+            else:
+                contador.delete()
+    return divergencias
+
+
+def montar_resumo(contadores):
+    """Organiza os ContadorMembros (já carregados) para o dashboard"""
+    por_dimensao = {}
+    for contador in contadores:
+        if contador.total > 0:
+            por_dimensao.setdefault(contador.dimensao, {})[contador.valor] = contador.total
+
+    tipos = por_dimensao.get('tipo_usuario', {})
+    estados = por_dimensao.get('estado', {})
+    ativos = por_dimensao.get('ativo', {})
+    nomes_estados = dict(Usuario.ESTADOS_BRASIL)
+    meses = sorted(por_dimensao.get('mes_associacao', {}).items())[-MESES_NO_DASHBOARD:]
+    maior_mes = max((total for _, total in meses), default=0)
+    return {
+        'total': sum(tipos.values()),
+        'ativos': ativos.get('1', 0),
+        'inativos': ativos.get('0', 0),
+        'por_tipo': [(nome, tipos.get(codigo, 0)) for codigo, nome in Usuario.TIPO_USUARIO],
+        'por_estado': sorted(((nomes_estados.get(uf, uf), total) for uf, total in estados.items()),
+                             key=lambda item: -item[1]),
+        'por_mes': [(mes, total, 100 * total // maior_mes) for mes, total in meses],
+    }
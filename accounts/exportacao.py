@@ -0,0 +1,82 @@
+"""
+Exportação do diretório de membros em CSV ou NDJSON com memória constante.
+
+As linhas vêm do banco em blocos (`.values_list().iterator()`) e são enviadas
+ao cliente à medida que são lidas, via StreamingHttpResponse. No ASGI o
+conteúdo é um gerador assíncrono que lê um bloco por vez: com um iterador
+comum o Django o leria inteiro numa lista antes de enviar o primeiro byte.
+"""
+import csv
+import json
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+
+CAMPOS_EXPORTACAO = (
+    'id', 'username', 'first_name', 'last_name', 'nome_social', 'email', 'tipo_usuario',
+    'ativo', 'nick_discord', 'cidade', 'estado', 'data_associacao',
+)
+TAMANHO_BLOCO = 2000
+# Várias linhas por yield para não pagar o overhead do servidor a cada registro
+LINHAS_POR_ENVIO = 500
+FORMATOS = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson; charset=utf-8',
+}
+
+
+class _Eco:
+    """Buffer falso: o csv.writer devolve a linha formatada em vez de gravá-la"""
+
+    def write(self, valor):
+        return valor
+
+
+def _formato(formato):
+    """(cabeçalho, função que formata uma linha do values_list)"""
+    if formato == 'csv':
+        escritor = csv.writer(_Eco())
+        return escritor.writerow(CAMPOS_EXPORTACAO), escritor.writerow
+
+    def ndjson(linha):
+        return json.dumps(dict(zip(CAMPOS_EXPORTACAO, linha)), cls=DjangoJSONEncoder, ensure_ascii=False) + '\n'
+    return '', ndjson
+
+
+def gerar(queryset, formato):
+    cabecalho, formatar = _formato(formato)
+    if cabecalho:
+        yield cabecalho
+    bloco = []
+    for linha in queryset.values_list(*CAMPOS_EXPORTACAO).iterator(chunk_size=TAMANHO_BLOCO):
+        bloco.append(formatar(linha))
+        if len(bloco) == LINHAS_POR_ENVIO:
+            yield ''.join(bloco)
+            bloco = []
+    if bloco:
+        yield ''.join(bloco)
+
+
+async def agerar(queryset, formato):
+    cabecalho, formatar = _formato(formato)
+    if cabecalho:
+        yield cabecalho
+    # O aiterator() do values_list abre o cursor fora da thread do ORM (Django 5.1); aqui o
+    # gerador síncrono avança um bloco por vez dentro do sync_to_async
+    linhas = queryset.values_list(*CAMPOS_EXPORTACAO).iterator(chunk_size=TAMANHO_BLOCO)
+    proximo_bloco = sync_to_async(lambda: list(islice(linhas, TAMANHO_BLOCO)))
+    while bloco := await proximo_bloco():
+        for inicio in range(0, len(bloco), LINHAS_POR_ENVIO):
+            yield ''.join(formatar(linha) for linha in bloco[inicio:inicio + LINHAS_POR_ENVIO])
+
+
+def resposta_exportacao(request, queryset, formato='csv'):
+    if formato not in FORMATOS:
+        formato = 'csv'
+    gerador = agerar if isinstance(request, ASGIRequest) else gerar
+    resposta = StreamingHttpResponse(gerador(queryset, formato), content_type=FORMATOS[formato])
+    resposta['Content-Disposition'] = f'attachment; filename="membros.{formato}"'
+    return resposta
@@ -12,3 +12,7 @@ class UsuarioCreationForm(UserCreationForm):
         for field_name, field in self.fields.items():
             field.widget.attrs['class'] = 'form-control'
             field.widget.attrs['placeholder'] = field.label
+
+class ImportacaoUsuariosForm(forms.Form):
+    arquivo = forms.FileField(label='Arquivo CSV ou XLSX',
+                              help_text='Colunas com os nomes dos campos de Usuário, mais "senha".')
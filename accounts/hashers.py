@@ -0,0 +1,156 @@
+"""
+Hashers de senha com custo calibrado e cálculo fora das threads de requisição.
+
+Os parâmetros (custo de tempo/memória do Argon2, N do scrypt, iterações do
+PBKDF2) vêm das configurações SENHA_*, medidas no próprio servidor com
+`manage.py calibrar_senhas`. Mudou o custo ou o algoritmo preferido? O Django
+refaz o hash no próximo login bem-sucedido (must_update), sem nenhuma migração.
+
+O cálculo em si (encode/verify) roda num ProcessPoolExecutor de no máximo
+SENHA_PROCESSOS processos (por worker; padrão 1) com prioridade baixa (nice):
+numa onda de logins a thread da requisição só espera o resultado, as demais
+páginas continuam com a CPU e o número de hashes simultâneos no servidor
+fica limitado a workers x SENHA_PROCESSOS. Com SENHA_PROCESSOS = 0 o hash é
+calculado na própria thread, como no Django. Quem já tem o seu próprio
+paralelismo (o comando importar_usuarios, com --workers threads) usa
+calculo_na_thread(): Argon2, scrypt e PBKDF2 soltam o GIL, então cada thread
+ocupa um núcleo em vez de todas esperarem na fila do pool.
+"""
+import atexit
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+from django.contrib.auth.hashers import (
+    Argon2PasswordHasher,
+    PBKDF2PasswordHasher,
+    ScryptPasswordHasher,
+)
+
+logger = logging.getLogger(__name__)
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+# True nos processos do pool: lá o hash é calculado direto
+_no_pool = False
+_thread = threading.local()
+
+
+def _iniciar_processo(prioridade):
+    global _no_pool
+    _no_pool = True
+    try:
+        os.nice(prioridade)
+    except (AttributeError, OSError):
+        pass
+
+
+def _calcular(hasher, metodo, args):
+    # O hasher chega por pickle com os parâmetros de quem pediu (o __init__ não roda de novo)
+    return getattr(hasher, metodo)(*args)
+
+
+def pool():
+    """Pool do processo atual, criado no primeiro uso (e de novo depois de um fork)"""
+    global _pool, _pool_pid
+    with _pool_lock:
+        if _pool is None or _pool_pid != os.getpid():
+            metodos = multiprocessing.get_all_start_methods()
+            # Nada de fork a partir de um worker com threads: o processo novo herdaria locks presos
+            contexto = multiprocessing.get_context('forkserver' if 'forkserver' in metodos else 'spawn')
+            _pool = ProcessPoolExecutor(
+                max_workers=settings.SENHA_PROCESSOS, mp_context=contexto,
+                initializer=_iniciar_processo, initargs=(settings.SENHA_PRIORIDADE,),
+            )
+            _pool_pid = os.getpid()
+        return _pool
+
+
+def _encerrar_pool():
+    # Sem isso os processos e semáforos do pool ficam para o resource_tracker ("leaked semaphore")
+    with _pool_lock:
+        executor = _pool if _pool_pid == os.getpid() else None
+    if executor is not None:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+atexit.register(_encerrar_pool)
+
+
+def _descartar_pool(quebrado):
+    global _pool
+    with _pool_lock:
+        if _pool is quebrado:
+            _pool = None
+    quebrado.shutdown(wait=False, cancel_futures=True)
+
+
+@contextmanager
+def calculo_na_thread():
+    """Dentro do bloco, os hashes desta thread são calculados nela mesma, sem o pool"""
+    anterior = getattr(_thread, 'direto', False)
+    _thread.direto = True
+    try:
+        yield
+    finally:
+        _thread.direto = anterior
+
+
+class CalculoEmPool:
+    """Mixin que manda encode/verify para o pool de processos"""
+
+    def _em_pool(self, metodo, *args):
+        if _no_pool or not settings.SENHA_PROCESSOS or getattr(_thread, 'direto', False):
+            return getattr(super(), metodo)(*args)
+        executor = pool()
+        try:
+            return executor.submit(_calcular, self, metodo, args).result()
+        except BrokenProcessPool:
+            # Processo do pool morto (OOM, kill): recria na próxima vez e calcula aqui
+            logger.warning('Pool de hash de senhas quebrado; calculando na thread', exc_info=True)
+            _descartar_pool(executor)
+            return getattr(super(), metodo)(*args)
+
+    def encode(self, password, salt, *args):
+        return self._em_pool('encode', password, salt, *args)
+
+    def verify(self, password, encoded):
+        return self._em_pool('verify', password, encoded)
+
+    def __reduce__(self):
+        # Só o que importa para o cálculo vai para o outro processo
+        return _recriar, (type(self), vars(self))
+
+
+def _recriar(classe, parametros):
+    hasher = classe.__new__(classe)
+    hasher.__dict__.update(parametros)
+    return hasher
+
+
+class Argon2Calibrado(CalculoEmPool, Argon2PasswordHasher):
+    def __init__(self):
+        self.time_cost = settings.SENHA_ARGON2_TIME_COST
+        self.memory_cost = settings.SENHA_ARGON2_MEMORY_COST
+        self.parallelism = settings.SENHA_ARGON2_PARALLELISM
+
+
+class ScryptCalibrado(CalculoEmPool, ScryptPasswordHasher):
+    def __init__(self):
+        self.work_factor = settings.SENHA_SCRYPT_N
+        self.block_size = settings.SENHA_SCRYPT_R
+        self.parallelism = settings.SENHA_SCRYPT_P
+        # O limite padrão do OpenSSL (32MB) não comporta N >= 2**15 com r = 8; 1GB de folga
+        # para ainda conferir hashes antigos gerados com um N maior que o atual
+        self.maxmem = max(256 * self.work_factor * self.block_size * self.parallelism, 2**30)
+
+
+class PBKDF2Calibrado(CalculoEmPool, PBKDF2PasswordHasher):
+    def __init__(self):
+        self.iterations = settings.SENHA_PBKDF2_ITERACOES
@@ -0,0 +1,126 @@
+"""
+Miniaturas das fotos de perfil (Usuario.foto_perfil).
+
+Depois que um usuário é salvo com foto nova, as miniaturas quadradas em
+TAMANHOS são geradas em WebP (e AVIF, quando o Pillow suporta) por um pool de
+threads, fora do ciclo da requisição. Os arquivos levam o hash do conteúdo
+original no nome (perfis/miniaturas/<hash>_<tamanho>.<formato>), então podem
+ser servidos com cache de longa duração. A tag {% avatar %} monta o srcset.
+Quando a foto é trocada ou removida, as miniaturas do hash antigo são
+apagadas (se nenhum outro membro usar a mesma foto).
+"""
+import hashlib
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections
+
+logger = logging.getLogger(__name__)
+
+TAMANHOS = (64, 128, 256)
+PASTA = 'perfis/miniaturas'
+QUALIDADE = {'webp': 80, 'avif': 60}
+FORMATOS = ('avif', 'webp')
+
+_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix='miniaturas')
+_formatos = None
+
+
+def formatos_suportados():
+    """Formatos de saída disponíveis no Pillow instalado, do mais compacto ao mais compatível"""
+    global _formatos
+    if _formatos is None:
+        from PIL import features
+        _formatos = tuple(f for f in FORMATOS if features.check(f))
+    return _formatos
+
+
+def nome_miniatura(foto_hash, tamanho, formato):
+    return f'{PASTA}/{foto_hash}_{tamanho}.{formato}'
+
+
+def hash_conteudo(arquivo):
+    sha = hashlib.sha256()
+    arquivo.open('rb')
+    try:
+        for bloco in arquivo.chunks():
+            sha.update(bloco)
+    finally:
+        arquivo.close()
+    return sha.hexdigest()[:16]
+
+
+def gerar_miniaturas(usuario_pk):
+    """Gera as miniaturas da foto atual do usuário e grava o hash; idempotente"""
+    from PIL import Image, ImageOps
+
+    from .models import Usuario
+
+    usuario = Usuario.objects.filter(pk=usuario_pk).only('foto_perfil', 'foto_hash').first()
+    if usuario is None or not usuario.foto_perfil:
+        return None
+    foto_hash = hash_conteudo(usuario.foto_perfil)
+    if foto_hash == usuario.foto_hash:
+        return foto_hash
+
+    usuario.foto_perfil.open('rb')
+    try:
+        with Image.open(usuario.foto_perfil) as original:
+            original = ImageOps.exif_transpose(original).convert('RGB')
+            for tamanho in TAMANHOS:
+                miniatura = ImageOps.fit(original, (tamanho, tamanho), Image.Resampling.LANCZOS)
+                for formato in formatos_suportados():
+                    nome = nome_miniatura(foto_hash, tamanho, formato)
+                    if default_storage.exists(nome):
+                        continue
+                    saida = BytesIO()
+                    miniatura.save(saida, formato.upper(), quality=QUALIDADE[formato])
+                    default_storage.save(nome, ContentFile(saida.getvalue()))
+    finally:
+        usuario.foto_perfil.close()
+
+    # update() não dispara post_save, evitando gerar tudo de novo
+    Usuario.objects.filter(pk=usuario_pk).update(foto_hash=foto_hash)
+    if usuario.foto_hash:
+        remover_miniaturas(usuario.foto_hash)
+    return foto_hash
+
+
+def remover_miniaturas(foto_hash):
+    """Apaga as miniaturas de um hash que nenhum usuário usa mais"""
+    from .models import Usuario
+
+    if Usuario.objects.filter(foto_hash=foto_hash).exists():
+        return
+    for tamanho in TAMANHOS:
+        # Todos os formatos, não só os suportados agora: o Pillow pode ter mudado desde a geração
+        for formato in FORMATOS:
+            default_storage.delete(nome_miniatura(foto_hash, tamanho, formato))
+
+
+def _gerar_com_log(usuario_pk):
+    try:
+        gerar_miniaturas(usuario_pk)
+    except Exception:
+        logger.exception('Falha ao gerar miniaturas do usuário %s', usuario_pk)
+
+
+def _gerar_no_pool(usuario_pk):
+    # As threads do pool vivem mais que qualquer requisição: sem isso, depois de uma queda do banco
+    # elas ficariam com a conexão morta até o processo reiniciar
+    close_old_connections()
+    try:
+        _gerar_com_log(usuario_pk)
+    finally:
+        close_old_connections()
+
+
+def agendar_miniaturas(usuario_pk):
+    if getattr(settings, 'MINIATURAS_ASSINCRONAS', True):
+        _pool.submit(_gerar_no_pool, usuario_pk)
+    else:
+        _gerar_com_log(usuario_pk)
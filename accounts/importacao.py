@@ -0,0 +1,240 @@
+"""
+Importação em massa de membros (Usuario) a partir de CSV ou XLSX.
+
+As linhas são lidas uma a uma (nada de carregar o arquivo inteiro), validadas
+em lotes, as senhas são geradas em um pool de threads e a inserção é feita com
+bulk_create por lote. Usado pelo comando `importar_usuarios` e pela tela de
+importação do UsuarioAdmin.
+"""
+import csv
+import io
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import IntegrityError, transaction
+from localflavor.br.validators import BRCPFValidator, BRPostalCodeValidator
+
+from .busca import indice_memoria
+from .estatisticas import recalcular
+from .hashers import calculo_na_thread
+from .models import Usuario
+
+CAMPOS = (
+    'username', 'email', 'first_name', 'last_name', 'tipo_usuario', 'nome_social', 'cpf',
+    'telefone', 'nick_discord', 'cep', 'endereco', 'numero', 'complemento', 'bairro',
+    'cidade', 'estado', 'data_associacao',
+)
+TIPOS = {codigo for codigo, _ in Usuario.TIPO_USUARIO}
+ESTADOS = {sigla for sigla, _ in Usuario.ESTADOS_BRASIL}
+
+validar_cpf = BRCPFValidator()
+validar_cep = BRPostalCodeValidator()
+
+
+class ResultadoImportacao:
+    def __init__(self):
+        self.importados = 0
+        self.erros = 0
+        self.segundos = 0.0
+
+    @property
+    def linhas_por_segundo(self):
+        return (self.importados + self.erros) / self.segundos if self.segundos else 0.0
+
+
+def ler_csv(arquivo):
+    """Gera (número da linha, dict) a partir de um arquivo CSV (binário ou texto)"""
+    if not isinstance(arquivo, io.TextIOBase):
+        arquivo = io.TextIOWrapper(arquivo, encoding='utf-8-sig', newline='')
+    amostra = arquivo.read(4096)
+    arquivo.seek(0)
+    try:
+        dialeto = csv.Sniffer().sniff(amostra, delimiters=',;')
+    except csv.Error:
+        dialeto = csv.excel
+    for numero, linha in enumerate(csv.DictReader(arquivo, dialect=dialeto), start=2):
+        yield numero, linha
+
+
+def ler_xlsx(arquivo):
+    """Gera (número da linha, dict) a partir da primeira planilha de um XLSX (requer openpyxl)"""
+    from openpyxl import load_workbook
+
+    planilha = load_workbook(arquivo, read_only=True, data_only=True).worksheets[0]
+    linhas = planilha.iter_rows(values_only=True)
+    cabecalho = [str(c or '').strip() for c in next(linhas, ())]
+    for numero, valores in enumerate(linhas, start=2):
+        yield numero, {c: ('' if v is None else str(v)) for c, v in zip(cabecalho, valores)}
+
+
+def ler_arquivo(arquivo, nome):
+    if nome.lower().endswith('.xlsx'):
+        return ler_xlsx(arquivo)
+    return ler_csv(arquivo)
+
+
+def _digitos(valor):
+    return re.sub(r'\D', '', valor or '')
+
+
+def _data(valor):
+    for formato in ('%Y-%m-%d', '%d/%m/%Y'):
+        try:
+            return datetime.strptime(valor[:10], formato).date()
+        except ValueError:
+            continue
+    raise ValidationError('Data inválida (use AAAA-MM-DD ou DD/MM/AAAA).')
+
+
+def validar_linha(dados):
+    """Retorna (kwargs para Usuario, senha em texto, lista de (campo, erro))"""
+    dados = {k.strip(): (v or '').strip() for k, v in dados.items() if k}
+    valores = {campo: dados[campo] for campo in CAMPOS if dados.get(campo)}
+    erros = []
+
+    if not valores.get('username'):
+        erros.append(('username', 'Obrigatório.'))
+    if valores.get('email'):
+        try:
+            validate_email(valores['email'])
+        except ValidationError as e:
+            erros.append(('email', e.messages[0]))
+    if valores.get('cpf'):
+        cpf = _digitos(valores['cpf'])
+        try:
+            validar_cpf(cpf)
+            valores['cpf'] = f'{cpf[:3]}.{cpf[3:6]}.{cpf[6:9]}-{cpf[9:]}'
+        except ValidationError as e:
+            erros.append(('cpf', e.messages[0]))
+    if valores.get('cep'):
+        cep = _digitos(valores['cep'])
+        cep = f'{cep[:5]}-{cep[5:]}'
+        try:
+            validar_cep(cep)
+            valores['cep'] = cep
+        except ValidationError as e:
+            erros.append(('cep', e.messages[0]))
+    if valores.get('tipo_usuario'):
+        valores['tipo_usuario'] = valores['tipo_usuario'].upper()
+        if valores['tipo_usuario'] not in TIPOS:
+            erros.append(('tipo_usuario', 'Tipo inválido.'))
+    if valores.get('estado'):
+        valores['estado'] = valores['estado'].upper()
+        if valores['estado'] not in ESTADOS:
+            erros.append(('estado', 'UF inválida.'))
+    if valores.get('data_associacao'):
+        try:
+            valores['data_associacao'] = _data(valores['data_associacao'])
+        except ValidationError as e:
+            erros.append(('data_associacao', e.messages[0]))
+
+    return valores, dados.get('password') or dados.get('senha') or None, erros
+
+
+def _hash_na_thread(senha):
+    with calculo_na_thread():
+        return make_password(senha)
+
+
+def importar_usuarios(linhas, lote=1000, workers=4, registrar_erro=None, ao_concluir_lote=None,
+                      hash_na_thread=False):
+    """
+    Importa um iterável de (número da linha, dict).
+
+    `registrar_erro(numero, campo, mensagem)` é chamado para cada linha rejeitada e
+    `ao_concluir_lote(resultado)` após cada lote inserido. Com `hash_na_thread`, as
+    senhas são calculadas nas `workers` threads, em paralelo e com prioridade normal
+    (comando de linha de comando); sem, passam pelo pool compartilhado de
+    accounts/hashers.py, que não disputa a CPU com as requisições (tela do admin).
+    """
+    resultado = ResultadoImportacao()
+    registrar_erro = registrar_erro or (lambda numero, campo, mensagem: None)
+    usernames_vistos, cpfs_vistos = set(), set()
+    inicio = time.perf_counter()
+    linhas = iter(linhas)
+
+    # No pool compartilhado (SENHA_PROCESSOS por worker, 1 por padrão) as threads só
+    # enfileiram: o ganho de --workers vem do cálculo na própria thread, que solta o GIL
+    calcular_hash = _hash_na_thread if hash_na_thread else make_password
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        while True:
+            bloco = list(islice(linhas, lote))
+            if not bloco:
+                break
+
+            validos = []
+            for numero, dados in bloco:
+                valores, senha, erros = validar_linha(dados)
+                username, cpf = valores.get('username'), valores.get('cpf')
+                if username in usernames_vistos:
+                    erros.append(('username', 'Repetido no arquivo.'))
+                if cpf and cpf in cpfs_vistos:
+                    erros.append(('cpf', 'Repetido no arquivo.'))
+                if erros:
+                    for campo, mensagem in erros:
+                        registrar_erro(numero, campo, mensagem)
+                    resultado.erros += 1
+                    continue
+                usernames_vistos.add(username)
+                if cpf:
+                    cpfs_vistos.add(cpf)
+                validos.append((numero, valores, senha))
+
+            # Uma consulta por lote para os conflitos com o que já está no banco
+            existentes = Usuario.objects.filter(
+                username__in=[v['username'] for _, v, _ in validos]
+            ).values_list('username', flat=True)
+            cpfs_existentes = Usuario.objects.filter(
+                cpf__in=[v['cpf'] for _, v, _ in validos if v.get('cpf')]
+            ).values_list('cpf', flat=True)
+            existentes, cpfs_existentes = set(existentes), set(cpfs_existentes)
+            aprovados = []
+            for numero, valores, senha in validos:
+                if valores['username'] in existentes:
+                    registrar_erro(numero, 'username', 'Já cadastrado.')
+                elif valores.get('cpf') in cpfs_existentes:
+                    registrar_erro(numero, 'cpf', 'Já cadastrado.')
+                else:
+                    aprovados.append((numero, valores, senha))
+                    continue
+                resultado.erros += 1
+
+            hashes = pool.map(calcular_hash, [senha for _, _, senha in aprovados])
+            usuarios = [Usuario(password=h, **valores) for (_, valores, _), h in zip(aprovados, hashes)]
+            resultado.importados += _inserir(usuarios, aprovados, resultado, registrar_erro)
+            resultado.segundos = time.perf_counter() - inicio
+            if ao_concluir_lote:
+                ao_concluir_lote(resultado)
+
+    resultado.segundos = time.perf_counter() - inicio
+    # bulk_create não dispara post_save: o índice em memória da busca é refeito na próxima
+    # consulta e os contadores do dashboard são recalculados uma vez para o arquivo todo
+    indice_memoria.invalidar()
+    recalcular()
+    return resultado
+
+
+def _inserir(usuarios, aprovados, resultado, registrar_erro):
+    try:
+        with transaction.atomic():
+            Usuario.objects.bulk_create(usuarios)
+        return len(usuarios)
+    except IntegrityError:
+        pass
+    # Conflito com outra importação concorrente: insere um a um para apontar a linha
+    inseridos = 0
+    for usuario, (numero, _, _) in zip(usuarios, aprovados):
+        try:
+            with transaction.atomic():
+                usuario.save(force_insert=True)
+            inseridos += 1
+        except IntegrityError as e:
+            registrar_erro(numero, '', str(e))
+            resultado.erros += 1
+    return inseridos
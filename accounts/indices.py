@@ -0,0 +1,38 @@
+"""
+Índices trigram (pg_trgm) que sustentavam o search_fields do UsuarioAdmin.
+
+O lookup `icontains` do Django gera `UPPER("campo"::text) LIKE UPPER('%termo%')`
+no PostgreSQL, então o índice GIN precisava ser sobre a mesma expressão para ser
+usado pelo planner. Criados na migração 0005 e removidos na 0010, quando a busca
+do admin passou para accounts/busca.py; ficam aqui porque as duas migrações os
+usam. Em outros bancos (SQLite no desenvolvimento) nada é feito.
+"""
+
+CAMPOS_BUSCA = ('username', 'first_name', 'last_name', 'email', 'cpf')
+TABELA = 'accounts_usuario'
+
+
+def nome_indice_trigram(campo):
+    return f'usuario_{campo}_trgm_idx'
+
+
+def criar_indices_trigram(schema_editor, concorrente=True):
+    """Cria a extensão pg_trgm e um índice GIN por campo de busca"""
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    concurrently = 'CONCURRENTLY ' if concorrente else ''
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for campo in CAMPOS_BUSCA:
+        schema_editor.execute(
+            f'CREATE INDEX {concurrently}IF NOT EXISTS {nome_indice_trigram(campo)} '
+            f'ON {TABELA} USING gin (UPPER("{campo}"::text) gin_trgm_ops)'
+        )
+
+
+def remover_indices_trigram(schema_editor, concorrente=True):
+    """Remove os índices GIN criados por criar_indices_trigram"""
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    concurrently = 'CONCURRENTLY ' if concorrente else ''
+    for campo in CAMPOS_BUSCA:
+        schema_editor.execute(f'DROP INDEX {concurrently}IF EXISTS {nome_indice_trigram(campo)}')
@@ -0,0 +1,77 @@
+import re
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.test import Client
+from django.test.utils import setup_test_environment
+from django.urls import reverse
+
+from accounts.imagens import TAMANHOS, formatos_suportados, gerar_miniaturas, nome_miniatura
+from accounts.models import Usuario
+
+USERNAME = 'bench_avatar'
+
+
+def foto_de_teste(largura, altura):
+    """JPEG com ruído, que comprime mal como uma foto de celular de verdade"""
+    from PIL import Image
+
+    imagem = Image.effect_noise((largura, altura), 64).convert('RGB')
+    saida = BytesIO()
+    imagem.save(saida, 'JPEG', quality=92)
+    return saida.getvalue()
+
+
+class Command(BaseCommand):
+    help = ('Compara os bytes baixados por renderização do dashboard servindo a foto de perfil '
+            'original e as miniaturas AVIF/WebP')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--largura', type=int, default=3000)
+        parser.add_argument('--altura', type=int, default=2000)
+        parser.add_argument('--limpar', action='store_true',
+                            help='Remove o usuário e os arquivos de teste ao final')
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        usuario, _ = Usuario.objects.get_or_create(username=USERNAME)
+        Usuario.objects.filter(pk=usuario.pk).update(foto_hash='')
+        usuario.refresh_from_db()
+        usuario.foto_perfil.save(f'{USERNAME}.jpg',
+                                 ContentFile(foto_de_teste(options['largura'], options['altura'])),
+                                 save=False)
+        # update() para não acionar o sinal: o "antes" precisa ser a foto original
+        Usuario.objects.filter(pk=usuario.pk).update(foto_perfil=usuario.foto_perfil.name)
+
+        client = Client()
+        client.force_login(usuario)
+        url = reverse('accounts:dashboard')
+
+        html = client.get(url).content
+        original = usuario.foto_perfil.size
+        linhas = [('original (JPEG)', len(html), original)]
+
+        gerar_miniaturas(usuario.pk)
+        html = client.get(url).content.decode()
+        for tipo, srcset in re.findall(r'<source type="image/(\w+)" srcset="([^"]+)"', html):
+            for candidato in srcset.split(', '):
+                endereco, densidade = candidato.rsplit(' ', 1)
+                nome = endereco[len(settings.MEDIA_URL):]
+                linhas.append((f'{tipo} {densidade}', len(html.encode()), default_storage.size(nome)))
+
+        self.stdout.write(f'{"imagem":<18} {"HTML":>10} {"imagem":>12} {"total":>12} {"vs original":>12}')
+        for nome, bytes_html, bytes_imagem in linhas:
+            total = bytes_html + bytes_imagem
+            reducao = 100 * (1 - total / (linhas[0][1] + original))
+            self.stdout.write(f'{nome:<18} {bytes_html:>10} {bytes_imagem:>12} {total:>12} {-reducao:>11.1f}%')
+
+        if options['limpar']:
+            usuario.refresh_from_db()
+            for tamanho in TAMANHOS:
+                for formato in formatos_suportados():
+                    default_storage.delete(nome_miniatura(usuario.foto_hash, tamanho, formato))
+            usuario.foto_perfil.delete(save=False)
+            usuario.delete()
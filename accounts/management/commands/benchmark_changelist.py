@@ -0,0 +1,124 @@
+import random
+import statistics
+import time
+
+from django.contrib import admin
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import RequestFactory
+
+from accounts.models import Usuario
+
+PREFIXO = 'bench_'
+NOMES = ['Ana', 'Bruno', 'Carla', 'Diego', 'Eduarda', 'Felipe', 'Gabriela', 'Henrique',
+         'Isabela', 'João', 'Larissa', 'Marcos', 'Natália', 'Otávio', 'Paula', 'Rafael']
+SOBRENOMES = ['Silva', 'Santos', 'Oliveira', 'Souza', 'Lima', 'Pereira', 'Costa',
+              'Rodrigues', 'Almeida', 'Nascimento', 'Ferreira', 'Carvalho']
+
+CENARIOS = [
+    ('sem filtro', {}),
+    ('tipo_usuario', {'tipo_usuario__exact': 'ASSOCIADO'}),
+    ('ativo', {'ativo__exact': '1'}),
+    ('tipo + ativo', {'tipo_usuario__exact': 'DIRETORIA', 'ativo__exact': '1'}),
+    ('busca', {'q': 'carvalho'}),
+]
+
+
+def percentis(amostras):
+    """Retorna (p50, p99) em milissegundos"""
+    cortes = statistics.quantiles(amostras, n=100, method='inclusive')
+    return cortes[49] * 1000, cortes[98] * 1000
+
+
+class Command(BaseCommand):
+    help = ('Popula usuários de teste e mede a latência p50/p99 do changelist do '
+            'UsuarioAdmin sem e com os índices de diretório de membros')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--usuarios', type=int, default=500_000,
+                            help='Quantidade de usuários de teste (padrão: 500000)')
+        parser.add_argument('--repeticoes', type=int, default=30,
+                            help='Requisições medidas por cenário (padrão: 30)')
+        parser.add_argument('--limpar', action='store_true',
+                            help='Remove os usuários de teste ao final')
+
+    def handle(self, *args, **options):
+        self.popular(options['usuarios'])
+        admin_user, _ = Usuario.objects.get_or_create(
+            username=f'{PREFIXO}admin', defaults={'is_staff': True, 'is_superuser': True}
+        )
+        model_admin = admin.site._registry[Usuario]
+        factory = RequestFactory()
+
+        try:
+            self.remover_indices()
+            antes = self.medir(model_admin, factory, admin_user, options['repeticoes'])
+        finally:
+            self.criar_indices()
+        depois = self.medir(model_admin, factory, admin_user, options['repeticoes'])
+
+        self.stdout.write(f'\n{"cenário":<15} {"antes p50":>10} {"antes p99":>10} '
+                          f'{"depois p50":>11} {"depois p99":>11}')
+        for nome, _ in CENARIOS:
+            a50, a99 = antes[nome]
+            d50, d99 = depois[nome]
+            self.stdout.write(f'{nome:<15} {a50:>8.1f}ms {a99:>8.1f}ms {d50:>9.1f}ms {d99:>9.1f}ms')
+
+        if options['limpar']:
+            Usuario.objects.filter(username__startswith=PREFIXO).delete()
+            self.stdout.write(self.style.SUCCESS('Usuários de teste removidos.'))
+
+    def popular(self, total):
+        existentes = Usuario.objects.filter(username__startswith=PREFIXO).count()
+        faltam = total - existentes
+        if faltam <= 0:
+            return
+        self.stdout.write(f'Criando {faltam} usuários de teste...')
+        senha = make_password('bench')  # um único hash: o custo do PBKDF2 não interessa aqui
+        tipos = [codigo for codigo, _ in Usuario.TIPO_USUARIO]
+        lote = []
+        for i in range(existentes, total):
+            nome, sobrenome = random.choice(NOMES), random.choice(SOBRENOMES)
+            lote.append(Usuario(
+                username=f'{PREFIXO}{i}',
+                password=senha,
+                first_name=nome,
+                last_name=sobrenome,
+                email=f'{nome.lower()}.{sobrenome.lower()}{i}@example.com',
+                tipo_usuario=random.choice(tipos),
+                ativo=random.random() < 0.9,
+            ))
+            if len(lote) == 5000:
+                Usuario.objects.bulk_create(lote)
+                lote = []
+        Usuario.objects.bulk_create(lote)
+
+    def remover_indices(self):
+        with connection.schema_editor() as editor:
+            for indice in Usuario._meta.indexes:
+                editor.remove_index(Usuario, indice)
+        self.analisar()
+
+    def criar_indices(self):
+        with connection.schema_editor() as editor:
+            for indice in Usuario._meta.indexes:
+                editor.add_index(Usuario, indice)
+        self.analisar()
+
+    def analisar(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'ANALYZE {Usuario._meta.db_table}')
+
+    def medir(self, model_admin, factory, usuario, repeticoes):
+        resultados = {}
+        for nome, params in CENARIOS:
+            amostras = []
+            for _ in range(repeticoes):
+                request = factory.get('/admin/accounts/usuario/', params)
+                request.user = usuario
+                inicio = time.perf_counter()
+                model_admin.changelist_view(request).render()
+                amostras.append(time.perf_counter() - inicio)
+            resultados[nome] = percentis(amostras)
+        return resultados
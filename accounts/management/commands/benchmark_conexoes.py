@@ -0,0 +1,119 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connections
+from django.test import Client
+from django.test.utils import setup_test_environment
+from django.urls import reverse
+
+from accounts.models import Usuario
+
+# Cada modo roda em um processo próprio, já que o settings lê as variáveis de ambiente no import
+MODOS = {
+    'nova conexão': {'DB_POOL': 'False', 'DB_CONN_MAX_AGE': '0'},
+    'persistente': {'DB_POOL': 'False', 'DB_CONN_MAX_AGE': '600'},
+    'pool': {'DB_POOL': 'True'},
+}
+
+
+class Command(BaseCommand):
+    help = ('Mede o custo de abrir conexões com o banco por requisição ao dashboard '
+            'sem persistência, com CONN_MAX_AGE e com o pool do psycopg')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requisicoes', type=int, default=500,
+                            help='Requisições por thread (padrão: 500)')
+        parser.add_argument('--threads', type=int, default=8,
+                            help='Clientes simultâneos (padrão: 8)')
+        parser.add_argument('--modos', default=','.join(MODOS),
+                            help='Modos separados por vírgula: ' + ', '.join(MODOS))
+        parser.add_argument('--interno', action='store_true', help='Uso interno: mede o modo atual')
+
+    def handle(self, *args, **options):
+        if options['interno']:
+            resultado = self.medir(options['requisicoes'], options['threads'])
+            self.stdout.write(json.dumps(resultado))
+            return
+
+        if settings.DATABASES['default']['ENGINE'] != 'django.db.backends.postgresql':
+            self.stdout.write(self.style.WARNING(
+                'DB_ENGINE não é postgresql: os modos de conexão só se aplicam ao PostgreSQL.'
+            ))
+
+        self.stdout.write(f'{"modo":<14} {"conexões":>9} {"setup/req":>10} {"p50":>8} {"p99":>8} {"req/s":>8}')
+        for modo in options['modos'].split(','):
+            env = {**os.environ, **MODOS[modo.strip()]}
+            processo = subprocess.run(
+                [sys.executable, sys.argv[0], 'benchmark_conexoes', '--interno',
+                 '--requisicoes', str(options['requisicoes']), '--threads', str(options['threads'])],
+                env=env, capture_output=True, text=True,
+            )
+            if processo.returncode != 0:
+                self.stderr.write(f'{modo}: falhou\n{processo.stderr}')
+                continue
+            r = json.loads(processo.stdout.strip().splitlines()[-1])
+            self.stdout.write(f'{modo:<14} {r["conexoes"]:>9} {r["setup_ms"]:>8.2f}ms '
+                              f'{r["p50_ms"]:>6.1f}ms {r["p99_ms"]:>6.1f}ms {r["rps"]:>8.0f}')
+
+    def medir(self, requisicoes, threads):
+        setup_test_environment()
+        usuario, _ = Usuario.objects.get_or_create(username='bench_conexoes')
+        url = reverse('accounts:dashboard')
+
+        # Cronometra toda abertura de conexão (ou retirada do pool) em todas as threads
+        classe = type(connections['default'])
+        original = classe.get_new_connection
+        custo = {'conexoes': 0, 'segundos': 0.0}
+        trava = threading.Lock()
+
+        def get_new_connection(self, conn_params):
+            inicio = time.perf_counter()
+            try:
+                return original(self, conn_params)
+            finally:
+                with trava:
+                    custo['conexoes'] += 1
+                    custo['segundos'] += time.perf_counter() - inicio
+
+        classe.get_new_connection = get_new_connection
+        latencias = []
+
+        def cliente():
+            client = Client()
+            client.force_login(usuario)
+            locais = []
+            for _ in range(requisicoes):
+                # O Client de teste desliga close_old_connections dos sinais de requisição;
+                # aqui reproduzimos o ciclo do handler WSGI de verdade
+                inicio = time.perf_counter()
+                close_old_connections()
+                client.get(url)
+                close_old_connections()
+                locais.append(time.perf_counter() - inicio)
+            connections.close_all()
+            with trava:
+                latencias.extend(locais)
+
+        inicio = time.perf_counter()
+        workers = [threading.Thread(target=cliente) for _ in range(threads)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        total = time.perf_counter() - inicio
+
+        cortes = statistics.quantiles(latencias, n=100, method='inclusive')
+        return {
+            'conexoes': custo['conexoes'],
+            'setup_ms': custo['segundos'] * 1000 / len(latencias),
+            'p50_ms': cortes[49] * 1000,
+            'p99_ms': cortes[98] * 1000,
+            'rps': len(latencias) / total,
+        }
@@ -0,0 +1,99 @@
+import logging
+import random
+import statistics
+import threading
+import time
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.test import Client, override_settings
+from django.test.utils import setup_test_environment
+from django.urls import reverse
+
+from accounts.models import Usuario
+
+USERNAME = 'bench_limites'
+SENHA = 'senha-do-benchmark-123'
+MODOS = {'sem limite': False, 'com limite': True}
+
+
+class Command(BaseCommand):
+    help = ('Simula um ataque de credential stuffing ao login (usuários inexistentes a partir de '
+            'poucos IPs) e mede a CPU gasta com e sem o LimiteTentativasMiddleware, além dos '
+            'logins legítimos que continuam entrando durante o ataque')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8, help='Conexões do atacante (padrão: 8)')
+        parser.add_argument('--ips', type=int, default=4, help='IPs de origem do ataque (padrão: 4)')
+        parser.add_argument('--taxa', type=float, default=30,
+                            help='Tentativas/s que o atacante tenta manter (padrão: 30)')
+        parser.add_argument('--duracao', type=float, default=10, help='Segundos por modo (padrão: 10)')
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        Usuario.objects.filter(username=USERNAME).delete()
+        Usuario.objects.create_user(USERNAME, password=SENHA)
+        self.stdout.write(f'{options["threads"]} conexões de ataque a {options["taxa"]:.0f}/s a partir de '
+                          f'{options["ips"]} IP(s), '
+                          f'{options["duracao"]:.0f}s por modo; hash na thread (SENHA_PROCESSOS=0) para a '
+                          f'CPU do hash entrar na conta do processo')
+        self.stdout.write(f'{"modo":<12} {"tentativas/s":>13} {"bloqueadas":>11} {"CPU":>8} '
+                          f'{"CPU/tentativa":>14} {"legítimos ok":>13} {"login legítimo":>15}')
+        try:
+            # Cada 429 gera um aviso no log do django.request e do middleware
+            logging.disable(logging.WARNING)
+            for modo, ativo in MODOS.items():
+                cache.clear()
+                with override_settings(LIMITES_ATIVOS=ativo, SENHA_PROCESSOS=0):
+                    self.medir(modo, options)
+        finally:
+            logging.disable(logging.NOTSET)
+            Usuario.objects.filter(username=USERNAME).delete()
+
+    def medir(self, modo, options):
+        url = reverse('accounts:login')
+        tentativas, bloqueadas, legitimos = [], [], []
+        fim = time.perf_counter() + options['duracao']
+
+        def atacar(indice):
+            client = Client(raise_request_exception=False)
+            ip = f'203.0.113.{indice % options["ips"] + 1}'
+            feitas = negadas = 0
+            intervalo = options['threads'] / options['taxa']
+            proxima = time.perf_counter() + indice * intervalo / options['threads']
+            while time.perf_counter() < fim:
+                # Ritmo fixo, como um atacante de verdade: não espera o servidor ficar livre
+                time.sleep(max(0, proxima - time.perf_counter()))
+                proxima += intervalo
+                usuario = f'vitima{random.randrange(10**6)}'
+                resposta = client.post(url, {'username': usuario, 'password': 'senha123'}, REMOTE_ADDR=ip)
+                feitas += 1
+                negadas += resposta.status_code == 429
+            tentativas.append(feitas)
+            bloqueadas.append(negadas)
+
+        def usar():
+            # Um membro de verdade, de outro IP, entrando e saindo durante o ataque
+            client = Client(raise_request_exception=False)
+            while time.perf_counter() < fim:
+                inicio = time.perf_counter()
+                resposta = client.post(url, {'username': USERNAME, 'password': SENHA}, REMOTE_ADDR='198.51.100.7')
+                legitimos.append((resposta.status_code == 302, time.perf_counter() - inicio))
+                client.cookies.clear()
+                time.sleep(0.5)
+
+        threads = [threading.Thread(target=atacar, args=(i,)) for i in range(options['threads'])]
+        threads.append(threading.Thread(target=usar))
+        cpu = time.process_time()
+        inicio = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        segundos = time.perf_counter() - inicio
+        cpu = time.process_time() - cpu
+        total = sum(tentativas)
+        self.stdout.write(f'{modo:<12} {total / segundos:>13.1f} {sum(bloqueadas):>11} {cpu:>7.1f}s '
+                          f'{cpu / total * 1000 if total else 0:>12.1f}ms '
+                          f'{sum(ok for ok, _ in legitimos):>6}/{len(legitimos):<6} '
+                          f'{statistics.median(t for _, t in legitimos) * 1000:>13.0f}ms')
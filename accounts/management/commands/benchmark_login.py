@@ -0,0 +1,110 @@
+import statistics
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+from django.core.management.base import BaseCommand
+from django.test import Client, override_settings
+from django.test.utils import setup_test_environment
+from django.urls import reverse
+
+from accounts.models import Usuario
+
+PREFIXO = 'bench_login'
+SENHA = 'senha-do-benchmark-123'
+MODOS = {
+    'pbkdf2 na thread': {
+        'PASSWORD_HASHERS': ['django.contrib.auth.hashers.PBKDF2PasswordHasher'],
+        'SENHA_PROCESSOS': 0,
+    },
+    'calibrado na thread': {'SENHA_PROCESSOS': 0},
+    'calibrado no pool': {},
+}
+
+
+class Command(BaseCommand):
+    help = ('Mede logins/s com muitos clientes simultâneos e a latência de uma página comum '
+            'durante a onda de logins: PBKDF2 padrão do Django, hasher calibrado na thread '
+            'da requisição e no pool de processos (accounts/hashers.py)')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--usuarios', type=int, default=20, help='Contas usadas no login (padrão: 20)')
+        parser.add_argument('--threads', type=int, default=16, help='Logins simultâneos (padrão: 16)')
+        parser.add_argument('--duracao', type=float, default=10, help='Segundos por modo (padrão: 10)')
+        parser.add_argument('--modos', default=','.join(MODOS),
+                            help='Modos separados por vírgula: ' + ', '.join(MODOS))
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        Usuario.objects.filter(username__startswith=PREFIXO).delete()
+        # Todas as contas começam com o hash antigo (PBKDF2 padrão), como as que já existem
+        antigo = PBKDF2PasswordHasher()
+        usuarios = Usuario.objects.bulk_create(
+            Usuario(username=f'{PREFIXO}{i}', password=antigo.encode(SENHA, antigo.salt()))
+            for i in range(options['usuarios'])
+        )
+        leitor = Usuario.objects.create_user(f'{PREFIXO}_leitor')
+        self.stdout.write(f'{options["threads"]} logins simultâneos, {options["duracao"]:.0f}s por modo, '
+                          f'SENHA_ALGORITMO={settings.SENHA_ALGORITMO}, SENHA_PROCESSOS={settings.SENHA_PROCESSOS}')
+        self.stdout.write(f'{"modo":<20} {"logins/s":>9} {"login p50":>10} {"login p99":>10} '
+                          f'{"página p50":>11} {"página p99":>11} {"falhas":>7} {"rehash":>7}')
+        try:
+            for modo in options['modos'].split(','):
+                modo = modo.strip()
+                Usuario.objects.filter(pk__in=[u.pk for u in usuarios]).update(
+                    password=antigo.encode(SENHA, antigo.salt())
+                )
+                with override_settings(**MODOS[modo]):
+                    self.medir(modo, usuarios, leitor, options)
+        finally:
+            Usuario.objects.filter(username__startswith=PREFIXO).delete()
+
+    def medir(self, modo, usuarios, leitor, options):
+        url_login = reverse('accounts:login')
+        url_pagina = reverse('accounts:diretorio')
+        logins, paginas, falhas = [], [], []
+        fim = time.perf_counter() + options['duracao']
+
+        def logar(indice):
+            client = Client(raise_request_exception=False)
+            while time.perf_counter() < fim:
+                usuario = usuarios[indice % len(usuarios)]
+                indice += options['threads']
+                inicio = time.perf_counter()
+                resposta = client.post(url_login, {'username': usuario.username, 'password': SENHA})
+                if resposta.status_code == 302:
+                    logins.append(time.perf_counter() - inicio)
+                else:
+                    falhas.append(resposta.status_code)
+                client.cookies.clear()
+
+        def navegar():
+            # Um membro já logado usando o site enquanto os outros entram
+            client = Client(raise_request_exception=False)
+            client.force_login(leitor)
+            while time.perf_counter() < fim:
+                inicio = time.perf_counter()
+                client.get(url_pagina)
+                paginas.append(time.perf_counter() - inicio)
+                time.sleep(0.05)
+
+        threads = [threading.Thread(target=logar, args=(i,)) for i in range(options['threads'])]
+        threads.append(threading.Thread(target=navegar))
+        inicio = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        segundos = time.perf_counter() - inicio
+
+        preferido = settings.PASSWORD_HASHERS[0]
+        refeitos = sum(
+            not senha.startswith('pbkdf2_sha256$') for senha in
+            Usuario.objects.filter(pk__in=[u.pk for u in usuarios]).values_list('password', flat=True)
+        ) if 'PBKDF2' not in preferido else 0
+        login = statistics.quantiles(logins, n=100, method='inclusive') if len(logins) > 1 else [0] * 99
+        pagina = statistics.quantiles(paginas, n=100, method='inclusive') if len(paginas) > 1 else [0] * 99
+        self.stdout.write(f'{modo:<20} {len(logins) / segundos:>9.1f} {login[49] * 1000:>8.0f}ms '
+                          f'{login[98] * 1000:>8.0f}ms {pagina[49] * 1000:>9.0f}ms {pagina[98] * 1000:>9.0f}ms '
+                          f'{len(falhas):>7} {refeitos:>7}')
@@ -0,0 +1,123 @@
+import os
+import statistics
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.hashers import Argon2Calibrado, CalculoEmPool, PBKDF2Calibrado, ScryptCalibrado
+
+# Mínimos da OWASP (Password Storage Cheat Sheet): a calibração nunca sugere menos que isso
+ARGON2_MEMORIA_MINIMA = 19 * 1024  # KiB, com time_cost >= 2
+ARGON2_TEMPO_MINIMO = 2
+SCRYPT_N_MINIMO = 2**17
+PBKDF2_ITERACOES_MINIMAS = 600_000
+
+
+def medir_ms(hasher, repeticoes):
+    """Mediana, em ms, de `repeticoes` cálculos na thread atual (sem o pool)"""
+    encode = super(CalculoEmPool, hasher).encode
+    salt = hasher.salt()
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        encode('senha de calibração', salt)
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    return statistics.median(tempos)
+
+
+class Command(BaseCommand):
+    help = ('Mede neste servidor o custo de cada algoritmo de hash de senha e sugere os '
+            'parâmetros SENHA_* que levam cerca de --alvo-ms por hash')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--alvo-ms', type=float, default=250,
+                            help='Tempo desejado por hash em um núcleo (padrão: 250)')
+        parser.add_argument('--memoria-mb', type=int, default=64,
+                            help='Memória inicial do Argon2 por hash (padrão: 64)')
+        parser.add_argument('--repeticoes', type=int, default=3, help='Medições por candidato (padrão: 3)')
+        parser.add_argument('--algoritmos', default='argon2,scrypt,pbkdf2',
+                            help='Algoritmos separados por vírgula')
+
+    def handle(self, *args, **options):
+        self.alvo = options['alvo_ms']
+        self.repeticoes = options['repeticoes']
+        self.stdout.write(f'Alvo: {self.alvo:.0f}ms por hash, {os.cpu_count()} CPU(s), '
+                          f'preferido atual: {settings.SENHA_ALGORITMO}')
+        sugestoes = {}
+        for algoritmo in options['algoritmos'].split(','):
+            calibrar = getattr(self, f'calibrar_{algoritmo.strip()}', None)
+            if calibrar is None:
+                raise CommandError(f'Algoritmo desconhecido: {algoritmo}')
+            resultado = calibrar(options)
+            if resultado:
+                sugestoes[algoritmo.strip()] = resultado
+
+        self.stdout.write('\nSugestão para o .env:')
+        for algoritmo, (variaveis, ms) in sugestoes.items():
+            por_segundo = settings.SENHA_PROCESSOS * 1000 / ms if settings.SENHA_PROCESSOS else 0
+            self.stdout.write(f'# {algoritmo}: {ms:.0f}ms por hash, ~{por_segundo:.0f} logins/s por worker '
+                              f'com SENHA_PROCESSOS={settings.SENHA_PROCESSOS}')
+            for nome, valor in variaveis.items():
+                self.stdout.write(f'{nome}={valor}')
+            if ms > self.alvo * 1.5:
+                self.stdout.write(self.style.WARNING(
+                    f'# {algoritmo}: o custo mínimo recomendado já passa do alvo neste servidor'
+                ))
+
+    def medir(self, rotulo, hasher):
+        ms = medir_ms(hasher, self.repeticoes)
+        self.stdout.write(f'  {rotulo:<34} {ms:>8.1f}ms')
+        return ms
+
+    def calibrar_argon2(self, options):
+        try:
+            import argon2  # noqa: F401
+        except ImportError:
+            self.stdout.write(self.style.WARNING('argon2: argon2-cffi não instalado, pulando'))
+            return None
+        self.stdout.write('argon2 (p=1; aumenta time_cost, reduz a memória se t=2 já passar do alvo)')
+        hasher = Argon2Calibrado()
+        hasher.parallelism = 1
+        hasher.memory_cost = max(options['memoria_mb'] * 1024, ARGON2_MEMORIA_MINIMA)
+        hasher.time_cost = ARGON2_TEMPO_MINIMO
+        ms = self.medir(f'm={hasher.memory_cost // 1024}MB t={hasher.time_cost}', hasher)
+        while ms > self.alvo and hasher.memory_cost > ARGON2_MEMORIA_MINIMA:
+            hasher.memory_cost = max(hasher.memory_cost // 2, ARGON2_MEMORIA_MINIMA)
+            ms = self.medir(f'm={hasher.memory_cost // 1024}MB t={hasher.time_cost}', hasher)
+        while True:
+            # O custo cresce linearmente com time_cost: basta estimar o próximo passo
+            if ms * (hasher.time_cost + 1) / hasher.time_cost > self.alvo:
+                break
+            hasher.time_cost += 1
+            ms = self.medir(f'm={hasher.memory_cost // 1024}MB t={hasher.time_cost}', hasher)
+        return {
+            'SENHA_ARGON2_TIME_COST': hasher.time_cost,
+            'SENHA_ARGON2_MEMORY_COST': hasher.memory_cost,
+            'SENHA_ARGON2_PARALLELISM': hasher.parallelism,
+        }, ms
+
+    def calibrar_scrypt(self, options):
+        self.stdout.write('scrypt (r=8, p=1; dobra N enquanto couber no alvo)')
+        hasher = ScryptCalibrado()
+        hasher.block_size, hasher.parallelism = 8, 1
+        hasher.work_factor = SCRYPT_N_MINIMO
+        ms = self.medir(f'N=2**{hasher.work_factor.bit_length() - 1}', hasher)
+        while ms * 2 <= self.alvo:
+            hasher.work_factor *= 2
+            ms = self.medir(f'N=2**{hasher.work_factor.bit_length() - 1}', hasher)
+        return {
+            'SENHA_SCRYPT_N': hasher.work_factor,
+            'SENHA_SCRYPT_R': hasher.block_size,
+            'SENHA_SCRYPT_P': hasher.parallelism,
+        }, ms
+
+    def calibrar_pbkdf2(self, options):
+        self.stdout.write('pbkdf2_sha256 (iterações proporcionais ao tempo medido)')
+        hasher = PBKDF2Calibrado()
+        hasher.iterations = 100_000
+        ms = self.medir(f'{hasher.iterations} iterações', hasher)
+        hasher.iterations = max(int(hasher.iterations * self.alvo / ms) // 10_000 * 10_000,
+                                PBKDF2_ITERACOES_MINIMAS)
+        ms = self.medir(f'{hasher.iterations} iterações', hasher)
+        return {'SENHA_PBKDF2_ITERACOES': hasher.iterations}, ms
@@ -0,0 +1,54 @@
+import csv
+
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.importacao import importar_usuarios, ler_arquivo
+
+
+class Command(BaseCommand):
+    help = ('Importa membros de um arquivo CSV ou XLSX (colunas com os nomes dos campos de '
+            'Usuario, mais "senha"), gravando as linhas rejeitadas em um arquivo de erros')
+
+    def add_arguments(self, parser):
+        parser.add_argument('arquivo', help='Caminho do .csv ou .xlsx')
+        parser.add_argument('--lote', type=int, default=1000,
+                            help='Linhas validadas e inseridas por vez (padrão: 1000)')
+        parser.add_argument('--workers', type=int, default=4,
+                            help='Threads que calculam os hashes de senha em paralelo, uma por núcleo '
+                                 '(padrão: 4)')
+        parser.add_argument('--erros', help='Arquivo CSV de erros (padrão: <arquivo>.erros.csv)')
+
+    def handle(self, *args, **options):
+        caminho = options['arquivo']
+        caminho_erros = options['erros'] or f'{caminho}.erros.csv'
+        try:
+            arquivo = open(caminho, 'rb')
+        except OSError as e:
+            raise CommandError(f'Não foi possível abrir {caminho}: {e}')
+
+        def progresso(resultado):
+            self.stdout.write(f'{resultado.importados} importados, {resultado.erros} com erro '
+                              f'({resultado.linhas_por_segundo:.0f} linhas/s)')
+
+        with arquivo, open(caminho_erros, 'w', newline='', encoding='utf-8') as saida_erros:
+            escritor = csv.writer(saida_erros)
+            escritor.writerow(['linha', 'campo', 'erro'])
+            try:
+                linhas = ler_arquivo(arquivo, caminho)
+                resultado = importar_usuarios(
+                    linhas,
+                    lote=options['lote'],
+                    workers=options['workers'],
+                    hash_na_thread=True,
+                    registrar_erro=lambda numero, campo, erro: escritor.writerow([numero, campo, erro]),
+                    ao_concluir_lote=progresso,
+                )
+            except ImportError:
+                raise CommandError('Para importar XLSX instale o openpyxl.')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Concluído: {resultado.importados} importados, {resultado.erros} com erro em '
+            f'{resultado.segundos:.1f}s ({resultado.linhas_por_segundo:.0f} linhas/s).'
+        ))
+        if resultado.erros:
+            self.stdout.write(f'Erros gravados em {caminho_erros}')
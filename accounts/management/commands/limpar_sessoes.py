@@ -0,0 +1,33 @@
+import time
+
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+
+class Command(BaseCommand):
+    help = ('Remove sessões expiradas em lotes pequenos, cada um em sua própria transação, '
+            'para não segurar locks na django_session por muito tempo')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=5000,
+                            help='Sessões removidas por transação (padrão: 5000)')
+        parser.add_argument('--pausa', type=float, default=0.1,
+                            help='Segundos de espera entre lotes (padrão: 0.1)')
+
+    def handle(self, *args, **options):
+        agora = timezone.now()
+        expiradas = Session.objects.filter(expire_date__lt=agora).order_by('expire_date')
+        total = 0
+        while True:
+            # Usa o índice de expire_date e apaga pela chave primária
+            chaves = list(expiradas.values_list('session_key', flat=True)[:options['lote']])
+            if not chaves:
+                break
+            removidas, _ = Session.objects.filter(session_key__in=chaves).delete()
+            total += removidas
+            self.stdout.write(f'{total} sessões removidas...')
+            if len(chaves) < options['lote']:
+                break
+            time.sleep(options['pausa'])
+        self.stdout.write(self.style.SUCCESS(f'Concluído: {total} sessões expiradas removidas.'))
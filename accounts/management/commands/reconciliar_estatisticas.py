@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from accounts.estatisticas import recalcular
+
+
+class Command(BaseCommand):
+    help = ('Confere os contadores de membros do dashboard com contagens reais (GROUP BY) '
+            'e corrige os divergentes; para rodar periodicamente (cron)')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verificar', action='store_true',
+                            help='Só lista as divergências, sem corrigir')
+
+    def handle(self, *args, **options):
+        divergencias = recalcular(corrigir=not options['verificar'])
+        for dimensao, valor, armazenado, real in divergencias:
+            self.stdout.write(f'{dimensao} {valor}: {armazenado} -> {real}')
+        if not divergencias:
+            self.stdout.write(self.style.SUCCESS('Contadores em dia.'))
+        elif options['verificar']:
+            self.stdout.write(self.style.WARNING(f'{len(divergencias)} contadores divergentes.'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'{len(divergencias)} contadores corrigidos.'))
@@ -0,0 +1,35 @@
+# Generated by Django 5.1.3 on 2026-10-18 13:59
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_alter_usuario_estado'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='usuario',
+            index=models.Index(fields=['first_name', 'last_name'], name='usuario_nome_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='usuario',
+            index=models.Index(fields=['tipo_usuario', 'first_name', 'last_name'], name='usuario_tipo_nome_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='usuario',
+            index=models.Index(fields=['ativo', 'first_name', 'last_name'], name='usuario_ativo_nome_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='usuario',
+            index=models.Index(condition=models.Q(('ativo', True)), fields=['tipo_usuario', 'first_name', 'last_name'], name='usuario_ativos_tipo_nome_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='usuario',
+            index=models.Index(django.db.models.functions.text.Lower('email'), name='usuario_email_lower_idx'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+from django.db import migrations
+
+from accounts.indices import criar_indices_trigram, remover_indices_trigram
+
+
+def criar(apps, schema_editor):
+    criar_indices_trigram(schema_editor)
+
+
+def remover(apps, schema_editor):
+    remover_indices_trigram(schema_editor)
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY não pode rodar dentro de uma transação
+    atomic = False
+
+    dependencies = [
+        ('accounts', '0004_indices_diretorio_membros'),
+    ]
+
+    operations = [
+        migrations.RunPython(criar, remover),
+    ]
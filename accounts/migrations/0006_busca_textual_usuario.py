@@ -0,0 +1,72 @@
+from django.db import migrations
+
+# Configuração de busca em português que ignora acentos (João == joao)
+CRIAR_CONFIGURACAO = """
+CREATE EXTENSION IF NOT EXISTS unaccent;
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_ts_config WHERE cfgname = 'pt_unaccent') THEN
+        CREATE TEXT SEARCH CONFIGURATION pt_unaccent (COPY = portuguese);
+        ALTER TEXT SEARCH CONFIGURATION pt_unaccent
+            ALTER MAPPING FOR hword, hword_part, word WITH unaccent, portuguese_stem;
+    END IF;
+END
+$$;
+"""
+
+# Pesos: nomes (A) > username/discord (B) > e-mail (C) > CPF só com dígitos (D)
+CRIAR_VETOR = r"""
+ALTER TABLE accounts_usuario ADD COLUMN IF NOT EXISTS busca_vetor tsvector;
+
+CREATE OR REPLACE FUNCTION accounts_usuario_busca_vetor() RETURNS trigger AS $$
+BEGIN
+    NEW.busca_vetor :=
+        setweight(to_tsvector('pt_unaccent', coalesce(NEW.first_name, '') || ' ' ||
+                  coalesce(NEW.last_name, '') || ' ' || coalesce(NEW.nome_social, '')), 'A') ||
+        setweight(to_tsvector('pt_unaccent', coalesce(NEW.username, '') || ' ' ||
+                  coalesce(NEW.nick_discord, '')), 'B') ||
+        setweight(to_tsvector('simple', coalesce(NEW.email, '')), 'C') ||
+        setweight(to_tsvector('simple', regexp_replace(coalesce(NEW.cpf, ''), '\D', '', 'g')), 'D');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS accounts_usuario_busca_vetor_trg ON accounts_usuario;
+CREATE TRIGGER accounts_usuario_busca_vetor_trg
+    BEFORE INSERT OR UPDATE OF first_name, last_name, nome_social, username, nick_discord, email, cpf
+    ON accounts_usuario FOR EACH ROW EXECUTE FUNCTION accounts_usuario_busca_vetor();
+
+UPDATE accounts_usuario SET first_name = first_name;
+
+CREATE INDEX IF NOT EXISTS usuario_busca_vetor_idx ON accounts_usuario USING gin (busca_vetor);
+"""
+
+REMOVER_VETOR = """
+DROP TRIGGER IF EXISTS accounts_usuario_busca_vetor_trg ON accounts_usuario;
+DROP FUNCTION IF EXISTS accounts_usuario_busca_vetor();
+ALTER TABLE accounts_usuario DROP COLUMN IF EXISTS busca_vetor;
+"""
+
+
+def criar(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(CRIAR_CONFIGURACAO)
+    schema_editor.execute(CRIAR_VETOR)
+
+
+def remover(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(REMOVER_VETOR)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0005_indices_trigram_busca'),
+    ]
+
+    operations = [
+        migrations.RunPython(criar, remover),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.3 on 2026-10-18 14:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0006_busca_textual_usuario'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='usuario',
+            name='foto_hash',
+            field=models.CharField(blank=True, editable=False, max_length=16),
+        ),
+    ]
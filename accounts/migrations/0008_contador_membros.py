@@ -0,0 +1,52 @@
+# Generated by Django 5.1.3 on 2026-10-18 14:22
+
+from django.db import migrations, models
+
+
+def popular_contadores(apps, schema_editor):
+    # Contagem inicial; depois os sinais mantêm e reconciliar_estatisticas confere
+    from django.db.models import Count
+    from django.db.models.functions import TruncMonth
+
+    Usuario = apps.get_model('accounts', 'Usuario')
+    ContadorMembros = apps.get_model('accounts', 'ContadorMembros')
+    usuarios = Usuario.objects.order_by()
+    contadores = []
+    for campo in ('tipo_usuario', 'estado', 'ativo'):
+        for linha in usuarios.values(campo).annotate(n=Count('pk')):
+            valor = linha[campo]
+            if campo == 'ativo':
+                valor = '1' if valor else '0'
+            contadores.append(ContadorMembros(dimensao=campo, valor=valor, total=linha['n']))
+    meses = (usuarios.filter(data_associacao__isnull=False)
+             .annotate(mes=TruncMonth('data_associacao')).values('mes').annotate(n=Count('pk')))
+    for linha in meses:
+        contadores.append(ContadorMembros(dimensao='mes_associacao',
+                                          valor=linha['mes'].strftime('%Y-%m'), total=linha['n']))
+    ContadorMembros.objects.bulk_create(contadores)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0007_usuario_foto_hash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContadorMembros',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dimensao', models.CharField(choices=[('tipo_usuario', 'Tipo de usuário'), ('estado', 'Estado'), ('ativo', 'Ativo'), ('mes_associacao', 'Mês de associação')], max_length=20, verbose_name='Dimensão')),
+                ('valor', models.CharField(max_length=20)),
+                ('total', models.IntegerField(default=0)),
+                ('atualizado_em', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Contador de membros',
+                'verbose_name_plural': 'Contadores de membros',
+                'constraints': [models.UniqueConstraint(fields=('dimensao', 'valor'), name='contador_membros_unico')],
+            },
+        ),
+        migrations.RunPython(popular_contadores, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,43 @@
+from django.db import migrations
+
+# E-mail quebrado em palavras (joao.silva@example.com -> joao silva example com), como a busca
+# divide o termo; inteiro ele virava um lexema só e "silva" não o encontrava
+FUNCAO = r"""
+CREATE OR REPLACE FUNCTION accounts_usuario_busca_vetor() RETURNS trigger AS $$
+BEGIN
+    NEW.busca_vetor :=
+        setweight(to_tsvector('pt_unaccent', coalesce(NEW.first_name, '') || ' ' ||
+                  coalesce(NEW.last_name, '') || ' ' || coalesce(NEW.nome_social, '')), 'A') ||
+        setweight(to_tsvector('pt_unaccent', coalesce(NEW.username, '') || ' ' ||
+                  coalesce(NEW.nick_discord, '')), 'B') ||
+        setweight(to_tsvector('simple', {email}), 'C') ||
+        setweight(to_tsvector('simple', regexp_replace(coalesce(NEW.cpf, ''), '\D', '', 'g')), 'D');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+UPDATE accounts_usuario SET first_name = first_name;
+"""
+EMAIL_EM_PALAVRAS = r"regexp_replace(coalesce(NEW.email, ''), '\W+', ' ', 'g')"
+EMAIL_INTEIRO = "coalesce(NEW.email, '')"
+
+
+def criar(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(FUNCAO.replace('{email}', EMAIL_EM_PALAVRAS))
+
+
+def remover(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(FUNCAO.replace('{email}', EMAIL_INTEIRO))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0008_contador_membros'),
+    ]
+
+    operations = [
+        migrations.RunPython(criar, remover),
+    ]
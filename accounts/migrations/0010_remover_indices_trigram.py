@@ -0,0 +1,26 @@
+from django.db import migrations
+
+from accounts.indices import criar_indices_trigram, remover_indices_trigram
+
+
+# A busca do UsuarioAdmin passou a usar busca_vetor (0006): os índices GIN de UPPER(campo)
+# não servem mais a nenhuma consulta e só encarecem cada INSERT/UPDATE de Usuario
+def remover(apps, schema_editor):
+    remover_indices_trigram(schema_editor)
+
+
+def criar(apps, schema_editor):
+    criar_indices_trigram(schema_editor)
+
+
+class Migration(migrations.Migration):
+    # DROP INDEX CONCURRENTLY não pode rodar dentro de uma transação
+    atomic = False
+
+    dependencies = [
+        ('accounts', '0009_busca_email_em_palavras'),
+    ]
+
+    operations = [
+        migrations.RunPython(remover, criar),
+    ]
@@ -1,5 +1,7 @@
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.db.models import Q
+from django.db.models.functions import Lower
 from localflavor.br.models import BRCPFField, BRPostalCodeField
 
 class Usuario(AbstractUser):
@@ -40,12 +42,69 @@ class Usuario(AbstractUser):
     ativo = models.BooleanField(default=True, verbose_name='Usuário Ativo')
     foto_perfil = models.ImageField(upload_to='perfis/', blank=True, null=True, 
                                      verbose_name='Foto de Perfil')
+    # Hash do conteúdo da foto; nomeia as miniaturas geradas por accounts/imagens.py
+    foto_hash = models.CharField(max_length=16, blank=True, editable=False)
     
     class Meta:
         verbose_name = 'Usuário'
         verbose_name_plural = 'Usuários'
         ordering = ['first_name', 'last_name']
+        indexes = [
+            # Listagem padrão (ordering) e filtros do UsuarioAdmin já ordenados por nome
+            models.Index(fields=['first_name', 'last_name'], name='usuario_nome_idx'),
+            models.Index(fields=['tipo_usuario', 'first_name', 'last_name'],
+                         name='usuario_tipo_nome_idx'),
+            models.Index(fields=['ativo', 'first_name', 'last_name'],
+                         name='usuario_ativo_nome_idx'),
+            # Diretório de membros: só ativos, por tipo, ordenados por nome
+            models.Index(fields=['tipo_usuario', 'first_name', 'last_name'],
+                         condition=Q(ativo=True), name='usuario_ativos_tipo_nome_idx'),
+            # Busca de e-mail sem diferenciar maiúsculas (login, recuperação de senha)
+            models.Index(Lower('email'), name='usuario_email_lower_idx'),
+        ]
     
     def __str__(self):
         nome = self.get_full_name()
         return f"{nome or self.username} ({self.get_tipo_usuario_display()})"
+
+    def is_diretoria(self):
+        return self.tipo_usuario == 'DIRETORIA'
+
+    def can_edit_empresa(self, empresa):
+        """Diretoria edita qualquer empresa; associado só as que são dele"""
+        if self.is_diretoria():
+            return True
+        if self.tipo_usuario == 'ASSOCIADO':
+            # Compara o id, sem buscar o responsável no banco
+            return empresa.responsavel_id == self.pk
+        return False
+
+
+class ContadorMembros(models.Model):
+    """
+    Contagem pré-calculada de membros por dimensão (ver accounts/estatisticas.py).
+
+    Mantida pelos sinais de Usuario e conferida pelo comando
+    `reconciliar_estatisticas`; o dashboard lê só esta tabela.
+    """
+    DIMENSOES = [
+        ('tipo_usuario', 'Tipo de usuário'),
+        ('estado', 'Estado'),
+        ('ativo', 'Ativo'),
+        ('mes_associacao', 'Mês de associação'),
+    ]
+
+    dimensao = models.CharField('Dimensão', max_length=20, choices=DIMENSOES)
+    valor = models.CharField(max_length=20)
+    total = models.IntegerField(default=0)
+    atualizado_em = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Contador de membros'
+        verbose_name_plural = 'Contadores de membros'
+        constraints = [
+            models.UniqueConstraint(fields=['dimensao', 'valor'], name='contador_membros_unico'),
+        ]
+
+    def __str__(self):
+        return f'{self.get_dimensao_display()} {self.valor}: {self.total}'
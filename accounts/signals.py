@@ -0,0 +1,67 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import estatisticas
+from .busca import indice_memoria
+from .imagens import agendar_miniaturas, remover_miniaturas
+from .models import Usuario
+
+
+@receiver(post_save, sender=Usuario)
+def reindexar_usuario(sender, instance, **kwargs):
+    indice_memoria.atualizar(instance)
+
+
+@receiver(post_delete, sender=Usuario)
+def desindexar_usuario(sender, instance, **kwargs):
+    indice_memoria.remover(instance.pk)
+
+
+@receiver(post_save, sender=Usuario)
+def processar_foto_perfil(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and 'foto_perfil' not in update_fields:
+        return
+    if instance.foto_perfil:
+        pk = instance.pk
+        transaction.on_commit(lambda: agendar_miniaturas(pk))
+    elif instance.foto_hash:
+        foto_hash = instance.foto_hash
+        Usuario.objects.filter(pk=instance.pk).update(foto_hash='')
+        instance.foto_hash = ''
+        transaction.on_commit(lambda: remover_miniaturas(foto_hash))
+
+
+@receiver(post_delete, sender=Usuario)
+def remover_miniaturas_do_usuario(sender, instance, **kwargs):
+    if instance.foto_hash:
+        foto_hash = instance.foto_hash
+        transaction.on_commit(lambda: remover_miniaturas(foto_hash))
+
+
+def _altera_estatisticas(raw, update_fields):
+    # save(update_fields=['last_login']) a cada login não mexe nos contadores
+    return not raw and (update_fields is None or bool(set(update_fields) & set(estatisticas.CAMPOS)))
+
+
+@receiver(pre_save, sender=Usuario)
+def guardar_valores_anteriores(sender, instance, raw=False, update_fields=None, **kwargs):
+    instance._estatisticas_antes = None
+    if instance._state.adding or not _altera_estatisticas(raw, update_fields):
+        return
+    instance._estatisticas_antes = (
+        Usuario.objects.filter(pk=instance.pk).values(*estatisticas.CAMPOS).first()
+    )
+
+
+@receiver(post_save, sender=Usuario)
+def atualizar_estatisticas(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    if not _altera_estatisticas(raw, update_fields):
+        return
+    antes = None if created else getattr(instance, '_estatisticas_antes', None)
+    estatisticas.registrar_alteracao(antes, estatisticas.valores_de(instance))
+
+
+@receiver(post_delete, sender=Usuario)
+def descontar_estatisticas(sender, instance, **kwargs):
+    estatisticas.registrar_alteracao(estatisticas.valores_de(instance), None)
@@ -0,0 +1,46 @@
+from django import template
+from django.core.files.storage import default_storage
+from django.utils.html import format_html, format_html_join
+
+from accounts.imagens import TAMANHOS, formatos_suportados, nome_miniatura
+
+register = template.Library()
+
+TIPOS_MIME = {'avif': 'image/avif', 'webp': 'image/webp'}
+
+
+def _srcset(foto_hash, tamanho, formato):
+    # 1x no tamanho pedido e 2x no dobro, quando houver miniatura para isso
+    candidatos = [(tamanho, '1x')]
+    if tamanho * 2 in TAMANHOS:
+        candidatos.append((tamanho * 2, '2x'))
+    return ', '.join(
+        f'{default_storage.url(nome_miniatura(foto_hash, t, formato))} {densidade}'
+        for t, densidade in candidatos
+    )
+
+
+@register.simple_tag
+def avatar(usuario, tamanho=64, classe='rounded-circle'):
+    """<picture> com AVIF/WebP em srcset; sem miniaturas prontas usa a foto original"""
+    tamanho = int(tamanho)
+    if tamanho not in TAMANHOS:
+        tamanho = min(TAMANHOS, key=lambda t: abs(t - tamanho))
+    alt = usuario.get_full_name() or usuario.username
+
+    if not usuario.foto_perfil:
+        return ''
+    formatos = formatos_suportados()
+    if not usuario.foto_hash or not formatos:
+        return format_html('<img src="{}" width="{}" height="{}" alt="{}" class="{}" loading="lazy">',
+                           usuario.foto_perfil.url, tamanho, tamanho, alt, classe)
+
+    fontes = format_html_join(
+        '', '<source type="{}" srcset="{}">',
+        ((TIPOS_MIME[f], _srcset(usuario.foto_hash, tamanho, f)) for f in formatos),
+    )
+    fallback = default_storage.url(nome_miniatura(usuario.foto_hash, tamanho, formatos[-1]))
+    return format_html(
+        '<picture>{}<img src="{}" width="{}" height="{}" alt="{}" class="{}" loading="lazy"></picture>',
+        fontes, fallback, tamanho, tamanho, alt, classe,
+    )
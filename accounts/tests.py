@@ -1,3 +1,736 @@
-from django.test import TestCase
+import csv
+import io
+import json
+import os
+import shutil
+import socket
+import struct
+import tempfile
+import unittest
+import zlib
+from datetime import date, timedelta
 
-# Create your tests here.
+from django.core import mail
+from django.contrib.auth.hashers import check_password, identify_hasher, make_password
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.files.uploadhandler import SkipFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from core import limites
+from core.email import entregador
+from core.metricas import metricas
+from core.models import EmailSaida
+from core.uploads import StreamingUploadHandler, dimensoes_webp
+
+from . import hashers
+from .busca import buscar_usuarios, indice_memoria
+from .estatisticas import contagens_reais, recalcular
+from .exportacao import CAMPOS_EXPORTACAO
+from .importacao import importar_usuarios, ler_arquivo
+from .imagens import TAMANHOS, formatos_suportados, nome_miniatura
+from .models import ContadorMembros, Usuario
+
+try:
+    from aiosmtpd.controller import Controller
+except ImportError:  # aiosmtpd só é necessário para os testes com SMTP de verdade
+    Controller = None
+
+HASHER_RAPIDO = ['django.contrib.auth.hashers.MD5PasswordHasher']
+REGRAS = {
+    'accounts:login': {'campo': 'username', 'por_ip': (4, 60), 'por_usuario': (2, 60), 'so_falhas': True},
+}
+
+
+@override_settings(LIMITES_TENTATIVAS=REGRAS, PASSWORD_HASHERS=HASHER_RAPIDO)
+class LimiteTentativasTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = Usuario.objects.create_user('membro', password='senha-certa-123')
+
+    def setUp(self):
+        cache.clear()
+        self.url = reverse('accounts:login')
+
+    def logar(self, username, senha='errada', ip='10.0.0.1'):
+        return self.client.post(self.url, {'username': username, 'password': senha}, REMOTE_ADDR=ip)
+
+    def test_bloqueia_usuario_depois_das_falhas_mesmo_com_a_senha_certa(self):
+        self.assertEqual(self.logar('membro').status_code, 200)
+        self.assertEqual(self.logar('Membro', ip='10.0.0.2').status_code, 200)
+        with self.assertLogs('core.middleware', 'WARNING'):
+            resposta = self.logar('membro', 'senha-certa-123', ip='10.0.0.3')
+        self.assertEqual(resposta.status_code, 429)
+        self.assertIn('Retry-After', resposta)
+
+    def test_bloqueia_ip_que_tenta_varios_usuarios(self):
+        for i in range(4):
+            self.assertEqual(self.logar(f'inexistente{i}').status_code, 200)
+        with self.assertLogs('core.middleware', 'WARNING'):
+            self.assertEqual(self.logar('outro').status_code, 429)
+        self.assertEqual(self.logar('membro', 'senha-certa-123', ip='10.0.0.9').status_code, 302)
+
+    def test_login_certo_zera_as_falhas_do_usuario(self):
+        self.logar('membro')
+        self.assertEqual(self.logar('membro', 'senha-certa-123').status_code, 302)
+        self.client.logout()
+        self.assertEqual(self.logar('membro').status_code, 200)
+        self.assertEqual(self.logar('membro').status_code, 200)
+
+    @override_settings(LIMITES_ATIVOS=False)
+    def test_desligado(self):
+        for _ in range(6):
+            self.assertEqual(self.logar('membro').status_code, 200)
+
+
+class JanelaDeslizanteTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_janela_anterior_pesa_pela_fracao_que_ainda_cai_na_janela(self):
+        for _ in range(10):
+            limites.registrar('teste', 'x', 60, agora=6000 + 30)
+        self.assertEqual(limites.contagem('teste', 'x', 60, agora=6000 + 59), 10)
+        # 15s na janela seguinte: 3/4 da anterior ainda conta
+        self.assertEqual(limites.contagem('teste', 'x', 60, agora=6060 + 15), 7.5)
+        self.assertEqual(limites.contagem('teste', 'x', 60, agora=6120 + 1), 0)
+        self.assertEqual(limites.excedido('teste', 'x', 7, 60, agora=6060 + 15), 46)
+
+
+@override_settings(EMAIL_BACKEND='core.email.FilaEmailBackend', PASSWORD_HASHERS=HASHER_RAPIDO,
+                   EMAIL_ENTREGA_BACKEND='django.core.mail.backends.locmem.EmailBackend')
+class FilaEmailTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    @override_settings(EMAIL_FILA_ASSINCRONA=False)
+    def test_recuperacao_de_senha_passa_pela_fila(self):
+        Usuario.objects.create_user('membro', email='membro@example.com', password='senha-certa-123')
+        resposta = self.client.post(reverse('accounts:password_reset'), {'email': 'membro@example.com'})
+        self.assertEqual(resposta.status_code, 302)
+        registro = EmailSaida.objects.get()
+        self.assertEqual(registro.status, EmailSaida.ENVIADO)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['membro@example.com'])
+        self.assertIn('/reset/', mail.outbox[0].message().get_payload(decode=True).decode())
+
+    def test_cadastro_so_enfileira_as_boas_vindas(self):
+        resposta = self.client.post(reverse('accounts:registrar'), {
+            'username': 'novo', 'email': 'novo@example.com', 'first_name': 'Nova', 'last_name': 'Pessoa',
+            'password1': 'Senha-Forte-2024!', 'password2': 'Senha-Forte-2024!',
+        })
+        self.assertRedirects(resposta, reverse('accounts:dashboard'), fetch_redirect_response=False)
+        registro = EmailSaida.objects.get()
+        self.assertEqual((registro.status, registro.destinatarios), (EmailSaida.PENDENTE, ['novo@example.com']))
+        self.assertEqual(mail.outbox, [])
+
+    def test_entrega_sincrona_so_leva_as_mensagens_da_chamada(self):
+        mail.send_mail('Antiga', 'Corpo', 'noreply@example.com', ['antiga@example.com'])
+        with self.settings(EMAIL_FILA_ASSINCRONA=False):
+            mail.send_mail('Nova', 'Corpo', 'noreply@example.com', ['nova@example.com'])
+        self.assertEqual([mensagem.subject for mensagem in mail.outbox], ['Nova'])
+        self.assertEqual(EmailSaida.objects.get(assunto='Antiga').status, EmailSaida.PENDENTE)
+
+
+class ServidorSmtpFalso:
+    """Handler do aiosmtpd que guarda as mensagens e conta as conexões (um EHLO por conexão)"""
+
+    def __init__(self):
+        self.mensagens = []
+        self.conexoes = 0
+        self.resposta = '250 OK'
+
+    async def handle_EHLO(self, server, session, envelope, hostname, responses):
+        self.conexoes += 1
+        session.host_name = hostname
+        return responses
+
+    async def handle_DATA(self, server, session, envelope):
+        if self.resposta.startswith('250'):
+            self.mensagens.append(envelope)
+        return self.resposta
+
+
+@unittest.skipIf(Controller is None, 'aiosmtpd não instalado')
+class EntregaSmtpTests(TestCase):
+    def setUp(self):
+        with socket.socket() as s:
+            s.bind(('127.0.0.1', 0))
+            porta = s.getsockname()[1]
+        self.servidor = ServidorSmtpFalso()
+        self.controller = Controller(self.servidor, hostname='127.0.0.1', port=porta)
+        self.controller.start()
+        self.addCleanup(self.controller.stop)
+        self.addCleanup(entregador.fechar)
+        configuracao = override_settings(
+            EMAIL_BACKEND='core.email.FilaEmailBackend', EMAIL_FILA_ASSINCRONA=True,
+            EMAIL_ENTREGA_BACKEND='django.core.mail.backends.smtp.EmailBackend',
+            EMAIL_HOST='127.0.0.1', EMAIL_PORT=porta, EMAIL_USE_TLS=False, EMAIL_TIMEOUT=5,
+        )
+        configuracao.enable()
+        self.addCleanup(configuracao.disable)
+
+    def enfileirar(self, quantidade):
+        mensagens = [mail.EmailMessage(f'Aviso {i}', 'Corpo', 'noreply@example.com', [f'm{i}@example.com'])
+                     for i in range(quantidade)]
+        return mail.get_connection().send_messages(mensagens)
+
+    def test_varias_mensagens_numa_conexao_so(self):
+        self.assertEqual(self.enfileirar(5), 5)
+        self.assertEqual(entregador.entregar_pendentes(), (5, 0))
+        self.assertEqual(len(self.servidor.mensagens), 5)
+        self.assertEqual(self.servidor.conexoes, 1)
+        self.assertFalse(EmailSaida.objects.exclude(status=EmailSaida.ENVIADO).exists())
+
+    def test_falha_temporaria_reagenda_e_permanente_desiste(self):
+        self.enfileirar(1)
+        self.servidor.resposta = '451 Tente mais tarde'
+        with self.assertLogs('core.email', 'WARNING'):
+            self.assertEqual(entregador.entregar_pendentes(), (0, 1))
+        registro = EmailSaida.objects.get()
+        self.assertEqual((registro.status, registro.tentativas), (EmailSaida.PENDENTE, 1))
+        self.assertGreater(registro.proxima_tentativa, timezone.now())
+        # Ainda não é hora: nada a entregar
+        self.assertEqual(entregador.entregar_pendentes(), (0, 0))
+
+        EmailSaida.objects.update(proxima_tentativa=timezone.now())
+        self.servidor.resposta = '550 Caixa inexistente'
+        entregador.entregar_pendentes()
+        registro.refresh_from_db()
+        self.assertEqual((registro.status, registro.tentativas), (EmailSaida.FALHOU, 2))
+        self.assertIn('550', registro.erro)
+
+    @override_settings(EMAIL_FILA_PRAZO_LOTE=0)
+    def test_lote_fora_do_prazo_devolve_o_resto(self):
+        # Prazo zero: cada lote envia uma mensagem e devolve as outras, que seguem na mesma rodada
+        self.enfileirar(3)
+        self.assertEqual(entregador.entregar_pendentes(), (3, 0))
+        self.assertEqual(len(self.servidor.mensagens), 3)
+        self.assertFalse(EmailSaida.objects.exclude(status=EmailSaida.ENVIADO, reserva='').exists())
+
+
+@override_settings(METRICAS_ATIVAS=True, METRICAS_TOKEN='segredo', PASSWORD_HASHERS=HASHER_RAPIDO)
+class MetricasTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        metricas.zerar()
+        self.addCleanup(metricas.zerar)
+
+    def linha(self, rota):
+        return next(linha for linha in metricas.resumo() if linha['rota'] == rota)
+
+    def test_mede_tempo_sql_templates_e_tamanho_por_rota(self):
+        self.client.force_login(Usuario.objects.create_user('membro', password='x'))
+        self.client.get(reverse('accounts:dashboard'))
+        self.client.get(reverse('accounts:dashboard'))
+        self.client.get('/nao-existe/')
+        painel = self.linha('accounts:dashboard')
+        self.assertEqual(painel['requisicoes'], 2)
+        self.assertGreater(painel['sql_consultas'], 0)
+        self.assertGreater(painel['template_ms'], 0)
+        self.assertGreater(painel['kb'], 0)
+        self.assertGreaterEqual(painel['maximo_ms'], painel['p50_ms'])
+        self.assertEqual(self.linha('(não encontrada)')['requisicoes'], 1)
+
+    def test_prometheus_so_para_staff_ou_com_token(self):
+        self.client.get(reverse('accounts:login'))
+        url = reverse('metricas_prometheus')
+        self.assertEqual(self.client.get(url).status_code, 401)
+        resposta = self.client.get(url, HTTP_AUTHORIZATION='Bearer segredo')
+        self.assertEqual(resposta.status_code, 200)
+        self.assertIn('intranet_requisicao_segundos_bucket{rota="accounts:login",le="+Inf"} 1\n',
+                      resposta.content.decode())
+        self.assertIn('intranet_respostas_total{rota="accounts:login",status="2xx"} 1\n', resposta.content.decode())
+
+    def test_pagina_do_admin(self):
+        self.client.force_login(Usuario.objects.create_user('membro', password='x'))
+        self.assertEqual(self.client.get(reverse('metricas')).status_code, 302)
+        self.client.force_login(Usuario.objects.create_user('admin', password='x', is_staff=True))
+        self.client.get(reverse('accounts:login'))
+        self.assertContains(self.client.get(reverse('metricas')), 'accounts:login')
+
+
+class BuscaUsuariosTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.joao = Usuario.objects.create_user('jsilva', first_name='João', last_name='da Silva',
+                                               email='joao.silva@example.com', cpf='529.982.247-25')
+        cls.maria = Usuario.objects.create_user('maria', first_name='Maria', last_name='Souza',
+                                                email='maria@outro.org', cpf='111.444.777-35')
+
+    def setUp(self):
+        # O índice em memória vive no processo, fora da transação de cada teste
+        indice_memoria.invalidar()
+        self.addCleanup(indice_memoria.invalidar)
+
+    def buscar(self, termo):
+        return set(buscar_usuarios(termo).values_list('username', flat=True))
+
+    def test_nome_sem_acento_e_por_prefixo(self):
+        self.assertEqual(self.buscar('joao sil'), {'jsilva'})
+        self.assertEqual(self.buscar('SOUZA'), {'maria'})
+        self.assertEqual(self.buscar('joao souza'), set())
+
+    def test_cpf_formatado_ou_so_digitos(self):
+        self.assertEqual(self.buscar('529.982.247-25'), {'jsilva'})
+        self.assertEqual(self.buscar('52998224725'), {'jsilva'})
+        self.assertEqual(self.buscar('111.444'), {'maria'})
+
+    def test_email_inteiro_ou_em_partes(self):
+        self.assertEqual(self.buscar('joao.silva@example.com'), {'jsilva'})
+        self.assertEqual(self.buscar('silva@example'), {'jsilva'})
+        self.assertEqual(self.buscar('outro.org'), {'maria'})
+
+    def test_candidatos_limitados_aos_de_maior_rank(self):
+        # "outro" é o username dele (peso B) e só o domínio do e-mail de Maria (peso C)
+        Usuario.objects.create_user('outro')
+        self.assertEqual(self.buscar('outro'), {'maria', 'outro'})
+        with self.settings(BUSCA_MAX_CANDIDATOS=1):
+            self.assertEqual(self.buscar('outro'), {'outro'})
+
+
+
+class LimparSessoesTests(TestCase):
+    def test_remove_so_as_expiradas_em_lotes(self):
+        agora = timezone.now()
+        Session.objects.bulk_create(
+            [Session(session_key=f'expirada{i}', session_data='', expire_date=agora - timedelta(days=i + 1))
+             for i in range(5)]
+            + [Session(session_key=f'valida{i}', session_data='', expire_date=agora + timedelta(days=1))
+               for i in range(2)]
+        )
+        saida = io.StringIO()
+        call_command('limpar_sessoes', lote=2, pausa=0, stdout=saida)
+        self.assertEqual(set(Session.objects.values_list('session_key', flat=True)), {'valida0', 'valida1'})
+        # Três lotes: 2 + 2 + 1
+        self.assertIn('2 sessões removidas...\n4 sessões removidas...\n5 sessões removidas...', saida.getvalue())
+        self.assertIn('Concluído: 5 sessões expiradas removidas.', saida.getvalue())
+
+class ExportacaoTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = Usuario.objects.create_user('admin', email='admin@example.com', first_name='Ana',
+                                                tipo_usuario='DIRETORIA', is_staff=True, is_superuser=True)
+        Usuario.objects.create_user('membro', email='membro@example.com', first_name='Bruno', tipo_usuario='AFILIADO')
+
+    def exportar(self, **parametros):
+        self.client.force_login(self.admin)
+        return self.client.get(reverse('admin:accounts_usuario_exportar'), parametros)
+
+    def test_csv_tem_cabecalho_e_valores(self):
+        resposta = self.exportar(tipo_usuario__exact='AFILIADO')
+        self.assertEqual(resposta['Content-Type'], 'text/csv; charset=utf-8')
+        linhas = list(csv.reader(io.StringIO(b''.join(resposta.streaming_content).decode())))
+        self.assertEqual(tuple(linhas[0]), CAMPOS_EXPORTACAO)
+        self.assertEqual(len(linhas), 2)
+        membro = dict(zip(linhas[0], linhas[1]))
+        self.assertEqual((membro['username'], membro['first_name'], membro['email'], membro['tipo_usuario'],
+                          membro['ativo']), ('membro', 'Bruno', 'membro@example.com', 'AFILIADO', 'True'))
+
+    def test_ndjson_um_objeto_por_linha(self):
+        resposta = self.exportar(formato='ndjson', q='bruno')
+        linhas = b''.join(resposta.streaming_content).decode().splitlines()
+        self.assertEqual([json.loads(linha)['username'] for linha in linhas], ['membro'])
+
+    def test_filtro_invalido_volta_para_o_changelist(self):
+        resposta = self.exportar(campo_que_nao_existe='1')
+        self.assertRedirects(resposta, reverse('admin:accounts_usuario_changelist') + '?e=1',
+                             fetch_redirect_response=False)
+
+    async def test_asgi_envia_gerador_assincrono(self):
+        await self.async_client.aforce_login(self.admin)
+        resposta = await self.async_client.get(reverse('admin:accounts_usuario_exportar'))
+        self.assertTrue(resposta.is_async)
+        conteudo = b''.join([parte async for parte in resposta.streaming_content]).decode()
+        self.assertEqual(len(conteudo.splitlines()), 3)
+
+
+@override_settings(PASSWORD_HASHERS=HASHER_RAPIDO)
+class ImportacaoTests(TestCase):
+    CABECALHO = ['username', 'email', 'first_name', 'cpf', 'cep', 'tipo_usuario', 'estado',
+                 'endereco', 'data_associacao', 'senha']
+
+    @classmethod
+    def setUpTestData(cls):
+        Usuario.objects.create_user('existente', cpf='111.444.777-35')
+
+    def setUp(self):
+        indice_memoria.invalidar()
+        self.addCleanup(indice_memoria.invalidar)
+
+    def arquivo(self, linhas, delimitador=','):
+        saida = io.StringIO()
+        escritor = csv.writer(saida, delimiter=delimitador)
+        escritor.writerow(self.CABECALHO)
+        escritor.writerows(linhas)
+        # Com BOM, como o Excel grava "CSV UTF-8"
+        return io.BytesIO(saida.getvalue().encode('utf-8-sig'))
+
+    def importar(self, arquivo, **opcoes):
+        erros = []
+        resultado = importar_usuarios(
+            ler_arquivo(arquivo, 'membros.csv'),
+            registrar_erro=lambda numero, campo, erro: erros.append((numero, campo)),
+            **opcoes,
+        )
+        return resultado, erros
+
+    def test_arquivo_valido_virgula_ou_ponto_e_virgula(self):
+        linha = ['ana', 'ana@example.com', 'Ana', '52998224725', '01310100', 'diretoria', 'sp',
+                 'Av. Paulista, 1000', '15/03/2021', 'senha-da-ana']
+        for delimitador in (',', ';'):
+            with self.subTest(delimitador=delimitador):
+                resultado, erros = self.importar(self.arquivo([linha], delimitador))
+                self.assertEqual((resultado.importados, resultado.erros, erros), (1, 0, []))
+                ana = Usuario.objects.get(username='ana')
+                self.assertEqual((ana.cpf, ana.cep, ana.tipo_usuario, ana.estado, ana.endereco),
+                                 ('529.982.247-25', '01310-100', 'DIRETORIA', 'SP', 'Av. Paulista, 1000'))
+                self.assertEqual(ana.data_associacao.isoformat(), '2021-03-15')
+                self.assertTrue(ana.check_password('senha-da-ana'))
+                # bulk_create não passa pelos sinais: o índice da busca é refeito
+                self.assertEqual(list(buscar_usuarios('ana').values_list('username', flat=True)), ['ana'])
+                ana.delete()
+
+    def test_linhas_invalidas_e_repetidas(self):
+        linhas = [
+            ['bia', 'bia@example.com', 'Bia', '390.533.447-05', '', '', '', '', '2021-01-02', ''],
+            ['bia', 'bia2@example.com', 'Bia', '', '', '', '', '', '', ''],
+            ['caio', '', 'Caio', '390.533.447-05', '', '', '', '', '', ''],
+            ['duda', '', 'Duda', '529.982.247-24', '', '', '', '', '', ''],
+            ['edu', '', 'Edu', '', '1234', '', '', '', '', ''],
+            ['existente', '', 'Outro', '', '', '', '', '', '', ''],
+            ['fabi', '', 'Fabi', '111.444.777-35', '', '', '', '', '', ''],
+            ['', 'sem@example.com', 'Sem', '', '', 'SOCIO', 'XX', '', 'ontem', ''],
+            ['gabi', 'gabi@example.com', 'Gabi', '', '', 'afiliado', '', '', '', ''],
+        ]
+        # Lotes de 2: as repetições são pegas entre lotes também
+        resultado, erros = self.importar(self.arquivo(linhas), lote=2)
+        self.assertEqual((resultado.importados, resultado.erros), (2, 7))
+        self.assertEqual(sorted(erros), [
+            (3, 'username'), (4, 'cpf'), (5, 'cpf'), (6, 'cep'), (7, 'username'), (8, 'cpf'),
+            (9, 'data_associacao'), (9, 'estado'), (9, 'tipo_usuario'), (9, 'username'),
+        ])
+        self.assertEqual(set(Usuario.objects.values_list('username', flat=True)), {'existente', 'bia', 'gabi'})
+        # Sem senha no arquivo: a conta fica sem senha utilizável
+        self.assertFalse(Usuario.objects.get(username='bia').has_usable_password())
+
+    def test_tela_do_admin(self):
+        admin = Usuario.objects.create_user('admin', tipo_usuario='DIRETORIA', is_staff=True, is_superuser=True)
+        self.client.force_login(admin)
+        url = reverse('admin:accounts_usuario_importar')
+        linhas = [['hugo', '', 'Hugo', '', '', '', '', '', '', ''], ['hugo', '', 'Hugo', '', '', '', '', '', '', '']]
+        arquivo = SimpleUploadedFile('membros.csv', self.arquivo(linhas).getvalue(), content_type='text/csv')
+        resposta = self.client.post(url, {'arquivo': arquivo})
+        self.assertEqual(resposta.status_code, 200)
+        self.assertEqual(resposta.context['erros'], [(3, 'username', 'Repetido no arquivo.')])
+        self.assertTrue(Usuario.objects.filter(username='hugo').exists())
+
+
+@override_settings(PASSWORD_HASHERS=HASHER_RAPIDO)
+class EstatisticasTests(TestCase):
+    def armazenados(self):
+        contadores = ContadorMembros.objects.filter(total__gt=0).values_list('dimensao', 'valor', 'total')
+        return {(dimensao, valor): total for dimensao, valor, total in contadores}
+
+    def assertContadoresEmDia(self):
+        self.assertEqual(self.armazenados(), {chave: n for chave, n in contagens_reais().items() if n})
+        self.assertEqual(recalcular(corrigir=False), [])
+
+    def test_sinais_acompanham_cadastro_alteracao_e_remocao(self):
+        ana = Usuario.objects.create_user('ana', tipo_usuario='ASSOCIADO', estado='SP',
+                                          data_associacao=date(2024, 5, 10))
+        bia = Usuario.objects.create_user('bia', tipo_usuario='ASSOCIADO')
+        self.assertContadoresEmDia()
+        self.assertEqual(self.armazenados()[('tipo_usuario', 'ASSOCIADO')], 2)
+
+        ana.tipo_usuario, ana.estado, ana.ativo = 'DIRETORIA', 'RJ', False
+        ana.data_associacao = date(2024, 6, 1)
+        ana.save()
+        self.assertContadoresEmDia()
+        self.assertNotIn(('mes_associacao', '2024-05'), self.armazenados())
+
+        # Só update_fields fora das dimensões (o last_login a cada login): nada muda
+        with self.assertNumQueries(1):
+            bia.save(update_fields=['last_login'])
+        bia.tipo_usuario = 'COLETIVO'
+        bia.save(update_fields=['tipo_usuario'])
+        self.assertContadoresEmDia()
+
+        ana.delete()
+        self.assertContadoresEmDia()
+        self.assertEqual(self.armazenados(), {('tipo_usuario', 'COLETIVO'): 1, ('estado', 'RJ'): 1, ('ativo', '1'): 1})
+
+    def test_reconciliar_corrige_o_que_passou_por_fora_dos_sinais(self):
+        for username in ('ana', 'bia', 'caio'):
+            Usuario.objects.create_user(username, tipo_usuario='AFILIADO')
+        Usuario.objects.filter(username='ana').update(tipo_usuario='DIRETORIA', data_associacao=date(2023, 1, 2))
+        # QuerySet.delete() passa pelos sinais; update() e bulk_create não
+        Usuario.objects.filter(username='caio').delete()
+        Usuario.objects.bulk_create([Usuario(username='duda', tipo_usuario='AFILIADO', estado='MG')])
+
+        saida = io.StringIO()
+        call_command('reconciliar_estatisticas', '--verificar', stdout=saida)
+        self.assertIn('tipo_usuario DIRETORIA: 0 -> 1', saida.getvalue())
+        self.assertIn('estado MG: 0 -> 1', saida.getvalue())
+        self.assertIn('4 contadores divergentes', saida.getvalue())
+        self.assertNotEqual(recalcular(corrigir=False), [])
+
+        call_command('reconciliar_estatisticas', stdout=io.StringIO())
+        self.assertContadoresEmDia()
+        self.assertEqual(self.armazenados()[('tipo_usuario', 'DIRETORIA')], 1)
+        self.assertEqual(self.armazenados()[('mes_associacao', '2023-01')], 1)
+        saida = io.StringIO()
+        call_command('reconciliar_estatisticas', stdout=saida)
+        self.assertIn('Contadores em dia.', saida.getvalue())
+
+
+def imagem(cor, formato='PNG', tamanho=(40, 30), **opcoes):
+    from PIL import Image
+
+    saida = io.BytesIO()
+    Image.new('RGB', tamanho, cor).save(saida, formato, **opcoes)
+    return saida.getvalue()
+
+
+@override_settings(MINIATURAS_ASSINCRONAS=False)
+class MiniaturasTests(TestCase):
+    def setUp(self):
+        pasta = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, pasta, ignore_errors=True)
+        configuracao = override_settings(MEDIA_ROOT=pasta)
+        configuracao.enable()
+        self.addCleanup(configuracao.disable)
+        self.usuario = Usuario.objects.create_user('membro')
+
+    def trocar_foto(self, conteudo):
+        self.usuario.foto_perfil = None if conteudo is None else SimpleUploadedFile('foto.png', conteudo)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.usuario.save()
+        self.usuario.refresh_from_db()
+        return self.usuario.foto_hash
+
+    def miniaturas(self, foto_hash):
+        return [default_storage.exists(nome_miniatura(foto_hash, tamanho, formato))
+                for tamanho in TAMANHOS for formato in formatos_suportados()]
+
+    def test_gera_miniaturas_e_apaga_as_da_foto_trocada(self):
+        antiga = self.trocar_foto(imagem('red'))
+        self.assertTrue(antiga)
+        self.assertTrue(all(self.miniaturas(antiga)))
+
+        nova = self.trocar_foto(imagem('blue'))
+        self.assertNotEqual(nova, antiga)
+        self.assertTrue(all(self.miniaturas(nova)))
+        self.assertFalse(any(self.miniaturas(antiga)))
+
+        self.assertEqual(self.trocar_foto(None), '')
+        self.assertFalse(any(self.miniaturas(nova)))
+
+    def test_mantem_miniaturas_usadas_por_outro_membro(self):
+        foto = imagem('green')
+        compartilhada = self.trocar_foto(foto)
+        outro = Usuario.objects.create_user('outro', foto_perfil=SimpleUploadedFile('foto.png', foto))
+        Usuario.objects.filter(pk=outro.pk).update(foto_hash=compartilhada)
+        self.trocar_foto(imagem('blue'))
+        self.assertTrue(all(self.miniaturas(compartilhada)))
+
+
+ARGON2_LEVE = dict(PASSWORD_HASHERS=['accounts.hashers.Argon2Calibrado'], SENHA_PROCESSOS=1,
+                   SENHA_ARGON2_TIME_COST=1, SENHA_ARGON2_MEMORY_COST=8 * 1024, SENHA_ARGON2_PARALLELISM=1)
+
+
+@unittest.skipUnless(hashers.Argon2PasswordHasher().library, 'argon2-cffi não instalado')
+@override_settings(**ARGON2_LEVE)
+class HashersCalibradosTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_encode_e_verify_no_pool(self):
+        codificada = make_password('senha-certa')
+        self.assertIn(',t=1,', codificada)
+        self.assertTrue(check_password('senha-certa', codificada))
+        self.assertFalse(check_password('senha-errada', codificada))
+        self.assertIsNotNone(hashers._pool)
+
+    def test_login_refaz_hash_com_parametros_novos(self):
+        usuario = Usuario.objects.create_user('membro', password='senha-certa-123')
+        # PASSWORD_HASHERS de novo só para o Django descartar os hashers em cache
+        with override_settings(SENHA_ARGON2_TIME_COST=2, PASSWORD_HASHERS=ARGON2_LEVE['PASSWORD_HASHERS']):
+            resposta = self.client.post(reverse('accounts:login'),
+                                        {'username': 'membro', 'password': 'senha-certa-123'})
+            self.assertEqual(resposta.status_code, 302)
+            usuario.refresh_from_db()
+            self.assertIn(',t=2,', usuario.password)
+            self.assertFalse(identify_hasher(usuario.password).must_update(usuario.password))
+
+    def test_pool_quebrado_calcula_na_thread(self):
+        quebrado = hashers.pool()
+        with self.assertRaises(hashers.BrokenProcessPool):
+            quebrado.submit(os._exit, 1).result()
+        with self.assertLogs('accounts.hashers', 'WARNING'):
+            codificada = make_password('senha-certa')
+        self.assertTrue(check_password('senha-certa', codificada))
+        self.assertIsNot(hashers.pool(), quebrado)
+
+    def test_importacao_calcula_nas_proprias_threads(self):
+        # Pool já encerrado no lugar do compartilhado: qualquer hash que passe por ele falha
+        fechado = hashers.ProcessPoolExecutor(max_workers=1)
+        fechado.shutdown()
+        anterior = hashers._pool, hashers._pool_pid
+        hashers._pool, hashers._pool_pid = fechado, os.getpid()
+        self.addCleanup(setattr, hashers, '_pool', anterior[0])
+        self.addCleanup(setattr, hashers, '_pool_pid', anterior[1])
+        with self.assertRaises(RuntimeError):
+            make_password('pelo-pool')
+
+        pasta = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, pasta)
+        caminho = os.path.join(pasta, 'membros.csv')
+        with open(caminho, 'w', encoding='utf-8') as arquivo:
+            arquivo.write('username,senha\n' + ''.join(f'membro{i},senha-{i}\n' for i in range(4)))
+        call_command('importar_usuarios', caminho, '--workers', '2', stdout=io.StringIO())
+        with hashers.calculo_na_thread():
+            self.assertTrue(check_password('senha-3', Usuario.objects.get(username='membro3').password))
+
+
+def chunk_png(tipo, dados):
+    return struct.pack('>I', len(dados)) + tipo + dados + struct.pack('>I', zlib.crc32(tipo + dados))
+
+
+def cabecalho_png(largura, altura):
+    ihdr = struct.pack('>IIBBBBB', largura, altura, 8, 2, 0, 0, 0)
+    return b'\x89PNG\r\n\x1a\n' + chunk_png(b'IHDR', ihdr) + chunk_png(b'IDAT', bytes(64))
+
+
+def cabecalho_jpeg(largura, altura, app=b''):
+    sof = b'\xff\xc0' + struct.pack('>HBHHB', 17, 8, altura, largura, 3) + b'\x01\x22\x00\x02\x11\x01\x03\x11\x01'
+    sos = b'\xff\xda' + struct.pack('>H', 12) + b'\x03\x01\x00\x02\x11\x03\x11\x00\x3f\x00'
+    return b'\xff\xd8' + app + sof + sos + bytes(64)
+
+
+def segmento_app1(tamanho):
+    return b'\xff\xe1' + struct.pack('>H', tamanho + 2) + bytes(tamanho)
+
+
+def cabecalho_webp(formato, largura, altura):
+    if formato == b'VP8X':
+        dados = bytes(4) + (largura - 1).to_bytes(3, 'little') + (altura - 1).to_bytes(3, 'little')
+    elif formato == b'VP8L':
+        bits = (largura - 1) | (altura - 1) << 14
+        dados = b'\x2f' + bits.to_bytes(4, 'little')
+    else:
+        dados = b'\x00\x00\x00\x9d\x01\x2a' + largura.to_bytes(2, 'little') + altura.to_bytes(2, 'little')
+    dados += bytes(64)
+    return b'RIFF' + struct.pack('<I', len(dados) + 12) + b'WEBP' + formato + struct.pack('<I', len(dados)) + dados
+
+
+class StreamingUploadHandlerTests(TestCase):
+    def enviar(self, conteudo, bloco=StreamingUploadHandler.chunk_size):
+        """Tamanho do arquivo aceito, None se descartado no fim ou o motivo do SkipFile"""
+        handler = StreamingUploadHandler()
+        handler.new_file('foto_perfil', 'foto', 'application/octet-stream', len(conteudo))
+        try:
+            for inicio in range(0, len(conteudo), bloco):
+                handler.receive_data_chunk(conteudo[inicio:inicio + bloco], inicio)
+        except SkipFile as motivo:
+            return str(motivo)
+        arquivo = handler.file_complete(len(conteudo))
+        return arquivo and arquivo.size
+
+    def test_imagens_reais_aceitas(self):
+        for formato in ('JPEG', 'PNG', 'GIF', 'WEBP'):
+            with self.subTest(formato=formato):
+                conteudo = imagem('red', formato, (64, 48))
+                self.assertEqual(self.enviar(conteudo), len(conteudo))
+                # Blocos pequenos: o tipo só é reconhecido no meio do fluxo
+                self.assertEqual(self.enviar(conteudo, bloco=7), len(conteudo))
+
+    def test_dimensoes_lidas_do_cabecalho(self):
+        grande, normal = (8000, 6000), (800, 600)
+        for nome, montar in (('png', cabecalho_png), ('jpeg', cabecalho_jpeg)):
+            with self.subTest(formato=nome), self.assertLogs('core.uploads', 'INFO'):
+                self.assertEqual(self.enviar(montar(*grande)), 'imagem com dimensões grandes demais')
+                self.assertEqual(self.enviar(montar(*grande), bloco=5), 'imagem com dimensões grandes demais')
+            self.assertIsNotNone(self.enviar(montar(*normal)))
+
+    def test_webp_vp8_vp8l_vp8x(self):
+        for formato in (b'VP8 ', b'VP8L', b'VP8X'):
+            with self.subTest(formato=formato):
+                self.assertEqual(dimensoes_webp(cabecalho_webp(formato, 1234, 567)[:32]), (1234, 567))
+                self.assertIsNotNone(self.enviar(cabecalho_webp(formato, 1234, 567)))
+                with self.assertLogs('core.uploads', 'INFO'):
+                    self.assertEqual(self.enviar(cabecalho_webp(formato, 8000, 6000)),
+                                     'imagem com dimensões grandes demais')
+        for lossless in (False, True):
+            conteudo = imagem('blue', 'WEBP', (123, 45), lossless=lossless)
+            self.assertEqual(dimensoes_webp(conteudo[:32]), (123, 45))
+        self.assertIsNone(dimensoes_webp(b'RIFF\x00\x00\x00\x00WEBPVP8'))
+
+    def test_jpeg_com_exif_grande_antes_das_dimensoes(self):
+        exif = segmento_app1(60000) * 2
+        self.assertIsNotNone(self.enviar(cabecalho_jpeg(800, 600, app=exif)))
+        with self.assertLogs('core.uploads', 'INFO'):
+            self.assertEqual(self.enviar(cabecalho_jpeg(800, 600, app=segmento_app1(60000) * 5)),
+                             'cabeçalho de imagem não encontrado')
+
+    def test_truncados_invalidos_e_grandes_demais(self):
+        with self.assertLogs('core.uploads', 'INFO'):
+            self.assertIsNone(self.enviar(b'\xff\xd8\xff'))
+            self.assertIsNone(self.enviar(cabecalho_png(800, 600)[:20]))
+            self.assertEqual(self.enviar(b'%PDF-1.7' + bytes(100)), 'tipo de arquivo não permitido')
+            # Assinatura certa sem cabeçalho legível: o parser nunca chega às dimensões
+            self.assertIsNone(self.enviar(b'\x89PNG\r\n\x1a\n' + b'\xff' * 100))
+        with override_settings(UPLOAD_REGRAS={'foto_perfil': {'tipos': ['png'], 'max_bytes': 1000}}), \
+                self.assertLogs('core.uploads', 'INFO'):
+            self.assertEqual(self.enviar(cabecalho_png(10, 10) + bytes(2000)), 'arquivo maior que o permitido')
+
+
+@override_settings(PASSWORD_HASHERS=HASHER_RAPIDO, MINIATURAS_ASSINCRONAS=False)
+class FotoRecusadaTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = Usuario.objects.create_user('admin', tipo_usuario='DIRETORIA', is_staff=True, is_superuser=True)
+        cls.membro = Usuario.objects.create_user('membro', first_name='Bruno')
+
+    def setUp(self):
+        pasta = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, pasta)
+        configuracao = override_settings(MEDIA_ROOT=pasta)
+        configuracao.enable()
+        self.addCleanup(configuracao.disable)
+        self.client.force_login(self.admin)
+
+    def salvar(self, conteudo, nome='foto.jpg'):
+        agora = timezone.localtime()
+        return self.client.post(reverse('admin:accounts_usuario_change', args=[self.membro.pk]), {
+            'username': 'membro', 'first_name': 'Bruno', 'tipo_usuario': 'AFILIADO', 'estado': 'RJ',
+            'ativo': 'on', 'is_active': 'on',
+            'date_joined_0': agora.date().isoformat(), 'date_joined_1': agora.strftime('%H:%M:%S'),
+            'foto_perfil': SimpleUploadedFile(nome, conteudo),
+        })
+
+    def test_foto_recusada_vira_erro_do_campo(self):
+        with self.assertLogs('core.uploads', 'INFO'):
+            resposta = self.salvar(b'%PDF-1.7' + bytes(100), 'foto.pdf')
+        self.assertEqual(resposta.status_code, 200)
+        self.assertEqual(resposta.context['adminform'].form.errors['foto_perfil'],
+                         ['Arquivo recusado: tipo de arquivo não permitido.'])
+
+        with override_settings(UPLOAD_REGRAS={'foto_perfil': {'tipos': ['png'], 'max_bytes': 1000}}), \
+                self.assertLogs('core.uploads', 'INFO'):
+            resposta = self.salvar(cabecalho_png(10, 10) + bytes(2000), 'foto.png')
+        self.assertEqual(resposta.context['adminform'].form.errors['foto_perfil'],
+                         ['Arquivo recusado: arquivo maior que o permitido.'])
+        self.membro.refresh_from_db()
+        self.assertFalse(self.membro.foto_perfil)
+
+    def test_foto_aceita_e_salva(self):
+        resposta = self.salvar(imagem('red', 'JPEG'))
+        self.assertRedirects(resposta, reverse('admin:accounts_usuario_changelist'), fetch_redirect_response=False)
+        self.membro.refresh_from_db()
+        self.assertTrue(self.membro.foto_perfil.name.startswith('perfis/'))
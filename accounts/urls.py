@@ -1,4 +1,4 @@
-from django.urls import path
+from django.urls import path, reverse_lazy
 from django.contrib.auth import views as auth_views
 from . import views
 
@@ -8,6 +8,7 @@ urlpatterns = [
     # Páginas principais
     path('', views.home_view, name='home'),
     path('dashboard/', views.dashboard_view, name='dashboard'),
+    path('diretorio/', views.diretorio_view, name='diretorio'),
 
     # Autenticação
     path('login/', auth_views.LoginView.as_view(
@@ -21,7 +22,9 @@ urlpatterns = [
 
     # Recuperação de senha
     path('password_reset/', auth_views.PasswordResetView.as_view(
-        template_name='registration/password_reset_form.html'
+        template_name='registration/password_reset_form.html',
+        email_template_name='accounts/emails/recuperar_senha.txt',
+        success_url=reverse_lazy('accounts:password_reset_done'),
     ), name='password_reset'),
 
     path('password_reset/done/', auth_views.PasswordResetDoneView.as_view(
@@ -29,7 +32,8 @@ urlpatterns = [
     ), name='password_reset_done'),
 
     path('reset/<uidb64>/<token>/', auth_views.PasswordResetConfirmView.as_view(
-        template_name='registration/password_reset_confirm.html'
+        template_name='registration/password_reset_confirm.html',
+        success_url=reverse_lazy('accounts:password_reset_complete'),
     ), name='password_reset_confirm'),
 
     path('reset/done/', auth_views.PasswordResetCompleteView.as_view(
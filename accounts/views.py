@@ -1,20 +1,46 @@
 from django.shortcuts import render, redirect
 from django.contrib.auth import login, logout
 from django.contrib.auth.decorators import login_required
+from django.conf import settings
+from django.core.mail import send_mail
+from django.core.paginator import Paginator
+from django.template.loader import render_to_string
+from django.views.decorators.cache import cache_page
+from .busca import buscar_usuarios
+from .estatisticas import montar_resumo
 from .forms import UsuarioCreationForm
+from .models import ContadorMembros, Usuario
 
+@cache_page(settings.CACHE_TIMEOUT, key_prefix='home')
 def home_view(request):
     return render(request, 'base/home.html')
 
 @login_required
-def dashboard_view(request):
-    return render(request, 'base/dashboard.html')
+async def dashboard_view(request):
+    # Uma consulta à tabela de contadores, qualquer que seja o número de membros
+    contadores = [contador async for contador in ContadorMembros.objects.all()]
+    return render(request, 'base/dashboard.html', {'estatisticas': montar_resumo(contadores)})
+
+@login_required
+def diretorio_view(request):
+    termo = request.GET.get('q', '').strip()
+    membros = Usuario.objects.filter(ativo=True)
+    if termo:
+        membros = buscar_usuarios(termo, membros).order_by('-busca_rank', 'first_name', 'last_name')
+    pagina = Paginator(membros, 30).get_page(request.GET.get('page'))
+    return render(request, 'accounts/diretorio.html', {'pagina': pagina, 'termo': termo})
 
 def registrar_usuario(request):
     if request.method == 'POST':
         form = UsuarioCreationForm(request.POST)
         if form.is_valid():
             user = form.save()
+            if user.email:
+                # Vai para a fila de e-mails (core/email.py): não espera o SMTP
+                contexto = {'usuario': user, 'dominio': request.get_host(),
+                            'protocolo': 'https' if request.is_secure() else 'http'}
+                send_mail('Bem-vindo(a) à ACJogos-RJ', render_to_string('accounts/emails/boas_vindas.txt', contexto),
+                          None, [user.email], fail_silently=True)
             login(request, user)
             return redirect('accounts:dashboard')
     else:
@@ -0,0 +1,25 @@
+"""
+ASGI config for acjogos_intranet project.
+
+It exposes the ASGI callable as a module-level variable named ``application``.
+
+For more information on this file, see
+https://docs.djangoproject.com/en/5.1/howto/deployment/asgi/
+"""
+
+import os
+
+from django.conf import settings
+from django.core.asgi import get_asgi_application
+
+# Define o arquivo de configurações a ser usado, apontando para o seu settings.py
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'acjogos_intranet.settings')
+
+# Inicia a aplicação ASGI (ex.: uvicorn acjogos_intranet.asgi:application --workers 4)
+application = get_asgi_application()
+
+# Rotas, traduções e templates prontos antes da primeira requisição; com o gunicorn em
+# preload_app isto roda uma vez no mestre e os workers herdam por fork
+if settings.AQUECER_NO_BOOT:
+    from core.aquecimento import aquecer
+    aquecer()
@@ -1,4 +1,5 @@
 import os
+from importlib.util import find_spec
 from pathlib import Path
 from decouple import config
 
@@ -23,19 +24,24 @@ INSTALLED_APPS = [
     'crispy_bootstrap5',
     
     # Apps locais
+    'core',
     'accounts',
     'empresas',
     'projetos',
     'pesquisas',
     'links',
+    'comunicados',
 ]
 
 MIDDLEWARE = [
+    'core.middleware.MetricasMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.LimiteTentativasMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.middleware.UsuarioAssincronoMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -44,7 +50,9 @@ ROOT_URLCONF = 'acjogos_intranet.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates que soma o tempo de renderização nas métricas (core/metricas.py)
+        'BACKEND': 'core.metricas.DjangoTemplatesMedidos',
+        'NAME': 'django',
         'DIRS': [BASE_DIR / 'templates'],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -60,6 +68,8 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'acjogos_intranet.wsgi.application'
+# Deploy ASGI: uvicorn acjogos_intranet.asgi:application (todos os middlewares aceitam async)
+ASGI_APPLICATION = 'acjogos_intranet.asgi.application'
 
 DB_ENGINE = config('DB_ENGINE', default='sqlite')
 if DB_ENGINE == 'postgresql':
@@ -71,8 +81,25 @@ if DB_ENGINE == 'postgresql':
             'PASSWORD': config('DB_PASSWORD'),
             'HOST': config('DB_HOST', default='localhost'),
             'PORT': config('DB_PORT', default='5432'),
+            # Conexões persistentes: reaproveita a conexão por até N segundos
+            # em vez de refazer TCP + autenticação a cada requisição
+            'CONN_MAX_AGE': config('DB_CONN_MAX_AGE', default=60, cast=int),
+            'CONN_HEALTH_CHECKS': config('DB_CONN_HEALTH_CHECKS', default=True, cast=bool),
         }
     }
+    # Pool nativo do Django 5.1 (requer psycopg[pool]); incompatível com CONN_MAX_AGE > 0
+    # No ASGI as consultas de cada requisição rodam numa thread própria, então conexões
+    # persistentes se multiplicam por thread: nesse deploy use o pool
+    if config('DB_POOL', default=False, cast=bool):
+        DATABASES['default']['CONN_MAX_AGE'] = 0
+        DATABASES['default']['OPTIONS'] = {
+            'pool': {
+                'min_size': config('DB_POOL_MIN_SIZE', default=2, cast=int),
+                'max_size': config('DB_POOL_MAX_SIZE', default=10, cast=int),
+                'timeout': config('DB_POOL_TIMEOUT', default=10, cast=int),
+                'max_idle': config('DB_POOL_MAX_IDLE', default=300, cast=int),
+            },
+        }
 else:
     DATABASES = {
         'default': {
@@ -81,6 +108,45 @@ else:
         }
     }
 
+# Cache: locmem (padrão), file ou redis (qualquer servidor compatível com o protocolo Redis;
+# precisa do pacote redis, que está no requirements.txt)
+CACHE_BACKEND = config('CACHE_BACKEND', default='locmem')
+CACHE_TIMEOUT = config('CACHE_TIMEOUT', default=300, cast=int)
+# Páginas iniciais dos módulos, por usuário. Os sinais invalidam o que muda no próprio
+# módulo; o prazo curto limita o resto (nomes vindos de outros módulos, permissões)
+CACHE_PAGINAS_TIMEOUT = config('CACHE_PAGINAS_TIMEOUT', default=60, cast=int)
+CACHE_BACKENDS = {
+    'locmem': {
+        'BACKEND': 'core.cache.LocMemCache',
+        'LOCATION': 'acjogos',
+    },
+    'file': {
+        'BACKEND': 'core.cache.FileBasedCache',
+        'LOCATION': config('CACHE_LOCATION', default=str(BASE_DIR / '.cache')),
+    },
+    'redis': {
+        'BACKEND': 'core.cache.RedisCache',
+        'LOCATION': config('CACHE_LOCATION', default='redis://127.0.0.1:6379/1'),
+    },
+}
+CACHES = {
+    'default': {
+        **CACHE_BACKENDS[CACHE_BACKEND],
+        'TIMEOUT': CACHE_TIMEOUT,
+        'KEY_PREFIX': 'acjogos',
+    }
+}
+
+# Sessões: cached_db (padrão) lê do cache e só vai ao banco em miss ou ao salvar;
+# signed_cookies não toca no banco; db é o comportamento padrão do Django
+SESSION_ENGINES = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'cache': 'django.contrib.sessions.backends.cache',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+}
+SESSION_ENGINE = SESSION_ENGINES[config('SESSION_MODE', default='cached_db')]
+
 AUTH_USER_MODEL = 'accounts.Usuario'
 
 AUTH_PASSWORD_VALIDATORS = [
@@ -90,6 +156,49 @@ AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.NumericPasswordValidator'},
 ]
 
+# Busca de membros sem PostgreSQL (accounts/busca.py): só os de maior rank entram no IN e
+# no CASE da consulta, para um termo curto não gerar um SQL com um parâmetro por membro
+BUSCA_MAX_CANDIDATOS = config('BUSCA_MAX_CANDIDATOS', default=500, cast=int)
+
+# Hash de senhas (accounts/hashers.py). O primeiro da lista gera os hashes novos; os outros
+# só conferem hashes antigos, refeitos com o preferido no próximo login. Custos medidos no
+# servidor com `manage.py calibrar_senhas`
+SENHA_ALGORITMO = config('SENHA_ALGORITMO', default='argon2' if find_spec('argon2') else 'scrypt')
+SENHA_HASHERS = {
+    'argon2': 'accounts.hashers.Argon2Calibrado',
+    'scrypt': 'accounts.hashers.ScryptCalibrado',
+    'pbkdf2': 'accounts.hashers.PBKDF2Calibrado',
+}
+PASSWORD_HASHERS = [SENHA_HASHERS[SENHA_ALGORITMO]] + [
+    caminho for algoritmo, caminho in SENHA_HASHERS.items() if algoritmo != SENHA_ALGORITMO
+]
+SENHA_ARGON2_TIME_COST = config('SENHA_ARGON2_TIME_COST', default=3, cast=int)
+SENHA_ARGON2_MEMORY_COST = config('SENHA_ARGON2_MEMORY_COST', default=64 * 1024, cast=int)  # KiB
+SENHA_ARGON2_PARALLELISM = config('SENHA_ARGON2_PARALLELISM', default=1, cast=int)
+SENHA_SCRYPT_N = config('SENHA_SCRYPT_N', default=2**17, cast=int)
+SENHA_SCRYPT_R = config('SENHA_SCRYPT_R', default=8, cast=int)
+SENHA_SCRYPT_P = config('SENHA_SCRYPT_P', default=1, cast=int)
+SENHA_PBKDF2_ITERACOES = config('SENHA_PBKDF2_ITERACOES', default=870000, cast=int)
+# Processos por worker que calculam os hashes, com prioridade baixa (nice) para não
+# disputar a CPU com as requisições; 0 calcula na própria thread da requisição. O total no
+# servidor é workers x SENHA_PROCESSOS, cada um com até SENHA_ARGON2_MEMORY_COST de memória
+# por hash: com os 2*cpu+1 workers do gunicorn.conf.py, 1 já dá mais processos que CPUs
+SENHA_PROCESSOS = config('SENHA_PROCESSOS', default=1, cast=int)
+SENHA_PRIORIDADE = config('SENHA_PRIORIDADE', default=10, cast=int)
+
+# Limite de tentativas (core.middleware.LimiteTentativasMiddleware): por rota, o campo com o
+# usuário e (máximo, segundos) por IP e por usuário, em janela deslizante no cache LIMITES_CACHE.
+# Com 'so_falhas' só contam os POSTs que não redirecionaram (senha errada). Atrás de um proxy,
+# LIMITES_CABECALHO_IP=HTTP_X_FORWARDED_FOR usa o endereço que o proxy acrescentou
+LIMITES_ATIVOS = config('LIMITES_ATIVOS', default=True, cast=bool)
+LIMITES_CACHE = config('LIMITES_CACHE', default='default')
+LIMITES_CABECALHO_IP = config('LIMITES_CABECALHO_IP', default='')
+LIMITES_TENTATIVAS = {
+    'accounts:login': {'campo': 'username', 'por_ip': (30, 300), 'por_usuario': (5, 900), 'so_falhas': True},
+    'accounts:password_reset': {'campo': 'email', 'por_ip': (5, 900), 'por_usuario': (3, 3600)},
+    'accounts:registrar': {'por_ip': (10, 3600)},
+}
+
 LANGUAGE_CODE = 'pt-br'
 TIME_ZONE = 'America/Sao_Paulo'
 USE_I18N = True
@@ -99,9 +208,61 @@ STATIC_URL = '/static/'
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 STATICFILES_DIRS = [BASE_DIR / 'static']
 
+# Em produção os estáticos ganham hash no nome (cache de longa duração) e versões .gz/.br
+# geradas no collectstatic; em desenvolvimento e nos testes não exige o manifest
+ESTATICOS_COM_HASH = config('ESTATICOS_COM_HASH', default=not DEBUG, cast=bool)
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': ('core.storage.ManifestComprimidoStorage' if ESTATICOS_COM_HASH
+                    else 'django.contrib.staticfiles.storage.StaticFilesStorage'),
+    },
+}
+# Serve /static/ pelo próprio Django (gunicorn sem nginx na frente), com Cache-Control imutável
+SERVIR_ESTATICOS = config('SERVIR_ESTATICOS', default=False, cast=bool)
+
+# Compila rotas, traduções e templates no boot (core/aquecimento.py) em vez de na 1ª requisição
+AQUECER_NO_BOOT = config('AQUECER_NO_BOOT', default=not DEBUG, cast=bool)
+
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Uploads: os arquivos vão direto para arquivo temporário em blocos de 16KB, nunca
+# inteiros para a memória; campos com regra são validados pelos primeiros bytes
+FILE_UPLOAD_HANDLERS = ['core.uploads.StreamingUploadHandler']
+UPLOAD_REGRAS = {
+    'foto_perfil': {
+        'tipos': ['jpeg', 'png', 'gif', 'webp', 'avif'],
+        'max_bytes': 10 * 1024 * 1024,
+        'max_pixels': 40_000_000,
+    },
+}
+
+# Miniaturas das fotos de perfil geradas fora da requisição (False: gera na hora, útil em testes)
+MINIATURAS_ASSINCRONAS = config('MINIATURAS_ASSINCRONAS', default=True, cast=bool)
+
+# Respostas de pesquisas acumuladas em memória e gravadas em lote (False: grava cada uma na hora)
+PESQUISAS_BUFFER_ASSINCRONO = config('PESQUISAS_BUFFER_ASSINCRONO', default=True, cast=bool)
+PESQUISAS_BUFFER_LOTE = config('PESQUISAS_BUFFER_LOTE', default=500, cast=int)
+PESQUISAS_BUFFER_INTERVALO = config('PESQUISAS_BUFFER_INTERVALO', default=1.0, cast=float)
+
+# Verificador de links (links/verificacao.py): conexões simultâneas, timeout por
+# requisição e por quanto tempo o resultado de uma URL vale sem voltar à rede
+LINKS_VERIFICACAO_CONCORRENCIA = config('LINKS_VERIFICACAO_CONCORRENCIA', default=20, cast=int)
+LINKS_VERIFICACAO_TIMEOUT = config('LINKS_VERIFICACAO_TIMEOUT', default=10, cast=float)
+LINKS_VERIFICACAO_CACHE = config('LINKS_VERIFICACAO_CACHE', default=3600, cast=int)
+
+# Métricas por rota (tempo, SQL, templates, bytes) em /admin/metricas/ e, no formato do
+# Prometheus, em /metricas/ para staff ou com o cabeçalho "Authorization: Bearer METRICAS_TOKEN"
+METRICAS_ATIVAS = config('METRICAS_ATIVAS', default=False, cast=bool)
+METRICAS_TOKEN = config('METRICAS_TOKEN', default='')
+
+# Cliques dos links somados em memória e gravados a cada intervalo (False: UPDATE a cada clique)
+LINKS_CLIQUES_ASSINCRONO = config('LINKS_CLIQUES_ASSINCRONO', default=True, cast=bool)
+LINKS_CLIQUES_INTERVALO = config('LINKS_CLIQUES_INTERVALO', default=5.0, cast=float)
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 LOGIN_URL = 'accounts:login'
@@ -111,11 +272,39 @@ LOGOUT_REDIRECT_URL = 'accounts:home'
 CRISPY_ALLOWED_TEMPLATE_PACKS = "bootstrap5"
 CRISPY_TEMPLATE_PACK = "bootstrap5"
 
-EMAIL_BACKEND = config('EMAIL_BACKEND', 
-                       default='django.core.mail.backends.console.EmailBackend')
+# E-mail: o EMAIL_BACKEND padrão só grava as mensagens na fila (core/email.py); quem fala com
+# o servidor é o EMAIL_ENTREGA_BACKEND, numa thread de fundo que reaproveita a conexão SMTP.
+# Em produção: EMAIL_ENTREGA_BACKEND=django.core.mail.backends.smtp.EmailBackend
+EMAIL_BACKEND = config('EMAIL_BACKEND', default='core.email.FilaEmailBackend')
+EMAIL_ENTREGA_BACKEND = config('EMAIL_ENTREGA_BACKEND',
+                               default='django.core.mail.backends.console.EmailBackend')
+EMAIL_HOST = config('EMAIL_HOST', default='smtp.gmail.com')
+EMAIL_PORT = config('EMAIL_PORT', default=587, cast=int)
+EMAIL_USE_TLS = config('EMAIL_USE_TLS', default=True, cast=bool)
+EMAIL_HOST_USER = config('EMAIL_HOST_USER', default='')
+EMAIL_HOST_PASSWORD = config('EMAIL_HOST_PASSWORD', default='')
+EMAIL_TIMEOUT = config('EMAIL_TIMEOUT', default=30, cast=int)
+# Fila: mensagens por lote, segundos entre varreduras por retentativas, espera da 1ª retentativa
+# (dobra a cada falha), tentativas até desistir e segundos até fechar a conexão SMTP parada.
+# EMAIL_FILA_PRAZO_LOTE: segundos de envio por lote, abaixo dos 10 minutos da reserva
+# (core.email.RESERVA); o que sobrar volta para a fila.
+# EMAIL_FILA_ASSINCRONA=False entrega na própria chamada do send_mail (útil em testes)
+EMAIL_FILA_ASSINCRONA = config('EMAIL_FILA_ASSINCRONA', default=True, cast=bool)
+EMAIL_FILA_LOTE = config('EMAIL_FILA_LOTE', default=50, cast=int)
+EMAIL_FILA_INTERVALO = config('EMAIL_FILA_INTERVALO', default=30.0, cast=float)
+EMAIL_FILA_ESPERA = config('EMAIL_FILA_ESPERA', default=30, cast=int)
+EMAIL_FILA_TENTATIVAS = config('EMAIL_FILA_TENTATIVAS', default=8, cast=int)
+EMAIL_FILA_PRAZO_LOTE = config('EMAIL_FILA_PRAZO_LOTE', default=300, cast=int)
+EMAIL_CONEXAO_OCIOSA = config('EMAIL_CONEXAO_OCIOSA', default=60.0, cast=float)
 DEFAULT_FROM_EMAIL = config('DEFAULT_FROM_EMAIL', 
                             default='noreply@acjogos-rj.org.br')
 
+# Comunicados em massa (comunicados/envio.py): mensagens por segundo no total (0 = sem limite),
+# conexões SMTP simultâneas e destinatários por lote (cada lote é um ponto de retomada)
+COMUNICADOS_TAXA = config('COMUNICADOS_TAXA', default=10.0, cast=float)
+COMUNICADOS_CONEXOES = config('COMUNICADOS_CONEXOES', default=4, cast=int)
+COMUNICADOS_LOTE = config('COMUNICADOS_LOTE', default=100, cast=int)
+
 from django.contrib.messages import constants as messages
 MESSAGE_TAGS = {
     messages.DEBUG: 'alert-info',
@@ -1,10 +1,14 @@
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, include, re_path
 from django.conf import settings
 from django.conf.urls.static import static
+from core import views as core_views
 
 urlpatterns = [
+    path('admin/cache/', admin.site.admin_view(core_views.cache_view), name='cache_stats'),
+    path('admin/metricas/', admin.site.admin_view(core_views.metricas_view), name='metricas'),
     path('admin/', admin.site.urls),
+    path('metricas/', core_views.metricas_prometheus_view, name='metricas_prometheus'),
     path('', include('accounts.urls')),
     path('empresas/', include('empresas.urls')),
     path('projetos/', include('projetos.urls')),
@@ -14,3 +18,8 @@ urlpatterns = [
 
 if settings.DEBUG:
     urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+
+if settings.SERVIR_ESTATICOS:
+    urlpatterns += [
+        re_path(rf'^{settings.STATIC_URL.strip("/")}/(?P<caminho>.+)$', core_views.estatico_view),
+    ]
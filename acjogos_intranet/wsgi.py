@@ -9,10 +9,17 @@ https://docs.djangoproject.com/en/5.1/howto/deployment/wsgi/
 
 import os
 
+from django.conf import settings
 from django.core.wsgi import get_wsgi_application
 
 # Define o arquivo de configurações a ser usado, apontando para o seu settings.py
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'acjogos_intranet.settings')
 
 # Inicia a aplicação WSGI
-application = get_wsgi_application()
\ No newline at end of file
+application = get_wsgi_application()
+
+# Rotas, traduções e templates prontos antes da primeira requisição; com o gunicorn em
+# preload_app isto roda uma vez no mestre e os workers herdam por fork
+if settings.AQUECER_NO_BOOT:
+    from core.aquecimento import aquecer
+    aquecer()
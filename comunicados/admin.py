@@ -0,0 +1,75 @@
+from django import forms
+from django.contrib import admin
+from django.template import TemplateSyntaxError
+
+from accounts.models import Usuario
+
+from .envio import compilar_corpo
+from .models import Comunicado, EntregaComunicado
+
+
+class ComunicadoForm(forms.ModelForm):
+    tipos_usuario = forms.MultipleChoiceField(
+        label='Tipos de usuário', choices=Usuario.TIPO_USUARIO, required=False,
+        widget=forms.CheckboxSelectMultiple, help_text='Nenhum marcado: todos os tipos.',
+    )
+    estados = forms.MultipleChoiceField(
+        choices=Usuario.ESTADOS_BRASIL, required=False,
+        widget=forms.CheckboxSelectMultiple, help_text='Nenhum marcado: todos os estados.',
+    )
+
+    class Meta:
+        model = Comunicado
+        fields = ('assunto', 'corpo', 'tipos_usuario', 'estados')
+
+    def clean_corpo(self):
+        corpo = self.cleaned_data['corpo']
+        try:
+            compilar_corpo(corpo)
+        except TemplateSyntaxError as erro:
+            raise forms.ValidationError(f'Modelo inválido: {erro}')
+        return corpo
+
+
+class ComunicadoAdmin(admin.ModelAdmin):
+    form = ComunicadoForm
+    list_display = ('assunto', 'status', 'enviados', 'falhas', 'incertos', 'criado_em', 'concluido_em')
+    list_filter = ('status',)
+    search_fields = ('assunto',)
+    readonly_fields = ('status', 'iniciado_em', 'atualizado_em', 'concluido_em', 'enviados', 'falhas', 'incertos')
+    actions = ['agendar_envio']
+
+    @admin.action(description='Agendar o envio dos comunicados selecionados')
+    def agendar_envio(self, request, queryset):
+        quantidade = queryset.filter(status=Comunicado.RASCUNHO).update(status=Comunicado.AGENDADO)
+        self.message_user(request, f'{quantidade} comunicados agendados; o envio sai pelo comando '
+                                   f'enviar_comunicados.')
+
+    def get_readonly_fields(self, request, obj=None):
+        campos = super().get_readonly_fields(request, obj)
+        # Depois de agendado o texto não muda: parte dos membros já pode ter recebido
+        if obj is not None and obj.status != Comunicado.RASCUNHO:
+            campos = ('assunto', 'corpo', 'tipos_usuario', 'estados') + tuple(campos)
+        return campos
+
+    def save_model(self, request, obj, form, change):
+        if not change and obj.criado_por_id is None:
+            obj.criado_por = request.user
+        super().save_model(request, obj, form, change)
+
+
+class EntregaComunicadoAdmin(admin.ModelAdmin):
+    list_display = ('comunicado', 'usuario', 'status', 'erro')
+    list_filter = ('status', 'comunicado')
+    list_select_related = ('comunicado', 'usuario')
+    raw_id_fields = ('comunicado', 'usuario')
+    show_full_result_count = False
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+admin.site.register(Comunicado, ComunicadoAdmin)
+admin.site.register(EntregaComunicado, EntregaComunicadoAdmin)
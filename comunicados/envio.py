@@ -0,0 +1,264 @@
+"""
+Envio de comunicados em massa para os membros ativos.
+
+Os destinatários são lidos com .iterator() (nada de carregar 50 mil membros
+na memória), em ordem de id, e enviados em lotes de COMUNICADOS_LOTE. O
+corpo é renderizado uma vez por segmento (tipo de usuário, estado): o nome
+de cada membro entra depois, por substituição de texto, então {{ nome }}
+não aceita filtros. O envio sai por COMUNICADOS_CONEXOES threads, cada uma
+com a sua conexão SMTP persistente (core.email.ConexaoEntrega, sem passar
+pela fila de e-mails), respeitando juntas COMUNICADOS_TAXA mensagens/s.
+
+Ponto de retomada: antes de enviar um lote, uma EntregaComunicado RESERVADA
+é gravada para cada destinatário; depois do lote, elas viram ENVIADA ou
+FALHOU. Rodar de novo depois de uma queda pula quem já tem entrega, ou seja,
+ninguém recebe duas vezes. As reservadas de um lote interrompido no meio não
+se sabe se foram enviadas: viram INCERTA e não são reenviadas, a não ser com
+reenviar_incertos. Se o servidor SMTP cair (falha temporária), o lote volta
+para a fila, o comunicado volta para AGENDADO e a próxima execução continua.
+"""
+import logging
+import smtplib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from itertools import islice
+
+from django.conf import settings
+from django.core.mail import EmailMessage
+from django.db import transaction
+from django.db.models import F, Q
+from django.template import TemplateSyntaxError, engines
+from django.utils import timezone
+
+from accounts.models import Usuario
+from core.email import ConexaoEntrega, permanente
+
+from .models import Comunicado, EntregaComunicado
+
+logger = logging.getLogger(__name__)
+
+MARCADOR_NOME = '\x00nome\x00'
+# Um comunicado ENVIANDO sem lote novo há mais que isso ficou órfão (processo morreu)
+ABANDONADO = timedelta(minutes=10)
+TIPOS = dict(Usuario.TIPO_USUARIO)
+ESTADOS = dict(Usuario.ESTADOS_BRASIL)
+
+
+class Taxa:
+    """Limite de mensagens por segundo compartilhado pelas threads de envio"""
+
+    def __init__(self, por_segundo):
+        self.intervalo = 1 / por_segundo if por_segundo else 0
+        self._proximo = time.monotonic()
+        self._trava = threading.Lock()
+
+    def aguardar(self):
+        if not self.intervalo:
+            return
+        with self._trava:
+            agora = time.monotonic()
+            # Sem acumular crédito enquanto ninguém envia: nada de rajadas depois de uma pausa
+            self._proximo = max(self._proximo, agora)
+            espera = self._proximo - agora
+            self._proximo += self.intervalo
+        if espera > 0:
+            time.sleep(espera)
+
+
+def compilar_corpo(corpo):
+    """Template do corpo (texto puro, sem escapar HTML); TemplateSyntaxError se o corpo for inválido"""
+    return engines['django'].from_string('{% autoescape off %}' + corpo + '{% endautoescape %}')
+
+
+class Modelos:
+    """Corpo do comunicado renderizado uma vez por (tipo de usuário, estado)"""
+
+    def __init__(self, comunicado):
+        self.template = compilar_corpo(comunicado.corpo)
+        self.renderizacoes = 0
+        self._textos = {}
+
+    def texto(self, tipo_usuario, estado, nome):
+        chave = (tipo_usuario, estado)
+        texto = self._textos.get(chave)
+        if texto is None:
+            texto = self.template.render({
+                'nome': MARCADOR_NOME,
+                'tipo_usuario': TIPOS.get(tipo_usuario, tipo_usuario),
+                'estado': ESTADOS.get(estado, estado),
+            })
+            self._textos[chave] = texto
+            self.renderizacoes += 1
+        return texto.replace(MARCADOR_NOME, nome)
+
+
+class Remetente:
+    """Pool de threads de envio, cada uma com a sua conexão SMTP persistente"""
+
+    def __init__(self, conexoes, taxa):
+        self.taxa = Taxa(taxa)
+        self.executor = ThreadPoolExecutor(max_workers=conexoes, thread_name_prefix='comunicados')
+        self._local = threading.local()
+        self._conexoes = []
+        self._trava = threading.Lock()
+
+    def _conexao(self):
+        conexao = getattr(self._local, 'conexao', None)
+        if conexao is None:
+            conexao = self._local.conexao = ConexaoEntrega()
+            with self._trava:
+                self._conexoes.append(conexao)
+        return conexao
+
+    def _enviar(self, item):
+        usuario_id, mensagem = item
+        self.taxa.aguardar()
+        try:
+            self._conexao().enviar(mensagem)
+        except (smtplib.SMTPException, OSError) as erro:
+            self._conexao().fechar()
+            return usuario_id, erro
+        return usuario_id, None
+
+    def enviar(self, itens):
+        """Lista de (usuario_id, erro ou None) para os (usuario_id, mensagem) recebidos"""
+        return list(self.executor.map(self._enviar, itens))
+
+    @property
+    def aberturas(self):
+        return sum(conexao.aberturas for conexao in self._conexoes)
+
+    def fechar(self):
+        self.executor.shutdown()
+        for conexao in self._conexoes:
+            conexao.fechar()
+
+
+def _marcar_incertos(comunicado, reenviar):
+    reservadas = comunicado.entregas.filter(status=EntregaComunicado.RESERVADA)
+    if reenviar:
+        reservadas.delete()
+        return
+    quantidade = reservadas.update(status=EntregaComunicado.INCERTA)
+    if quantidade:
+        logger.warning('Comunicado %s: %d envios interrompidos marcados como incertos', comunicado.pk, quantidade)
+        Comunicado.objects.filter(pk=comunicado.pk).update(incertos=F('incertos') + quantidade)
+
+
+def _registrar(comunicado, resultados):
+    """Confirma o lote; devolve True se o servidor falhou e o envio deve parar"""
+    enviados = [usuario_id for usuario_id, erro in resultados if erro is None]
+    definitivas = [(usuario_id, erro) for usuario_id, erro in resultados if erro is not None and permanente(erro)]
+    temporarias = [usuario_id for usuario_id, erro in resultados if erro is not None and not permanente(erro)]
+    entregas = comunicado.entregas
+    with transaction.atomic():
+        entregas.filter(usuario_id__in=enviados).update(status=EntregaComunicado.ENVIADA)
+        for usuario_id, erro in definitivas:
+            entregas.filter(usuario_id=usuario_id).update(status=EntregaComunicado.FALHOU, erro=str(erro)[:300])
+        # Não chegaram ao servidor: saem da lista para irem na próxima execução
+        entregas.filter(usuario_id__in=temporarias).delete()
+        Comunicado.objects.filter(pk=comunicado.pk).update(
+            enviados=F('enviados') + len(enviados), falhas=F('falhas') + len(definitivas),
+            atualizado_em=timezone.now(),
+        )
+    if temporarias:
+        logger.warning('Comunicado %s: servidor de e-mail falhou (%s); o envio para e continua depois',
+                       comunicado.pk, next(erro for _, erro in resultados if erro is not None and not permanente(erro)))
+    return bool(temporarias)
+
+
+def enviar_comunicado(comunicado, taxa=None, conexoes=None, lote=None, reenviar_incertos=False,
+                      ao_concluir_lote=None):
+    """
+    Envia (ou continua enviando) o comunicado; retorna True se terminou.
+
+    `ao_concluir_lote(comunicado)` é chamado após cada lote confirmado, com os
+    contadores atualizados.
+    """
+    lote = lote or settings.COMUNICADOS_LOTE
+    try:
+        modelos = Modelos(comunicado)
+    except TemplateSyntaxError:
+        # Corpo gravado sem passar pelo formulário: volta para rascunho em vez de ser
+        # reservado e falhar de novo a cada execução
+        logger.exception('Comunicado %s: corpo inválido, devolvido para rascunho', comunicado.pk)
+        Comunicado.objects.filter(pk=comunicado.pk).update(status=Comunicado.RASCUNHO)
+        comunicado.refresh_from_db()
+        raise
+    _marcar_incertos(comunicado, reenviar_incertos)
+    agora = timezone.now()
+    Comunicado.objects.filter(pk=comunicado.pk).update(status=Comunicado.ENVIANDO, atualizado_em=agora)
+    Comunicado.objects.filter(pk=comunicado.pk, iniciado_em__isnull=True).update(iniciado_em=agora)
+    remetente = Remetente(conexoes or settings.COMUNICADOS_CONEXOES,
+                          settings.COMUNICADOS_TAXA if taxa is None else taxa)
+    destinatarios = (
+        comunicado.destinatarios()
+        .exclude(pk__in=comunicado.entregas.values('usuario_id'))
+        .order_by('pk')
+        .values_list('pk', 'email', 'first_name', 'nome_social', 'tipo_usuario', 'estado')
+        .iterator(chunk_size=2000)
+    )
+    interrompido = False
+    try:
+        while bloco := list(islice(destinatarios, lote)):
+            EntregaComunicado.objects.bulk_create(
+                [EntregaComunicado(comunicado=comunicado, usuario_id=linha[0]) for linha in bloco]
+            )
+            itens = [
+                (pk, EmailMessage(comunicado.assunto, modelos.texto(tipo, estado, nome_social or nome or 'membro'),
+                                  None, [email]))
+                for pk, email, nome, nome_social, tipo, estado in bloco
+            ]
+            if _registrar(comunicado, remetente.enviar(itens)):
+                interrompido = True
+                break
+            if ao_concluir_lote:
+                comunicado.refresh_from_db()
+                ao_concluir_lote(comunicado)
+    finally:
+        remetente.fechar()
+    logger.info('Comunicado %s: corpo renderizado %d vezes, %d conexões SMTP abertas',
+                comunicado.pk, modelos.renderizacoes, remetente.aberturas)
+
+    if interrompido:
+        Comunicado.objects.filter(pk=comunicado.pk).update(status=Comunicado.AGENDADO)
+    else:
+        Comunicado.objects.filter(pk=comunicado.pk).update(status=Comunicado.CONCLUIDO,
+                                                           concluido_em=timezone.now())
+    comunicado.refresh_from_db()
+    return not interrompido
+
+
+def _abandonados(agora):
+    return (Q(status=Comunicado.ENVIANDO, atualizado_em__lt=agora - ABANDONADO)
+            | Q(status=Comunicado.ENVIANDO, atualizado_em__isnull=True, iniciado_em__lt=agora - ABANDONADO))
+
+
+def _reservar(disponiveis, agora):
+    reservados = []
+    for comunicado in disponiveis.order_by('criado_em', 'id'):
+        # UPDATE condicional: se outro processo pegou antes, não casa nenhuma linha
+        if disponiveis.filter(pk=comunicado.pk).update(status=Comunicado.ENVIANDO, atualizado_em=agora):
+            comunicado.refresh_from_db()
+            reservados.append(comunicado)
+    return reservados
+
+
+def reservar_agendados():
+    """Comunicados agendados ou órfãos, cada um reservado (ENVIANDO) para este processo"""
+    agora = timezone.now()
+    return _reservar(Comunicado.objects.filter(Q(status=Comunicado.AGENDADO) | _abandonados(agora)), agora)
+
+
+def reservar_comunicado(pk):
+    """
+    Reserva um comunicado em qualquer status, desde que outro processo não o esteja enviando.
+
+    Retorna o comunicado reservado ou None se ele não existe ou já está em envio.
+    """
+    agora = timezone.now()
+    disponiveis = Comunicado.objects.filter(pk=pk).filter(~Q(status=Comunicado.ENVIANDO) | _abandonados(agora))
+    reservados = _reservar(disponiveis, agora)
+    return reservados[0] if reservados else None
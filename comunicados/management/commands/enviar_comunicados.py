@@ -0,0 +1,56 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.template import TemplateSyntaxError
+
+from comunicados.envio import enviar_comunicado, reservar_agendados, reservar_comunicado
+from comunicados.models import Comunicado
+
+
+class Command(BaseCommand):
+    help = ('Envia os comunicados agendados (e continua os interrompidos). Rodar de novo depois de '
+            'uma queda retoma do último lote, sem reenviar para quem já recebeu')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--comunicado', type=int, default=None,
+                            help='Envia só este comunicado, mesmo que não esteja agendado')
+        parser.add_argument('--taxa', type=float, default=None,
+                            help='Mensagens por segundo (padrão: COMUNICADOS_TAXA; 0 = sem limite)')
+        parser.add_argument('--conexoes', type=int, default=None,
+                            help='Conexões SMTP simultâneas (padrão: COMUNICADOS_CONEXOES)')
+        parser.add_argument('--reenviar-incertos', action='store_true',
+                            help='Reenvia para quem estava no lote interrompido (pode duplicar)')
+
+    def handle(self, *args, **options):
+        if options['comunicado'] is not None:
+            pk = options['comunicado']
+            # Mesma reserva condicional do cron: nunca dois processos enviando o mesmo comunicado
+            comunicado = reservar_comunicado(pk)
+            if comunicado is None:
+                if not Comunicado.objects.filter(pk=pk).exists():
+                    raise CommandError(f'Comunicado {pk} não existe.')
+                raise CommandError(f'Comunicado {pk} já está sendo enviado por outro processo.')
+            comunicados = [comunicado]
+        else:
+            comunicados = reservar_agendados()
+        if not comunicados:
+            self.stdout.write('Nenhum comunicado agendado.')
+
+        for comunicado in comunicados:
+            self.stdout.write(f'{comunicado.assunto}: {comunicado.destinatarios().count()} destinatários')
+            try:
+                concluido = enviar_comunicado(
+                    comunicado, taxa=options['taxa'], conexoes=options['conexoes'],
+                    reenviar_incertos=options['reenviar_incertos'],
+                    ao_concluir_lote=lambda c: self.stdout.write(
+                        f'  {c.enviados} enviados, {c.falhas} falhas, {c.incertos} incertos'
+                    ),
+                )
+            except TemplateSyntaxError as erro:
+                self.stderr.write(f'Corpo inválido ({erro}); comunicado devolvido para rascunho.')
+                continue
+            resumo = (f'{comunicado.enviados} enviados, {comunicado.falhas} falhas, '
+                      f'{comunicado.incertos} incertos.')
+            if concluido:
+                self.stdout.write(self.style.SUCCESS(f'Concluído: {resumo}'))
+            else:
+                self.stdout.write(self.style.WARNING(f'Interrompido pelo servidor de e-mail: {resumo} '
+                                                     f'Rode de novo para continuar.'))
@@ -0,0 +1,57 @@
+# Generated by Django 5.1.3 on 2026-10-18 15:00
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Comunicado',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('assunto', models.CharField(max_length=200)),
+                ('corpo', models.TextField(help_text='Texto do e-mail. Aceita {{ nome }}, {{ tipo_usuario }} e {{ estado }}.')),
+                ('tipos_usuario', models.JSONField(blank=True, default=list, verbose_name='Tipos de usuário')),
+                ('estados', models.JSONField(blank=True, default=list)),
+                ('status', models.CharField(choices=[('RASCUNHO', 'Rascunho'), ('AGENDADO', 'Agendado'), ('ENVIANDO', 'Enviando'), ('CONCLUIDO', 'Concluído')], default='RASCUNHO', max_length=10)),
+                ('criado_em', models.DateTimeField(auto_now_add=True, verbose_name='Criado em')),
+                ('iniciado_em', models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Iniciado em')),
+                ('atualizado_em', models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Último lote em')),
+                ('concluido_em', models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Concluído em')),
+                ('enviados', models.PositiveIntegerField(default=0, editable=False)),
+                ('falhas', models.PositiveIntegerField(default=0, editable=False)),
+                ('incertos', models.PositiveIntegerField(default=0, editable=False)),
+                ('criado_por', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='comunicados_criados', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Comunicado',
+                'verbose_name_plural': 'Comunicados',
+                'ordering': ['-criado_em', '-id'],
+            },
+        ),
+        migrations.CreateModel(
+            name='EntregaComunicado',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('RESERVADA', 'Reservada'), ('ENVIADA', 'Enviada'), ('FALHOU', 'Falhou'), ('INCERTA', 'Incerta (envio interrompido)')], default='RESERVADA', max_length=10)),
+                ('erro', models.CharField(blank=True, max_length=300)),
+                ('comunicado', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='entregas', to='comunicados.comunicado')),
+                ('usuario', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='entregas_comunicados', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Entrega de comunicado',
+                'verbose_name_plural': 'Entregas de comunicados',
+                'indexes': [models.Index(fields=['comunicado', 'status'], name='entrega_comunicado_status_idx')],
+                'constraints': [models.UniqueConstraint(fields=('comunicado', 'usuario'), name='entrega_comunicado_unica')],
+            },
+        ),
+    ]
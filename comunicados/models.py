@@ -0,0 +1,84 @@
+from django.conf import settings
+from django.db import models
+
+from accounts.models import Usuario
+
+
+class Comunicado(models.Model):
+    RASCUNHO = 'RASCUNHO'
+    AGENDADO = 'AGENDADO'
+    ENVIANDO = 'ENVIANDO'
+    CONCLUIDO = 'CONCLUIDO'
+    STATUS = [
+        (RASCUNHO, 'Rascunho'),
+        (AGENDADO, 'Agendado'),
+        (ENVIANDO, 'Enviando'),
+        (CONCLUIDO, 'Concluído'),
+    ]
+
+    assunto = models.CharField(max_length=200)
+    corpo = models.TextField(help_text='Texto do e-mail. Aceita {{ nome }}, {{ tipo_usuario }} e {{ estado }}.')
+    # Vazio = todos
+    tipos_usuario = models.JSONField('Tipos de usuário', default=list, blank=True)
+    estados = models.JSONField(default=list, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS, default=RASCUNHO)
+    criado_por = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL,
+                                   null=True, blank=True, related_name='comunicados_criados')
+    criado_em = models.DateTimeField('Criado em', auto_now_add=True)
+
+    # Progresso, atualizado a cada lote por comunicados/envio.py
+    iniciado_em = models.DateTimeField('Iniciado em', null=True, blank=True, editable=False)
+    atualizado_em = models.DateTimeField('Último lote em', null=True, blank=True, editable=False)
+    concluido_em = models.DateTimeField('Concluído em', null=True, blank=True, editable=False)
+    enviados = models.PositiveIntegerField(default=0, editable=False)
+    falhas = models.PositiveIntegerField(default=0, editable=False)
+    incertos = models.PositiveIntegerField(default=0, editable=False)
+
+    class Meta:
+        verbose_name = 'Comunicado'
+        verbose_name_plural = 'Comunicados'
+        ordering = ['-criado_em', '-id']
+
+    def __str__(self):
+        return self.assunto
+
+    def destinatarios(self):
+        membros = Usuario.objects.filter(ativo=True).exclude(email='')
+        if self.tipos_usuario:
+            membros = membros.filter(tipo_usuario__in=self.tipos_usuario)
+        if self.estados:
+            membros = membros.filter(estado__in=self.estados)
+        return membros
+
+
+class EntregaComunicado(models.Model):
+    """Um destinatário de um comunicado: gravada como RESERVADA antes do envio e confirmada depois"""
+    RESERVADA = 'RESERVADA'
+    ENVIADA = 'ENVIADA'
+    FALHOU = 'FALHOU'
+    INCERTA = 'INCERTA'
+    STATUS = [
+        (RESERVADA, 'Reservada'),
+        (ENVIADA, 'Enviada'),
+        (FALHOU, 'Falhou'),
+        (INCERTA, 'Incerta (envio interrompido)'),
+    ]
+
+    comunicado = models.ForeignKey(Comunicado, on_delete=models.CASCADE, related_name='entregas')
+    usuario = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE,
+                                related_name='entregas_comunicados')
+    status = models.CharField(max_length=10, choices=STATUS, default=RESERVADA)
+    erro = models.CharField(max_length=300, blank=True)
+
+    class Meta:
+        verbose_name = 'Entrega de comunicado'
+        verbose_name_plural = 'Entregas de comunicados'
+        constraints = [
+            models.UniqueConstraint(fields=['comunicado', 'usuario'], name='entrega_comunicado_unica'),
+        ]
+        indexes = [
+            models.Index(fields=['comunicado', 'status'], name='entrega_comunicado_status_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.comunicado} -> {self.usuario_id}'
@@ -0,0 +1,131 @@
+import smtplib
+
+from django.core import mail
+from django.core.management import CommandError, call_command
+from django.core.mail.backends.locmem import EmailBackend
+from django.template import TemplateSyntaxError
+from django.test import TestCase, override_settings
+
+from accounts.models import Usuario
+
+from .admin import ComunicadoForm
+from .envio import Modelos, enviar_comunicado, reservar_agendados, reservar_comunicado
+from .models import Comunicado, EntregaComunicado
+
+
+class Queda(BaseException):
+    """O processo morrendo no meio do envio (não é capturada como erro de SMTP)"""
+
+
+class BackendQueCai(EmailBackend):
+    """locmem que derruba o processo depois de `limite` mensagens"""
+    limite = None
+
+    def send_messages(self, messages):
+        if BackendQueCai.limite is not None and len(mail.outbox) >= BackendQueCai.limite:
+            raise Queda()
+        return super().send_messages(messages)
+
+
+class BackendForaDoAr(EmailBackend):
+    def send_messages(self, messages):
+        raise smtplib.SMTPServerDisconnected('Connection unexpectedly closed')
+
+
+ENVIO = dict(EMAIL_ENTREGA_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+             COMUNICADOS_TAXA=0, COMUNICADOS_CONEXOES=2, COMUNICADOS_LOTE=4)
+
+
+@override_settings(**ENVIO)
+class EnvioComunicadoTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        Usuario.objects.bulk_create(
+            Usuario(username=f'membro{i}', email=f'membro{i}@example.com', first_name=f'Membro{i}',
+                    tipo_usuario='ASSOCIADO', estado='RJ' if i % 2 else 'SP')
+            for i in range(10)
+        )
+        Usuario.objects.create(username='inativo', email='inativo@example.com', tipo_usuario='ASSOCIADO',
+                               ativo=False)
+        Usuario.objects.create(username='semEmail', email='', tipo_usuario='ASSOCIADO')
+        Usuario.objects.create(username='diretor', email='diretor@example.com', first_name='Dir',
+                               tipo_usuario='DIRETORIA', estado='RJ')
+
+    def setUp(self):
+        BackendQueCai.limite = None
+        self.comunicado = Comunicado.objects.create(
+            assunto='Assembleia', corpo='Olá, {{ nome }} ({{ tipo_usuario }}, {{ estado }}) & cia.',
+            tipos_usuario=['ASSOCIADO'], status=Comunicado.AGENDADO,
+        )
+
+    def test_segmentacao(self):
+        self.assertEqual(self.comunicado.destinatarios().count(), 10)
+        self.comunicado.estados = ['RJ']
+        self.assertEqual(self.comunicado.destinatarios().count(), 5)
+
+    def test_envia_uma_vez_para_cada_destinatario(self):
+        self.assertTrue(enviar_comunicado(self.comunicado))
+        self.assertEqual(sorted(m.to[0] for m in mail.outbox), sorted(f'membro{i}@example.com' for i in range(10)))
+        corpo = next(m.body for m in mail.outbox if m.to == ['membro1@example.com'])
+        self.assertEqual(corpo, 'Olá, Membro1 (Associado, Rio de Janeiro) & cia.')
+        self.assertEqual((self.comunicado.status, self.comunicado.enviados), (Comunicado.CONCLUIDO, 10))
+        self.assertEqual(self.comunicado.entregas.filter(status=EntregaComunicado.ENVIADA).count(), 10)
+
+    def test_corpo_renderizado_uma_vez_por_segmento(self):
+        modelos = Modelos(self.comunicado)
+        for nome in ('Ana', 'Bia', 'Caio'):
+            modelos.texto('ASSOCIADO', 'RJ', nome)
+        self.assertEqual(modelos.texto('ASSOCIADO', 'SP', 'Duda'), 'Olá, Duda (Associado, São Paulo) & cia.')
+        self.assertEqual(modelos.renderizacoes, 2)
+
+    @override_settings(EMAIL_ENTREGA_BACKEND='comunicados.tests.BackendQueCai', COMUNICADOS_CONEXOES=1)
+    def test_retoma_depois_de_queda_sem_reenviar(self):
+        BackendQueCai.limite = 6
+        with self.assertRaises(Queda):
+            enviar_comunicado(self.comunicado)
+        self.assertEqual(len(mail.outbox), 6)
+        self.assertEqual(reservar_agendados(), [])  # ENVIANDO há pouco: ainda não é órfão
+
+        BackendQueCai.limite = None
+        with self.assertLogs('comunicados.envio', 'WARNING'):
+            self.assertTrue(enviar_comunicado(self.comunicado))
+        destinatarios = [m.to[0] for m in mail.outbox]
+        self.assertEqual(len(destinatarios), len(set(destinatarios)))
+        # O lote interrompido (membros 4 a 7) teve 2 enviados antes da queda e 2 não: os 4 ficam incertos
+        self.assertEqual((self.comunicado.enviados, self.comunicado.incertos), (6, 4))
+        self.assertEqual(len(destinatarios), 8)
+
+    @override_settings(EMAIL_ENTREGA_BACKEND='comunicados.tests.BackendForaDoAr')
+    def test_servidor_fora_do_ar_devolve_para_a_fila(self):
+        with self.assertLogs('comunicados.envio', 'WARNING'):
+            self.assertFalse(enviar_comunicado(self.comunicado))
+        self.assertEqual(self.comunicado.status, Comunicado.AGENDADO)
+        self.assertFalse(self.comunicado.entregas.exists())
+        self.assertEqual(reservar_agendados(), [self.comunicado])
+
+    def test_corpo_invalido_barrado_no_formulario_e_no_envio(self):
+        dados = {'assunto': 'Festa', 'corpo': 'Olá {% if nome %}'}
+        form = ComunicadoForm(dados)
+        self.assertIn('corpo', form.errors)
+        self.assertTrue(ComunicadoForm({**dados, 'corpo': 'Olá {% if nome %}{{ nome }}{% endif %}'}).is_valid())
+
+        # Gravado por fora do formulário: volta para rascunho e não é reservado de novo
+        Comunicado.objects.filter(pk=self.comunicado.pk).update(corpo='Olá {% if nome %}')
+        self.comunicado.refresh_from_db()
+        with self.assertLogs('comunicados.envio', 'ERROR'), self.assertRaises(TemplateSyntaxError):
+            enviar_comunicado(self.comunicado)
+        self.assertEqual(self.comunicado.status, Comunicado.RASCUNHO)
+        self.assertFalse(self.comunicado.entregas.exists())
+        self.assertEqual(reservar_agendados(), [])
+
+    def test_comunicado_avulso_passa_pela_mesma_reserva(self):
+        self.assertEqual(reservar_agendados(), [self.comunicado])
+        # Outro processo tentando o mesmo comunicado pelo --comunicado
+        self.assertIsNone(reservar_comunicado(self.comunicado.pk))
+        with self.assertRaisesMessage(CommandError, 'já está sendo enviado'):
+            call_command('enviar_comunicados', comunicado=self.comunicado.pk)
+        with self.assertRaisesMessage(CommandError, 'não existe'):
+            call_command('enviar_comunicados', comunicado=0)
+
+        rascunho = Comunicado.objects.create(assunto='Rascunho', corpo='Oi, {{ nome }}', tipos_usuario=['DIRETORIA'])
+        self.assertEqual(reservar_comunicado(rascunho.pk).status, Comunicado.ENVIANDO)
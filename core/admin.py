@@ -0,0 +1,29 @@
+from django.contrib import admin
+from django.utils import timezone
+
+from .models import EmailSaida
+
+
+class EmailSaidaAdmin(admin.ModelAdmin):
+    list_display = ('assunto', 'destinatarios', 'status', 'tentativas', 'proxima_tentativa', 'criado_em', 'enviado_em')
+    list_filter = ('status',)
+    search_fields = ('assunto',)
+    readonly_fields = ('remetente', 'destinatarios', 'assunto', 'status', 'tentativas', 'proxima_tentativa',
+                       'erro', 'criado_em', 'enviado_em')
+    show_full_result_count = False
+    actions = ['reenviar_agora']
+
+    @admin.action(description='Reenviar agora os e-mails selecionados')
+    def reenviar_agora(self, request, queryset):
+        from .email import entregador
+
+        quantidade = queryset.exclude(status=EmailSaida.ENVIADO).update(
+            status=EmailSaida.PENDENTE, tentativas=0, proxima_tentativa=timezone.now(), reserva='',
+        )
+        entregador.acordar()
+        self.message_user(request, f'{quantidade} e-mails voltaram para a fila.')
+
+    def has_add_permission(self, request):
+        return False
+
+admin.site.register(EmailSaida, EmailSaidaAdmin)
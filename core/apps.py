@@ -0,0 +1,14 @@
+from django.apps import AppConfig
+from django.conf import settings
+
+
+class CoreConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'core'
+    verbose_name = 'Infraestrutura'
+
+    def ready(self):
+        if settings.METRICAS_ATIVAS:
+            # Antes de qualquer conexão: as das threads do sync_to_async também precisam da medição de SQL
+            from .metricas import instrumentar_conexoes
+            instrumentar_conexoes()
@@ -0,0 +1,51 @@
+"""
+Aquecimento do processo antes da primeira requisição.
+
+Depois do django.setup(), boa parte do custo de "subir" ainda fica para a
+primeira requisição de cada worker: compilar as regex das rotas, carregar os
+catálogos de tradução e compilar os templates. `aquecer` faz isso no boot.
+Com o gunicorn em preload_app (gunicorn.conf.py) roda uma única vez no
+processo mestre e os workers já nascem prontos por fork (copy-on-write);
+um worker reciclado (max_requests) ou que caiu volta a atender em poucos
+milissegundos. Os templates só ficam em memória com o loader em cache, ou
+seja, sem DEBUG; com DEBUG o passo é pulado.
+"""
+import logging
+
+from django.conf import settings
+from django.template import TemplateSyntaxError, engines
+from django.urls import get_resolver
+from django.utils import translation
+
+logger = logging.getLogger(__name__)
+
+
+def compilar_rotas(resolver):
+    for padrao in resolver.url_patterns:
+        padrao.pattern.regex  # LocaleRegexDescriptor compila e guarda na primeira leitura
+        if hasattr(padrao, 'url_patterns'):
+            compilar_rotas(padrao)
+
+
+def compilar_templates():
+    motor = engines['django']
+    quantidade = 0
+    for pasta in motor.dirs:
+        for caminho in sorted(pasta.rglob('*.html')):
+            try:
+                motor.get_template(caminho.relative_to(pasta).as_posix())
+            except TemplateSyntaxError:
+                logger.warning('Template com erro de sintaxe: %s', caminho, exc_info=True)
+                continue
+            quantidade += 1
+    return quantidade
+
+
+def aquecer():
+    resolver = get_resolver()
+    compilar_rotas(resolver)
+    resolver.reverse_dict  # popula as tabelas usadas pelo {% url %} e pelo reverse()
+    with translation.override(settings.LANGUAGE_CODE):
+        translation.gettext('Aquecimento')  # carrega os catálogos .mo do idioma padrão
+    if not settings.DEBUG:
+        compilar_templates()
@@ -0,0 +1,152 @@
+"""
+Backends de cache com contagem de acertos/falhas.
+
+São os backends do próprio Django com um mixin que conta hits e misses por
+categoria de chave (páginas do cache_page, fragmentos do {% cache %}, demais).
+Os contadores são por processo e aparecem em /admin/cache/.
+
+Também fica aqui o cache_por_usuario das páginas iniciais dos módulos: cada
+usuário tem a sua cópia, e salvar os dados do módulo troca a versão da chave.
+"""
+import hashlib
+import threading
+import time
+from collections import defaultdict
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.cache.backends import filebased, locmem, redis
+from django.db import transaction
+
+_AUSENTE = object()
+
+
+class Contador:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._valores = defaultdict(lambda: {'hits': 0, 'misses': 0})
+
+    def registrar(self, chave, hits=0, misses=0):
+        categoria = categoria_da_chave(chave)
+        with self._lock:
+            valores = self._valores[categoria]
+            valores['hits'] += hits
+            valores['misses'] += misses
+
+    def resumo(self):
+        """Lista de (categoria, hits, misses, taxa de acerto em %) ordenada por categoria"""
+        with self._lock:
+            itens = sorted((k, dict(v)) for k, v in self._valores.items())
+        resumo = []
+        for categoria, valores in itens:
+            total = valores['hits'] + valores['misses']
+            taxa = 100 * valores['hits'] / total if total else 0.0
+            resumo.append((categoria, valores['hits'], valores['misses'], taxa))
+        return resumo
+
+    def zerar(self):
+        with self._lock:
+            self._valores.clear()
+
+
+contador = Contador()
+
+
+def categoria_da_chave(chave):
+    if chave.startswith('views.decorators.cache.'):
+        return 'páginas'
+    if chave.startswith('paginas:'):
+        return 'páginas por usuário'
+    if chave.startswith('template.cache.'):
+        return 'fragmento: ' + chave.split('.')[2]
+    return chave.split(':', 1)[0].split('.', 1)[0]
+
+
+class ContadorMixin:
+    def get(self, key, default=None, version=None):
+        valor = super().get(key, _AUSENTE, version)
+        if valor is _AUSENTE:
+            contador.registrar(key, misses=1)
+            return default
+        contador.registrar(key, hits=1)
+        return valor
+
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        valores = super().get_many(keys, version)
+        for key in keys:
+            if key in valores:
+                contador.registrar(key, hits=1)
+            else:
+                contador.registrar(key, misses=1)
+        return valores
+
+
+class LocMemCache(ContadorMixin, locmem.LocMemCache):
+    pass
+
+
+class FileBasedCache(ContadorMixin, filebased.FileBasedCache):
+    pass
+
+
+class RedisCache(ContadorMixin, redis.RedisCache):
+    pass
+
+
+def _chave_versao(modulo):
+    return f'paginas_versao:{modulo}'
+
+
+def invalidar_paginas(*modulos):
+    """
+    Troca a versão das páginas dos módulos: as cópias antigas expiram sem serem lidas.
+
+    A troca espera o commit; antes dele, outra requisição ainda leria os dados
+    antigos e os guardaria com a versão nova.
+    """
+    def trocar():
+        for modulo in modulos:
+            try:
+                cache.incr(_chave_versao(modulo))
+            except ValueError:
+                # Versão já expulsa do cache: um valor novo que não repete nenhum anterior
+                cache.set(_chave_versao(modulo), time.time_ns(), None)
+    transaction.on_commit(trocar)
+
+
+def _chave_pagina(modulo, request, versao):
+    caminho = hashlib.md5(request.get_full_path().encode()).hexdigest()
+    return f'paginas:{modulo}:{versao}:{request.user.pk}:{caminho}'
+
+
+def _guardavel(response):
+    # Página que grava cookie (CSRF, sessão) não pode voltar do cache para outra requisição
+    return response.status_code == 200 and not response.streaming and not response.cookies
+
+
+def cache_por_usuario(modulo):
+    """
+    Cacheia o GET de uma view assíncrona por usuário e URL completa, por
+    CACHE_PAGINAS_TIMEOUT.
+
+    A chave leva a versão do módulo; os sinais de cada app chamam
+    invalidar_paginas(modulo) quando os dados que a página mostra mudam. Vai
+    depois do login_required, que já garante um request.user autenticado.
+    """
+    def decorator(view):
+        @wraps(view)
+        async def _view(request, *args, **kwargs):
+            if request.method != 'GET':
+                return await view(request, *args, **kwargs)
+            versao = await cache.aget_or_set(_chave_versao(modulo), time.time_ns, None)
+            chave = _chave_pagina(modulo, request, versao)
+            response = await cache.aget(chave)
+            if response is None:
+                response = await view(request, *args, **kwargs)
+                if _guardavel(response):
+                    await cache.aset(chave, response, settings.CACHE_PAGINAS_TIMEOUT)
+            return response
+        return _view
+    return decorator
@@ -0,0 +1,277 @@
+"""
+Fila de saída de e-mails.
+
+O EMAIL_BACKEND do projeto (FilaEmailBackend) não fala com o servidor SMTP:
+grava cada mensagem, já montada em MIME, na tabela EmailSaida e acorda o
+entregador. Um send_mail na view (recuperação de senha, cadastro) custa um
+INSERT, por mais lento que esteja o SMTP.
+
+O entregador é uma thread de fundo por processo que pega lotes de até
+EMAIL_FILA_LOTE mensagens e as envia pelo EMAIL_ENTREGA_BACKEND (o SMTP de
+verdade) numa única conexão, mantida aberta entre lotes até ficar
+EMAIL_CONEXAO_OCIOSA segundos sem uso. Falha temporária (servidor fora,
+conexão caiu, 4xx) reagenda a mensagem com espera exponencial; falha
+permanente (5xx, destinatário recusado) ou EMAIL_FILA_TENTATIVAS esgotadas
+marcam a mensagem como FALHOU, visível no admin.
+
+Vários processos (workers do gunicorn, o comando enviar_emails) podem entregar
+ao mesmo tempo: cada lote é reservado com um UPDATE que empurra
+proxima_tentativa para o futuro, e quem perde a corrida não vê a mensagem.
+Se o processo morrer no meio do lote, a reserva vence em RESERVA e a
+mensagem volta para a fila: a entrega é "pelo menos uma vez". Um lote para
+de enviar depois de EMAIL_FILA_PRAZO_LOTE segundos e devolve o que sobrou, para
+que nenhuma mensagem ainda reservada passe de RESERVA e seja pega por outro
+processo. Com EMAIL_FILA_ASSINCRONA=False a própria chamada entrega só as
+mensagens que acabou de gravar (testes).
+"""
+import atexit
+import logging
+import random
+import smtplib
+import threading
+import time
+import uuid
+from datetime import timedelta
+from email import message_from_bytes
+from email.message import Message
+
+from django.conf import settings
+from django.core.mail import get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+from django.core.mail.message import EmailMessage, MIMEMixin
+from django.db import DatabaseError, connection, transaction
+from django.utils import timezone
+
+from .models import EmailSaida
+
+logger = logging.getLogger(__name__)
+
+RESERVA = timedelta(minutes=10)
+ESPERA_MAXIMA = 3600
+
+
+class MimePronto(MIMEMixin, Message):
+    pass
+
+
+class EmailPronto(EmailMessage):
+    """Mensagem da fila para o backend de entrega: o MIME gravado vai como está"""
+
+    def __init__(self, registro):
+        super().__init__(subject=registro.assunto, from_email=registro.remetente, to=registro.destinatarios)
+        self.conteudo = bytes(registro.conteudo)
+
+    def message(self):
+        return message_from_bytes(self.conteudo, _class=MimePronto)
+
+    def recipients(self):
+        return self.to
+
+
+def enfileirar(mensagens):
+    """Grava as mensagens na fila; retorna os registros criados"""
+    registros = [
+        EmailSaida(
+            remetente=mensagem.from_email,
+            destinatarios=mensagem.recipients(),
+            assunto=str(mensagem.subject)[:255],
+            # Message-ID e Date são gerados aqui: uma nova tentativa reenvia a mesma mensagem
+            conteudo=mensagem.message().as_bytes(),
+        )
+        for mensagem in mensagens if mensagem.recipients()
+    ]
+    return EmailSaida.objects.bulk_create(registros)
+
+
+def espera(tentativas):
+    """Segundos até a próxima tentativa: 30s, 1min, 2min, ... até 1h, com ±20% de variação"""
+    return min(settings.EMAIL_FILA_ESPERA * 2 ** (tentativas - 1), ESPERA_MAXIMA) * random.uniform(0.8, 1.2)
+
+
+def reservar(lote, ids=None):
+    """Reserva até `lote` mensagens no horário (só entre `ids`, se informados)"""
+    agora = timezone.now()
+    pendentes = EmailSaida.objects.filter(status=EmailSaida.PENDENTE, proxima_tentativa__lte=agora)
+    if ids is not None:
+        pendentes = pendentes.filter(pk__in=ids)
+    ids = list(pendentes.order_by('proxima_tentativa', 'id').values_list('pk', flat=True)[:lote])
+    if not ids:
+        return []
+    reserva = uuid.uuid4().hex
+    # Só fica com as que nenhum outro processo reservou entre a consulta e o UPDATE
+    pendentes.filter(pk__in=ids).update(reserva=reserva, proxima_tentativa=agora + RESERVA)
+    return list(EmailSaida.objects.filter(pk__in=ids, reserva=reserva).order_by('proxima_tentativa', 'id'))
+
+
+def devolver(registros):
+    """Desfaz a reserva das mensagens não tentadas: voltam para a fila já no horário"""
+    EmailSaida.objects.filter(pk__in=[registro.pk for registro in registros],
+                              reserva=registros[0].reserva).update(reserva='', proxima_tentativa=timezone.now())
+
+
+def permanente(erro):
+    if isinstance(erro, smtplib.SMTPRecipientsRefused):
+        return True
+    return isinstance(erro, smtplib.SMTPResponseException) and 500 <= erro.smtp_code < 600
+
+
+def concluir(enviados, falhas):
+    """Marca os ids enviados e reagenda (ou desiste de) cada (registro, erro) das falhas"""
+    agora = timezone.now()
+    with transaction.atomic():
+        if enviados:
+            EmailSaida.objects.filter(pk__in=enviados).update(
+                status=EmailSaida.ENVIADO, enviado_em=agora, erro='', reserva='',
+            )
+        for registro, erro in falhas:
+            tentativas = registro.tentativas + 1
+            desistir = permanente(erro) or tentativas >= settings.EMAIL_FILA_TENTATIVAS
+            EmailSaida.objects.filter(pk=registro.pk).update(
+                status=EmailSaida.FALHOU if desistir else EmailSaida.PENDENTE,
+                tentativas=tentativas,
+                proxima_tentativa=agora + timedelta(seconds=espera(tentativas)),
+                erro=f'{type(erro).__name__}: {erro}'[:2000],
+                reserva='',
+            )
+
+
+class ConexaoEntrega:
+    """Conexão com o EMAIL_ENTREGA_BACKEND aberta no primeiro envio e mantida entre envios"""
+
+    def __init__(self):
+        self.aberturas = 0
+        self.usada_em = 0.0
+        self._backend = None
+
+    @property
+    def aberta(self):
+        return self._backend is not None
+
+    def _abrir(self):
+        if self._backend is None:
+            backend = get_connection(settings.EMAIL_ENTREGA_BACKEND, fail_silently=False)
+            backend.open()
+            self._backend = backend
+            self.aberturas += 1
+        return self._backend
+
+    def fechar(self):
+        if self._backend is not None:
+            backend, self._backend = self._backend, None
+            try:
+                backend.close()
+            except Exception:
+                logger.debug('Erro ao fechar a conexão de e-mail', exc_info=True)
+
+    def enviar(self, mensagem):
+        reaproveitada = self._backend is not None
+        try:
+            self._abrir().send_messages([mensagem])
+        except smtplib.SMTPServerDisconnected:
+            self.fechar()
+            if not reaproveitada:
+                raise
+            # O servidor derrubou a conexão parada: mais uma chance com uma conexão nova
+            self._abrir().send_messages([mensagem])
+        self.usada_em = time.monotonic()
+
+
+class Entregador:
+    def __init__(self, lote, intervalo):
+        self.lote = lote
+        self.intervalo = intervalo
+        self.conexao = ConexaoEntrega()
+        self._evento = threading.Event()
+        self._trava = threading.Lock()
+        self._envio = threading.Lock()
+        self._thread = None
+
+    def acordar(self):
+        with self._trava:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._executar, name='fila-emails', daemon=True)
+                self._thread.start()
+        self._evento.set()
+
+    def _executar(self):
+        while True:
+            # Sem aviso de mensagem nova, acorda de tempos em tempos para as retentativas
+            self._evento.wait(min(self.intervalo, settings.EMAIL_CONEXAO_OCIOSA))
+            self._evento.clear()
+            try:
+                self.entregar_pendentes()
+            except Exception:
+                logger.exception('Falha inesperada na fila de e-mails')
+            if self.conexao.aberta and time.monotonic() - self.conexao.usada_em > settings.EMAIL_CONEXAO_OCIOSA:
+                with self._envio:
+                    self.conexao.fechar()
+
+    def fechar(self):
+        self.conexao.fechar()
+
+    def entregar_lote(self, ids=None):
+        """(mensagens reservadas, enviadas, devolvidas sem tentar) em um lote"""
+        with self._envio:
+            connection.close_if_unusable_or_obsolete()
+            registros = reservar(self.lote, ids)
+            inicio = time.monotonic()
+            enviados, falhas, devolvidos = [], [], []
+            for indice, registro in enumerate(registros):
+                if indice and time.monotonic() - inicio > settings.EMAIL_FILA_PRAZO_LOTE:
+                    # SMTP lento: o resto volta para a fila antes que a reserva vença
+                    devolvidos = registros[indice:]
+                    devolver(devolvidos)
+                    break
+                try:
+                    self.conexao.enviar(EmailPronto(registro))
+                except Exception as erro:
+                    if permanente(erro):
+                        falhas.append((registro, erro))
+                        continue
+                    # Problema no servidor ou na conexão: o resto do lote espera junto
+                    logger.warning('Falha ao entregar e-mails: %s', erro)
+                    self.conexao.fechar()
+                    falhas.extend((pendente, erro) for pendente in registros[indice:])
+                    break
+                enviados.append(registro.pk)
+            if registros:
+                concluir(enviados, falhas)
+            return len(registros), len(enviados), len(devolvidos)
+
+    def entregar_pendentes(self, ids=None):
+        """Entrega o que já está no horário (só entre `ids`, se informados); retorna (enviadas, falhas)"""
+        enviadas = falhas = 0
+        while True:
+            try:
+                reservadas, ok, devolvidas = self.entregar_lote(ids)
+            except DatabaseError:
+                logger.warning('Banco indisponível; a fila de e-mails espera a próxima rodada', exc_info=True)
+                break
+            enviadas += ok
+            falhas += reservadas - ok - devolvidas
+            if reservadas < self.lote and not devolvidas:
+                break
+        return enviadas, falhas
+
+
+entregador = Entregador(lote=settings.EMAIL_FILA_LOTE, intervalo=settings.EMAIL_FILA_INTERVALO)
+atexit.register(entregador.fechar)
+
+
+class FilaEmailBackend(BaseEmailBackend):
+    def send_messages(self, email_messages):
+        try:
+            registros = enfileirar(email_messages)
+        except DatabaseError:
+            if not self.fail_silently:
+                raise
+            logger.exception('Não foi possível gravar e-mails na fila')
+            return 0
+        if registros:
+            if settings.EMAIL_FILA_ASSINCRONA:
+                transaction.on_commit(entregador.acordar)
+            else:
+                # Só as desta chamada: o resto da fila não entra na requisição de quem chamou
+                entregador.entregar_pendentes([registro.pk for registro in registros])
+                entregador.fechar()
+        return len(registros)
@@ -0,0 +1,65 @@
+"""
+Contadores de janela deslizante guardados no cache.
+
+Cada contador estima quantos eventos aconteceram nos últimos `segundos` com
+duas janelas fixas, a atual e a anterior: atual + anterior × (fração da
+janela anterior que ainda cai nos últimos `segundos`). São só duas chaves
+por (nome, valor), incrementadas com cache.incr (atômico no locmem e no
+Redis), em vez de uma lista de horários por cliente. Os valores (IP,
+usuário, e-mail) entram na chave como hash: assim nenhum caractere fora do
+permitido pelo memcached/Redis chega ao cache.
+
+Com o cache locmem os contadores são de cada processo, ou seja, com vários
+workers do gunicorn o limite efetivo é multiplicado pelo número de workers;
+com CACHE_BACKEND=redis (ou LIMITES_CACHE apontando para um cache Redis)
+todos os workers somam nos mesmos contadores.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+
+def _cache():
+    return caches[settings.LIMITES_CACHE]
+
+
+def _chaves(nome, valor, segundos, agora):
+    """(chave da janela atual, chave da anterior, fração decorrida da janela atual)"""
+    janela, resto = divmod(agora, segundos)
+    base = f'limite:{nome}:{hashlib.sha256(valor.encode()).hexdigest()[:24]}'
+    return f'{base}:{int(janela)}', f'{base}:{int(janela) - 1}', resto / segundos
+
+
+def contagem(nome, valor, segundos, agora=None):
+    """Estimativa de eventos registrados para `valor` nos últimos `segundos`"""
+    atual, anterior, decorrido = _chaves(nome, valor, segundos, time.time() if agora is None else agora)
+    valores = _cache().get_many([atual, anterior])
+    return valores.get(atual, 0) + valores.get(anterior, 0) * (1 - decorrido)
+
+
+def registrar(nome, valor, segundos, agora=None):
+    atual, _, _ = _chaves(nome, valor, segundos, time.time() if agora is None else agora)
+    cache = _cache()
+    # A chave vive duas janelas: enquanto é a atual e enquanto é a anterior
+    if cache.add(atual, 1, timeout=2 * segundos):
+        return
+    try:
+        cache.incr(atual)
+    except ValueError:
+        # Expirou entre o add e o incr
+        cache.set(atual, 1, timeout=2 * segundos)
+
+
+def zerar(nome, valor, segundos, agora=None):
+    atual, anterior, _ = _chaves(nome, valor, segundos, time.time() if agora is None else agora)
+    _cache().delete_many([atual, anterior])
+
+
+def excedido(nome, valor, limite, segundos, agora=None):
+    """0 se ainda cabe no limite; senão os segundos até o fim da janela atual (para o Retry-After)"""
+    agora = time.time() if agora is None else agora
+    if contagem(nome, valor, segundos, agora) < limite:
+        return 0
+    return int(segundos - agora % segundos) + 1
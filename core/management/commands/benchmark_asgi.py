@@ -0,0 +1,149 @@
+import asyncio
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.test.utils import setup_test_environment
+from django.urls import reverse
+
+from accounts.models import Usuario
+
+USERNAME = 'bench_asgi'
+URLS = ('accounts:dashboard', 'empresas:home', 'projetos:home', 'pesquisas:home', 'links:home')
+
+
+def servidores(workers, threads, porta):
+    """Comando de cada servidor: gunicorn com threads (WSGI) e uvicorn (ASGI)"""
+    return {
+        'WSGI': [sys.executable, '-m', 'gunicorn', 'acjogos_intranet.wsgi:application',
+                 '--worker-class', 'gthread', '--workers', str(workers), '--threads', str(threads),
+                 '--bind', f'127.0.0.1:{porta}', '--backlog', '2048', '--log-level', 'warning'],
+        'ASGI': [sys.executable, '-m', 'uvicorn', 'acjogos_intranet.asgi:application',
+                 '--workers', str(workers), '--host', '127.0.0.1', '--port', str(porta),
+                 '--backlog', '2048', '--no-access-log', '--log-level', 'warning'],
+    }
+
+
+def porta_livre():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+async def requisitar(leitor, escritor, caminho, cookie):
+    escritor.write((f'GET {caminho} HTTP/1.1\r\nHost: 127.0.0.1\r\n'
+                    f'Cookie: {cookie}\r\nConnection: keep-alive\r\n\r\n').encode())
+    await escritor.drain()
+    cabecalho = await leitor.readuntil(b'\r\n\r\n')
+    linhas = cabecalho.decode('latin-1').split('\r\n')
+    status = int(linhas[0].split()[1])
+    campos = dict(linha.lower().split(': ', 1) for linha in linhas[1:] if ': ' in linha)
+    await leitor.readexactly(int(campos.get('content-length', 0)))
+    return status, campos.get('connection') == 'close'
+
+
+async def cliente(porta, caminhos, cookie, fim, latencias, falhas, indice):
+    conexao = None
+    while time.perf_counter() < fim:
+        caminho = caminhos[indice % len(caminhos)]
+        indice += 1
+        inicio = time.perf_counter()
+        try:
+            if conexao is None:
+                conexao = await asyncio.open_connection('127.0.0.1', porta)
+            status, fechar = await asyncio.wait_for(requisitar(*conexao, caminho, cookie), 30)
+        except (OSError, asyncio.IncompleteReadError, asyncio.TimeoutError, ValueError):
+            falhas['conexão'] += 1
+            if conexao is not None:
+                conexao[1].close()
+            conexao = None
+            continue
+        latencias.append(time.perf_counter() - inicio)
+        if status != 200:
+            falhas['status'] += 1
+        if fechar:
+            conexao[1].close()
+            conexao = None
+    if conexao is not None:
+        conexao[1].close()
+
+
+async def carga(porta, caminhos, cookie, clientes, duracao):
+    latencias, falhas = [], {'conexão': 0, 'status': 0}
+    fim = time.perf_counter() + duracao
+    await asyncio.gather(*(cliente(porta, caminhos, cookie, fim, latencias, falhas, i)
+                           for i in range(clientes)))
+    return latencias, falhas
+
+
+async def esperar_servidor(porta, processo, limite=30):
+    fim = time.perf_counter() + limite
+    while time.perf_counter() < fim:
+        if processo.poll() is not None:
+            return False
+        try:
+            _, escritor = await asyncio.open_connection('127.0.0.1', porta)
+            escritor.close()
+            return True
+        except OSError:
+            await asyncio.sleep(0.2)
+    return False
+
+
+class Command(BaseCommand):
+    help = ('Sobe o projeto com gunicorn (WSGI) e com uvicorn (ASGI) e mede req/s e latência '
+            'p50/p99 do dashboard e das páginas dos módulos com muitos clientes simultâneos')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clientes', type=int, default=500, help='Conexões simultâneas (padrão: 500)')
+        parser.add_argument('--duracao', type=float, default=15, help='Segundos por servidor (padrão: 15)')
+        parser.add_argument('--workers', type=int, default=1, help='Processos de cada servidor (padrão: 1)')
+        parser.add_argument('--threads', type=int, default=8, help='Threads por worker do gunicorn (padrão: 8)')
+        parser.add_argument('--modos', default='WSGI,ASGI', help='Servidores separados por vírgula')
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        usuario, _ = Usuario.objects.get_or_create(username=USERNAME)
+        client = Client()
+        client.force_login(usuario)
+        cookie = f'{settings.SESSION_COOKIE_NAME}={client.cookies[settings.SESSION_COOKIE_NAME].value}'
+        caminhos = [reverse(nome) for nome in URLS]
+
+        # Sem DEBUG, como em produção (o DEBUG guarda todas as consultas de cada requisição);
+        # sem manifest porque o benchmark não depende de um collectstatic prévio
+        env = {**os.environ, 'DEBUG': 'False', 'ALLOWED_HOSTS': '127.0.0.1',
+               'ESTATICOS_COM_HASH': 'False', 'PYTHONPATH': str(settings.BASE_DIR)}
+        self.stdout.write(f'{options["clientes"]} clientes, {options["duracao"]:.0f}s por servidor, '
+                          f'{options["workers"]} worker(s), {os.cpu_count()} CPU(s)')
+        self.stdout.write(f'{"servidor":<10} {"req/s":>8} {"p50":>9} {"p99":>9} {"reqs":>8} '
+                          f'{"erros conn":>10} {"não-200":>8}')
+        for modo in options['modos'].split(','):
+            porta = porta_livre()
+            comando = servidores(options['workers'], options['threads'], porta).get(modo.strip())
+            if comando is None:
+                raise CommandError(f'Servidor desconhecido: {modo}')
+            processo = subprocess.Popen(comando, env=env, cwd=settings.BASE_DIR)
+            try:
+                if not asyncio.run(esperar_servidor(porta, processo)):
+                    self.stderr.write(f'{modo}: o servidor não subiu (gunicorn/uvicorn instalados?)')
+                    continue
+                latencias, falhas = asyncio.run(
+                    carga(porta, caminhos, cookie, options['clientes'], options['duracao'])
+                )
+            finally:
+                processo.terminate()
+                processo.wait()
+            if len(latencias) < 2:
+                self.stderr.write(f'{modo}: nenhuma resposta')
+                continue
+            cortes = statistics.quantiles(latencias, n=100, method='inclusive')
+            self.stdout.write(f'{modo:<10} {len(latencias) / options["duracao"]:>8.0f} '
+                              f'{cortes[49] * 1000:>7.1f}ms {cortes[98] * 1000:>7.1f}ms {len(latencias):>8} '
+                              f'{falhas["conexão"]:>10} {falhas["status"]:>8}')
+        usuario.delete()
@@ -0,0 +1,123 @@
+import asyncio
+import statistics
+import threading
+import time
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client, override_settings
+from django.test.utils import setup_test_environment
+from django.urls import reverse
+
+from accounts.models import Usuario
+from core.email import entregador
+from core.management.commands.benchmark_asgi import porta_livre
+from core.models import EmailSaida
+
+PREFIXO = 'bench_email'
+MODOS = {
+    'SMTP na requisição': 'django.core.mail.backends.smtp.EmailBackend',
+    'fila': 'core.email.FilaEmailBackend',
+}
+
+
+class SmtpLento:
+    """Servidor SMTP local (aiosmtpd) com o atraso de um provedor externo na conexão e em cada envio"""
+
+    def __init__(self, atraso_conexao, atraso_envio):
+        self.atraso_conexao = atraso_conexao
+        self.atraso_envio = atraso_envio
+        self.conexoes = 0
+        self.recebidas = 0
+
+    async def handle_EHLO(self, server, session, envelope, hostname, responses):
+        self.conexoes += 1
+        session.host_name = hostname
+        await asyncio.sleep(self.atraso_conexao)
+        return responses
+
+    async def handle_DATA(self, server, session, envelope):
+        await asyncio.sleep(self.atraso_envio)
+        self.recebidas += 1
+        return '250 OK'
+
+
+class Command(BaseCommand):
+    help = ('Mede a latência do POST de recuperação de senha com um SMTP lento, enviando na '
+            'requisição e pela fila de e-mails, e quanto a fila leva para entregar tudo')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pedidos', type=int, default=40, help='Pedidos de recuperação (padrão: 40)')
+        parser.add_argument('--threads', type=int, default=8, help='Clientes simultâneos (padrão: 8)')
+        parser.add_argument('--atraso-conexao', type=float, default=0.3,
+                            help='Segundos para abrir cada conexão SMTP (padrão: 0.3)')
+        parser.add_argument('--atraso-envio', type=float, default=0.1,
+                            help='Segundos por mensagem no SMTP (padrão: 0.1)')
+
+    def handle(self, *args, **options):
+        try:
+            from aiosmtpd.controller import Controller
+        except ImportError:
+            raise CommandError('O benchmark usa o aiosmtpd como servidor SMTP local: pip install aiosmtpd')
+
+        setup_test_environment()
+        Usuario.objects.filter(username__startswith=PREFIXO).delete()
+        # O PasswordResetForm ignora contas sem senha utilizável; um hash só serve para todas
+        senha = make_password(PREFIXO)
+        usuarios = Usuario.objects.bulk_create(
+            Usuario(username=f'{PREFIXO}{i}', email=f'{PREFIXO}{i}@example.com', password=senha)
+            for i in range(options['pedidos'])
+        )
+        porta = porta_livre()
+        self.stdout.write(f'{options["pedidos"]} pedidos, {options["threads"]} clientes, SMTP com '
+                          f'{options["atraso_conexao"]:.1f}s por conexão e {options["atraso_envio"]:.1f}s por mensagem')
+        self.stdout.write(f'{"modo":<20} {"p50":>8} {"p99":>8} {"entregues em":>13} {"conexões SMTP":>14}')
+        try:
+            for modo, backend in MODOS.items():
+                servidor = SmtpLento(options['atraso_conexao'], options['atraso_envio'])
+                controller = Controller(servidor, hostname='127.0.0.1', port=porta)
+                controller.start()
+                try:
+                    with override_settings(
+                        EMAIL_BACKEND=backend, EMAIL_FILA_ASSINCRONA=True, LIMITES_ATIVOS=False,
+                        EMAIL_ENTREGA_BACKEND='django.core.mail.backends.smtp.EmailBackend',
+                        EMAIL_HOST='127.0.0.1', EMAIL_PORT=porta, EMAIL_USE_TLS=False, EMAIL_TIMEOUT=30,
+                    ):
+                        self.medir(modo, usuarios, servidor, options)
+                finally:
+                    entregador.fechar()
+                    controller.stop()
+        finally:
+            EmailSaida.objects.filter(destinatarios__0__startswith=PREFIXO).delete()
+            Usuario.objects.filter(username__startswith=PREFIXO).delete()
+
+    def medir(self, modo, usuarios, servidor, options):
+        url = reverse('accounts:password_reset')
+        latencias = []
+        fila = list(usuarios)
+        trava = threading.Lock()
+
+        def pedir():
+            client = Client(raise_request_exception=False)
+            while True:
+                with trava:
+                    if not fila:
+                        return
+                    usuario = fila.pop()
+                inicio = time.perf_counter()
+                client.post(url, {'email': usuario.email})
+                latencias.append(time.perf_counter() - inicio)
+
+        inicio = time.perf_counter()
+        threads = [threading.Thread(target=pedir) for _ in range(options['threads'])]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        # Com a fila o POST volta antes da entrega: o total só conta quando o SMTP recebeu tudo
+        while servidor.recebidas < len(usuarios) and time.perf_counter() - inicio < 120:
+            time.sleep(0.05)
+        entregues = time.perf_counter() - inicio
+        cortes = statistics.quantiles(latencias, n=100, method='inclusive')
+        self.stdout.write(f'{modo:<20} {cortes[49] * 1000:>6.0f}ms {cortes[98] * 1000:>6.0f}ms '
+                          f'{entregues:>12.1f}s {servidor.conexoes:>14}')
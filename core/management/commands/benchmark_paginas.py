@@ -0,0 +1,83 @@
+import gzip
+import re
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.core.management.base import BaseCommand
+from django.test import Client
+from django.test.utils import setup_test_environment
+from django.urls import reverse
+
+from accounts.models import Usuario
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+USERNAME = 'bench_paginas'
+# (rótulo, nome da url, precisa de login)
+PAGINAS = (
+    ('home', 'accounts:home', False),
+    ('login', 'accounts:login', False),
+    ('registrar', 'accounts:registrar', False),
+    ('dashboard', 'accounts:dashboard', True),
+)
+RECURSOS = re.compile(r'<(?:link[^>]+rel="stylesheet"[^>]+href|script[^>]+src)="([^"]+)"')
+
+
+def tamanhos(conteudo):
+    """(bruto, gzip, brotli ou None)"""
+    br = len(brotli.compress(conteudo, quality=11)) if brotli is not None else None
+    return len(conteudo), len(gzip.compress(conteudo, compresslevel=9)), br
+
+
+def conteudo_estatico(url):
+    """Bytes de um recurso local referenciado pela página, ou None se for externo"""
+    if not url.startswith(settings.STATIC_URL):
+        return None
+    caminho = finders.find(url[len(settings.STATIC_URL):].split('?')[0])
+    if caminho is None:
+        return None
+    with open(caminho, 'rb') as arquivo:
+        return arquivo.read()
+
+
+def kb(valor):
+    return '-' if valor is None else f'{valor / 1024:.1f}KB'
+
+
+class Command(BaseCommand):
+    help = ('Mostra o peso de cada página (HTML + CSS/JS locais) bruto, com gzip e brotli, '
+            'na primeira visita e em visitas repetidas com os estáticos em cache')
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        usuario, _ = Usuario.objects.get_or_create(username=USERNAME)
+        anonimo, logado = Client(), Client()
+        logado.force_login(usuario)
+
+        self.stdout.write(f'{"página":<10} {"recursos":>8} {"externos":>8} {"HTML":>9} '
+                          f'{"1ª bruto":>9} {"1ª gzip":>9} {"1ª br":>9} {"repetida":>9}')
+        houve_externos = False
+        for rotulo, nome, precisa_login in PAGINAS:
+            resposta = (logado if precisa_login else anonimo).get(reverse(nome))
+            html = resposta.content
+            urls = RECURSOS.findall(html.decode())
+            locais = [c for c in map(conteudo_estatico, urls) if c is not None]
+            externos = len(urls) - len(locais)
+            houve_externos = houve_externos or externos > 0
+
+            totais = [tamanhos(html)] + [tamanhos(c) for c in locais]
+            bruto = sum(t[0] for t in totais)
+            comprimido = sum(t[1] for t in totais)
+            br = sum(t[2] for t in totais) if brotli is not None else None
+            # Com nomes com hash e Cache-Control imutável, a visita repetida só baixa o HTML
+            repetida = totais[0][1]
+            self.stdout.write(f'{rotulo:<10} {len(locais):>8} {externos:>8} {kb(len(html)):>9} '
+                              f'{kb(bruto):>9} {kb(comprimido):>9} {kb(br):>9} {kb(repetida):>9}')
+        if houve_externos:
+            self.stdout.write('Recursos externos (CDN) não entram na soma.')
+        if brotli is None:
+            self.stdout.write('Módulo brotli não instalado: coluna "1ª br" vazia.')
+        usuario.delete()
@@ -0,0 +1,130 @@
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from io import BytesIO
+
+from django.core.handlers.wsgi import WSGIRequest
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory, override_settings
+from django.test.client import BOUNDARY, MULTIPART_CONTENT
+
+# Configuração padrão do Django com o limite de memória de 10MB versus o handler em streaming
+MODOS = {
+    'memória 10MB': {
+        'FILE_UPLOAD_HANDLERS': [
+            'django.core.files.uploadhandler.MemoryFileUploadHandler',
+            'django.core.files.uploadhandler.TemporaryFileUploadHandler',
+        ],
+        'FILE_UPLOAD_MAX_MEMORY_SIZE': 10 * 1024 * 1024,
+    },
+    'streaming': {
+        'FILE_UPLOAD_HANDLERS': ['core.uploads.StreamingUploadHandler'],
+    },
+}
+
+
+def corpo_multipart(caminho, tamanho, invalido=False):
+    """Grava em disco, em blocos, um corpo multipart com uma 'foto' de `tamanho` bytes"""
+    from PIL import Image
+
+    if invalido:
+        inicio = b'MZ' + b'\x00' * 14
+    else:
+        # JPEG de verdade no início e lixo depois do EOI, ignorado pelos decodificadores
+        saida = BytesIO()
+        Image.new('RGB', (64, 64)).save(saida, 'JPEG')
+        inicio = saida.getvalue()
+    cabecalho = (
+        f'--{BOUNDARY}\r\n'
+        'Content-Disposition: form-data; name="foto_perfil"; filename="foto.jpg"\r\n'
+        'Content-Type: image/jpeg\r\n\r\n'
+    ).encode()
+    with open(caminho, 'wb') as arquivo:
+        arquivo.write(cabecalho + inicio)
+        restante = tamanho - len(inicio)
+        while restante > 0:
+            bloco = min(restante, 1024 * 1024)
+            arquivo.write(os.urandom(bloco))
+            restante -= bloco
+        arquivo.write(f'\r\n--{BOUNDARY}--\r\n'.encode())
+        return arquivo.tell()
+
+
+def rss_maximo_mb():
+    # ru_maxrss é em KB no Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class Command(BaseCommand):
+    help = ('Mede o pico de memória (RSS) do processo com vários uploads de foto_perfil '
+            'simultâneos, com o handler padrão em memória e com o handler em streaming')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--uploads', type=int, default=16, help='Uploads simultâneos (padrão: 16)')
+        parser.add_argument('--tamanho-mb', type=float, default=8, help='Tamanho de cada arquivo (padrão: 8)')
+        parser.add_argument('--invalidos', action='store_true',
+                            help='Envia arquivos com assinatura errada (mede a rejeição antecipada)')
+        parser.add_argument('--modo', help='Uso interno: mede um único modo')
+
+    def handle(self, *args, **options):
+        if options['modo']:
+            self.stdout.write(json.dumps(self.medir(options)))
+            return
+
+        self.stdout.write(f'{"modo":<14} {"RSS base":>10} {"RSS pico":>10} {"acréscimo":>10} {"tempo":>8} {"aceitos":>8}')
+        for modo in MODOS:
+            processo = subprocess.run(
+                [sys.executable, sys.argv[0], 'benchmark_uploads', '--modo', modo,
+                 '--uploads', str(options['uploads']), '--tamanho-mb', str(options['tamanho_mb'])]
+                + (['--invalidos'] if options['invalidos'] else []),
+                capture_output=True, text=True,
+            )
+            if processo.returncode != 0:
+                self.stderr.write(f'{modo}: falhou\n{processo.stderr}')
+                continue
+            r = json.loads(processo.stdout.strip().splitlines()[-1])
+            self.stdout.write(f'{modo:<14} {r["base_mb"]:>8.1f}MB {r["pico_mb"]:>8.1f}MB '
+                              f'{r["pico_mb"] - r["base_mb"]:>8.1f}MB {r["segundos"]:>7.2f}s {r["aceitos"]:>8}')
+
+    def medir(self, options):
+        tamanho = int(options['tamanho_mb'] * 1024 * 1024)
+        pasta = tempfile.mkdtemp()
+        caminhos = [os.path.join(pasta, f'corpo{i}') for i in range(options['uploads'])]
+        comprimentos = [corpo_multipart(c, tamanho, options['invalidos']) for c in caminhos]
+        base = rss_maximo_mb()
+        aceitos = []
+        barreira = threading.Barrier(len(caminhos))
+
+        def enviar(caminho, comprimento):
+            with open(caminho, 'rb') as corpo:
+                # O corpo vem do disco, como de um socket: só o que o handler guarda pesa na memória
+                environ = RequestFactory()._base_environ(
+                    REQUEST_METHOD='POST', PATH_INFO='/', CONTENT_TYPE=MULTIPART_CONTENT,
+                    CONTENT_LENGTH=str(comprimento), **{'wsgi.input': corpo},
+                )
+                request = WSGIRequest(environ)
+                barreira.wait()
+                arquivos = request.FILES
+                aceitos.append(len(arquivos))
+                time.sleep(0.2)  # segura o arquivo como uma view faria enquanto valida/salva
+                for arquivo in arquivos.values():
+                    arquivo.close()
+
+        with override_settings(**MODOS[options['modo']]):
+            inicio = time.perf_counter()
+            threads = [threading.Thread(target=enviar, args=a) for a in zip(caminhos, comprimentos)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            segundos = time.perf_counter() - inicio
+
+        for caminho in caminhos:
+            os.remove(caminho)
+        os.rmdir(pasta)
+        return {'base_mb': base, 'pico_mb': rss_maximo_mb(), 'segundos': segundos, 'aceitos': sum(aceitos)}
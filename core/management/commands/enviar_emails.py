@@ -0,0 +1,39 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.email import entregador
+from core.models import EmailSaida
+
+
+class Command(BaseCommand):
+    help = ('Entrega os e-mails da fila que já estão no horário (para o cron, ou contínuo com '
+            '--continuo) e remove os enviados há mais de --limpar-dias dias')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--continuo', action='store_true',
+                            help='Fica rodando, como um processo entregador dedicado')
+        parser.add_argument('--intervalo', type=float, default=5,
+                            help='Segundos entre varreduras no modo contínuo (padrão: 5)')
+        parser.add_argument('--limpar-dias', type=int, default=None,
+                            help='Remove os e-mails enviados há mais de N dias')
+
+    def handle(self, *args, **options):
+        if options['limpar_dias'] is not None:
+            limite = timezone.now() - timedelta(days=options['limpar_dias'])
+            removidos, _ = EmailSaida.objects.filter(status=EmailSaida.ENVIADO, enviado_em__lt=limite).delete()
+            self.stdout.write(f'{removidos} e-mails enviados removidos da fila.')
+
+        try:
+            while True:
+                enviadas, falhas = entregador.entregar_pendentes()
+                if enviadas or falhas or not options['continuo']:
+                    estilo = self.style.WARNING if falhas else self.style.SUCCESS
+                    self.stdout.write(estilo(f'{enviadas} e-mails enviados, {falhas} com falha.'))
+                if not options['continuo']:
+                    break
+                time.sleep(options['intervalo'])
+        finally:
+            entregador.fechar()
@@ -0,0 +1,201 @@
+import http.client
+import importlib.util
+import json
+import os
+import re
+import signal
+import statistics
+import subprocess
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.management.commands.benchmark_asgi import porta_livre
+
+# Não deveriam ser carregados no boot nem na primeira requisição de uma página comum
+MODULOS_ADIADOS = ('PIL', 'openpyxl', 'brotli', 'accounts.importacao', 'links.verificacao')
+URL_TESTE = '/login/'
+
+# Roda num interpretador novo: o mesmo caminho de um worker (import do wsgi) + duas requisições
+SCRIPT = '''
+import io, json, sys, time
+inicio = time.perf_counter()
+from acjogos_intranet.wsgi import application
+boot = time.perf_counter()
+tempos, status = [], []
+for _ in range(2):
+    # environ à mão: importar django.test poluiria a lista de módulos carregados
+    ambiente = {{'REQUEST_METHOD': 'GET', 'PATH_INFO': {url!r}, 'SERVER_NAME': '127.0.0.1',
+                'SERVER_PORT': '80', 'wsgi.url_scheme': 'http', 'wsgi.input': io.BytesIO()}}
+    antes = time.perf_counter()
+    b''.join(application(ambiente, lambda s, h: status.append(s)))
+    tempos.append(time.perf_counter() - antes)
+print(json.dumps({{'boot': boot - inicio, 'requisicoes': tempos, 'status': status,
+                  'modulos': sorted(sys.modules)}}))
+'''
+
+LINHA_IMPORTTIME = re.compile(r'import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)')
+
+
+def ambiente_producao(**extra):
+    return {**os.environ, 'DJANGO_SETTINGS_MODULE': 'acjogos_intranet.settings', 'DEBUG': 'False',
+            'ALLOWED_HOSTS': 'testserver,127.0.0.1', 'ESTATICOS_COM_HASH': 'False',
+            'PYTHONPATH': str(settings.BASE_DIR), **extra}
+
+
+def bytecode_desatualizado(modulos):
+    """Módulos do projeto sem .pyc válido: recompilados do fonte a cada processo novo"""
+    base = str(settings.BASE_DIR)
+    resultado = []
+    for nome in modulos:
+        spec = importlib.util.find_spec(nome) if nome in sys.modules or '.' not in nome else None
+        origem = getattr(spec, 'origin', None) if spec else None
+        if not origem or not origem.startswith(base) or not origem.endswith('.py'):
+            continue
+        compilado = Path(importlib.util.cache_from_source(origem))
+        if not compilado.exists() or compilado.stat().st_mtime < Path(origem).stat().st_mtime:
+            resultado.append(nome)
+    return resultado
+
+
+def esperar_200(porta, limite=30):
+    fim = time.perf_counter() + limite
+    while time.perf_counter() < fim:
+        conexao = http.client.HTTPConnection('127.0.0.1', porta, timeout=5)
+        try:
+            conexao.request('GET', URL_TESTE)
+            if conexao.getresponse().status == 200:
+                return True
+        except OSError:
+            pass
+        finally:
+            conexao.close()
+        # Recusada ou ainda não 200 (aquecendo): a mesma espera antes de tentar de novo
+        time.sleep(0.005)
+    return False
+
+
+def filhos(pid):
+    caminho = Path(f'/proc/{pid}/task/{pid}/children')
+    return [int(p) for p in caminho.read_text().split()] if caminho.exists() else []
+
+
+class Command(BaseCommand):
+    help = ('Mede o tempo de subida de um worker (interpretador, django.setup, primeira requisição) '
+            'e lista o custo de import por pacote e por módulo a partir do -X importtime')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeticoes', type=int, default=5, help='Processos medidos (padrão: 5)')
+        parser.add_argument('--top', type=int, default=15, help='Linhas em cada ranking (padrão: 15)')
+        parser.add_argument('--meta-ms', type=float, default=400,
+                            help='Meta para um processo novo chegar à primeira resposta (padrão: 400)')
+        parser.add_argument('--meta-worker-ms', type=float, default=100,
+                            help='Meta para um worker do gunicorn voltar a atender (padrão: 100)')
+        parser.add_argument('--gunicorn', action='store_true',
+                            help='Mede também quanto um worker do gunicorn leva para voltar a '
+                                 'atender depois de morto, com e sem preload_app')
+
+    def handle(self, *args, **options):
+        script = SCRIPT.format(url=URL_TESTE)
+        medicoes = [self.executar(script) for _ in range(options['repeticoes'])]
+        fases = {
+            'interpretador': [m['total'] - m['boot'] - sum(m['requisicoes']) for m in medicoes],
+            'boot (wsgi)': [m['boot'] for m in medicoes],
+            '1ª requisição': [m['requisicoes'][0] for m in medicoes],
+            '2ª requisição': [m['requisicoes'][1] for m in medicoes],
+        }
+        self.stdout.write(f'Processo novo até a primeira resposta ({options["repeticoes"]} execuções, '
+                          f'mediana), GET {URL_TESTE} -> {medicoes[0]["status"][0]}')
+        for nome, valores in fases.items():
+            self.stdout.write(f'  {nome:<16} {statistics.median(valores) * 1000:>8.1f}ms')
+        total = statistics.median(m['total'] - m['requisicoes'][1] for m in medicoes) * 1000
+        estilo = self.style.SUCCESS if total <= options['meta_ms'] else self.style.WARNING
+        self.stdout.write(estilo(f'  {"total":<16} {total:>8.1f}ms (meta {options["meta_ms"]:.0f}ms)'))
+
+        proprios, pacotes, projeto = self.importtime(script)
+        self.stdout.write(f'\nImports por pacote (tempo próprio, -X importtime), total {sum(pacotes.values()) / 1000:.0f}ms')
+        for pacote, micros in pacotes.most_common(options['top']):
+            self.stdout.write(f'  {pacote:<30} {micros / 1000:>8.1f}ms')
+        self.stdout.write('\nMódulos do projeto (tempo acumulado, inclui o que cada um importa)')
+        for modulo, micros in projeto.most_common(options['top']):
+            self.stdout.write(f'  {modulo:<30} {micros / 1000:>8.1f}ms')
+
+        carregados = set(medicoes[0]['modulos'])
+        adiados = [m for m in MODULOS_ADIADOS if m in carregados]
+        if adiados:
+            self.stdout.write(self.style.WARNING(f'\nCarregados cedo demais: {", ".join(adiados)}'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'\nNenhum de {", ".join(MODULOS_ADIADOS)} carregado no boot.'))
+        desatualizados = bytecode_desatualizado(m for m in proprios if m.split('.')[0] in carregados)
+        if desatualizados:
+            self.stdout.write(self.style.WARNING(
+                f'{len(desatualizados)} módulos do projeto sem .pyc atualizado (rode '
+                f'"python -m compileall -q ." no deploy): {", ".join(desatualizados[:10])}'
+            ))
+
+        if options['gunicorn']:
+            self.stdout.write('\nWorker do gunicorn morto com SIGKILL até voltar a responder (1 worker)')
+            for preload in (False, True):
+                self.medir_gunicorn(preload, options['meta_worker_ms'])
+
+    def executar(self, script):
+        inicio = time.perf_counter()
+        processo = subprocess.run([sys.executable, '-c', script], env=ambiente_producao(),
+                                  cwd=settings.BASE_DIR, capture_output=True, text=True, check=True)
+        total = time.perf_counter() - inicio
+        return {**json.loads(processo.stdout.strip().splitlines()[-1]), 'total': total}
+
+    def importtime(self, script):
+        processo = subprocess.run([sys.executable, '-X', 'importtime', '-c', script],
+                                  env=ambiente_producao(), cwd=settings.BASE_DIR,
+                                  capture_output=True, text=True, check=True)
+        proprios, pacotes, projeto = {}, Counter(), Counter()
+        apps = {app.split('.')[0] for app in settings.INSTALLED_APPS} | {'acjogos_intranet'}
+        for linha in processo.stderr.splitlines():
+            casamento = LINHA_IMPORTTIME.match(linha)
+            if not casamento:
+                continue
+            proprio, acumulado, nome = int(casamento[1]), int(casamento[2]), casamento[4]
+            proprios[nome] = proprio
+            pacotes[nome.split('.')[0]] += proprio
+            if nome.split('.')[0] in apps and not nome.startswith('django'):
+                projeto[nome] = acumulado
+        return proprios, pacotes, projeto
+
+    def medir_gunicorn(self, preload, meta):
+        porta = porta_livre()
+        env = ambiente_producao(GUNICORN_BIND=f'127.0.0.1:{porta}', GUNICORN_WORKERS='1',
+                                GUNICORN_PRELOAD=str(preload))
+        inicio = time.perf_counter()
+        mestre = subprocess.Popen([sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py',
+                                   '--log-level', 'warning', 'acjogos_intranet.wsgi'],
+                                  env=env, cwd=settings.BASE_DIR, stderr=subprocess.DEVNULL)
+        try:
+            if not esperar_200(porta):
+                self.stderr.write('  o gunicorn não subiu')
+                return
+            subida = time.perf_counter() - inicio
+            tempos = []
+            for _ in range(5):
+                mortos = filhos(mestre.pid)
+                for pid in mortos:
+                    os.kill(pid, signal.SIGKILL)
+                antes = time.perf_counter()
+                # Só consulta depois que o mestre criou o substituto, para não bater no worker morto
+                while not set(filhos(mestre.pid)) - set(mortos):
+                    time.sleep(0.001)
+                if not esperar_200(porta):
+                    break
+                tempos.append(time.perf_counter() - antes)
+        finally:
+            mestre.terminate()
+            mestre.wait()
+        if tempos:
+            mediana = statistics.median(tempos) * 1000
+            estilo = self.style.SUCCESS if mediana <= meta else self.style.WARNING
+            self.stdout.write(estilo(f'  preload_app={str(preload):<5} subida do mestre {subida * 1000:>6.0f}ms, '
+                                     f'worker de volta em {mediana:>6.0f}ms (mediana, meta {meta:.0f}ms)'))
@@ -0,0 +1,249 @@
+"""
+Métricas por rota: tempo de resposta, SQL, templates e tamanho da resposta.
+
+Com METRICAS_ATIVAS, o MetricasMiddleware (primeiro da lista) abre uma
+Medicao por requisição numa ContextVar. Enquanto ela existe, o
+execute_wrapper instalado nas conexões do banco soma consultas e tempo de
+SQL, e o backend de templates do projeto (DjangoTemplatesMedidos) soma o
+tempo de renderização. SQL disparado de dentro do template (querysets
+preguiçosos) conta nos dois. No fim, os números vão para histogramas em
+memória por nome de rota ('accounts:login', 'admin:index', ...).
+
+Os contadores são por processo, como os de cache: com vários workers cada
+um tem os seus. Aparecem em /admin/metricas/ e, no formato de exposição do
+Prometheus, em /metricas/ (staff ou o token METRICAS_TOKEN).
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.template.backends.django import DjangoTemplates, Template
+from django.urls import Resolver404, resolve
+
+# Limites dos baldes ("le" do Prometheus); o último balde, sem limite, é o +Inf
+SEGUNDOS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+CONSULTAS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+BYTES = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+SERIES = (
+    # chave, métrica do Prometheus, descrição, limites
+    ('duracao', 'intranet_requisicao_segundos', 'Tempo de resposta da requisição', SEGUNDOS),
+    ('sql_consultas', 'intranet_sql_consultas', 'Consultas SQL por requisição', CONSULTAS),
+    ('sql_segundos', 'intranet_sql_segundos', 'Tempo em SQL por requisição', SEGUNDOS),
+    ('template_segundos', 'intranet_template_segundos', 'Tempo renderizando templates por requisição', SEGUNDOS),
+    ('bytes', 'intranet_resposta_bytes', 'Tamanho do corpo da resposta', BYTES),
+)
+
+_medicao = ContextVar('medicao', default=None)
+
+
+class Medicao:
+    __slots__ = ('sql_consultas', 'sql_segundos', 'template_segundos')
+
+    def __init__(self):
+        self.sql_consultas = 0
+        self.sql_segundos = 0.0
+        self.template_segundos = 0.0
+
+
+class Histograma:
+    __slots__ = ('limites', 'baldes', 'soma', 'contagem', 'maximo')
+
+    def __init__(self, limites):
+        self.limites = limites
+        self.baldes = [0] * (len(limites) + 1)
+        self.soma = 0
+        self.contagem = 0
+        self.maximo = 0
+
+    def observar(self, valor):
+        self.baldes[bisect_left(self.limites, valor)] += 1
+        self.soma += valor
+        self.contagem += 1
+        self.maximo = max(self.maximo, valor)
+
+    def quantil(self, q):
+        """Estimativa por interpolação dentro do balde, como o histogram_quantile do Prometheus"""
+        if not self.contagem:
+            return 0
+        alvo = q * self.contagem
+        acumulado = 0
+        for indice, quantidade in enumerate(self.baldes):
+            if quantidade and acumulado + quantidade >= alvo:
+                inferior = self.limites[indice - 1] if indice else 0
+                superior = self.limites[indice] if indice < len(self.limites) else self.maximo
+                return min(inferior + (superior - inferior) * (alvo - acumulado) / quantidade, self.maximo)
+            acumulado += quantidade
+        return self.maximo
+
+
+class MetricasRota:
+    def __init__(self):
+        self.series = {chave: Histograma(limites) for chave, _, _, limites in SERIES}
+        self.respostas = {}
+
+    def observar(self, valores, status):
+        for chave, valor in valores.items():
+            self.series[chave].observar(valor)
+        classe = f'{status // 100}xx'
+        self.respostas[classe] = self.respostas.get(classe, 0) + 1
+
+
+class Metricas:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._rotas = {}
+
+    def registrar(self, rota, valores, status):
+        with self._lock:
+            metricas = self._rotas.get(rota)
+            if metricas is None:
+                metricas = self._rotas[rota] = MetricasRota()
+            metricas.observar(valores, status)
+
+    def resumo(self):
+        """Um dicionário por rota, da que mais somou tempo de resposta para a que menos somou"""
+        with self._lock:
+            linhas = []
+            for rota, metricas in self._rotas.items():
+                series = metricas.series
+                duracao = series['duracao']
+                n = duracao.contagem
+                linhas.append({
+                    'rota': rota,
+                    'requisicoes': n,
+                    'erros': metricas.respostas.get('5xx', 0),
+                    'total_s': duracao.soma,
+                    'p50_ms': duracao.quantil(0.5) * 1000,
+                    'p95_ms': duracao.quantil(0.95) * 1000,
+                    'maximo_ms': duracao.maximo * 1000,
+                    'sql_consultas': series['sql_consultas'].soma / n,
+                    'sql_ms': series['sql_segundos'].soma / n * 1000,
+                    'template_ms': series['template_segundos'].soma / n * 1000,
+                    'kb': series['bytes'].soma / n / 1024,
+                })
+        return sorted(linhas, key=lambda linha: linha['total_s'], reverse=True)
+
+    def prometheus(self):
+        """Texto no formato de exposição do Prometheus (text/plain; version=0.0.4)"""
+        with self._lock:
+            rotas = sorted(self._rotas.items())
+            linhas = []
+            for chave, nome, descricao, limites in SERIES:
+                linhas += [f'# HELP {nome} {descricao}', f'# TYPE {nome} histogram']
+                for rota, metricas in rotas:
+                    rotulo = f'rota="{_escapar(rota)}"'
+                    histograma = metricas.series[chave]
+                    acumulado = 0
+                    for limite, quantidade in zip((*limites, '+Inf'), histograma.baldes):
+                        acumulado += quantidade
+                        linhas.append(f'{nome}_bucket{{{rotulo},le="{limite}"}} {acumulado}')
+                    linhas.append(f'{nome}_sum{{{rotulo}}} {histograma.soma}')
+                    linhas.append(f'{nome}_count{{{rotulo}}} {histograma.contagem}')
+            linhas += ['# HELP intranet_respostas_total Respostas por classe de status',
+                       '# TYPE intranet_respostas_total counter']
+            for rota, metricas in rotas:
+                for classe, quantidade in sorted(metricas.respostas.items()):
+                    linhas.append(f'intranet_respostas_total{{rota="{_escapar(rota)}",status="{classe}"}} {quantidade}')
+        return '\n'.join(linhas) + '\n'
+
+    def zerar(self):
+        with self._lock:
+            self._rotas.clear()
+
+
+metricas = Metricas()
+
+
+def _escapar(valor):
+    return valor.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def iniciar():
+    """Abre a medição da requisição atual; devolve (medicao, token para encerrar)"""
+    medicao = Medicao()
+    return medicao, _medicao.set(medicao)
+
+
+def encerrar(token):
+    _medicao.reset(token)
+
+
+def nome_da_rota(request):
+    if request.resolver_match is not None:
+        return request.resolver_match.view_name
+    # Respostas dadas antes da view (429 do limite de tentativas, redirecionamentos do CommonMiddleware)
+    try:
+        return resolve(request.path_info).view_name
+    except Resolver404:
+        return '(não encontrada)'
+
+
+def registrar(request, response, medicao, duracao):
+    if response.streaming:
+        tamanho = int(response.get('Content-Length') or 0)
+    else:
+        tamanho = len(response.content)
+    metricas.registrar(nome_da_rota(request), {
+        'duracao': duracao,
+        'sql_consultas': medicao.sql_consultas,
+        'sql_segundos': medicao.sql_segundos,
+        'template_segundos': medicao.template_segundos,
+        'bytes': tamanho,
+    }, response.status_code)
+
+
+def medir_sql(execute, sql, params, many, context):
+    medicao = _medicao.get()
+    if medicao is None:
+        return execute(sql, params, many, context)
+    inicio = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        medicao.sql_segundos += time.perf_counter() - inicio
+        medicao.sql_consultas += 1
+
+
+def _instrumentar(connection, **kwargs):
+    if medir_sql not in connection.execute_wrappers:
+        connection.execute_wrappers.append(medir_sql)
+
+
+def instrumentar_conexoes():
+    """Coloca o medir_sql nas conexões já abertas nesta thread e em todas as que abrirem depois"""
+    connection_created.connect(_instrumentar, dispatch_uid='core.metricas')
+    for conexao in connections.all(initialized_only=True):
+        _instrumentar(conexao)
+
+
+class TemplateMedido(Template):
+    def render(self, context=None, request=None):
+        medicao = _medicao.get()
+        if medicao is None:
+            return super().render(context, request)
+        inicio = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            medicao.template_segundos += time.perf_counter() - inicio
+
+
+class DjangoTemplatesMedidos(DjangoTemplates):
+    """
+    DjangoTemplates que soma na Medicao da requisição o tempo de cada render.
+
+    Só os templates pedidos ao backend (render, TemplateResponse,
+    render_to_string) são medidos; {% include %} e {% extends %} entram no
+    tempo do template que os usa. Sem medição aberta, o custo é uma leitura
+    de ContextVar por render.
+    """
+
+    def from_string(self, template_code):
+        return TemplateMedido(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        return TemplateMedido(super().get_template(template_name).template, self)
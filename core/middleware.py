@@ -0,0 +1,194 @@
+import logging
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user
+from django.core.exceptions import MiddlewareNotUsed
+from django.shortcuts import render
+from django.urls import reverse
+from django.utils.functional import cached_property
+
+from . import limites, metricas
+
+logger = logging.getLogger(__name__)
+
+
+class MetricasMiddleware:
+    """
+    Mede cada requisição para o core.metricas: tempo total, SQL, templates e bytes.
+
+    Opcional (METRICAS_ATIVAS); desligado, o Django o tira da cadeia no boot.
+    Fica em primeiro na lista para que o tempo inclua os outros middlewares.
+    Em respostas em streaming o tempo vai até o início do envio do corpo.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.METRICAS_ATIVAS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.assincrono = iscoroutinefunction(get_response)
+        if self.assincrono:
+            markcoroutinefunction(self)
+        metricas.instrumentar_conexoes()
+
+    def __call__(self, request):
+        if self.assincrono:
+            return self.__acall__(request)
+        inicio = time.perf_counter()
+        medicao, token = metricas.iniciar()
+        try:
+            response = self.get_response(request)
+        finally:
+            metricas.encerrar(token)
+        metricas.registrar(request, response, medicao, time.perf_counter() - inicio)
+        return response
+
+    async def __acall__(self, request):
+        inicio = time.perf_counter()
+        # O sync_to_async copia o contexto: as consultas feitas nas threads do ORM somam na mesma medição
+        medicao, token = metricas.iniciar()
+        try:
+            response = await self.get_response(request)
+        finally:
+            metricas.encerrar(token)
+        metricas.registrar(request, response, medicao, time.perf_counter() - inicio)
+        return response
+
+
+class UsuarioAssincronoMiddleware:
+    """
+    Deixa request.user já carregado antes de views async.
+
+    O request.user do AuthenticationMiddleware é preguiçoso e consulta o banco
+    de forma síncrona na primeira leitura, o que dentro de uma view async (ou
+    do template renderizado por ela) levanta SynchronousOnlyOperation. No ASGI
+    o usuário é carregado com o ORM assíncrono; no WSGI só antes de views
+    async, que o Django executa num loop de eventos próprio.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.assincrono = iscoroutinefunction(get_response)
+        if self.assincrono:
+            markcoroutinefunction(self)
+        else:
+            # Só registrado no modo síncrono: no ASGI um process_view síncrono custaria
+            # um sync_to_async por requisição
+            self.process_view = self._carregar_para_view_async
+
+    def __call__(self, request):
+        if self.assincrono:
+            return self.__acall__(request)
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        request.user = await request.auser()
+        return await self.get_response(request)
+
+    def _carregar_para_view_async(self, request, view_func, view_args, view_kwargs):
+        if not iscoroutinefunction(view_func):
+            return None
+        usuario = get_user(request)
+
+        async def auser():
+            return usuario
+
+        request.user, request.auser = usuario, auser
+        return None
+
+
+class LimiteTentativasMiddleware:
+    """
+    Limita POSTs de login, recuperação de senha e cadastro por IP e por usuário.
+
+    As regras ficam em settings.LIMITES_TENTATIVAS (nome da rota -> campo do
+    formulário com o usuário e (máximo, segundos) por IP e por usuário), com
+    contadores de janela deslizante no cache (core/limites.py). Acima do
+    limite a resposta é 429 antes mesmo das sessões e da view, ou seja, sem
+    calcular hash de senha nenhum. Nas regras com 'so_falhas' só contam as
+    tentativas que não redirecionaram (login errado); um login certo zera o
+    contador do usuário.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.assincrono = iscoroutinefunction(get_response)
+        if self.assincrono:
+            markcoroutinefunction(self)
+
+    @cached_property
+    def rotas(self):
+        return {reverse(nome): (nome, regra) for nome, regra in settings.LIMITES_TENTATIVAS.items()}
+
+    def _alvo(self, request):
+        if request.method != 'POST' or not settings.LIMITES_ATIVOS:
+            return None
+        rota = self.rotas.get(request.path_info)
+        if rota is None:
+            return None
+        nome, regra = rota
+        contadores = [(f'{nome}:ip', ip_do_cliente(request), *regra['por_ip'])]
+        if regra.get('campo') and 'por_usuario' in regra:
+            usuario = request.POST.get(regra['campo'], '').strip().lower()
+            if usuario:
+                contadores.append((f'{nome}:usuario', usuario, *regra['por_usuario']))
+        return regra, contadores
+
+    def __call__(self, request):
+        if self.assincrono:
+            return self.__acall__(request)
+        alvo = self._alvo(request)
+        if alvo is None:
+            return self.get_response(request)
+        bloqueio = self._verificar(request, alvo)
+        if bloqueio is not None:
+            return bloqueio
+        response = self.get_response(request)
+        self._registrar(response, alvo)
+        return response
+
+    async def __acall__(self, request):
+        alvo = self._alvo(request)
+        if alvo is None:
+            return await self.get_response(request)
+        bloqueio = await sync_to_async(self._verificar)(request, alvo)
+        if bloqueio is not None:
+            return bloqueio
+        response = await self.get_response(request)
+        await sync_to_async(self._registrar)(response, alvo)
+        return response
+
+    def _verificar(self, request, alvo):
+        for nome, valor, limite, segundos in alvo[1]:
+            espera = limites.excedido(nome, valor, limite, segundos)
+            if espera:
+                logger.warning('Limite de tentativas excedido: %s (%s)', nome, ip_do_cliente(request))
+                response = render(request, 'base/limite.html', {'minutos': -(-espera // 60)}, status=429)
+                response['Retry-After'] = str(espera)
+                return response
+        return None
+
+    def _registrar(self, response, alvo):
+        regra, contadores = alvo
+        falhou = response.status_code not in (301, 302)
+        for nome, valor, _, segundos in contadores:
+            if falhou or not regra.get('so_falhas'):
+                limites.registrar(nome, valor, segundos)
+            elif nome.endswith(':usuario'):
+                limites.zerar(nome, valor, segundos)
+
+
+def ip_do_cliente(request):
+    """REMOTE_ADDR ou, atrás de um proxy, o último endereço do cabeçalho que ele acrescenta"""
+    if settings.LIMITES_CABECALHO_IP:
+        encaminhado = request.META.get(settings.LIMITES_CABECALHO_IP, '')
+        if encaminhado:
+            return encaminhado.rsplit(',', 1)[-1].strip()
+    return request.META.get('REMOTE_ADDR', '')
@@ -0,0 +1,38 @@
+# Generated by Django 5.1.3 on 2026-10-18 14:51
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EmailSaida',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('remetente', models.CharField(max_length=254)),
+                ('destinatarios', models.JSONField(default=list, verbose_name='Destinatários')),
+                ('assunto', models.CharField(blank=True, max_length=255)),
+                ('conteudo', models.BinaryField()),
+                ('status', models.CharField(choices=[('PENDENTE', 'Pendente'), ('ENVIADO', 'Enviado'), ('FALHOU', 'Falhou')], default='PENDENTE', max_length=10)),
+                ('tentativas', models.PositiveSmallIntegerField(default=0)),
+                ('proxima_tentativa', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Próxima tentativa')),
+                ('reserva', models.CharField(blank=True, editable=False, max_length=32)),
+                ('erro', models.TextField(blank=True)),
+                ('criado_em', models.DateTimeField(auto_now_add=True, verbose_name='Criado em')),
+                ('enviado_em', models.DateTimeField(blank=True, null=True, verbose_name='Enviado em')),
+            ],
+            options={
+                'verbose_name': 'E-mail na fila',
+                'verbose_name_plural': 'Fila de e-mails',
+                'ordering': ['-criado_em', '-id'],
+                'indexes': [models.Index(fields=['status', 'proxima_tentativa'], name='email_fila_idx')],
+            },
+        ),
+    ]
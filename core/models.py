@@ -0,0 +1,38 @@
+from django.db import models
+from django.utils import timezone
+
+
+class EmailSaida(models.Model):
+    """Mensagem na fila de saída (core/email.py), já em MIME, pronta para o SMTP"""
+    PENDENTE = 'PENDENTE'
+    ENVIADO = 'ENVIADO'
+    FALHOU = 'FALHOU'
+    STATUS = [
+        (PENDENTE, 'Pendente'),
+        (ENVIADO, 'Enviado'),
+        (FALHOU, 'Falhou'),
+    ]
+
+    remetente = models.CharField(max_length=254)
+    destinatarios = models.JSONField('Destinatários', default=list)
+    assunto = models.CharField(max_length=255, blank=True)
+    conteudo = models.BinaryField()
+    status = models.CharField(max_length=10, choices=STATUS, default=PENDENTE)
+    tentativas = models.PositiveSmallIntegerField(default=0)
+    # Também serve de reserva: quem pega a mensagem para enviar a empurra para o futuro
+    proxima_tentativa = models.DateTimeField('Próxima tentativa', default=timezone.now)
+    reserva = models.CharField(max_length=32, blank=True, editable=False)
+    erro = models.TextField(blank=True)
+    criado_em = models.DateTimeField('Criado em', auto_now_add=True)
+    enviado_em = models.DateTimeField('Enviado em', null=True, blank=True)
+
+    class Meta:
+        verbose_name = 'E-mail na fila'
+        verbose_name_plural = 'Fila de e-mails'
+        ordering = ['-criado_em', '-id']
+        indexes = [
+            models.Index(fields=['status', 'proxima_tentativa'], name='email_fila_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.assunto} ({", ".join(self.destinatarios)})'
@@ -0,0 +1,127 @@
+"""
+Paginação por chave (keyset/seek) para listagens grandes.
+
+Em vez de OFFSET, que obriga o banco a ler e descartar todas as linhas das
+páginas anteriores, cada página começa depois (ou antes) dos valores de
+ordenação da última linha mostrada: WHERE (a, b) > (x, y) ORDER BY a, b LIMIT n.
+Com um índice em (a, b) a página 500 custa o mesmo que a primeira. Não há
+número de página, só "anterior" e "próxima", levados na URL como um cursor
+opaco. O último campo de `campos` precisa ser único (normalmente o id) e
+nenhum deles pode ser nulo.
+"""
+import base64
+import binascii
+import json
+from functools import reduce
+from operator import or_
+
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+
+
+def codificar_cursor(valores):
+    texto = json.dumps(valores, cls=DjangoJSONEncoder, separators=(',', ':'))
+    return base64.urlsafe_b64encode(texto.encode()).decode().rstrip('=')
+
+
+def decodificar_cursor(cursor, quantidade):
+    """Lista de valores do cursor, ou None se ele for inválido"""
+    try:
+        texto = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        valores = json.loads(texto)
+    except (binascii.Error, ValueError, UnicodeDecodeError):
+        return None
+    if not isinstance(valores, list) or len(valores) != quantidade or None in valores:
+        return None
+    return valores
+
+
+def _depois_de(campos, valores, comparacao):
+    # (a, b, c) > (x, y, z)  ==  a > x OR (a = x AND b > y) OR (a = x AND b = y AND c > z)
+    condicoes = []
+    for i, campo in enumerate(campos):
+        iguais = {campos[j]: valores[j] for j in range(i)}
+        condicoes.append(Q(**iguais, **{f'{campo}__{comparacao}': valores[i]}))
+    # Limite redundante no primeiro campo para o banco usar o índice como intervalo
+    return Q(**{f'{campos[0]}__{comparacao}e': valores[0]}) & reduce(or_, condicoes)
+
+
+class PaginaKeyset:
+    def __init__(self, itens, campos, tem_anterior, tem_proxima):
+        self.itens = itens
+        self.campos = campos
+        self.tem_anterior = tem_anterior
+        self.tem_proxima = tem_proxima
+
+    def __iter__(self):
+        return iter(self.itens)
+
+    def __len__(self):
+        return len(self.itens)
+
+    def _cursor(self, item):
+        return codificar_cursor([getattr(item, campo) for campo in self.campos])
+
+    @property
+    def cursor_anterior(self):
+        return self._cursor(self.itens[0]) if self.tem_anterior and self.itens else None
+
+    @property
+    def cursor_proximo(self):
+        return self._cursor(self.itens[-1]) if self.tem_proxima and self.itens else None
+
+
+class PaginadorKeyset:
+    """
+    Pagina `queryset` ordenado por `campos` (todos ascendentes).
+
+    `apos` e `antes` são os cursores vindos da URL; sem nenhum dos dois (ou com
+    um cursor inválido) devolve a primeira página, como o Paginator.get_page.
+    """
+
+    def __init__(self, queryset, campos, tamanho=50):
+        self.queryset = queryset
+        self.campos = tuple(campos)
+        self.tamanho = tamanho
+
+    def _valores(self, cursor):
+        """Valores do cursor convertidos pelos campos de ordenação, ou None se não servirem"""
+        valores = decodificar_cursor(cursor, len(self.campos))
+        if valores is None:
+            return None
+        opcoes = self.queryset.model._meta
+        try:
+            # O cursor vem da URL: ["x", "abc"] no lugar de [nome, id] não pode chegar ao banco
+            valores = [opcoes.get_field(campo).to_python(valor) for campo, valor in zip(self.campos, valores)]
+        except (ValidationError, ValueError, TypeError):
+            return None
+        return None if None in valores else valores
+
+    def _consulta(self, apos=None, antes=None):
+        """(queryset com LIMIT tamanho + 1, voltando, tinha cursor)"""
+        cursor = apos or antes
+        valores = self._valores(cursor) if cursor else None
+        voltando = valores is not None and not apos
+        consulta = self.queryset
+        if valores is not None:
+            consulta = consulta.filter(_depois_de(self.campos, valores, 'lt' if voltando else 'gt'))
+        ordem = [f'-{campo}' for campo in self.campos] if voltando else list(self.campos)
+        return consulta.order_by(*ordem)[:self.tamanho + 1], voltando, valores is not None
+
+    def _montar(self, linhas, voltando, tinha_cursor):
+        # A linha a mais só indica se existe outra página naquela direção
+        sobra = len(linhas) > self.tamanho
+        linhas = linhas[:self.tamanho]
+        if voltando:
+            linhas.reverse()
+            return PaginaKeyset(linhas, self.campos, tem_anterior=sobra, tem_proxima=True)
+        return PaginaKeyset(linhas, self.campos, tem_anterior=tinha_cursor, tem_proxima=sobra)
+
+    def pagina(self, apos=None, antes=None):
+        consulta, voltando, tinha_cursor = self._consulta(apos, antes)
+        return self._montar(list(consulta), voltando, tinha_cursor)
+
+    async def apagina(self, apos=None, antes=None):
+        consulta, voltando, tinha_cursor = self._consulta(apos, antes)
+        return self._montar([linha async for linha in consulta], voltando, tinha_cursor)
@@ -0,0 +1,51 @@
+"""
+Storage de arquivos estáticos com nomes com hash e versões pré-comprimidas.
+
+Depois do pós-processamento do ManifestStaticFilesStorage (que gera os nomes
+com hash do conteúdo), grava ao lado de cada arquivo de texto uma versão .gz e,
+se o módulo brotli estiver instalado, uma .br. Assim o servidor só escolhe o
+arquivo certo pelo Accept-Encoding, sem comprimir nada por requisição.
+"""
+import gzip
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+EXTENSOES_COMPRIMIVEIS = ('.css', '.js', '.svg', '.json', '.txt', '.map', '.html', '.xml')
+TAMANHO_MINIMO = 1024
+
+
+def versoes_comprimidas(conteudo):
+    """Gera (sufixo, bytes) para cada compressão que de fato reduz o arquivo"""
+    # mtime=0 deixa o .gz idêntico entre execuções do collectstatic
+    candidatos = [('.gz', gzip.compress(conteudo, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        candidatos.append(('.br', brotli.compress(conteudo, quality=11)))
+    for sufixo, comprimido in candidatos:
+        if len(comprimido) < len(conteudo):
+            yield sufixo, comprimido
+
+
+class ManifestComprimidoStorage(ManifestStaticFilesStorage):
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        nomes = set(self.hashed_files) | set(self.hashed_files.values())
+        for nome in sorted(nomes):
+            if not nome.endswith(EXTENSOES_COMPRIMIVEIS) or not self.exists(nome):
+                continue
+            with self.open(nome) as arquivo:
+                conteudo = arquivo.read()
+            if len(conteudo) < TAMANHO_MINIMO:
+                continue
+            for sufixo, comprimido in versoes_comprimidas(conteudo):
+                if self.exists(nome + sufixo):
+                    self.delete(nome + sufixo)
+                self._save(nome + sufixo, ContentFile(comprimido))
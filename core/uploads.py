@@ -0,0 +1,173 @@
+"""
+Upload handler que nunca guarda o arquivo inteiro em memória.
+
+Cada arquivo vai direto para um arquivo temporário em blocos pequenos. Para os
+campos com regra em settings.UPLOAD_REGRAS (ex.: foto_perfil), o tipo é
+conferido pela assinatura dos primeiros bytes e, para imagens, as dimensões
+são lidas do cabeçalho com o parser incremental do Pillow. Um upload inválido
+ou grande demais é descartado (SkipFile) assim que isso é detectado, sem ler
+o resto do corpo para o disco.
+
+O arquivo descartado some de request.FILES; o motivo fica em
+request.uploads_rejeitados[campo], e os formulários com RejeicoesUploadMixin o
+mostram como erro do campo (senão, num campo opcional, o formulário salvaria
+"com sucesso" sem a foto nova).
+"""
+import logging
+
+from django.conf import settings
+from django.core.files.uploadhandler import SkipFile, TemporaryFileUploadHandler
+
+logger = logging.getLogger(__name__)
+
+ASSINATURAS = {
+    'jpeg': lambda c: c.startswith(b'\xff\xd8\xff'),
+    'png': lambda c: c.startswith(b'\x89PNG\r\n\x1a\n'),
+    'gif': lambda c: c[:6] in (b'GIF87a', b'GIF89a'),
+    'webp': lambda c: c[:4] == b'RIFF' and c[8:12] == b'WEBP',
+    'avif': lambda c: c[4:12] in (b'ftypavif', b'ftypavis'),
+    'pdf': lambda c: c.startswith(b'%PDF-'),
+}
+# Tipos cujas dimensões o Parser incremental do Pillow consegue ler só com o início do arquivo;
+# WebP é lido à mão (dimensoes_webp) e AVIF fica para a validação do formulário
+TIPOS_PARSER_PIL = {'jpeg', 'png', 'gif'}
+BYTES_ASSINATURA = 16
+# JPEGs com EXIF grande podem ter o cabeçalho de dimensões depois de 64KB
+MAX_BYTES_CABECALHO = 256 * 1024
+
+
+def dimensoes_webp(cabecalho):
+    """(largura, altura) a partir dos 30 primeiros bytes de um WebP, ou None"""
+    if len(cabecalho) < 30:
+        return None
+    formato = cabecalho[12:16]
+    if formato == b'VP8X':
+        largura = int.from_bytes(cabecalho[24:27], 'little') + 1
+        altura = int.from_bytes(cabecalho[27:30], 'little') + 1
+    elif formato == b'VP8L':
+        b = cabecalho[21:25]
+        largura = 1 + (b[0] | (b[1] & 0x3F) << 8)
+        altura = 1 + (b[1] >> 6 | b[2] << 2 | (b[3] & 0x0F) << 10)
+    elif formato == b'VP8 ':
+        largura = int.from_bytes(cabecalho[26:28], 'little') & 0x3FFF
+        altura = int.from_bytes(cabecalho[28:30], 'little') & 0x3FFF
+    else:
+        return None
+    return largura, altura
+
+
+class StreamingUploadHandler(TemporaryFileUploadHandler):
+    chunk_size = 16 * 1024
+
+    def new_file(self, field_name, *args, **kwargs):
+        super().new_file(field_name, *args, **kwargs)
+        self.regra = getattr(settings, 'UPLOAD_REGRAS', {}).get(field_name)
+        self.recebidos = 0
+        self.inicio = b''
+        self.tipo = None
+        self.parser = None
+        self.dimensoes_ok = self.regra is None
+
+    def _registrar_rejeicao(self, motivo):
+        logger.info('Upload de %s rejeitado: %s', self.field_name, motivo)
+        self.file.close()
+        if self.request is not None:
+            if not hasattr(self.request, 'uploads_rejeitados'):
+                self.request.uploads_rejeitados = {}
+            self.request.uploads_rejeitados[self.field_name] = motivo
+
+    def _rejeitar(self, motivo):
+        self._registrar_rejeicao(motivo)
+        raise SkipFile(motivo)
+
+    def receive_data_chunk(self, raw_data, start):
+        self.recebidos += len(raw_data)
+        if self.regra:
+            if self.recebidos > self.regra['max_bytes']:
+                self._rejeitar('arquivo maior que o permitido')
+            if self.tipo is None:
+                self._conferir_assinatura(raw_data)
+            if not self.dimensoes_ok:
+                self._conferir_dimensoes(raw_data)
+        self.file.write(raw_data)
+
+    def _conferir_assinatura(self, raw_data):
+        self.inicio += raw_data[:BYTES_ASSINATURA - len(self.inicio)]
+        if len(self.inicio) < BYTES_ASSINATURA:
+            return
+        for tipo in self.regra['tipos']:
+            if ASSINATURAS[tipo](self.inicio):
+                self.tipo = tipo
+                break
+        else:
+            self._rejeitar('tipo de arquivo não permitido')
+        if self.tipo == 'webp' and self.recebidos == len(raw_data):
+            self._conferir_tamanho(dimensoes_webp(raw_data[:32]))
+        if self.tipo not in TIPOS_PARSER_PIL:
+            self.dimensoes_ok = True
+
+    def _conferir_tamanho(self, dimensoes):
+        if dimensoes is None:
+            return
+        largura, altura = dimensoes
+        if largura * altura > self.regra.get('max_pixels', 40_000_000):
+            self._rejeitar('imagem com dimensões grandes demais')
+
+    def _conferir_dimensoes(self, raw_data):
+        if self.tipo is None:
+            return
+        if self.parser is None:
+            from PIL import ImageFile
+            self.parser = ImageFile.Parser()
+            raw_data = self._ja_recebido(raw_data)
+        try:
+            self.parser.feed(raw_data)
+        except Exception:
+            self._rejeitar('cabeçalho de imagem inválido')
+        imagem = self.parser.image
+        if imagem is not None:
+            self._conferir_tamanho(imagem.size)
+            # Dimensões conhecidas: para de alimentar o parser (não decodifica a imagem)
+            self.dimensoes_ok = True
+        elif self.recebidos > MAX_BYTES_CABECALHO:
+            self._rejeitar('cabeçalho de imagem não encontrado')
+
+    def _ja_recebido(self, raw_data):
+        # O tipo pode ter sido identificado no meio de um bloco; o parser precisa de tudo desde o byte 0
+        if self.recebidos == len(raw_data):
+            return raw_data
+        self.file.flush()
+        self.file.seek(0)
+        anterior = self.file.read()
+        self.file.seek(0, 2)
+        return anterior + raw_data
+
+    def file_complete(self, file_size):
+        if self.regra and (self.tipo is None or not self.dimensoes_ok):
+            # Arquivo menor que a assinatura/cabeçalho: não dá para validar. Aqui o parser do
+            # Django não trata SkipFile; devolver None simplesmente descarta o arquivo
+            self._registrar_rejeicao('arquivo incompleto ou imagem ilegível')
+            return None
+        return super().file_complete(file_size)
+
+
+class RejeicoesUploadMixin:
+    """
+    Form que mostra como erro do campo os uploads descartados pelo StreamingUploadHandler.
+
+    O form não recebe a requisição: a view (ou o ModelAdmin.get_form) cria uma
+    subclasse com `uploads_rejeitados = rejeicoes(request)`.
+    """
+    uploads_rejeitados = {}
+
+    def clean(self):
+        dados = super().clean()
+        for campo, motivo in self.uploads_rejeitados.items():
+            if campo in self.fields:
+                self.add_error(campo, f'Arquivo recusado: {motivo}.')
+        return dados
+
+
+def rejeicoes(request):
+    """{campo: motivo} dos uploads descartados nesta requisição"""
+    return getattr(request, 'uploads_rejeitados', {})
@@ -0,0 +1,107 @@
+import mimetypes
+import os
+
+from django.conf import settings
+from django.contrib import admin
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse
+from django.shortcuts import redirect, render
+from django.utils._os import safe_join
+from django.utils.crypto import constant_time_compare
+from django.views.decorators.http import require_safe
+
+from .cache import contador
+from .metricas import metricas
+
+# Versões pré-comprimidas geradas pelo core.storage.ManifestComprimidoStorage, na ordem de preferência
+CODIFICACOES = (('br', '.br'), ('gzip', '.gz'))
+CACHE_IMUTAVEL = 'public, max-age=31536000, immutable'
+CACHE_CURTO = 'public, max-age=3600'
+
+_nomes_com_hash = None
+
+
+def cache_view(request):
+    if request.method == 'POST':
+        contador.zerar()
+        return redirect('cache_stats')
+    context = {
+        **admin.site.each_context(request),
+        'title': 'Estatísticas de cache',
+        'backend': settings.CACHES['default']['BACKEND'],
+        'resumo': contador.resumo(),
+    }
+    return render(request, 'core/cache.html', context)
+
+
+def metricas_view(request):
+    if request.method == 'POST':
+        metricas.zerar()
+        return redirect('metricas')
+    context = {
+        **admin.site.each_context(request),
+        'title': 'Métricas por rota',
+        'ativas': settings.METRICAS_ATIVAS,
+        'resumo': metricas.resumo(),
+    }
+    return render(request, 'core/metricas.html', context)
+
+
+@require_safe
+def metricas_prometheus_view(request):
+    """As mesmas métricas para o Prometheus: staff logado ou o cabeçalho Authorization: Bearer METRICAS_TOKEN"""
+    token = settings.METRICAS_TOKEN
+    autorizado = request.user.is_active and request.user.is_staff
+    if not autorizado and token:
+        autorizado = constant_time_compare(request.headers.get('Authorization', ''), f'Bearer {token}')
+    if not autorizado:
+        response = HttpResponse('Não autorizado.\n', status=401, content_type='text/plain; charset=utf-8')
+        response['WWW-Authenticate'] = 'Bearer'
+        return response
+    return HttpResponse(metricas.prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+def nomes_com_hash():
+    """Nomes com hash do manifest do collectstatic (vazio sem ManifestStaticFilesStorage)"""
+    global _nomes_com_hash
+    if _nomes_com_hash is None:
+        _nomes_com_hash = frozenset(getattr(staticfiles_storage, 'hashed_files', {}).values())
+    return _nomes_com_hash
+
+
+def codificacoes_aceitas(cabecalho):
+    aceitas = set()
+    for item in cabecalho.split(','):
+        nome, _, parametros = item.strip().partition(';')
+        if parametros.replace(' ', '') in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000'):
+            continue
+        aceitas.add(nome.strip().lower())
+    return aceitas
+
+
+@require_safe
+def estatico_view(request, caminho):
+    """Serve STATIC_ROOT escolhendo a versão .br/.gz pelo Accept-Encoding"""
+    try:
+        arquivo = safe_join(settings.STATIC_ROOT, caminho)
+    except SuspiciousFileOperation:
+        raise Http404
+    if not os.path.isfile(arquivo):
+        raise Http404
+
+    content_type = mimetypes.guess_type(arquivo)[0] or 'application/octet-stream'
+    aceitas = codificacoes_aceitas(request.headers.get('Accept-Encoding', ''))
+    codificacao = None
+    for nome, sufixo in CODIFICACOES:
+        if nome in aceitas and os.path.isfile(arquivo + sufixo):
+            arquivo, codificacao = arquivo + sufixo, nome
+            break
+
+    response = FileResponse(open(arquivo, 'rb'), content_type=content_type)
+    if codificacao:
+        response['Content-Encoding'] = codificacao
+    response['Vary'] = 'Accept-Encoding'
+    # Só o nome com hash muda quando o conteúdo muda; o nome original pode ficar velho no cache
+    response['Cache-Control'] = CACHE_IMUTAVEL if caminho in nomes_com_hash() else CACHE_CURTO
+    return response
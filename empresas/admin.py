@@ -1,3 +1,15 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import Empresa
+
+
+class EmpresaAdmin(admin.ModelAdmin):
+    list_display = ('razao_social', 'nome_fantasia', 'cnpj', 'responsavel', 'cidade', 'estado', 'ativa')
+    list_filter = ('ativa', 'estado')
+    search_fields = ('razao_social', 'nome_fantasia', 'cnpj')
+    list_select_related = ('responsavel',)
+    autocomplete_fields = ('responsavel',)
+    # Sem o COUNT(*) da tabela inteira a cada página do changelist
+    show_full_result_count = False
+
+admin.site.register(Empresa, EmpresaAdmin)
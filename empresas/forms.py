@@ -0,0 +1,18 @@
+from django import forms
+from .models import Empresa
+
+class EmpresaForm(forms.ModelForm):
+    class Meta:
+        model = Empresa
+        fields = ['razao_social', 'nome_fantasia', 'cnpj', 'email', 'telefone', 'site',
+                  'cidade', 'estado', 'ativa']
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        for field_name, field in self.fields.items():
+            if field_name == 'ativa':
+                field.widget.attrs['class'] = 'form-check-input'
+            elif field_name == 'estado':
+                field.widget.attrs['class'] = 'form-select'
+            else:
+                field.widget.attrs['class'] = 'form-control'
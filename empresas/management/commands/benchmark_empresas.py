@@ -0,0 +1,89 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.core.paginator import Paginator
+
+from core.paginacao import PaginadorKeyset, codificar_cursor
+from empresas.models import Empresa
+
+PREFIXO = 'Bench '
+CAMPOS = ('razao_social', 'id')
+PALAVRAS = ['Alfa', 'Beta', 'Pixel', 'Neon', 'Arcade', 'Quest', 'Studio', 'Games', 'Interativa',
+            'Digital', 'Lab', 'Forge', 'Play', 'Nexus', 'Vortex', 'Orbit']
+
+
+def cnpj_valido(numero):
+    """CNPJ formatado e com dígitos verificadores corretos a partir de um inteiro"""
+    digitos = [int(d) for d in f'{numero % 10**8:08d}0001']
+    for pesos in ([5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2], [6, 5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2]):
+        resto = sum(p * d for p, d in zip(pesos, digitos)) % 11
+        digitos.append(0 if resto < 2 else 11 - resto)
+    d = ''.join(map(str, digitos))
+    return f'{d[:2]}.{d[2:5]}.{d[5:8]}/{d[8:12]}-{d[12:]}'
+
+
+class Command(BaseCommand):
+    help = ('Popula empresas de teste e compara o tempo de buscar uma página da listagem '
+            'com OFFSET (Paginator) e com paginação por chave, em páginas cada vez mais fundas')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--empresas', type=int, default=100_000,
+                            help='Quantidade de empresas de teste (padrão: 100000)')
+        parser.add_argument('--paginas', default='1,100,500,1500',
+                            help='Páginas medidas, separadas por vírgula')
+        parser.add_argument('--repeticoes', type=int, default=20)
+        parser.add_argument('--limpar', action='store_true',
+                            help='Remove as empresas de teste ao final')
+
+    def handle(self, *args, **options):
+        self.popular(options['empresas'])
+        empresas = Empresa.objects.filter(ativa=True)
+        por_pagina = 50
+
+        self.stdout.write(f'{"página":>7} {"OFFSET p50":>11} {"chave p50":>10}')
+        for numero in map(int, options['paginas'].split(',')):
+            # Cursor da página: valores da última linha da página anterior (preparação, fora da medição)
+            cursor = None
+            if numero > 1:
+                anterior = (empresas.order_by(*CAMPOS)
+                            .values_list(*CAMPOS)[(numero - 1) * por_pagina - 1:(numero - 1) * por_pagina])
+                if not anterior:
+                    self.stdout.write(f'{numero:>7} além da última página')
+                    continue
+                cursor = codificar_cursor(list(anterior[0]))
+
+            offset, chave = [], []
+            paginador = Paginator(empresas.order_by(*CAMPOS), por_pagina)
+            keyset = PaginadorKeyset(empresas, CAMPOS, por_pagina)
+            for _ in range(options['repeticoes']):
+                inicio = time.perf_counter()
+                list(paginador.page(numero).object_list)
+                offset.append(time.perf_counter() - inicio)
+                inicio = time.perf_counter()
+                keyset.pagina(apos=cursor)
+                chave.append(time.perf_counter() - inicio)
+            self.stdout.write(f'{numero:>7} {statistics.median(offset) * 1000:>9.2f}ms '
+                              f'{statistics.median(chave) * 1000:>8.2f}ms')
+
+        if options['limpar']:
+            Empresa.objects.filter(razao_social__startswith=PREFIXO).delete()
+            self.stdout.write(self.style.SUCCESS('Empresas de teste removidas.'))
+
+    def popular(self, total):
+        existentes = Empresa.objects.filter(razao_social__startswith=PREFIXO).count()
+        if existentes >= total:
+            return
+        self.stdout.write(f'Criando {total - existentes} empresas de teste...')
+        estados = ['RJ', 'SP', 'MG', 'RS', 'PE']
+        for inicio in range(existentes, total, 5000):
+            Empresa.objects.bulk_create([
+                Empresa(
+                    razao_social=f'{PREFIXO}{random.choice(PALAVRAS)} {random.choice(PALAVRAS)} {i}',
+                    cnpj=cnpj_valido(10_000_000 + i),
+                    estado=random.choice(estados),
+                    ativa=random.random() > 0.1,
+                )
+                for i in range(inicio, min(inicio + 5000, total))
+            ])
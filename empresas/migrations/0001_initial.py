@@ -0,0 +1,42 @@
+# Generated by Django 5.1.3 on 2026-10-18 14:23
+
+import django.db.models.deletion
+import localflavor.br.models
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Empresa',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('razao_social', models.CharField(max_length=255, verbose_name='Razão Social')),
+                ('nome_fantasia', models.CharField(blank=True, max_length=255, verbose_name='Nome Fantasia')),
+                ('cnpj', localflavor.br.models.BRCNPJField(max_length=18, unique=True, verbose_name='CNPJ')),
+                ('email', models.EmailField(blank=True, max_length=254, verbose_name='E-mail')),
+                ('telefone', models.CharField(blank=True, max_length=20)),
+                ('site', models.URLField(blank=True)),
+                ('cidade', models.CharField(blank=True, default='Rio de Janeiro', max_length=100)),
+                ('estado', models.CharField(choices=[('AC', 'Acre'), ('AL', 'Alagoas'), ('AP', 'Amapá'), ('AM', 'Amazonas'), ('BA', 'Bahia'), ('CE', 'Ceará'), ('DF', 'Distrito Federal'), ('ES', 'Espírito Santo'), ('GO', 'Goiás'), ('MA', 'Maranhão'), ('MT', 'Mato Grosso'), ('MS', 'Mato Grosso do Sul'), ('MG', 'Minas Gerais'), ('PA', 'Pará'), ('PB', 'Paraíba'), ('PR', 'Paraná'), ('PE', 'Pernambuco'), ('PI', 'Piauí'), ('RJ', 'Rio de Janeiro'), ('RN', 'Rio Grande do Norte'), ('RS', 'Rio Grande do Sul'), ('RO', 'Rondônia'), ('RR', 'Roraima'), ('SC', 'Santa Catarina'), ('SP', 'São Paulo'), ('SE', 'Sergipe'), ('TO', 'Tocantins')], default='RJ', max_length=2)),
+                ('ativa', models.BooleanField(default=True)),
+                ('criado_em', models.DateTimeField(auto_now_add=True, verbose_name='Criado em')),
+                ('atualizado_em', models.DateTimeField(auto_now=True, verbose_name='Atualizado em')),
+                ('responsavel', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='empresas', to=settings.AUTH_USER_MODEL, verbose_name='Responsável')),
+            ],
+            options={
+                'verbose_name': 'Empresa',
+                'verbose_name_plural': 'Empresas',
+                'ordering': ['razao_social', 'id'],
+                'indexes': [models.Index(fields=['razao_social', 'id'], name='empresa_nome_idx'), models.Index(fields=['estado', 'razao_social', 'id'], name='empresa_estado_nome_idx'), models.Index(fields=['ativa', 'razao_social', 'id'], name='empresa_ativa_nome_idx'), models.Index(fields=['responsavel', 'razao_social', 'id'], name='empresa_responsavel_nome_idx')],
+            },
+        ),
+    ]
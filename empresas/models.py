@@ -1,3 +1,61 @@
+from django.conf import settings
 from django.db import models
+from localflavor.br.models import BRCNPJField
 
-# Create your models here.
+from accounts.models import Usuario
+
+
+class EmpresaQuerySet(models.QuerySet):
+    def com_permissao_edicao(self, usuario):
+        """
+        Anota `pode_editar` em cada empresa, na mesma consulta da listagem.
+
+        Mesma regra de Usuario.can_edit_empresa, avaliada pelo banco para a
+        página inteira em vez de objeto por objeto.
+        """
+        if not usuario.is_authenticated:
+            regra = models.Value(False)
+        elif usuario.is_diretoria():
+            regra = models.Value(True)
+        elif usuario.tipo_usuario == 'ASSOCIADO':
+            # CASE em vez de "responsavel_id = x", que dá NULL para empresas sem responsável
+            regra = models.Case(models.When(responsavel_id=usuario.pk, then=models.Value(True)),
+                                default=models.Value(False))
+        else:
+            regra = models.Value(False)
+        return self.annotate(pode_editar=regra)
+
+
+class Empresa(models.Model):
+    razao_social = models.CharField('Razão Social', max_length=255)
+    nome_fantasia = models.CharField('Nome Fantasia', max_length=255, blank=True)
+    cnpj = BRCNPJField('CNPJ', unique=True)
+    responsavel = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL,
+                                    null=True, blank=True, related_name='empresas',
+                                    verbose_name='Responsável')
+    email = models.EmailField('E-mail', blank=True)
+    telefone = models.CharField(max_length=20, blank=True)
+    site = models.URLField(blank=True)
+    cidade = models.CharField(max_length=100, blank=True, default='Rio de Janeiro')
+    estado = models.CharField(max_length=2, choices=Usuario.ESTADOS_BRASIL, default='RJ')
+    ativa = models.BooleanField(default=True)
+    criado_em = models.DateTimeField('Criado em', auto_now_add=True)
+    atualizado_em = models.DateTimeField('Atualizado em', auto_now=True)
+
+    objects = EmpresaQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = 'Empresa'
+        verbose_name_plural = 'Empresas'
+        ordering = ['razao_social', 'id']
+        indexes = [
+            # Listagem por chave (core/paginacao.py): cada filtro termina em (razao_social, id)
+            models.Index(fields=['razao_social', 'id'], name='empresa_nome_idx'),
+            models.Index(fields=['estado', 'razao_social', 'id'], name='empresa_estado_nome_idx'),
+            models.Index(fields=['ativa', 'razao_social', 'id'], name='empresa_ativa_nome_idx'),
+            models.Index(fields=['responsavel', 'razao_social', 'id'],
+                         name='empresa_responsavel_nome_idx'),
+        ]
+
+    def __str__(self):
+        return self.nome_fantasia or self.razao_social
@@ -0,0 +1,11 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from core.cache import invalidar_paginas
+from .models import Empresa
+
+
+# A lista de projetos também mostra a razão social da empresa
+@receiver([post_save, post_delete], sender=Empresa)
+def invalidar_paginas_empresa(sender, instance, **kwargs):
+    invalidar_paginas('empresas', 'projetos')
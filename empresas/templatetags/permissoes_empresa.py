@@ -0,0 +1,17 @@
+from django import template
+
+register = template.Library()
+
+
+@register.filter
+def pode_editar(empresa, usuario):
+    """
+    {% if empresa|pode_editar:user %}
+
+    Usa a anotação de Empresa.objects.com_permissao_edicao(usuario) quando a
+    listagem a trouxe; sem ela, cai na regra por objeto de Usuario.can_edit_empresa.
+    """
+    anotado = getattr(empresa, 'pode_editar', None)
+    if anotado is not None:
+        return anotado
+    return usuario.is_authenticated and usuario.can_edit_empresa(empresa)
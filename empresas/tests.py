@@ -1,3 +1,93 @@
-from django.test import TestCase
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
 
-# Create your tests here.
+from accounts.models import Usuario
+from core.paginacao import codificar_cursor
+from .models import Empresa
+
+
+# As contagens são da própria view: sem o cache de página do cache_por_usuario
+@override_settings(CACHE_PAGINAS_TIMEOUT=0)
+class PermissaoEdicaoEmpresaTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.diretoria = Usuario.objects.create_user('diretoria', tipo_usuario='DIRETORIA')
+        cls.associado = Usuario.objects.create_user('associado', tipo_usuario='ASSOCIADO')
+        cls.outro = Usuario.objects.create_user('outro', tipo_usuario='ASSOCIADO')
+        cls.afiliado = Usuario.objects.create_user('afiliado', tipo_usuario='AFILIADO')
+
+    def setUp(self):
+        cache.clear()
+
+    def criar_empresas(self, quantidade):
+        inicio = Empresa.objects.count()
+        responsaveis = [self.associado, self.outro, None]
+        Empresa.objects.bulk_create(
+            Empresa(razao_social=f'Empresa {i:03d}', cnpj=f'00.000.{i:03d}/0001-00',
+                    responsavel=responsaveis[i % 3])
+            for i in range(inicio, inicio + quantidade)
+        )
+
+    def consultas_da_listagem(self):
+        self.client.force_login(self.associado)
+        with CaptureQueriesContext(connection) as consultas:
+            resposta = self.client.get(reverse('empresas:home'))
+        self.assertEqual(resposta.status_code, 200)
+        return len(consultas), resposta
+
+    def test_anotacao_segue_can_edit_empresa(self):
+        self.criar_empresas(6)
+        for usuario in (self.diretoria, self.associado, self.outro, self.afiliado):
+            for empresa in Empresa.objects.com_permissao_edicao(usuario):
+                self.assertEqual(empresa.pode_editar, usuario.can_edit_empresa(empresa))
+
+    def test_listagem_com_consultas_constantes(self):
+        self.criar_empresas(3)
+        poucas, _ = self.consultas_da_listagem()
+        self.criar_empresas(45)
+        muitas, resposta = self.consultas_da_listagem()
+        self.assertEqual(poucas, muitas)
+        # Uma a cada três empresas é do associado logado
+        self.assertContains(resposta, '>Editar</a>', count=16)
+
+    def test_editar_empresa_de_outro_associado(self):
+        self.criar_empresas(2)
+        empresa_do_outro = Empresa.objects.get(responsavel=self.outro)
+        self.client.force_login(self.associado)
+        resposta = self.client.get(reverse('empresas:editar', args=[empresa_do_outro.pk]))
+        self.assertEqual(resposta.status_code, 403)
+        self.client.force_login(self.diretoria)
+        resposta = self.client.get(reverse('empresas:editar', args=[empresa_do_outro.pk]))
+        self.assertEqual(resposta.status_code, 200)
+
+
+@override_settings(CACHE_PAGINAS_TIMEOUT=0)
+class CursorListagemEmpresasTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = Usuario.objects.create_user('associado', tipo_usuario='ASSOCIADO')
+        Empresa.objects.bulk_create(
+            Empresa(razao_social=f'Empresa {i:03d}', cnpj=f'00.000.{i:03d}/0001-00') for i in range(60)
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def listar(self, apos):
+        self.client.force_login(self.usuario)
+        resposta = self.client.get(reverse('empresas:home'), {'apos': apos})
+        self.assertEqual(resposta.status_code, 200)
+        return [empresa.razao_social for empresa in resposta.context['pagina']]
+
+    def test_cursor_valido_continua_depois_da_ultima_linha(self):
+        ultima = Empresa.objects.get(razao_social='Empresa 049')
+        self.assertEqual(self.listar(codificar_cursor([ultima.razao_social, ultima.pk]))[0], 'Empresa 050')
+
+    def test_cursor_invalido_volta_para_a_primeira_pagina(self):
+        for cursor in ('lixo!!', codificar_cursor({'a': 1}), codificar_cursor(['x', 'abc']),
+                       codificar_cursor([None, 1]), codificar_cursor(['x', [1]])):
+            with self.subTest(cursor=cursor):
+                self.assertEqual(self.listar(cursor)[0], 'Empresa 000')
@@ -5,4 +5,5 @@ app_name = 'empresas'
 
 urlpatterns = [
     path('', views.home_view, name='home'),
+    path('<int:pk>/editar/', views.editar_view, name='editar'),
 ]
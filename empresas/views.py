@@ -1,6 +1,51 @@
-from django.shortcuts import render
+from django.shortcuts import get_object_or_404, redirect, render
 from django.contrib.auth.decorators import login_required
+from django.core.exceptions import PermissionDenied
+from core.cache import cache_por_usuario
+from core.paginacao import PaginadorKeyset
+from accounts.models import Usuario
+from .forms import EmpresaForm
+from .models import Empresa
+
+POR_PAGINA = 50
+
+@login_required
+@cache_por_usuario('empresas')
+async def home_view(request):
+    # Permissão de edição calculada na mesma consulta para a página toda
+    empresas = Empresa.objects.select_related('responsavel').com_permissao_edicao(request.user)
+    estado = request.GET.get('estado', '')
+    if estado:
+        empresas = empresas.filter(estado=estado)
+    if request.GET.get('inativas') != '1':
+        empresas = empresas.filter(ativa=True)
+    if request.GET.get('minhas') == '1':
+        empresas = empresas.filter(responsavel=request.user)
+
+    paginador = PaginadorKeyset(empresas, ('razao_social', 'id'), POR_PAGINA)
+    pagina = await paginador.apagina(apos=request.GET.get('apos'), antes=request.GET.get('antes'))
+
+    # Os links de anterior/próxima mantêm os filtros e trocam só o cursor
+    filtros = request.GET.copy()
+    filtros.pop('apos', None)
+    filtros.pop('antes', None)
+    return render(request, 'empresas/home.html', {
+        'pagina': pagina,
+        'filtros': filtros.urlencode(),
+        'estado': estado,
+        'estados': Usuario.ESTADOS_BRASIL,
+    })
 
 @login_required
-def home_view(request):
-    return render(request, 'empresas/home.html')
+def editar_view(request, pk):
+    empresa = get_object_or_404(Empresa, pk=pk)
+    if not request.user.can_edit_empresa(empresa):
+        raise PermissionDenied
+    if request.method == 'POST':
+        form = EmpresaForm(request.POST, instance=empresa)
+        if form.is_valid():
+            form.save()
+            return redirect('empresas:home')
+    else:
+        form = EmpresaForm(instance=empresa)
+    return render(request, 'empresas/editar.html', {'form': form, 'empresa': empresa})
@@ -0,0 +1,25 @@
+"""
+Configuração do gunicorn: gunicorn -c gunicorn.conf.py acjogos_intranet.wsgi
+
+Com preload_app o mestre importa o projeto (django.setup e core/aquecimento.py)
+uma única vez e os workers nascem por fork já prontos: um worker novo ou
+reciclado atende em milissegundos em vez de refazer o boot inteiro. Mudanças
+no código exigem reiniciar o mestre (não basta HUP nos workers).
+"""
+import os
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.environ.get('GUNICORN_WORKERS', 2 * (os.cpu_count() or 1) + 1))
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', 8))
+preload_app = os.environ.get('GUNICORN_PRELOAD', 'True') == 'True'
+# Reciclar workers é barato com preload_app; limita o crescimento de memória
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 5000))
+max_requests_jitter = max_requests // 10
+
+
+def post_fork(server, worker):
+    # Conexões abertas pelo mestre durante o boot não podem ser compartilhadas entre processos
+    if server.cfg.preload_app:
+        from django.db import connections
+        connections.close_all()
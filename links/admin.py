@@ -1,3 +1,25 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import Link
+
+
+class LinkAdmin(admin.ModelAdmin):
+    list_display = ('titulo', 'url', 'categoria', 'ativo', 'cliques', 'status_http', 'erro', 'verificado_em')
+    list_filter = ('categoria', 'ativo')
+    search_fields = ('titulo', 'url')
+    readonly_fields = ('cliques', 'status_http', 'erro', 'verificado_em')
+    actions = ['verificar_agora']
+
+    @admin.action(description='Verificar os links selecionados agora')
+    def verificar_agora(self, request, queryset):
+        from .verificacao import verificar
+
+        com_problema = verificar(queryset, usar_cache=False)
+        self.message_user(request, f'{queryset.count()} links verificados, {len(com_problema)} com problema.')
+
+    def save_model(self, request, obj, form, change):
+        if not change and obj.criado_por_id is None:
+            obj.criado_por = request.user
+        super().save_model(request, obj, form, change)
+
+admin.site.register(Link, LinkAdmin)
@@ -0,0 +1,92 @@
+"""
+Contagem de cliques dos Links Úteis sem um UPDATE por clique.
+
+Um UPDATE por clique faz todas as requisições de um link popular disputarem
+a mesma linha (e, no SQLite, o banco inteiro). O redirecionamento só soma 1
+num Counter em memória; uma thread grava a cada `LINKS_CLIQUES_INTERVALO`
+segundos um UPDATE cliques = cliques + n por valor de n (links com o mesmo
+número de cliques no período vão num único UPDATE ... WHERE id IN (...)).
+
+Garantias: se o banco falhar, as contagens voltam para o buffer e entram na
+próxima rodada; no encerramento normal do processo (SIGTERM/SIGINT do
+gunicorn ou do uvicorn, fim de um comando) o atexit grava o que restou.
+Só um SIGKILL (ou falta de luz) perde cliques, no máximo os do último
+intervalo. Com LINKS_CLIQUES_ASSINCRONO=False cada clique é gravado na hora.
+"""
+import atexit
+import logging
+import threading
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import DatabaseError, connection, transaction
+from django.db.models import F
+
+from .models import Link
+
+logger = logging.getLogger(__name__)
+
+
+def gravar_cliques(contagens):
+    """Soma as contagens {link_id: n} em Link.cliques, um UPDATE por valor distinto de n"""
+    por_quantidade = defaultdict(list)
+    for link_id, quantidade in contagens.items():
+        por_quantidade[quantidade].append(link_id)
+    with transaction.atomic():
+        for quantidade, ids in por_quantidade.items():
+            Link.objects.filter(pk__in=ids).update(cliques=F('cliques') + quantidade)
+
+
+class BufferCliques:
+    def __init__(self, intervalo):
+        self.intervalo = intervalo
+        self._contagens = Counter()
+        self._trava = threading.Lock()
+        self._thread = None
+
+    def pendentes(self):
+        return sum(self._contagens.values())
+
+    def registrar(self, link_id):
+        with self._trava:
+            self._contagens[link_id] += 1
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._executar, name='buffer-cliques', daemon=True)
+                self._thread.start()
+
+    def _executar(self):
+        evento = threading.Event()
+        while True:
+            evento.wait(self.intervalo)
+            try:
+                self.descarregar()
+            except Exception:
+                logger.exception('Falha inesperada no buffer de cliques')
+
+    def descarregar(self):
+        """Grava as contagens pendentes; retorna quantos cliques foram gravados"""
+        with self._trava:
+            contagens, self._contagens = self._contagens, Counter()
+        if not contagens:
+            return 0
+        connection.close_if_unusable_or_obsolete()
+        try:
+            gravar_cliques(contagens)
+        except DatabaseError:
+            logger.warning('Banco indisponível; %d cliques voltam para o buffer',
+                           sum(contagens.values()), exc_info=True)
+            with self._trava:
+                self._contagens.update(contagens)
+            return 0
+        return sum(contagens.values())
+
+
+buffer = BufferCliques(intervalo=settings.LINKS_CLIQUES_INTERVALO)
+atexit.register(buffer.descarregar)
+
+
+def registrar_clique(link_id):
+    if settings.LINKS_CLIQUES_ASSINCRONO:
+        buffer.registrar(link_id)
+    else:
+        gravar_cliques({link_id: 1})
@@ -0,0 +1,15 @@
+from django import forms
+from .models import Link
+
+class LinkForm(forms.ModelForm):
+    class Meta:
+        model = Link
+        fields = ['titulo', 'url', 'descricao', 'categoria']
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        for field_name, field in self.fields.items():
+            if field_name == 'categoria':
+                field.widget.attrs['class'] = 'form-select'
+            else:
+                field.widget.attrs['class'] = 'form-control'
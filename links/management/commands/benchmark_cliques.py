@@ -0,0 +1,119 @@
+import asyncio
+import http.client
+import os
+import random
+import subprocess
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db.models import Sum
+from django.test import Client, override_settings
+from django.test.utils import setup_test_environment
+from django.urls import reverse
+
+from accounts.models import Usuario
+from core.management.commands.benchmark_asgi import esperar_servidor, porta_livre, servidores
+from links.cliques import buffer
+from links.models import Link
+
+USERNAME = 'bench_cliques'
+PREFIXO = 'Bench clique '
+MODOS = {'direto': False, 'buffer': True}
+
+
+class Command(BaseCommand):
+    help = ('Mede redirecionamentos/s do contador de cliques gravando cada clique e pelo buffer, '
+            'e confere que nenhum clique se perde ao encerrar o gunicorn com SIGTERM')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--links', type=int, default=3, help='Links disputados (padrão: 3)')
+        parser.add_argument('--threads', type=int, default=16, help='Clientes simultâneos (padrão: 16)')
+        parser.add_argument('--duracao', type=float, default=5, help='Segundos por modo (padrão: 5)')
+        parser.add_argument('--cliques-encerramento', type=int, default=500,
+                            help='Cliques enviados ao gunicorn antes do SIGTERM (padrão: 500)')
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        usuario, _ = Usuario.objects.get_or_create(username=USERNAME)
+        client = Client()
+        client.force_login(usuario)
+        cookie = client.cookies[settings.SESSION_COOKIE_NAME].value
+        Link.objects.filter(titulo__startswith=PREFIXO).delete()
+        links = Link.objects.bulk_create(
+            Link(titulo=f'{PREFIXO}{i}', url=f'https://example.com/{i}') for i in range(options['links'])
+        )
+        try:
+            self.stdout.write(f'{"modo":<8} {"redir/s":>8} {"cliques":>8} {"erros":>6} {"no banco":>9}')
+            for modo in MODOS:
+                self.medir(modo, links, cookie, options)
+            if options['cliques_encerramento']:
+                self.encerramento(links[0], cookie, options['cliques_encerramento'])
+        finally:
+            Link.objects.filter(titulo__startswith=PREFIXO).delete()
+            usuario.delete()
+
+    def medir(self, modo, links, cookie, options):
+        Link.objects.filter(titulo__startswith=PREFIXO).update(cliques=0)
+        urls = [reverse('links:ir', args=[link.pk]) for link in links]
+        sucessos, erros = [], []
+        fim = time.perf_counter() + options['duracao']
+
+        def clicar():
+            client = Client(raise_request_exception=False)
+            client.cookies[settings.SESSION_COOKIE_NAME] = cookie
+            feitos = falhas = 0
+            while time.perf_counter() < fim:
+                if client.get(random.choice(urls)).status_code == 302:
+                    feitos += 1
+                else:
+                    falhas += 1
+            sucessos.append(feitos)
+            erros.append(falhas)
+
+        with override_settings(LINKS_CLIQUES_ASSINCRONO=MODOS[modo]):
+            threads = [threading.Thread(target=clicar) for _ in range(options['threads'])]
+            inicio = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            segundos = time.perf_counter() - inicio
+            buffer.descarregar()
+        gravados = Link.objects.filter(titulo__startswith=PREFIXO).aggregate(total=Sum('cliques'))['total']
+        self.stdout.write(f'{modo:<8} {sum(sucessos) / segundos:>8.0f} {sum(sucessos):>8} '
+                          f'{sum(erros):>6} {gravados:>9}')
+
+    def encerramento(self, link, cookie, quantidade):
+        """Cliques no buffer de um gunicorn de verdade, que então recebe SIGTERM antes de gravar"""
+        Link.objects.filter(pk=link.pk).update(cliques=0)
+        porta = porta_livre()
+        # Intervalo enorme: nada é gravado pela thread, só pelo atexit no encerramento
+        env = {**os.environ, 'DEBUG': 'False', 'ALLOWED_HOSTS': '127.0.0.1', 'ESTATICOS_COM_HASH': 'False',
+               'LINKS_CLIQUES_ASSINCRONO': 'True', 'LINKS_CLIQUES_INTERVALO': '3600',
+               'PYTHONPATH': str(settings.BASE_DIR)}
+        processo = subprocess.Popen(servidores(1, 4, porta)['WSGI'], env=env, cwd=settings.BASE_DIR)
+        try:
+            if not asyncio.run(esperar_servidor(porta, processo)):
+                self.stderr.write('encerramento: o gunicorn não subiu')
+                return
+            conexao = http.client.HTTPConnection('127.0.0.1', porta, timeout=30)
+            caminho = reverse('links:ir', args=[link.pk])
+            enviados = 0
+            for _ in range(quantidade):
+                conexao.request('GET', caminho,
+                                headers={'Cookie': f'{settings.SESSION_COOKIE_NAME}={cookie}'})
+                resposta = conexao.getresponse()
+                resposta.read()
+                enviados += resposta.status == 302
+            conexao.close()
+            link.refresh_from_db()
+            antes = link.cliques
+        finally:
+            processo.terminate()
+            processo.wait()
+        link.refresh_from_db()
+        resultado = 'nenhum perdido' if link.cliques == enviados else f'{enviados - link.cliques} PERDIDOS'
+        self.stdout.write(f'encerramento (SIGTERM): {enviados} cliques enviados, {antes} no banco antes '
+                          f'do sinal, {link.cliques} depois: {resultado}')
@@ -0,0 +1,34 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from django.utils import timezone
+
+from links.models import Link
+from links.verificacao import verificar
+
+
+class Command(BaseCommand):
+    help = ('Confere concorrentemente se os links ativos ainda respondem e grava o status; '
+            'para rodar periodicamente (cron)')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--horas', type=float, default=24,
+                            help='Só links não verificados nas últimas N horas (padrão: 24)')
+        parser.add_argument('--todos', action='store_true',
+                            help='Verifica todos os links ativos, ignorando --horas e o cache')
+
+    def handle(self, *args, **options):
+        links = Link.objects.filter(ativo=True)
+        if not options['todos']:
+            limite = timezone.now() - timedelta(hours=options['horas'])
+            links = links.filter(Q(verificado_em__isnull=True) | Q(verificado_em__lt=limite))
+        links = list(links)
+        com_problema = verificar(links, usar_cache=not options['todos'])
+        for link in com_problema:
+            self.stdout.write(f'{link.url}: {link.erro or link.status_http}')
+        mensagem = f'{len(links)} links verificados, {len(com_problema)} com problema.'
+        if com_problema:
+            self.stdout.write(self.style.WARNING(mensagem))
+        else:
+            self.stdout.write(self.style.SUCCESS(mensagem))
@@ -0,0 +1,41 @@
+# Generated by Django 5.1.3 on 2026-10-18 14:35
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Link',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('titulo', models.CharField(max_length=200, verbose_name='Título')),
+                ('url', models.URLField(max_length=500, verbose_name='URL')),
+                ('descricao', models.CharField(blank=True, max_length=300, verbose_name='Descrição')),
+                ('categoria', models.CharField(choices=[('FERRAMENTAS', 'Ferramentas'), ('EDITAIS', 'Editais e fomento'), ('EVENTOS', 'Eventos'), ('APRENDIZADO', 'Aprendizado'), ('COMUNIDADE', 'Comunidade'), ('OUTROS', 'Outros')], default='OUTROS', max_length=20)),
+                ('ativo', models.BooleanField(default=True)),
+                ('criado_em', models.DateTimeField(auto_now_add=True, verbose_name='Criado em')),
+                ('status_http', models.PositiveSmallIntegerField(blank=True, editable=False, null=True, verbose_name='Status HTTP')),
+                ('erro', models.CharField(blank=True, editable=False, max_length=200)),
+                ('etag', models.CharField(blank=True, editable=False, max_length=200)),
+                ('last_modified', models.CharField(blank=True, editable=False, max_length=64)),
+                ('verificado_em', models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Verificado em')),
+                ('criado_por', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='links_criados', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Link',
+                'verbose_name_plural': 'Links',
+                'ordering': ['titulo', 'id'],
+                'indexes': [models.Index(fields=['verificado_em'], name='link_verificado_idx')],
+            },
+        ),
+    ]
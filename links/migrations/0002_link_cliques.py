@@ -0,0 +1,18 @@
+# Generated by Django 5.1.3 on 2026-10-18 14:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('links', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='link',
+            name='cliques',
+            field=models.PositiveBigIntegerField(default=0, editable=False),
+        ),
+    ]
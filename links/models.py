@@ -1,3 +1,49 @@
+from django.conf import settings
 from django.db import models
 
-# Create your models here.
+
+class Link(models.Model):
+    CATEGORIAS = [
+        ('FERRAMENTAS', 'Ferramentas'),
+        ('EDITAIS', 'Editais e fomento'),
+        ('EVENTOS', 'Eventos'),
+        ('APRENDIZADO', 'Aprendizado'),
+        ('COMUNIDADE', 'Comunidade'),
+        ('OUTROS', 'Outros'),
+    ]
+
+    titulo = models.CharField('Título', max_length=200)
+    url = models.URLField('URL', max_length=500)
+    descricao = models.CharField('Descrição', max_length=300, blank=True)
+    categoria = models.CharField(max_length=20, choices=CATEGORIAS, default='OUTROS')
+    ativo = models.BooleanField(default=True)
+    criado_por = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL,
+                                   null=True, blank=True, related_name='links_criados')
+    criado_em = models.DateTimeField('Criado em', auto_now_add=True)
+    # Somado em lote por links/cliques.py
+    cliques = models.PositiveBigIntegerField(default=0, editable=False)
+
+    # Preenchidos pelo verificador (links/verificacao.py)
+    status_http = models.PositiveSmallIntegerField('Status HTTP', null=True, blank=True, editable=False)
+    erro = models.CharField(max_length=200, blank=True, editable=False)
+    etag = models.CharField(max_length=200, blank=True, editable=False)
+    last_modified = models.CharField(max_length=64, blank=True, editable=False)
+    verificado_em = models.DateTimeField('Verificado em', null=True, blank=True, editable=False)
+
+    class Meta:
+        verbose_name = 'Link'
+        verbose_name_plural = 'Links'
+        ordering = ['titulo', 'id']
+        indexes = [
+            models.Index(fields=['verificado_em'], name='link_verificado_idx'),
+        ]
+
+    def __str__(self):
+        return self.titulo
+
+    @property
+    def saudavel(self):
+        """None enquanto nunca foi verificado"""
+        if self.verificado_em is None:
+            return None
+        return not self.erro and self.status_http is not None and self.status_http < 400
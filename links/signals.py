@@ -0,0 +1,13 @@
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from core.cache import invalidar_paginas
+from .models import Link
+
+
+# O redirecionamento usa a URL do cache: editar, desativar ou excluir o link derruba a cópia
+@receiver([post_save, post_delete], sender=Link)
+def invalidar_url(sender, instance, **kwargs):
+    cache.delete(f'links:url:{instance.pk}')
+    invalidar_paginas('links')
@@ -1,3 +1,154 @@
-from django.test import TestCase
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 
-# Create your tests here.
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from accounts.models import Usuario
+from .cliques import BufferCliques
+from .models import Link
+from .verificacao import verificar
+
+
+class SiteFalso(BaseHTTPRequestHandler):
+    """Servidor local no lugar dos sites de verdade: os testes não dependem da rede"""
+    requisicoes = []
+    simultaneas = 0
+    max_simultaneas = 0
+    trava = threading.Lock()
+
+    def do_GET(self):
+        classe = type(self)
+        with classe.trava:
+            classe.requisicoes.append((self.path, self.headers.get('If-None-Match')))
+            classe.simultaneas += 1
+            classe.max_simultaneas = max(classe.max_simultaneas, classe.simultaneas)
+        caminho = self.path.partition('?')[0]
+        try:
+            if caminho == '/lento':
+                time.sleep(0.2)
+            if caminho == '/antigo':
+                self.responder(301, Location='/pagina')
+            elif caminho == '/pagina' and self.headers.get('If-None-Match') == '"v1"':
+                self.responder(304, ETag='"v1"')
+            elif caminho in ('/pagina', '/lento'):
+                self.responder(200, corpo=b'ok' * 1000, ETag='"v1"')
+            else:
+                self.responder(404)
+        finally:
+            with classe.trava:
+                classe.simultaneas -= 1
+
+    def responder(self, status, corpo=b'', **cabecalhos):
+        self.send_response(status)
+        for nome, valor in cabecalhos.items():
+            self.send_header(nome, valor)
+        self.send_header('Content-Length', str(len(corpo)))
+        self.end_headers()
+        if corpo:
+            self.wfile.write(corpo)
+
+    def log_message(self, *args):
+        pass
+
+
+@override_settings(LINKS_VERIFICACAO_CONCORRENCIA=3, LINKS_VERIFICACAO_TIMEOUT=5)
+class VerificacaoLinksTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.servidor = ThreadingHTTPServer(('127.0.0.1', 0), SiteFalso)
+        threading.Thread(target=cls.servidor.serve_forever, daemon=True).start()
+        cls.base = f'http://127.0.0.1:{cls.servidor.server_address[1]}'
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.servidor.shutdown()
+        cls.servidor.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        SiteFalso.requisicoes = []
+        SiteFalso.max_simultaneas = 0
+
+    def criar(self, caminho):
+        return Link.objects.create(titulo=caminho, url=self.base + caminho)
+
+    def test_status_redirecionamento_e_requisicao_condicional(self):
+        pagina, antigo, quebrado = self.criar('/pagina'), self.criar('/antigo'), self.criar('/sumiu')
+        self.assertEqual(verificar(Link.objects.all()), [quebrado])
+        antigo.refresh_from_db()
+        self.assertEqual((antigo.status_http, antigo.etag), (200, '"v1"'))
+        quebrado.refresh_from_db()
+        self.assertEqual(quebrado.status_http, 404)
+        self.assertFalse(quebrado.saudavel)
+
+        # Sem cache: a segunda rodada manda o ETag e recebe 304
+        SiteFalso.requisicoes = []
+        verificar([Link.objects.get(pk=pagina.pk)], usar_cache=False)
+        self.assertEqual(SiteFalso.requisicoes, [('/pagina', '"v1"')])
+        pagina.refresh_from_db()
+        self.assertEqual((pagina.status_http, pagina.etag), (304, '"v1"'))
+        self.assertTrue(pagina.saudavel)
+
+    def test_resultado_em_cache_nao_volta_a_rede(self):
+        self.criar('/pagina')
+        verificar(Link.objects.all())
+        verificar(Link.objects.all())
+        self.assertEqual(len(SiteFalso.requisicoes), 1)
+
+    def test_concorrencia_limitada(self):
+        for i in range(10):
+            self.criar(f'/lento?{i}')
+        inicio = time.perf_counter()
+        self.assertEqual(verificar(Link.objects.all()), [])
+        # 10 requisições de 0,2s, 3 por vez: bem menos que em série, nunca mais de 3 abertas
+        self.assertLess(time.perf_counter() - inicio, 1.5)
+        self.assertEqual(SiteFalso.max_simultaneas, 3)
+
+    def test_servidor_fora_do_ar(self):
+        link = Link.objects.create(titulo='Fora', url='http://127.0.0.1:9/')
+        self.assertEqual(verificar([link]), [link])
+        link.refresh_from_db()
+        self.assertIsNone(link.status_http)
+        self.assertIn('ConnectionRefusedError', link.erro)
+
+    def test_pagina_de_links(self):
+        self.criar('/pagina')
+        self.client.force_login(Usuario.objects.create_user('membro'))
+        self.assertContains(self.client.get(reverse('links:home')), '/pagina')
+
+
+class CliquesTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.link = Link.objects.create(titulo='Itch.io', url='https://itch.io/')
+        cls.outro = Link.objects.create(titulo='Godot', url='https://godotengine.org/')
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(Usuario.objects.create_user('membro'))
+        self.url = reverse('links:ir', args=[self.link.pk])
+
+    @override_settings(LINKS_CLIQUES_ASSINCRONO=False)
+    def test_redireciona_e_conta(self):
+        self.assertRedirects(self.client.get(self.url), 'https://itch.io/', fetch_redirect_response=False)
+        self.client.get(self.url)
+        self.link.refresh_from_db()
+        self.assertEqual(self.link.cliques, 2)
+
+        self.link.ativo = False
+        self.link.save()
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+    def test_buffer_soma_em_poucos_updates(self):
+        buffer = BufferCliques(intervalo=60)
+        for link_id in [self.link.pk] * 3 + [self.outro.pk] * 3:
+            buffer._contagens[link_id] += 1
+        with self.assertNumQueries(3):  # SAVEPOINT, um UPDATE para os dois links, RELEASE
+            self.assertEqual(buffer.descarregar(), 6)
+        self.assertEqual(buffer.pendentes(), 0)
+        self.assertEqual(list(Link.objects.order_by('pk').values_list('cliques', flat=True)), [3, 3])
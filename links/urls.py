@@ -5,4 +5,6 @@ app_name = 'links'
 
 urlpatterns = [
     path('', views.home_view, name='home'),
+    path('novo/', views.novo_view, name='novo'),
+    path('<int:pk>/ir/', views.ir_view, name='ir'),
 ]
@@ -0,0 +1,154 @@
+"""
+Verificação de saúde dos Links Úteis.
+
+Todos os links são conferidos num único event loop: cada URL é uma corrotina
+e um asyncio.Semaphore limita quantas conexões ficam abertas ao mesmo tempo
+(LINKS_VERIFICACAO_CONCORRENCIA), para não estourar descritores nem martelar
+os sites. Só o cabeçalho da resposta é lido; a conexão é fechada antes do
+corpo. A requisição leva If-None-Match/If-Modified-Since da verificação
+anterior, e o servidor que os suporta responde 304 sem gerar a página.
+O resultado de cada URL fica no cache por LINKS_VERIFICACAO_CACHE segundos:
+URLs repetidas e verificações seguidas não voltam à rede.
+
+O cliente HTTP é o mínimo sobre asyncio.open_connection (status e
+cabeçalhos, redirecionamentos, TLS), sem dependências novas.
+"""
+import asyncio
+import hashlib
+import ssl
+from urllib.parse import urljoin, urlsplit
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from core.cache import invalidar_paginas
+from .models import Link
+
+REDIRECIONAMENTOS = {301, 302, 303, 307, 308}
+MAX_REDIRECIONAMENTOS = 5
+USER_AGENT = 'ACJogosIntranet-VerificadorLinks/1.0'
+CAMPOS_RESULTADO = ['status_http', 'erro', 'etag', 'last_modified', 'verificado_em']
+
+_contexto_ssl = None
+
+
+def contexto_ssl():
+    global _contexto_ssl
+    if _contexto_ssl is None:
+        _contexto_ssl = ssl.create_default_context()
+    return _contexto_ssl
+
+
+def chave_cache(url):
+    return 'links:verificacao:' + hashlib.sha1(url.encode()).hexdigest()
+
+
+async def requisitar(url, cabecalhos, timeout):
+    """(status, {cabeçalho em minúsculas: valor}) de um GET, sem ler o corpo"""
+    partes = urlsplit(url)
+    if partes.scheme not in ('http', 'https') or not partes.hostname:
+        raise ValueError('URL inválida')
+    seguro = partes.scheme == 'https'
+    host = partes.hostname.encode('idna').decode()
+    porta = partes.port or (443 if seguro else 80)
+    caminho = (partes.path or '/') + (f'?{partes.query}' if partes.query else '')
+    linhas = [
+        f'GET {caminho} HTTP/1.1',
+        f'Host: {host}' + (f':{partes.port}' if partes.port else ''),
+        f'User-Agent: {USER_AGENT}',
+        'Accept: */*',
+        'Connection: close',
+        *(f'{nome}: {valor}' for nome, valor in cabecalhos.items()),
+    ]
+    leitor, escritor = await asyncio.wait_for(
+        asyncio.open_connection(host, porta, ssl=contexto_ssl() if seguro else None,
+                                server_hostname=host if seguro else None),
+        timeout,
+    )
+    try:
+        escritor.write(('\r\n'.join(linhas) + '\r\n\r\n').encode('latin-1'))
+        await escritor.drain()
+        bruto = await asyncio.wait_for(leitor.readuntil(b'\r\n\r\n'), timeout)
+    finally:
+        escritor.close()
+
+    inicio, *resto = bruto.decode('latin-1').split('\r\n')
+    status = int(inicio.split()[1])
+    campos = {}
+    for linha in resto:
+        nome, separador, valor = linha.partition(':')
+        if separador:
+            campos[nome.strip().lower()] = valor.strip()
+    return status, campos
+
+
+async def verificar_url(url, etag='', last_modified='', timeout=10):
+    """Resultado da verificação de uma URL como dict (cabe direto no cache)"""
+    cabecalhos = {}
+    if etag:
+        cabecalhos['If-None-Match'] = etag
+    if last_modified:
+        cabecalhos['If-Modified-Since'] = last_modified
+    resultado = {'status_http': None, 'erro': '', 'etag': '', 'last_modified': ''}
+    atual = url
+    try:
+        for _ in range(MAX_REDIRECIONAMENTOS + 1):
+            status, campos = await requisitar(atual, cabecalhos, timeout)
+            if status not in REDIRECIONAMENTOS or 'location' not in campos:
+                break
+            atual = urljoin(atual, campos['location'])
+        else:
+            resultado['erro'] = 'redirecionamentos demais'
+            return resultado
+    except TimeoutError:
+        resultado['erro'] = 'tempo esgotado'
+        return resultado
+    except (OSError, ValueError, IndexError, UnicodeError,
+            asyncio.IncompleteReadError, asyncio.LimitOverrunError) as erro:
+        resultado['erro'] = f'{type(erro).__name__}: {erro}'[:200]
+        return resultado
+
+    resultado['status_http'] = status
+    if status == 304:
+        # Nada mudou desde a última verificação: os validadores continuam os mesmos
+        resultado['etag'], resultado['last_modified'] = etag, last_modified
+    else:
+        resultado['etag'] = campos.get('etag', '')[:200]
+        resultado['last_modified'] = campos.get('last-modified', '')[:64]
+    return resultado
+
+
+async def verificar_links(links, concorrencia, timeout, usar_cache=True):
+    """{url: resultado} dos links, com no máximo `concorrencia` conexões ao mesmo tempo"""
+    semaforo = asyncio.Semaphore(concorrencia)
+    por_url = {link.url: link for link in links}
+
+    async def verificar_um(url, link):
+        chave = chave_cache(url)
+        resultado = await cache.aget(chave) if usar_cache else None
+        if resultado is None:
+            async with semaforo:
+                resultado = await verificar_url(url, link.etag, link.last_modified, timeout)
+            await cache.aset(chave, resultado, settings.LINKS_VERIFICACAO_CACHE)
+        return url, resultado
+
+    return dict(await asyncio.gather(*(verificar_um(url, link) for url, link in por_url.items())))
+
+
+def verificar(links, usar_cache=True):
+    """Verifica e grava o resultado dos links; retorna os que estão com problema"""
+    links = list(links)
+    if not links:
+        return []
+    resultados = asyncio.run(verificar_links(
+        links, settings.LINKS_VERIFICACAO_CONCORRENCIA, settings.LINKS_VERIFICACAO_TIMEOUT, usar_cache
+    ))
+    agora = timezone.now()
+    for link in links:
+        for campo, valor in resultados[link.url].items():
+            setattr(link, campo, valor)
+        link.verificado_em = agora
+    Link.objects.bulk_update(links, CAMPOS_RESULTADO, batch_size=500)
+    invalidar_paginas('links')
+    return [link for link in links if not link.saudavel]
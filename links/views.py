@@ -1,6 +1,41 @@
-from django.shortcuts import render
+from django.shortcuts import redirect, render
 from django.contrib.auth.decorators import login_required
+from django.core.cache import cache
+from django.http import Http404
+from core.cache import cache_por_usuario
+from .cliques import registrar_clique
+from .forms import LinkForm
+from .models import Link
 
 @login_required
-def home_view(request):
-    return render(request, 'base/em_construcao.html', {'app_name': 'Links'})
+@cache_por_usuario('links')
+async def home_view(request):
+    links = [link async for link in Link.objects.filter(ativo=True).order_by('categoria', 'titulo', 'id')]
+    return render(request, 'links/home.html', {'links': links})
+
+@login_required
+def novo_view(request):
+    if request.method == 'POST':
+        form = LinkForm(request.POST)
+        if form.is_valid():
+            link = form.save(commit=False)
+            link.criado_por = request.user
+            link.save()
+            # A verificação fica para o próximo verificar_links: a requisição não espera o site
+            return redirect('links:home')
+    else:
+        form = LinkForm()
+    return render(request, 'links/novo.html', {'form': form})
+
+@login_required
+def ir_view(request, pk):
+    # URL vem do cache e o clique vai para o buffer: o redirecionamento não escreve no banco
+    chave = f'links:url:{pk}'
+    url = cache.get(chave)
+    if url is None:
+        url = Link.objects.filter(pk=pk, ativo=True).values_list('url', flat=True).first()
+        if url is None:
+            raise Http404
+        cache.set(chave, url)
+    registrar_clique(pk)
+    return redirect(url)
@@ -1,3 +1,66 @@
+from django import forms
 from django.contrib import admin
 
-# Register your models here.
+from .agregados import TAMANHO_OPCAO, opcao_valida
+from .models import Pergunta, Pesquisa, Resposta
+
+
+class PerguntaForm(forms.ModelForm):
+    class Meta:
+        model = Pergunta
+        fields = '__all__'
+
+    def clean_opcoes(self):
+        opcoes = self.cleaned_data['opcoes']
+        if not isinstance(opcoes, list) or not all(opcao_valida(opcao) for opcao in opcoes):
+            raise forms.ValidationError(
+                f'Use uma lista de textos, cada um com 1 a {TAMANHO_OPCAO} caracteres: ["Sim", "Não"].'
+            )
+        if len(set(opcoes)) != len(opcoes):
+            raise forms.ValidationError('Há opções repetidas.')
+        return opcoes
+
+    def clean(self):
+        dados = super().clean()
+        tipo = dados.get('tipo')
+        if tipo in ('UNICA', 'MULTIPLA') and not dados.get('opcoes') and 'opcoes' not in self.errors:
+            self.add_error('opcoes', 'Perguntas de escolha precisam de opções.')
+        # Respostas já recebidas estão no formato do tipo antigo e não entrariam nos resultados
+        if (self.instance.pk and 'tipo' in self.changed_data
+                and self.instance.agregados.filter(total__gt=0).exists()):
+            self.add_error('tipo', 'A pergunta já tem respostas; para mudar o tipo, crie uma pergunta nova.')
+        return dados
+
+
+class PerguntaInline(admin.TabularInline):
+    model = Pergunta
+    form = PerguntaForm
+    extra = 1
+
+
+class PesquisaAdmin(admin.ModelAdmin):
+    list_display = ('titulo', 'aberta', 'anonima', 'total_respostas', 'criado_por', 'criado_em')
+    list_filter = ('aberta', 'anonima')
+    search_fields = ('titulo',)
+    list_select_related = ('criado_por',)
+    readonly_fields = ('total_respostas',)
+    inlines = [PerguntaInline]
+
+    def save_model(self, request, obj, form, change):
+        if not change and obj.criado_por_id is None:
+            obj.criado_por = request.user
+        super().save_model(request, obj, form, change)
+
+
+class RespostaAdmin(admin.ModelAdmin):
+    list_display = ('pesquisa', 'usuario', 'recebida_em')
+    list_select_related = ('pesquisa', 'usuario')
+    readonly_fields = ('pesquisa', 'usuario', 'token', 'respostas', 'recebida_em')
+    # A tabela cresce rápido: sem COUNT(*) exato na paginação do admin
+    show_full_result_count = False
+
+    def has_add_permission(self, request):
+        return False
+
+admin.site.register(Pesquisa, PesquisaAdmin)
+admin.site.register(Resposta, RespostaAdmin)
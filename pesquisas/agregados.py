@@ -0,0 +1,189 @@
+"""
+Resultados de pesquisas pré-calculados (AgregadoPergunta e Pesquisa.total_respostas).
+
+Cada lote gravado pelo buffer de ingestao.py soma, em Python, a contribuição de
+todas as suas respostas e aplica um UPDATE ... = campo + delta por linha de
+agregado tocada: o custo é por pergunta/opção, não por resposta. A página de
+resultados lê só os agregados, qualquer que seja o número de respostas, e
+`recalcular` refaz tudo lendo as respostas para corrigir o que passou por
+fora (respostas apagadas ou alteradas direto no banco).
+"""
+import logging
+from collections import Counter, defaultdict
+from math import sqrt
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+from core.cache import invalidar_paginas
+from .models import AgregadoPergunta, Pergunta, Pesquisa, Resposta
+
+logger = logging.getLogger(__name__)
+
+TOTAL = ''  # opção da linha geral de cada pergunta
+TAMANHO_OPCAO = AgregadoPergunta._meta.get_field('opcao').max_length
+
+
+def opcao_valida(opcao):
+    return isinstance(opcao, str) and 0 < len(opcao) <= TAMANHO_OPCAO
+
+
+def valor_valido(tipo, valor):
+    """O valor cabe nos agregados do tipo atual da pergunta? (o tipo pode ter mudado depois da resposta)"""
+    if tipo == 'NUMERO':
+        return isinstance(valor, int) and not isinstance(valor, bool)
+    if tipo == 'UNICA':
+        return opcao_valida(valor)
+    if tipo == 'MULTIPLA':
+        return isinstance(valor, list) and all(opcao_valida(opcao) for opcao in valor)
+    return True
+
+
+def acumular(deltas, respostas, tipos):
+    """
+    Soma em `deltas` {(pergunta, opção): [total, soma, soma_quadrados]} um dict de respostas.
+
+    Valores que não cabem no tipo atual da pergunta ficam de fora dos agregados (a
+    resposta continua gravada); retorna quantos foram ignorados.
+    """
+    ignorados = 0
+    for chave, valor in respostas.items():
+        pergunta = int(chave)
+        tipo = tipos.get(pergunta)
+        if tipo is None:
+            continue  # pergunta excluída depois da resposta
+        if not valor_valido(tipo, valor):
+            ignorados += 1
+            continue
+        geral = deltas[(pergunta, TOTAL)]
+        geral[0] += 1
+        if tipo == 'NUMERO':
+            geral[1] += valor
+            geral[2] += valor * valor
+        elif tipo == 'UNICA':
+            deltas[(pergunta, valor)][0] += 1
+        elif tipo == 'MULTIPLA':
+            for opcao in valor:
+                deltas[(pergunta, opcao)][0] += 1
+    return ignorados
+
+
+def novo_acumulador():
+    return defaultdict(lambda: [0, 0, 0])
+
+
+def aplicar(deltas):
+    """Soma cada delta ao agregado correspondente, criando os que ainda não existem"""
+    for (pergunta, opcao), (total, soma, quadrados) in deltas.items():
+        agregados = AgregadoPergunta.objects.filter(pergunta_id=pergunta, opcao=opcao)
+        incremento = {'total': F('total') + total, 'soma': F('soma') + soma,
+                      'soma_quadrados': F('soma_quadrados') + quadrados}
+        if agregados.update(**incremento):
+            continue
+        try:
+            with transaction.atomic():
+                AgregadoPergunta.objects.create(pergunta_id=pergunta, opcao=opcao, total=total,
+                                                soma=soma, soma_quadrados=quadrados)
+        except IntegrityError:
+            # Outro processo criou a linha entre o UPDATE e o INSERT
+            agregados.update(**incremento)
+
+
+def registrar_lote(respostas):
+    """Aplica aos agregados um lote de Respostas recém-gravadas (chamado dentro da transação)"""
+    if not respostas:
+        return
+    por_pesquisa = Counter(r.pesquisa_id for r in respostas)
+    tipos = dict(Pergunta.objects.filter(pesquisa_id__in=por_pesquisa).values_list('id', 'tipo'))
+    deltas = novo_acumulador()
+    ignorados = sum(acumular(deltas, resposta.respostas, tipos) for resposta in respostas)
+    if ignorados:
+        logger.warning('%d valores de resposta incompatíveis com o tipo da pergunta ficaram fora '
+                       'dos agregados', ignorados)
+    aplicar(deltas)
+    for pesquisa_id, quantidade in por_pesquisa.items():
+        Pesquisa.objects.filter(pk=pesquisa_id).update(total_respostas=F('total_respostas') + quantidade)
+
+
+def recalcular(pesquisa_id=None, corrigir=True):
+    """
+    Refaz os agregados lendo as respostas e, se `corrigir`, regrava os divergentes.
+
+    Os agregados ficam travados (select_for_update) durante a leitura, então um
+    lote concorrente espera e soma o seu delta depois do valor corrigido.
+    Retorna a lista de (pergunta ou 'pesquisa N', opção, armazenado, real) divergentes.
+    """
+    pesquisas = Pesquisa.objects.all() if pesquisa_id is None else Pesquisa.objects.filter(pk=pesquisa_id)
+    with transaction.atomic():
+        totais = {p.pk: p for p in pesquisas.select_for_update()}
+        armazenados = {
+            (a.pergunta_id, a.opcao): a
+            for a in AgregadoPergunta.objects.select_for_update().filter(pergunta__pesquisa__in=list(totais))
+        }
+        tipos = dict(Pergunta.objects.filter(pesquisa__in=list(totais)).values_list('id', 'tipo'))
+        reais = novo_acumulador()
+        respostas_reais = Counter()
+        linhas = (Resposta.objects.filter(pesquisa__in=list(totais)).order_by()
+                  .values_list('pesquisa_id', 'respostas').iterator(chunk_size=2000))
+        for pesquisa, respostas in linhas:
+            respostas_reais[pesquisa] += 1
+            acumular(reais, respostas, tipos)
+
+        divergencias = []
+        for pesquisa in totais.values():
+            real = respostas_reais[pesquisa.pk]
+            if pesquisa.total_respostas != real:
+                divergencias.append((f'pesquisa {pesquisa.pk}', TOTAL, pesquisa.total_respostas, real))
+                if corrigir:
+                    Pesquisa.objects.filter(pk=pesquisa.pk).update(total_respostas=real)
+
+        for chave in sorted(set(armazenados) | set(reais)):
+            agregado = armazenados.get(chave)
+            armazenado = [agregado.total, agregado.soma, agregado.soma_quadrados] if agregado else [0, 0, 0]
+            real = reais.get(chave, [0, 0, 0])
+            if armazenado == real:
+                continue
+            divergencias.append((*chave, armazenado[0], real[0]))
+            if not corrigir:
+                continue
+            if agregado is None:
+                AgregadoPergunta.objects.create(pergunta_id=chave[0], opcao=chave[1], total=real[0],
+                                                soma=real[1], soma_quadrados=real[2])
+            elif real[0]:
+                AgregadoPergunta.objects.filter(pk=agregado.pk).update(
+                    total=real[0], soma=real[1], soma_quadrados=real[2]
+                )
+            else:
+                agregado.delete()
+        if corrigir and divergencias:
+            invalidar_paginas('pesquisas')
+    return divergencias
+
+
+def montar_resultados(perguntas, agregados):
+    """Organiza os AgregadoPergunta (já carregados) para a página de resultados"""
+    por_pergunta = defaultdict(dict)
+    for agregado in agregados:
+        por_pergunta[agregado.pergunta_id][agregado.opcao] = agregado
+
+    resultados = []
+    for pergunta in perguntas:
+        linhas = por_pergunta.get(pergunta.pk, {})
+        geral = linhas.get(TOTAL)
+        n = geral.total if geral else 0
+        resultado = {'pergunta': pergunta, 'respostas': n}
+        if pergunta.tipo in ('UNICA', 'MULTIPLA'):
+            # Opções atuais na ordem da pergunta e, no fim, as que foram removidas mas têm votos
+            opcoes = list(pergunta.opcoes) + sorted(o for o in linhas if o and o not in pergunta.opcoes)
+            resultado['opcoes'] = [
+                (opcao, linhas[opcao].total if opcao in linhas else 0,
+                 round(100 * linhas[opcao].total / n) if n and opcao in linhas else 0)
+                for opcao in opcoes
+            ]
+        elif pergunta.tipo == 'NUMERO' and n:
+            resultado['media'] = geral.soma / n
+            # Variância amostral a partir das somas inteiras (numerador exato)
+            variancia = (n * geral.soma_quadrados - geral.soma ** 2) / (n * (n - 1)) if n > 1 else 0
+            resultado['desvio'] = sqrt(variancia)
+        resultados.append(resultado)
+    return resultados
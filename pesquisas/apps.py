@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class PesquisasConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'pesquisas'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,33 @@
+from django import forms
+
+
+class RespostaPesquisaForm(forms.Form):
+    """Um campo `p_<id>` por pergunta, montado a partir dos dicts de ingestao.dados_pesquisa"""
+
+    def __init__(self, perguntas, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.perguntas = perguntas
+        for pergunta in perguntas:
+            self.fields[f'p_{pergunta["id"]}'] = self._campo(pergunta)
+
+    def _campo(self, pergunta):
+        comum = {'label': pergunta['texto'], 'required': pergunta['obrigatoria']}
+        escolhas = [(opcao, opcao) for opcao in pergunta['opcoes']]
+        if pergunta['tipo'] == 'UNICA':
+            return forms.ChoiceField(choices=escolhas, widget=forms.RadioSelect, **comum)
+        if pergunta['tipo'] == 'MULTIPLA':
+            return forms.MultipleChoiceField(choices=escolhas, widget=forms.CheckboxSelectMultiple, **comum)
+        if pergunta['tipo'] == 'NUMERO':
+            return forms.IntegerField(min_value=pergunta['minimo'], max_value=pergunta['maximo'],
+                                      widget=forms.NumberInput(attrs={'class': 'form-control'}), **comum)
+        return forms.CharField(max_length=2000, widget=forms.Textarea(attrs={'class': 'form-control', 'rows': 3}),
+                               **comum)
+
+    def respostas(self):
+        """{id da pergunta (texto): valor}, sem as perguntas opcionais deixadas em branco"""
+        resultado = {}
+        for pergunta in self.perguntas:
+            valor = self.cleaned_data.get(f'p_{pergunta["id"]}')
+            if valor not in (None, '', []):
+                resultado[str(pergunta['id'])] = valor
+        return resultado
@@ -0,0 +1,273 @@
+"""
+Caminho de escrita das respostas de pesquisas, pensado para picos.
+
+Depois de um anúncio no Discord chegam milhares de submissões em poucos
+minutos. A requisição só valida o formulário (com as perguntas vindas do
+cache) e coloca a Resposta num buffer em memória; uma thread grava o buffer
+com bulk_create a cada `PESQUISAS_BUFFER_LOTE` respostas ou
+`PESQUISAS_BUFFER_INTERVALO` segundos, o que vier primeiro. Um INSERT de 500
+linhas custa muito menos que 500 INSERTs, cada um com seu commit, e os
+resultados da pesquisa (agregados.py) são atualizados uma vez por lote.
+
+Quem já respondeu fica em Participacao, com um HMAC de (pesquisa, membro):
+reenviar o formulário, dar F5 ou responder de dois dispositivos gera o mesmo
+token de participação e a resposta repetida é descartada no lote, sem erro
+para o usuário. A Resposta leva só um token aleatório, então nas pesquisas
+anônimas nada liga a resposta ao membro.
+
+Nenhuma resposta aceita é descartada: com o banco fora do ar o lote volta
+para o buffer e as tentativas se espaçam; um lote que falha por outro motivo
+é gravado uma resposta por vez, e as que ainda falham ficam retidas e são
+tentadas de novo, sozinhas. Com PESQUISAS_BUFFER_ASSINCRONO=False cada
+resposta é gravada na hora (testes e instalações pequenas). Respostas no
+buffer se perdem se o processo morrer sem encerrar normalmente; o intervalo
+limita essa janela, e no encerramento normal o que não pôde ser gravado vai
+inteiro para o log.
+"""
+import atexit
+import json
+import logging
+import secrets
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import (
+    DatabaseError, IntegrityError, InterfaceError, OperationalError, connection, transaction,
+)
+from django.utils import timezone
+from django.utils.crypto import salted_hmac
+
+from core.cache import invalidar_paginas
+from .agregados import registrar_lote
+from .models import Participacao, Pesquisa, Resposta
+
+logger = logging.getLogger(__name__)
+
+CHAVE_CACHE = 'pesquisas:dados:{}'
+# Teto da espera entre tentativas com o banco fora do ar ou para uma resposta retida
+ESPERA_MAXIMA = 300
+
+
+def token_participacao(pesquisa_id, usuario_id):
+    return salted_hmac('pesquisas.resposta', f'{pesquisa_id}:{usuario_id}',
+                       algorithm='sha256').hexdigest()[:32]
+
+
+def dados_pesquisa(pesquisa_id):
+    """Pesquisa e perguntas como dicts, do cache; None se não existir"""
+    chave = CHAVE_CACHE.format(pesquisa_id)
+    dados = cache.get(chave)
+    if dados is None:
+        pesquisa = Pesquisa.objects.filter(pk=pesquisa_id).prefetch_related('perguntas').first()
+        if pesquisa is None:
+            return None
+        dados = {
+            'id': pesquisa.pk,
+            'titulo': pesquisa.titulo,
+            'descricao': pesquisa.descricao,
+            'aberta': pesquisa.aberta,
+            'anonima': pesquisa.anonima,
+            'perguntas': [
+                {'id': p.pk, 'texto': p.texto, 'tipo': p.tipo, 'opcoes': p.opcoes,
+                 'minimo': p.minimo, 'maximo': p.maximo, 'obrigatoria': p.obrigatoria}
+                for p in pesquisa.perguntas.all()
+            ],
+        }
+        cache.set(chave, dados, settings.CACHE_TIMEOUT)
+    return dados
+
+
+def invalidar_pesquisa(pesquisa_id):
+    cache.delete(CHAVE_CACHE.format(pesquisa_id))
+
+
+def gravar_lote(respostas):
+    """
+    Insere as respostas de quem ainda não respondeu; retorna as que foram gravadas.
+
+    Cada Resposta chega com o atributo `participacao` (token_participacao), que
+    não é gravado nela.
+    """
+    unicas = {}
+    for resposta in respostas:
+        unicas.setdefault(resposta.participacao, resposta)
+    with transaction.atomic():
+        # Reenvios já gravados são ignorados
+        existentes = set(Participacao.objects.filter(token__in=list(unicas)).values_list('token', flat=True))
+        novas = [resposta for token, resposta in unicas.items() if token not in existentes]
+        try:
+            with transaction.atomic():
+                _inserir(novas)
+        except IntegrityError:
+            # Outro processo gravou a mesma participação entre a consulta e o INSERT
+            novas = [resposta for resposta in novas if _inserir_uma(resposta)]
+        # Os agregados num savepoint próprio: se falharem, as respostas ficam gravadas mesmo
+        # assim e o reconstruir_agregados acerta os resultados depois
+        try:
+            with transaction.atomic():
+                registrar_lote(novas)
+        except DatabaseError:
+            logger.exception('Agregados de %d respostas não atualizados; rode reconstruir_agregados',
+                             len(novas))
+        if novas:
+            # "Respondida" e o total de respostas da página inicial mudaram
+            invalidar_paginas('pesquisas')
+    return novas
+
+
+def _inserir(respostas):
+    # Participações em ordem de token, não na das respostas: nem a ordem física das linhas pareia as duas
+    participacoes = sorted(respostas, key=lambda resposta: resposta.participacao)
+    Participacao.objects.bulk_create(
+        [Participacao(token=r.participacao, pesquisa_id=r.pesquisa_id) for r in participacoes]
+    )
+    Resposta.objects.bulk_create(respostas)
+
+
+def _inserir_uma(resposta):
+    try:
+        with transaction.atomic():
+            _inserir([resposta])
+        return True
+    except IntegrityError:
+        resposta.pk = None
+        return False
+
+
+def _espera(tentativas, intervalo):
+    return min(intervalo * 2 ** tentativas, ESPERA_MAXIMA)
+
+
+class BufferRespostas:
+    def __init__(self, lote, intervalo):
+        self.lote = lote
+        self.intervalo = intervalo
+        self._pendentes = []
+        # (monotonic da próxima tentativa, tentativas, resposta) que falharam sozinhas
+        self._retidas = []
+        self._falhas_banco = 0
+        self._retomar_em = 0.0
+        self._trava = threading.Lock()
+        self._acordar = threading.Event()
+        self._thread = None
+
+    def __len__(self):
+        return len(self._pendentes) + len(self._retidas)
+
+    def adicionar(self, resposta):
+        with self._trava:
+            self._pendentes.append(resposta)
+            cheio = len(self._pendentes) >= self.lote
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._executar, name='buffer-pesquisas',
+                                                daemon=True)
+                self._thread.start()
+        if cheio:
+            self._acordar.set()
+
+    def _executar(self):
+        while True:
+            self._acordar.wait(self.intervalo)
+            self._acordar.clear()
+            try:
+                self.descarregar()
+            except Exception:
+                logger.exception('Falha inesperada no buffer de respostas de pesquisas')
+
+    def descarregar(self):
+        """Grava o que está pendente e as retidas cuja vez chegou; retorna quantas respostas eram novas"""
+        agora = time.monotonic()
+        with self._trava:
+            if agora < self._retomar_em:
+                return 0  # banco fora do ar na última rodada: espera a vez da próxima tentativa
+            pendentes, self._pendentes = self._pendentes, []
+            prontas = [item for item in self._retidas if item[0] <= agora]
+            self._retidas = [item for item in self._retidas if item[0] > agora]
+        if not pendentes and not prontas:
+            return 0
+        # A thread do buffer vive fora do ciclo de requisições: descarta conexão quebrada/velha
+        connection.close_if_unusable_or_obsolete()
+        gravadas = 0
+        for inicio in range(0, len(pendentes), self.lote):
+            bloco = pendentes[inicio:inicio + self.lote]
+            try:
+                gravadas += len(gravar_lote(bloco))
+            except (OperationalError, InterfaceError):
+                self._banco_indisponivel(pendentes[inicio:], prontas)
+                return gravadas
+            except Exception:
+                # Uma resposta ruim não pode levar o lote junto: cada uma é tentada sozinha abaixo
+                logger.exception('Falha ao gravar lote de %d respostas; gravando uma por vez', len(bloco))
+                prontas.extend((agora, 0, resposta) for resposta in bloco)
+
+        for posicao, (_, tentativas, resposta) in enumerate(prontas):
+            try:
+                gravadas += len(gravar_lote([resposta]))
+            except (OperationalError, InterfaceError):
+                self._banco_indisponivel([], prontas[posicao:])
+                return gravadas
+            except Exception:
+                espera = _espera(tentativas, self.intervalo)
+                logger.exception('Resposta %s não gravada (tentativa %d); nova tentativa em %.0fs',
+                                 resposta.token, tentativas + 1, espera)
+                with self._trava:
+                    self._retidas.append((time.monotonic() + espera, tentativas + 1, resposta))
+        self._falhas_banco = 0
+        return gravadas
+
+    def _banco_indisponivel(self, pendentes, retidas):
+        """Devolve tudo ao buffer e adia a próxima rodada, com espera crescente"""
+        espera = _espera(self._falhas_banco, self.intervalo)
+        logger.warning('Banco indisponível; %d respostas voltam para o buffer (nova tentativa em %.0fs)',
+                       len(pendentes) + len(retidas), espera, exc_info=True)
+        with self._trava:
+            self._pendentes[:0] = pendentes
+            self._retidas.extend(retidas)
+            self._falhas_banco += 1
+            self._retomar_em = time.monotonic() + espera
+
+    def encerrar(self):
+        """No fim do processo: uma última tentativa e, para o que sobrar, os dados completos no log"""
+        with self._trava:
+            self._retomar_em = 0.0
+            self._retidas = [(0.0, tentativas, resposta) for _, tentativas, resposta in self._retidas]
+        self.descarregar()
+        with self._trava:
+            sobras = self._pendentes + [resposta for _, _, resposta in self._retidas]
+        for resposta in sobras:
+            logger.error('Resposta de pesquisa não gravada ao encerrar: %s', json.dumps({
+                'pesquisa': resposta.pesquisa_id, 'usuario': resposta.usuario_id, 'token': resposta.token,
+                'respostas': resposta.respostas, 'recebida_em': resposta.recebida_em,
+            }, cls=DjangoJSONEncoder, ensure_ascii=False))
+
+
+buffer = BufferRespostas(
+    lote=settings.PESQUISAS_BUFFER_LOTE,
+    intervalo=settings.PESQUISAS_BUFFER_INTERVALO,
+)
+atexit.register(buffer.encerrar)
+
+
+def montar_resposta(dados, usuario, respostas):
+    resposta = Resposta(
+        pesquisa_id=dados['id'],
+        usuario_id=None if dados['anonima'] else usuario.pk,
+        token=secrets.token_hex(16),
+        respostas=respostas,
+        recebida_em=timezone.now(),
+    )
+    resposta.participacao = token_participacao(dados['id'], usuario.pk)
+    return resposta
+
+
+def registrar_resposta(dados, usuario, respostas):
+    """Monta a Resposta já validada pelo formulário e a grava ou enfileira; retorna o token"""
+    resposta = montar_resposta(dados, usuario, respostas)
+    if settings.PESQUISAS_BUFFER_ASSINCRONO:
+        buffer.adicionar(resposta)
+    else:
+        gravar_lote([resposta])
+    return resposta.token
@@ -0,0 +1,119 @@
+import queue
+import random
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.test import Client, override_settings
+from django.test.utils import setup_test_environment
+from django.urls import reverse
+
+from accounts.models import Usuario
+from pesquisas.agregados import recalcular
+from pesquisas.ingestao import buffer
+from pesquisas.models import Pergunta, Pesquisa, Resposta
+
+PREFIXO = 'bench_pesq_'
+MODOS = {'direto': False, 'buffer': True}
+
+
+def criar_pesquisa(titulo):
+    pesquisa = Pesquisa.objects.create(titulo=titulo)
+    Pergunta.objects.bulk_create([
+        Pergunta(pesquisa=pesquisa, ordem=1, texto='Plataforma principal', tipo='UNICA',
+                 opcoes=['PC', 'Console', 'Mobile']),
+        Pergunta(pesquisa=pesquisa, ordem=2, texto='Gêneros', tipo='MULTIPLA',
+                 opcoes=['Ação', 'RPG', 'Estratégia', 'Puzzle']),
+        Pergunta(pesquisa=pesquisa, ordem=3, texto='Nota para o evento', tipo='NUMERO', minimo=0, maximo=10),
+        Pergunta(pesquisa=pesquisa, ordem=4, texto='Comentários', tipo='TEXTO', obrigatoria=False),
+    ])
+    perguntas = list(pesquisa.perguntas.values_list('id', flat=True))
+    return pesquisa, perguntas
+
+
+def dados_formulario(perguntas):
+    unica, multipla, numero, texto = perguntas
+    return {
+        f'p_{unica}': random.choice(['PC', 'Console', 'Mobile']),
+        f'p_{multipla}': random.sample(['Ação', 'RPG', 'Estratégia', 'Puzzle'], 2),
+        f'p_{numero}': str(random.randint(0, 10)),
+        f'p_{texto}': 'Muito bom!' if random.random() < 0.3 else '',
+    }
+
+
+class Command(BaseCommand):
+    help = ('Simula o pico de respostas depois de um anúncio: muitos membros enviando a mesma '
+            'pesquisa ao mesmo tempo (com reenvios), gravando cada resposta na hora e pelo buffer')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--membros', type=int, default=2000, help='Membros respondendo (padrão: 2000)')
+        parser.add_argument('--threads', type=int, default=16, help='Envios simultâneos (padrão: 16)')
+        parser.add_argument('--reenvios', type=float, default=0.2,
+                            help='Fração dos membros que envia de novo (padrão: 0.2)')
+        parser.add_argument('--modos', default='direto,buffer', help='Modos separados por vírgula')
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        cookies = self.preparar_membros(options['membros'])
+        self.stdout.write(f'{options["membros"]} membros, {options["threads"]} threads, '
+                          f'{options["reenvios"]:.0%} de reenvios, lote {settings.PESQUISAS_BUFFER_LOTE}')
+        self.stdout.write(f'{"modo":<8} {"envios/s":>9} {"envios":>7} {"erros":>6} '
+                          f'{"gravação":>9} {"respostas":>10} {"idempotente":>12} {"agregados":>10}')
+        try:
+            for modo in options['modos'].split(','):
+                self.medir(modo.strip(), cookies, options)
+        finally:
+            Pesquisa.objects.filter(titulo__startswith='Benchmark ').delete()
+            Usuario.objects.filter(username__startswith=PREFIXO).delete()
+
+    def preparar_membros(self, quantidade):
+        Usuario.objects.filter(username__startswith=PREFIXO).delete()
+        Usuario.objects.bulk_create(Usuario(username=f'{PREFIXO}{i}') for i in range(quantidade))
+        cookies = []
+        # Login fora da medição: só o envio do formulário interessa
+        for usuario in Usuario.objects.filter(username__startswith=PREFIXO):
+            client = Client()
+            client.force_login(usuario)
+            cookies.append(client.cookies[settings.SESSION_COOKIE_NAME].value)
+        return cookies
+
+    def medir(self, modo, cookies, options):
+        pesquisa, perguntas = criar_pesquisa(f'Benchmark {modo}')
+        url = reverse('pesquisas:responder', args=[pesquisa.pk])
+        envios = cookies + random.sample(cookies, int(len(cookies) * options['reenvios']))
+        random.shuffle(envios)
+        fila = queue.SimpleQueue()
+        for cookie in envios:
+            fila.put(cookie)
+        erros = []
+
+        def enviar():
+            client = Client(raise_request_exception=False)
+            while True:
+                try:
+                    cookie = fila.get_nowait()
+                except queue.Empty:
+                    return
+                client.cookies[settings.SESSION_COOKIE_NAME] = cookie
+                resposta = client.post(url, dados_formulario(perguntas))
+                if resposta.status_code != 302:
+                    erros.append(resposta.status_code)
+
+        with override_settings(PESQUISAS_BUFFER_ASSINCRONO=MODOS[modo]):
+            threads = [threading.Thread(target=enviar) for _ in range(options['threads'])]
+            inicio = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            segundos = time.perf_counter() - inicio
+            # Até a última resposta estar no banco (no modo direto já está)
+            buffer.descarregar()
+            gravacao = time.perf_counter() - inicio
+
+        total = Resposta.objects.filter(pesquisa=pesquisa).count()
+        agregados_ok = not recalcular(pesquisa.pk, corrigir=False)
+        self.stdout.write(f'{modo:<8} {len(envios) / segundos:>9.0f} {len(envios):>7} {len(erros):>6} '
+                          f'{gravacao:>8.2f}s {total:>10} {"sim" if total == len(cookies) else "NÃO":>12} '
+                          f'{"ok" if agregados_ok else "DIVERGEM":>10}')
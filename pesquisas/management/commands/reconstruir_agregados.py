@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from pesquisas.agregados import recalcular
+
+
+class Command(BaseCommand):
+    help = ('Refaz os resultados agregados das pesquisas lendo todas as respostas e corrige '
+            'os divergentes (respostas apagadas ou gravadas por fora do buffer)')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pesquisa', type=int, help='Só esta pesquisa (id)')
+        parser.add_argument('--verificar', action='store_true',
+                            help='Só lista as divergências, sem corrigir')
+
+    def handle(self, *args, **options):
+        divergencias = recalcular(options['pesquisa'], corrigir=not options['verificar'])
+        for pergunta, opcao, armazenado, real in divergencias:
+            self.stdout.write(f'{pergunta} {opcao or "(total)"}: {armazenado} -> {real}')
+        if not divergencias:
+            self.stdout.write(self.style.SUCCESS('Agregados em dia.'))
+        elif options['verificar']:
+            self.stdout.write(self.style.WARNING(f'{len(divergencias)} agregados divergentes.'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'{len(divergencias)} agregados corrigidos.'))
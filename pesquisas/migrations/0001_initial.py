@@ -0,0 +1,68 @@
+# Generated by Django 5.1.3 on 2026-10-18 14:29
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Pesquisa',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('titulo', models.CharField(max_length=200, verbose_name='Título')),
+                ('descricao', models.TextField(blank=True, verbose_name='Descrição')),
+                ('aberta', models.BooleanField(default=True)),
+                ('anonima', models.BooleanField(default=False, help_text='Não guarda quem respondeu (uma resposta por membro continua valendo).', verbose_name='Anônima')),
+                ('criado_em', models.DateTimeField(auto_now_add=True, verbose_name='Criada em')),
+                ('criado_por', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='pesquisas_criadas', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Pesquisa',
+                'verbose_name_plural': 'Pesquisas',
+                'ordering': ['-criado_em', '-id'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Pergunta',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ordem', models.PositiveSmallIntegerField(default=0)),
+                ('texto', models.CharField(max_length=500)),
+                ('tipo', models.CharField(choices=[('UNICA', 'Escolha única'), ('MULTIPLA', 'Múltipla escolha'), ('NUMERO', 'Número / escala'), ('TEXTO', 'Texto livre')], default='UNICA', max_length=10)),
+                ('opcoes', models.JSONField(blank=True, default=list, help_text='Lista de opções para perguntas de escolha.', verbose_name='Opções')),
+                ('minimo', models.IntegerField(blank=True, null=True, verbose_name='Mínimo')),
+                ('maximo', models.IntegerField(blank=True, null=True, verbose_name='Máximo')),
+                ('obrigatoria', models.BooleanField(default=True, verbose_name='Obrigatória')),
+                ('pesquisa', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='perguntas', to='pesquisas.pesquisa')),
+            ],
+            options={
+                'verbose_name': 'Pergunta',
+                'verbose_name_plural': 'Perguntas',
+                'ordering': ['ordem', 'id'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Resposta',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.CharField(max_length=32, unique=True)),
+                ('respostas', models.JSONField()),
+                ('recebida_em', models.DateTimeField(verbose_name='Recebida em')),
+                ('pesquisa', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='respostas', to='pesquisas.pesquisa')),
+                ('usuario', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='respostas_pesquisas', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Resposta',
+                'verbose_name_plural': 'Respostas',
+            },
+        ),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 5.1.3 on 2026-10-18 14:32
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def popular_agregados(apps, schema_editor):
+    # Agregados das respostas já gravadas; depois cada lote mantém e reconstruir_agregados confere
+    from collections import Counter
+
+    from pesquisas.agregados import acumular, novo_acumulador
+
+    Pergunta = apps.get_model('pesquisas', 'Pergunta')
+    Pesquisa = apps.get_model('pesquisas', 'Pesquisa')
+    Resposta = apps.get_model('pesquisas', 'Resposta')
+    AgregadoPergunta = apps.get_model('pesquisas', 'AgregadoPergunta')
+    tipos = dict(Pergunta.objects.values_list('id', 'tipo'))
+    deltas = novo_acumulador()
+    totais = Counter()
+    for pesquisa, respostas in Resposta.objects.order_by().values_list('pesquisa_id', 'respostas').iterator():
+        totais[pesquisa] += 1
+        acumular(deltas, respostas, tipos)
+    AgregadoPergunta.objects.bulk_create(
+        AgregadoPergunta(pergunta_id=pergunta, opcao=opcao, total=total, soma=soma, soma_quadrados=quadrados)
+        for (pergunta, opcao), (total, soma, quadrados) in deltas.items()
+    )
+    for pesquisa, total in totais.items():
+        Pesquisa.objects.filter(pk=pesquisa).update(total_respostas=total)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pesquisas', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pesquisa',
+            name='total_respostas',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.CreateModel(
+            name='AgregadoPergunta',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('opcao', models.CharField(blank=True, max_length=200, verbose_name='Opção')),
+                ('total', models.BigIntegerField(default=0)),
+                ('soma', models.BigIntegerField(default=0)),
+                ('soma_quadrados', models.BigIntegerField(default=0)),
+                ('atualizado_em', models.DateTimeField(auto_now=True)),
+                ('pergunta', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='agregados', to='pesquisas.pergunta')),
+            ],
+            options={
+                'verbose_name': 'Agregado de pergunta',
+                'verbose_name_plural': 'Agregados de perguntas',
+                'constraints': [models.UniqueConstraint(fields=('pergunta', 'opcao'), name='agregado_pergunta_unico')],
+            },
+        ),
+        migrations.RunPython(popular_agregados, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.1.3 on 2026-10-18 15:26
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def separar_participacoes(apps, schema_editor):
+    # O token das respostas antigas é o HMAC de (pesquisa, membro): vai para Participacao e a
+    # resposta ganha um token aleatório
+    import secrets
+
+    Participacao = apps.get_model('pesquisas', 'Participacao')
+    Resposta = apps.get_model('pesquisas', 'Resposta')
+    respostas = list(Resposta.objects.only('pk', 'pesquisa_id', 'token'))
+    Participacao.objects.bulk_create(
+        sorted((Participacao(token=r.token, pesquisa_id=r.pesquisa_id) for r in respostas), key=lambda p: p.token),
+        batch_size=2000,
+    )
+    for resposta in respostas:
+        resposta.token = secrets.token_hex(16)
+    Resposta.objects.bulk_update(respostas, ['token'], batch_size=2000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pesquisas', '0002_agregados'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Participacao',
+            fields=[
+                ('token', models.CharField(max_length=32, primary_key=True, serialize=False)),
+                ('pesquisa', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='participacoes', to='pesquisas.pesquisa')),
+            ],
+            options={
+                'verbose_name': 'Participação',
+                'verbose_name_plural': 'Participações',
+            },
+        ),
+        migrations.RunPython(separar_participacoes, migrations.RunPython.noop),
+    ]
@@ -1,3 +1,126 @@
+from django.conf import settings
 from django.db import models
 
-# Create your models here.
+
+class Pesquisa(models.Model):
+    titulo = models.CharField('Título', max_length=200)
+    descricao = models.TextField('Descrição', blank=True)
+    aberta = models.BooleanField(default=True)
+    anonima = models.BooleanField('Anônima', default=False,
+                                  help_text='Não guarda quem respondeu (uma resposta por membro continua valendo).')
+    criado_por = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL,
+                                   null=True, blank=True, related_name='pesquisas_criadas')
+    criado_em = models.DateTimeField('Criada em', auto_now_add=True)
+    # Mantido por pesquisas/agregados.py a cada lote gravado
+    total_respostas = models.PositiveIntegerField(default=0, editable=False)
+
+    class Meta:
+        verbose_name = 'Pesquisa'
+        verbose_name_plural = 'Pesquisas'
+        ordering = ['-criado_em', '-id']
+
+    def __str__(self):
+        return self.titulo
+
+    def resultados_visiveis_para(self, usuario):
+        """Resultados ficam com quem criou a pesquisa, a diretoria e a equipe do admin"""
+        return usuario.is_staff or usuario.is_diretoria() or self.criado_por_id == usuario.pk
+
+
+class Pergunta(models.Model):
+    TIPOS = [
+        ('UNICA', 'Escolha única'),
+        ('MULTIPLA', 'Múltipla escolha'),
+        ('NUMERO', 'Número / escala'),
+        ('TEXTO', 'Texto livre'),
+    ]
+
+    pesquisa = models.ForeignKey(Pesquisa, on_delete=models.CASCADE, related_name='perguntas')
+    ordem = models.PositiveSmallIntegerField(default=0)
+    texto = models.CharField(max_length=500)
+    tipo = models.CharField(max_length=10, choices=TIPOS, default='UNICA')
+    opcoes = models.JSONField('Opções', default=list, blank=True,
+                              help_text='Lista de opções para perguntas de escolha.')
+    minimo = models.IntegerField('Mínimo', null=True, blank=True)
+    maximo = models.IntegerField('Máximo', null=True, blank=True)
+    obrigatoria = models.BooleanField('Obrigatória', default=True)
+
+    class Meta:
+        verbose_name = 'Pergunta'
+        verbose_name_plural = 'Perguntas'
+        ordering = ['ordem', 'id']
+
+    def __str__(self):
+        return self.texto
+
+
+class Resposta(models.Model):
+    """
+    Uma submissão inteira numa única linha compacta.
+
+    As respostas ficam em JSON (jsonb no PostgreSQL) como {id da pergunta: valor},
+    sem uma linha por pergunta, e a tabela só tem o índice da FK e o do token:
+    cada submissão custa um INSERT pequeno. O token é aleatório e não diz nada
+    sobre quem respondeu; quem já respondeu fica em Participacao.
+    """
+    pesquisa = models.ForeignKey(Pesquisa, on_delete=models.CASCADE, related_name='respostas')
+    usuario = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL,
+                                null=True, blank=True, related_name='respostas_pesquisas')
+    token = models.CharField(max_length=32, unique=True)
+    respostas = models.JSONField()
+    recebida_em = models.DateTimeField('Recebida em')
+
+    class Meta:
+        verbose_name = 'Resposta'
+        verbose_name_plural = 'Respostas'
+
+    def __str__(self):
+        return f'Resposta {self.pk} de {self.pesquisa}'
+
+
+class Participacao(models.Model):
+    """
+    Registro de que um membro já respondeu a uma pesquisa, sem ligação com a Resposta.
+
+    O token (ver pesquisas/ingestao.py) é um HMAC de (pesquisa, membro) e é a
+    própria chave primária: sem id sequencial nem data, nada aqui permite
+    parear a participação com a resposta gravada no mesmo lote.
+    """
+    token = models.CharField(max_length=32, primary_key=True)
+    pesquisa = models.ForeignKey(Pesquisa, on_delete=models.CASCADE, related_name='participacoes')
+
+    class Meta:
+        verbose_name = 'Participação'
+        verbose_name_plural = 'Participações'
+
+    def __str__(self):
+        return f'Participação em {self.pesquisa}'
+
+
+class AgregadoPergunta(models.Model):
+    """
+    Resultado acumulado de uma pergunta, atualizado a cada lote de respostas.
+
+    A linha com opcao='' é a da pergunta: `total` é quantas respostas ela teve e,
+    para perguntas numéricas, `soma` e `soma_quadrados` dão média e variância.
+    Como as respostas numéricas são inteiras, essas somas são exatas e podem ser
+    incrementadas com UPDATE ... = campo + delta por qualquer processo, sem
+    travar a linha. Perguntas de escolha têm ainda uma linha por opção com
+    quantas vezes ela foi marcada.
+    """
+    pergunta = models.ForeignKey(Pergunta, on_delete=models.CASCADE, related_name='agregados')
+    opcao = models.CharField('Opção', max_length=200, blank=True)
+    total = models.BigIntegerField(default=0)
+    soma = models.BigIntegerField(default=0)
+    soma_quadrados = models.BigIntegerField(default=0)
+    atualizado_em = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Agregado de pergunta'
+        verbose_name_plural = 'Agregados de perguntas'
+        constraints = [
+            models.UniqueConstraint(fields=['pergunta', 'opcao'], name='agregado_pergunta_unico'),
+        ]
+
+    def __str__(self):
+        return f'{self.pergunta_id} {self.opcao or "(total)"}: {self.total}'
@@ -0,0 +1,18 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from core.cache import invalidar_paginas
+from .ingestao import invalidar_pesquisa
+from .models import Pergunta, Pesquisa
+
+
+# A página de resposta usa a pesquisa do cache: qualquer edição no admin derruba a cópia
+@receiver([post_save, post_delete], sender=Pesquisa)
+def invalidar_por_pesquisa(sender, instance, **kwargs):
+    invalidar_pesquisa(instance.pk)
+    invalidar_paginas('pesquisas')
+
+
+@receiver([post_save, post_delete], sender=Pergunta)
+def invalidar_por_pergunta(sender, instance, **kwargs):
+    invalidar_pesquisa(instance.pesquisa_id)
@@ -1,3 +1,176 @@
-from django.test import TestCase
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
 
-# Create your tests here.
+from accounts.models import Usuario
+from .admin import PerguntaForm
+from .agregados import recalcular
+from .ingestao import BufferRespostas, gravar_lote, montar_resposta, token_participacao
+from .models import AgregadoPergunta, Participacao, Pergunta, Pesquisa, Resposta
+
+
+@override_settings(PESQUISAS_BUFFER_ASSINCRONO=False)
+class RespostasPesquisaTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = Usuario.objects.create_user('membro')
+        cls.pesquisa = Pesquisa.objects.create(titulo='Evento de maio')
+        cls.plataforma = Pergunta.objects.create(pesquisa=cls.pesquisa, texto='Plataforma', tipo='UNICA',
+                                                 opcoes=['PC', 'Console'])
+        cls.nota = Pergunta.objects.create(pesquisa=cls.pesquisa, texto='Nota', tipo='NUMERO',
+                                           minimo=0, maximo=10)
+
+    def setUp(self):
+        # O rollback entre testes não dispara os sinais que invalidam a pesquisa em cache
+        cache.clear()
+        self.client.force_login(self.usuario)
+        self.url = reverse('pesquisas:responder', args=[self.pesquisa.pk])
+
+    def test_reenvio_nao_duplica_resposta(self):
+        dados = {f'p_{self.plataforma.pk}': 'PC', f'p_{self.nota.pk}': '8'}
+        self.assertRedirects(self.client.post(self.url, dados),
+                             reverse('pesquisas:obrigado', args=[self.pesquisa.pk]))
+        self.client.post(self.url, {**dados, f'p_{self.nota.pk}': '3'})
+
+        resposta = Resposta.objects.get()
+        self.assertEqual(resposta.respostas, {str(self.plataforma.pk): 'PC', str(self.nota.pk): 8})
+        self.assertEqual(resposta.usuario, self.usuario)
+        self.assertContains(self.client.get(self.url), 'já respondeu')
+
+    def test_resposta_invalida_nao_e_gravada(self):
+        resposta = self.client.post(self.url, {f'p_{self.plataforma.pk}': 'Fliperama',
+                                               f'p_{self.nota.pk}': '11'})
+        self.assertEqual(resposta.status_code, 200)
+        self.assertEqual(len(resposta.context['form'].errors), 2)
+        self.assertFalse(Resposta.objects.exists())
+
+    def test_pergunta_nova_aparece_apesar_do_cache(self):
+        self.client.get(self.url)
+        Pergunta.objects.create(pesquisa=self.pesquisa, texto='Voltaria?', tipo='UNICA',
+                                opcoes=['Sim', 'Não'])
+        self.assertContains(self.client.get(self.url), 'Voltaria?')
+
+    def resposta(self, usuario, **respostas):
+        dados = {'id': self.pesquisa.pk, 'anonima': self.pesquisa.anonima}
+        return montar_resposta(dados, usuario, {str(pergunta): valor for pergunta, valor in respostas.items()})
+
+    def test_buffer_grava_em_lote_sem_duplicar(self):
+        buffer = BufferRespostas(lote=100, intervalo=60)
+        outro = Usuario.objects.create_user('outro')
+        for valor in ('PC', 'Console'):
+            buffer._pendentes.append(self.resposta(self.usuario, **{str(self.plataforma.pk): valor}))
+        buffer._pendentes.append(self.resposta(outro))
+
+        self.assertEqual(buffer.descarregar(), 2)
+        self.assertEqual(len(buffer), 0)
+        self.assertEqual(Resposta.objects.get(usuario=self.usuario).respostas, {str(self.plataforma.pk): 'PC'})
+        # Reenvio num lote seguinte: a participação já está gravada
+        buffer._pendentes.append(self.resposta(outro))
+        self.assertEqual(buffer.descarregar(), 0)
+        self.assertEqual(Resposta.objects.count(), 2)
+
+    def test_resposta_ruim_nao_leva_o_lote_junto(self):
+        buffer = BufferRespostas(lote=100, intervalo=60)
+        membros = [Usuario.objects.create_user(f'membro{i}') for i in range(3)]
+        ruim = self.resposta(membros[1], **{str(self.nota.pk): {1, 2}})  # set não vira JSON
+        buffer._pendentes += [self.resposta(membros[0]), ruim, self.resposta(membros[2])]
+
+        with self.assertLogs('pesquisas.ingestao', 'ERROR'):
+            self.assertEqual(buffer.descarregar(), 2)
+        # Fica retida para nova tentativa, sozinha e mais tarde
+        self.assertEqual(len(buffer), 1)
+        self.assertEqual(buffer.descarregar(), 0)
+
+        ruim.respostas = {str(self.nota.pk): 1}
+        buffer._retidas = [(0.0, tentativas, resposta) for _, tentativas, resposta in buffer._retidas]
+        self.assertEqual(buffer.descarregar(), 1)
+        self.assertEqual((len(buffer), Resposta.objects.count()), (0, 3))
+
+    def test_pesquisa_anonima_nao_liga_resposta_ao_membro(self):
+        Pesquisa.objects.filter(pk=self.pesquisa.pk).update(anonima=True)
+        dados = {f'p_{self.plataforma.pk}': 'PC', f'p_{self.nota.pk}': '8'}
+        self.client.post(self.url, dados)
+        self.client.post(self.url, dados)
+
+        resposta = Resposta.objects.get()
+        self.assertIsNone(resposta.usuario)
+        token = token_participacao(self.pesquisa.pk, self.usuario.pk)
+        self.assertNotEqual(resposta.token, token)
+        self.assertEqual(list(Participacao.objects.values_list('token', flat=True)), [token])
+        self.assertContains(self.client.get(self.url), 'já respondeu')
+
+
+@override_settings(PESQUISAS_BUFFER_ASSINCRONO=False)
+class AgregadosPesquisaTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.diretor = Usuario.objects.create_user('diretor', tipo_usuario='DIRETORIA')
+        cls.pesquisa = Pesquisa.objects.create(titulo='Evento de junho')
+        cls.generos = Pergunta.objects.create(pesquisa=cls.pesquisa, texto='Gêneros', tipo='MULTIPLA',
+                                              opcoes=['Ação', 'RPG', 'Puzzle'], obrigatoria=False)
+        cls.nota = Pergunta.objects.create(pesquisa=cls.pesquisa, texto='Nota', tipo='NUMERO',
+                                           minimo=0, maximo=10)
+        cls.membros = [Usuario.objects.create_user(f'membro{i}') for i in range(4)]
+        cls.usuario_novo = Usuario.objects.create_user('novo')
+
+    def setUp(self):
+        cache.clear()
+        url = reverse('pesquisas:responder', args=[self.pesquisa.pk])
+        for membro, generos, nota in zip(self.membros, [['Ação'], ['Ação', 'RPG'], ['RPG'], []],
+                                         [2, 4, 4, 10]):
+            self.client.force_login(membro)
+            self.client.post(url, {f'p_{self.generos.pk}': generos, f'p_{self.nota.pk}': nota})
+
+    def test_agregados_acompanham_os_lotes(self):
+        self.assertEqual(recalcular(corrigir=False), [])
+        self.pesquisa.refresh_from_db()
+        self.assertEqual(self.pesquisa.total_respostas, 4)
+
+        self.client.force_login(self.diretor)
+        resposta = self.client.get(reverse('pesquisas:resultados', args=[self.pesquisa.pk]))
+        generos, nota = resposta.context['resultados']
+        self.assertEqual(generos['respostas'], 3)
+        self.assertEqual(generos['opcoes'], [('Ação', 2, 67), ('RPG', 2, 67), ('Puzzle', 0, 0)])
+        self.assertEqual(nota['media'], 5)
+        self.assertAlmostEqual(nota['desvio'], 3.4641016, places=6)
+
+    def test_recalcular_corrige_respostas_apagadas(self):
+        Resposta.objects.filter(usuario=self.membros[0]).delete()
+        self.assertEqual(len(recalcular()), 4)
+        self.assertEqual(recalcular(corrigir=False), [])
+        self.pesquisa.refresh_from_db()
+        self.assertEqual(self.pesquisa.total_respostas, 3)
+
+    def test_valores_fora_do_tipo_nao_impedem_a_gravacao(self):
+        # Respostas no formato antigo de uma pergunta que mudou de tipo, ou opção longa demais
+        dados = {'id': self.pesquisa.pk, 'anonima': False}
+        respostas = [
+            montar_resposta(dados, self.diretor, {str(self.nota.pk): 'dez', str(self.generos.pk): ['Ação']}),
+            montar_resposta(dados, self.usuario_novo, {str(self.nota.pk): 7, str(self.generos.pk): ['x' * 300]}),
+        ]
+        with self.assertLogs('pesquisas.agregados', 'WARNING'):
+            self.assertEqual(len(gravar_lote(respostas)), 2)
+        self.assertEqual(Resposta.objects.count(), 6)
+        self.assertEqual(AgregadoPergunta.objects.get(pergunta=self.nota, opcao='').total, 5)
+        self.assertEqual(AgregadoPergunta.objects.get(pergunta=self.generos, opcao='Ação').total, 3)
+        self.assertEqual(recalcular(corrigir=False), [])
+
+    def test_formulario_da_pergunta_valida_opcoes_e_tipo(self):
+        def erros(instancia=None, **dados):
+            dados = {'pesquisa': self.pesquisa.pk, 'ordem': 0, 'texto': 'Plataforma', 'tipo': 'UNICA',
+                     'opcoes': '["PC", "Console"]', 'obrigatoria': True, **dados}
+            return PerguntaForm(dados, instance=instancia).errors
+
+        self.assertEqual(erros(), {})
+        self.assertIn('opcoes', erros(opcoes='"PC, Console"'))
+        self.assertIn('opcoes', erros(opcoes='["PC", 3]'))
+        self.assertIn('opcoes', erros(opcoes=f'["{"x" * 201}"]'))
+        self.assertIn('opcoes', erros(opcoes='["PC", "PC"]'))
+        self.assertIn('opcoes', erros(opcoes='[]'))
+        self.assertEqual(erros(tipo='TEXTO', opcoes='[]'), {})
+        self.assertIn('tipo', erros(self.nota, texto='Nota', tipo='UNICA'))
+
+    def test_resultados_so_para_quem_pode_ver(self):
+        self.client.force_login(self.membros[0])
+        resposta = self.client.get(reverse('pesquisas:resultados', args=[self.pesquisa.pk]))
+        self.assertEqual(resposta.status_code, 403)
@@ -5,4 +5,7 @@ app_name = 'pesquisas'
 
 urlpatterns = [
     path('', views.home_view, name='home'),
+    path('<int:pk>/', views.responder_view, name='responder'),
+    path('<int:pk>/obrigado/', views.obrigado_view, name='obrigado'),
+    path('<int:pk>/resultados/', views.resultados_view, name='resultados'),
 ]
@@ -1,6 +1,69 @@
-from django.shortcuts import render
+from django.shortcuts import redirect, render
 from django.contrib.auth.decorators import login_required
+from django.core.exceptions import PermissionDenied
+from django.http import Http404
+from core.cache import cache_por_usuario
+from .agregados import montar_resultados
+from .forms import RespostaPesquisaForm
+from .ingestao import dados_pesquisa, registrar_resposta, token_participacao
+from .models import AgregadoPergunta, Participacao, Pesquisa
 
 @login_required
-def home_view(request):
-    return render(request, 'pesquisas/home.html')
+@cache_por_usuario('pesquisas')
+async def home_view(request):
+    pesquisas = [p async for p in Pesquisa.objects.filter(aberta=True)[:50]]
+    # Uma consulta pelos tokens do usuário em vez de uma por pesquisa
+    tokens = {token_participacao(p.pk, request.user.pk): p for p in pesquisas}
+    respondidas = {t async for t in Participacao.objects.filter(token__in=list(tokens)).values_list('token', flat=True)}
+    for token, pesquisa in tokens.items():
+        pesquisa.respondida = token in respondidas
+        pesquisa.pode_ver_resultados = pesquisa.resultados_visiveis_para(request.user)
+    return render(request, 'pesquisas/home.html', {'pesquisas': pesquisas})
+
+@login_required
+def responder_view(request, pk):
+    # Pesquisa e perguntas vêm do cache: no pico, o POST só grava (ou enfileira) a resposta
+    dados = dados_pesquisa(pk)
+    if dados is None:
+        raise Http404
+    contexto = {'pesquisa': dados}
+    if not dados['aberta']:
+        contexto['encerrada'] = True
+        return render(request, 'pesquisas/responder.html', contexto)
+
+    if request.method == 'POST':
+        form = RespostaPesquisaForm(dados['perguntas'], request.POST)
+        if form.is_valid():
+            # Reenvios geram o mesmo token de participação e são descartados na gravação
+            registrar_resposta(dados, request.user, form.respostas())
+            return redirect('pesquisas:obrigado', pk=pk)
+    elif Participacao.objects.filter(token=token_participacao(pk, request.user.pk)).exists():
+        contexto['ja_respondida'] = True
+        return render(request, 'pesquisas/responder.html', contexto)
+    else:
+        form = RespostaPesquisaForm(dados['perguntas'])
+    contexto['form'] = form
+    return render(request, 'pesquisas/responder.html', contexto)
+
+@login_required
+def obrigado_view(request, pk):
+    dados = dados_pesquisa(pk)
+    if dados is None:
+        raise Http404
+    return render(request, 'pesquisas/responder.html', {'pesquisa': dados, 'enviada': True})
+
+@login_required
+async def resultados_view(request, pk):
+    # Só os agregados: três consultas pequenas com 10 ou 100 mil respostas
+    try:
+        pesquisa = await Pesquisa.objects.aget(pk=pk)
+    except Pesquisa.DoesNotExist:
+        raise Http404
+    if not pesquisa.resultados_visiveis_para(request.user):
+        raise PermissionDenied
+    perguntas = [p async for p in pesquisa.perguntas.all()]
+    agregados = [a async for a in AgregadoPergunta.objects.filter(pergunta__pesquisa=pesquisa)]
+    return render(request, 'pesquisas/resultados.html', {
+        'pesquisa': pesquisa,
+        'resultados': montar_resultados(perguntas, agregados),
+    })
@@ -1,3 +1,37 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import Marco, MembroProjeto, Projeto, Tarefa
+
+
+class MembroProjetoInline(admin.TabularInline):
+    model = MembroProjeto
+    extra = 0
+    autocomplete_fields = ('usuario',)
+
+
+class MarcoInline(admin.TabularInline):
+    model = Marco
+    extra = 0
+    readonly_fields = ('total_tarefas', 'tarefas_concluidas')
+
+
+class ProjetoAdmin(admin.ModelAdmin):
+    list_display = ('nome', 'empresa', 'responsavel', 'status', 'total_tarefas',
+                    'tarefas_concluidas', 'total_membros', 'ultima_atividade')
+    list_filter = ('status',)
+    search_fields = ('nome',)
+    list_select_related = ('empresa', 'responsavel')
+    autocomplete_fields = ('empresa', 'responsavel')
+    readonly_fields = ('total_tarefas', 'tarefas_concluidas', 'total_membros', 'ultima_atividade')
+    inlines = [MembroProjetoInline, MarcoInline]
+
+
+class TarefaAdmin(admin.ModelAdmin):
+    list_display = ('titulo', 'projeto', 'marco', 'responsavel', 'status', 'prazo')
+    list_filter = ('status',)
+    search_fields = ('titulo', 'projeto__nome')
+    list_select_related = ('projeto', 'marco', 'responsavel')
+    autocomplete_fields = ('projeto', 'responsavel')
+
+admin.site.register(Projeto, ProjetoAdmin)
+admin.site.register(Tarefa, TarefaAdmin)
@@ -0,0 +1,73 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from core.cache import invalidar_paginas
+from projetos.models import Marco, MembroProjeto, Projeto, Tarefa
+
+
+def contagem(modelo, campo, **filtros):
+    """COUNT correlacionado das linhas de `modelo` que apontam, por `campo`, para a linha de fora"""
+    linhas = (modelo.objects.filter(**{campo: OuterRef('pk')}, **filtros).order_by()
+              .values(campo).annotate(n=Count('pk')).values('n'))
+    return Coalesce(Subquery(linhas, output_field=IntegerField()), Value(0))
+
+
+class Command(BaseCommand):
+    help = ('Recalcula com COUNT os contadores desnormalizados de projetos e marcos e corrige '
+            'os divergentes (alterações feitas com QuerySet.update ou direto no banco)')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verificar', action='store_true',
+                            help='Só lista as divergências, sem corrigir')
+
+    def handle(self, *args, **options):
+        corrigidos = 0
+        with transaction.atomic():
+            # FOR UPDATE não pode ir numa consulta com GROUP BY (o PostgreSQL recusa): as linhas são
+            # travadas antes e as contagens vêm de subconsultas, sem agregação na consulta de fora
+            list(Projeto.objects.select_for_update().values_list('pk', flat=True))
+            list(Marco.objects.select_for_update().values_list('pk', flat=True))
+
+            projetos = Projeto.objects.order_by().annotate(
+                n_tarefas=contagem(Tarefa, 'projeto'),
+                n_concluidas=contagem(Tarefa, 'projeto', status='CONCLUIDA'),
+                n_membros=contagem(MembroProjeto, 'projeto'),
+            )
+            for projeto in projetos:
+                reais = (projeto.n_tarefas, projeto.n_concluidas, projeto.n_membros)
+                if reais == (projeto.total_tarefas, projeto.tarefas_concluidas, projeto.total_membros):
+                    continue
+                corrigidos += 1
+                self.stdout.write(f'Projeto {projeto.pk} "{projeto}": '
+                                  f'{projeto.total_tarefas}/{projeto.tarefas_concluidas}/'
+                                  f'{projeto.total_membros} -> {reais[0]}/{reais[1]}/{reais[2]}')
+                if not options['verificar']:
+                    Projeto.objects.filter(pk=projeto.pk).update(
+                        total_tarefas=reais[0], tarefas_concluidas=reais[1], total_membros=reais[2]
+                    )
+
+            marcos = Marco.objects.order_by().annotate(
+                n_tarefas=contagem(Tarefa, 'marco'),
+                n_concluidas=contagem(Tarefa, 'marco', status='CONCLUIDA'),
+            )
+            for marco in marcos:
+                if (marco.n_tarefas, marco.n_concluidas) == (marco.total_tarefas, marco.tarefas_concluidas):
+                    continue
+                corrigidos += 1
+                self.stdout.write(f'Marco {marco.pk} "{marco}": {marco.total_tarefas}/'
+                                  f'{marco.tarefas_concluidas} -> {marco.n_tarefas}/{marco.n_concluidas}')
+                if not options['verificar']:
+                    Marco.objects.filter(pk=marco.pk).update(
+                        total_tarefas=marco.n_tarefas, tarefas_concluidas=marco.n_concluidas
+                    )
+
+        if corrigidos and not options['verificar']:
+            invalidar_paginas('projetos')
+        if not corrigidos:
+            self.stdout.write(self.style.SUCCESS('Contadores em dia.'))
+        elif options['verificar']:
+            self.stdout.write(self.style.WARNING(f'{corrigidos} registros divergentes.'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'{corrigidos} registros corrigidos.'))
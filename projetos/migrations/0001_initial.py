@@ -0,0 +1,114 @@
+# Generated by Django 5.1.3 on 2026-10-18 14:26
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('empresas', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MembroProjeto',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('papel', models.CharField(choices=[('COORDENACAO', 'Coordenação'), ('EQUIPE', 'Equipe'), ('CONSULTORIA', 'Consultoria')], default='EQUIPE', max_length=20)),
+                ('entrou_em', models.DateField(default=django.utils.timezone.localdate, verbose_name='Entrou em')),
+                ('usuario', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='participacoes', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Membro do projeto',
+                'verbose_name_plural': 'Membros do projeto',
+            },
+        ),
+        migrations.CreateModel(
+            name='Projeto',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nome', models.CharField(max_length=200)),
+                ('descricao', models.TextField(blank=True, verbose_name='Descrição')),
+                ('status', models.CharField(choices=[('PLANEJADO', 'Planejado'), ('ANDAMENTO', 'Em andamento'), ('PAUSADO', 'Pausado'), ('CONCLUIDO', 'Concluído')], default='PLANEJADO', max_length=20)),
+                ('data_inicio', models.DateField(blank=True, null=True, verbose_name='Início')),
+                ('data_fim_prevista', models.DateField(blank=True, null=True, verbose_name='Término previsto')),
+                ('criado_em', models.DateTimeField(auto_now_add=True, verbose_name='Criado em')),
+                ('total_tarefas', models.PositiveIntegerField(default=0, editable=False)),
+                ('tarefas_concluidas', models.PositiveIntegerField(default=0, editable=False)),
+                ('total_membros', models.PositiveIntegerField(default=0, editable=False)),
+                ('ultima_atividade', models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Última atividade')),
+                ('empresa', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='projetos', to='empresas.empresa')),
+                ('membros', models.ManyToManyField(related_name='projetos', through='projetos.MembroProjeto', to=settings.AUTH_USER_MODEL)),
+                ('responsavel', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='projetos_responsavel', to=settings.AUTH_USER_MODEL, verbose_name='Responsável')),
+            ],
+            options={
+                'verbose_name': 'Projeto',
+                'verbose_name_plural': 'Projetos',
+                'ordering': ['nome', 'id'],
+            },
+        ),
+        migrations.AddField(
+            model_name='membroprojeto',
+            name='projeto',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='membros_projeto', to='projetos.projeto'),
+        ),
+        migrations.CreateModel(
+            name='Marco',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('titulo', models.CharField(max_length=200, verbose_name='Título')),
+                ('data_prevista', models.DateField(blank=True, null=True, verbose_name='Data prevista')),
+                ('concluido', models.BooleanField(default=False, verbose_name='Concluído')),
+                ('total_tarefas', models.PositiveIntegerField(default=0, editable=False)),
+                ('tarefas_concluidas', models.PositiveIntegerField(default=0, editable=False)),
+                ('projeto', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='marcos', to='projetos.projeto')),
+            ],
+            options={
+                'verbose_name': 'Marco',
+                'verbose_name_plural': 'Marcos',
+                'ordering': ['data_prevista', 'id'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Tarefa',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('titulo', models.CharField(max_length=200, verbose_name='Título')),
+                ('descricao', models.TextField(blank=True, verbose_name='Descrição')),
+                ('status', models.CharField(choices=[('PENDENTE', 'Pendente'), ('ANDAMENTO', 'Em andamento'), ('CONCLUIDA', 'Concluída')], default='PENDENTE', max_length=20)),
+                ('prazo', models.DateField(blank=True, null=True)),
+                ('concluida_em', models.DateTimeField(blank=True, null=True, verbose_name='Concluída em')),
+                ('atualizado_em', models.DateTimeField(auto_now=True, verbose_name='Atualizado em')),
+                ('marco', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='tarefas', to='projetos.marco')),
+                ('projeto', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tarefas', to='projetos.projeto')),
+                ('responsavel', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='tarefas', to=settings.AUTH_USER_MODEL, verbose_name='Responsável')),
+            ],
+            options={
+                'verbose_name': 'Tarefa',
+                'verbose_name_plural': 'Tarefas',
+                'ordering': ['status', 'prazo', 'id'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='projeto',
+            index=models.Index(fields=['nome', 'id'], name='projeto_nome_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='projeto',
+            index=models.Index(fields=['status', 'nome', 'id'], name='projeto_status_nome_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='membroprojeto',
+            constraint=models.UniqueConstraint(fields=('projeto', 'usuario'), name='membro_projeto_unico'),
+        ),
+        migrations.AddIndex(
+            model_name='tarefa',
+            index=models.Index(fields=['projeto', 'status'], name='tarefa_projeto_status_idx'),
+        ),
+    ]
@@ -1,3 +1,207 @@
-from django.db import models
+from django.conf import settings
+from django.db import models, transaction
+from django.db.models import F
+from django.utils import timezone
 
-# Create your models here.
+
+class Projeto(models.Model):
+    STATUS = [
+        ('PLANEJADO', 'Planejado'),
+        ('ANDAMENTO', 'Em andamento'),
+        ('PAUSADO', 'Pausado'),
+        ('CONCLUIDO', 'Concluído'),
+    ]
+
+    nome = models.CharField(max_length=200)
+    descricao = models.TextField('Descrição', blank=True)
+    empresa = models.ForeignKey('empresas.Empresa', on_delete=models.SET_NULL, null=True, blank=True,
+                                related_name='projetos')
+    responsavel = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL,
+                                    null=True, blank=True, related_name='projetos_responsavel',
+                                    verbose_name='Responsável')
+    membros = models.ManyToManyField(settings.AUTH_USER_MODEL, through='MembroProjeto',
+                                     related_name='projetos')
+    status = models.CharField(max_length=20, choices=STATUS, default='PLANEJADO')
+    data_inicio = models.DateField('Início', null=True, blank=True)
+    data_fim_prevista = models.DateField('Término previsto', null=True, blank=True)
+    criado_em = models.DateTimeField('Criado em', auto_now_add=True)
+
+    # Contadores desnormalizados: mantidos por Tarefa/MembroProjeto na mesma transação
+    # e conferidos pelo comando `recalcular_projetos`; a listagem não faz COUNT(*)
+    total_tarefas = models.PositiveIntegerField(default=0, editable=False)
+    tarefas_concluidas = models.PositiveIntegerField(default=0, editable=False)
+    total_membros = models.PositiveIntegerField(default=0, editable=False)
+    ultima_atividade = models.DateTimeField('Última atividade', null=True, blank=True, editable=False)
+
+    class Meta:
+        verbose_name = 'Projeto'
+        verbose_name_plural = 'Projetos'
+        ordering = ['nome', 'id']
+        indexes = [
+            models.Index(fields=['nome', 'id'], name='projeto_nome_idx'),
+            models.Index(fields=['status', 'nome', 'id'], name='projeto_status_nome_idx'),
+        ]
+
+    CONTADORES = ('total_tarefas', 'tarefas_concluidas', 'total_membros', 'ultima_atividade')
+
+    def __str__(self):
+        return self.nome
+
+    def save(self, *args, **kwargs):
+        # Os contadores só mudam por somar_contadores e recalcular_projetos: um save() de uma
+        # instância lida antes (o formulário do admin) não pode sobrescrevê-los com valores velhos
+        if not self._state.adding and not args and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [campo.name for campo in self._meta.concrete_fields
+                                       if not campo.primary_key and campo.name not in self.CONTADORES]
+        super().save(*args, **kwargs)
+
+    @property
+    def percentual_concluido(self):
+        if not self.total_tarefas:
+            return 0
+        return 100 * self.tarefas_concluidas // self.total_tarefas
+
+    @classmethod
+    def somar_contadores(cls, projeto_id, tarefas=0, concluidas=0, membros=0):
+        """UPDATE com F() para somar deltas sem ler a linha (seguro com saves concorrentes)"""
+        cls.objects.filter(pk=projeto_id).update(
+            total_tarefas=F('total_tarefas') + tarefas,
+            tarefas_concluidas=F('tarefas_concluidas') + concluidas,
+            total_membros=F('total_membros') + membros,
+            ultima_atividade=timezone.now(),
+        )
+
+
+class MembroProjeto(models.Model):
+    PAPEIS = [
+        ('COORDENACAO', 'Coordenação'),
+        ('EQUIPE', 'Equipe'),
+        ('CONSULTORIA', 'Consultoria'),
+    ]
+
+    projeto = models.ForeignKey(Projeto, on_delete=models.CASCADE, related_name='membros_projeto')
+    usuario = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE,
+                                related_name='participacoes')
+    papel = models.CharField(max_length=20, choices=PAPEIS, default='EQUIPE')
+    entrou_em = models.DateField('Entrou em', default=timezone.localdate)
+
+    class Meta:
+        verbose_name = 'Membro do projeto'
+        verbose_name_plural = 'Membros do projeto'
+        constraints = [
+            models.UniqueConstraint(fields=['projeto', 'usuario'], name='membro_projeto_unico'),
+        ]
+
+    def __str__(self):
+        return f'{self.usuario} em {self.projeto}'
+
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            novo = self._state.adding
+            super().save(*args, **kwargs)
+            if novo:
+                Projeto.somar_contadores(self.projeto_id, membros=1)
+
+
+class Marco(models.Model):
+    projeto = models.ForeignKey(Projeto, on_delete=models.CASCADE, related_name='marcos')
+    titulo = models.CharField('Título', max_length=200)
+    data_prevista = models.DateField('Data prevista', null=True, blank=True)
+    concluido = models.BooleanField('Concluído', default=False)
+    total_tarefas = models.PositiveIntegerField(default=0, editable=False)
+    tarefas_concluidas = models.PositiveIntegerField(default=0, editable=False)
+
+    class Meta:
+        verbose_name = 'Marco'
+        verbose_name_plural = 'Marcos'
+        ordering = ['data_prevista', 'id']
+
+    def __str__(self):
+        return self.titulo
+
+    @property
+    def percentual_concluido(self):
+        if not self.total_tarefas:
+            return 0
+        return 100 * self.tarefas_concluidas // self.total_tarefas
+
+    @classmethod
+    def somar_contadores(cls, marco_id, tarefas=0, concluidas=0):
+        cls.objects.filter(pk=marco_id).update(
+            total_tarefas=F('total_tarefas') + tarefas,
+            tarefas_concluidas=F('tarefas_concluidas') + concluidas,
+        )
+
+
+class Tarefa(models.Model):
+    STATUS = [
+        ('PENDENTE', 'Pendente'),
+        ('ANDAMENTO', 'Em andamento'),
+        ('CONCLUIDA', 'Concluída'),
+    ]
+
+    projeto = models.ForeignKey(Projeto, on_delete=models.CASCADE, related_name='tarefas')
+    marco = models.ForeignKey(Marco, on_delete=models.SET_NULL, null=True, blank=True,
+                              related_name='tarefas')
+    titulo = models.CharField('Título', max_length=200)
+    descricao = models.TextField('Descrição', blank=True)
+    responsavel = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL,
+                                    null=True, blank=True, related_name='tarefas',
+                                    verbose_name='Responsável')
+    status = models.CharField(max_length=20, choices=STATUS, default='PENDENTE')
+    prazo = models.DateField(null=True, blank=True)
+    concluida_em = models.DateTimeField('Concluída em', null=True, blank=True)
+    atualizado_em = models.DateTimeField('Atualizado em', auto_now=True)
+
+    class Meta:
+        verbose_name = 'Tarefa'
+        verbose_name_plural = 'Tarefas'
+        ordering = ['status', 'prazo', 'id']
+        indexes = [
+            models.Index(fields=['projeto', 'status'], name='tarefa_projeto_status_idx'),
+        ]
+
+    def __str__(self):
+        return self.titulo
+
+    @property
+    def concluida(self):
+        return self.status == 'CONCLUIDA'
+
+    def save(self, *args, **kwargs):
+        if self.concluida and self.concluida_em is None:
+            self.concluida_em = timezone.now()
+        elif not self.concluida:
+            self.concluida_em = None
+        # O save e os contadores do projeto/marco entram ou saem juntos
+        with transaction.atomic():
+            alteracoes = [(self.projeto_id, self.marco_id, self.concluida, 1)]
+            if not self._state.adding:
+                anterior = (Tarefa.objects.select_for_update().filter(pk=self.pk)
+                            .values_list('projeto_id', 'marco_id', 'status').first())
+                if anterior is not None:
+                    projeto_id, marco_id, status = anterior
+                    alteracoes.append((projeto_id, marco_id, status == 'CONCLUIDA', -1))
+            super().save(*args, **kwargs)
+            ajustar_contadores(alteracoes)
+
+
+def ajustar_contadores(alteracoes):
+    """
+    Aplica uma lista de (projeto_id, marco_id, concluída, +1/-1) aos contadores.
+
+    Os deltas são somados antes: mudar só o status de uma tarefa vira um único
+    UPDATE no projeto (e um no marco), com total_tarefas + 0.
+    """
+    projetos, marcos = {}, {}
+    for projeto_id, marco_id, concluida, sinal in alteracoes:
+        for destino, chave in ((projetos, projeto_id), (marcos, marco_id)):
+            if chave is None:
+                continue
+            tarefas, concluidas = destino.get(chave, (0, 0))
+            destino[chave] = (tarefas + sinal, concluidas + (sinal if concluida else 0))
+    for projeto_id, (tarefas, concluidas) in projetos.items():
+        Projeto.somar_contadores(projeto_id, tarefas=tarefas, concluidas=concluidas)
+    for marco_id, (tarefas, concluidas) in marcos.items():
+        if tarefas or concluidas:
+            Marco.somar_contadores(marco_id, tarefas=tarefas, concluidas=concluidas)
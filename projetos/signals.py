@@ -0,0 +1,45 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from core.cache import invalidar_paginas
+from .models import MembroProjeto, Projeto, Tarefa, ajustar_contadores
+
+
+# Os contadores da lista de projetos mudam junto com tarefas e membros
+@receiver([post_save, post_delete], sender=Projeto)
+@receiver([post_save, post_delete], sender=Tarefa)
+@receiver([post_save, post_delete], sender=MembroProjeto)
+def invalidar_paginas_projeto(sender, **kwargs):
+    invalidar_paginas('projetos')
+
+
+# Exclusões pelo sinal (e não por delete()) para valer também em QuerySet.delete() e
+# em cascata; o Collector do Django já roda tudo dentro de uma transação
+@receiver(post_delete, sender=Tarefa)
+def descontar_tarefa(sender, instance, **kwargs):
+    ajustar_contadores([(instance.projeto_id, instance.marco_id, instance.concluida, -1)])
+
+
+@receiver(post_delete, sender=MembroProjeto)
+def descontar_membro(sender, instance, **kwargs):
+    Projeto.somar_contadores(instance.projeto_id, membros=-1)
+
+
+@receiver(m2m_changed, sender=MembroProjeto)
+def somar_membros_adicionados(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    projeto.membros.add() / usuario.projetos.add() inserem com bulk_create, sem save().
+
+    No post_add o pk_set só traz os ids que ainda não estavam ligados, ou seja, as
+    linhas de fato inseridas. remove() e clear() não precisam de tratamento aqui:
+    o Django apaga as linhas do through com QuerySet.delete(), que dispara o
+    post_delete acima para cada linha realmente excluída.
+    """
+    if action != 'post_add' or not pk_set:
+        return
+    invalidar_paginas('projetos')
+    if reverse:
+        for projeto_id in pk_set:
+            Projeto.somar_contadores(projeto_id, membros=1)
+    else:
+        Projeto.somar_contadores(instance.pk, membros=len(pk_set))
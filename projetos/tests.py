@@ -1,3 +1,171 @@
-from django.test import TestCase
+from io import StringIO
 
-# Create your tests here.
+from django.core.management import call_command
+from django.db import connection
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from accounts.models import Usuario
+from .models import Marco, MembroProjeto, Projeto, Tarefa
+
+
+class ContadoresProjetoTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = Usuario.objects.create_user('membro')
+        cls.projeto = Projeto.objects.create(nome='Game jam')
+        cls.marco = Marco.objects.create(projeto=cls.projeto, titulo='Protótipo')
+
+    def assertContadores(self, objeto, total, concluidas):
+        objeto.refresh_from_db()
+        self.assertEqual((objeto.total_tarefas, objeto.tarefas_concluidas), (total, concluidas))
+
+    def test_criar_concluir_mover_e_excluir_tarefas(self):
+        tarefa = Tarefa.objects.create(projeto=self.projeto, marco=self.marco, titulo='Arte')
+        Tarefa.objects.create(projeto=self.projeto, titulo='Som', status='CONCLUIDA')
+        self.assertContadores(self.projeto, 2, 1)
+        self.assertContadores(self.marco, 1, 0)
+
+        tarefa.status = 'CONCLUIDA'
+        tarefa.save()
+        self.assertContadores(self.projeto, 2, 2)
+        self.assertContadores(self.marco, 1, 1)
+        self.assertEqual(self.projeto.percentual_concluido, 100)
+
+        tarefa.marco = None
+        tarefa.save()
+        self.assertContadores(self.marco, 0, 0)
+        self.assertContadores(self.projeto, 2, 2)
+
+        Tarefa.objects.filter(pk=tarefa.pk).delete()
+        self.assertContadores(self.projeto, 1, 1)
+        self.assertIsNotNone(self.projeto.ultima_atividade)
+
+    def test_membros(self):
+        membro = MembroProjeto.objects.create(projeto=self.projeto, usuario=self.usuario)
+        self.projeto.refresh_from_db()
+        self.assertEqual(self.projeto.total_membros, 1)
+        membro.delete()
+        self.projeto.refresh_from_db()
+        self.assertEqual(self.projeto.total_membros, 0)
+
+    def assertMembros(self, total):
+        self.projeto.refresh_from_db()
+        self.assertEqual(self.projeto.total_membros, total)
+        self.assertEqual(self.projeto.membros.count(), total)
+
+    def test_membros_pelo_related_manager(self):
+        outro = Usuario.objects.create_user('outro')
+        self.projeto.membros.add(self.usuario, outro)
+        self.assertMembros(2)
+        # Já ligado: nenhuma linha nova, nada a somar
+        self.projeto.membros.add(self.usuario)
+        self.assertMembros(2)
+        self.projeto.membros.remove(outro)
+        self.projeto.membros.remove(outro)
+        self.assertMembros(1)
+
+        outro.projetos.add(self.projeto, Projeto.objects.create(nome='Oficina'))
+        self.assertMembros(2)
+        self.assertEqual(Projeto.objects.get(nome='Oficina').total_membros, 1)
+        self.projeto.membros.clear()
+        self.assertMembros(0)
+        outro.projetos.clear()
+        self.assertEqual(Projeto.objects.get(nome='Oficina').total_membros, 0)
+
+    def test_save_de_instancia_antiga_nao_sobrescreve_contadores(self):
+        antiga = Projeto.objects.get(pk=self.projeto.pk)
+        Tarefa.objects.create(projeto=self.projeto, titulo='Arte')
+        MembroProjeto.objects.create(projeto=self.projeto, usuario=self.usuario)
+        antiga.nome = 'Game jam 2025'
+        antiga.save()
+        self.projeto.refresh_from_db()
+        self.assertEqual((self.projeto.nome, self.projeto.total_tarefas, self.projeto.total_membros),
+                         ('Game jam 2025', 1, 1))
+
+    def test_recalcular_corrige_update_em_massa(self):
+        Tarefa.objects.create(projeto=self.projeto, marco=self.marco, titulo='Código')
+        Tarefa.objects.update(status='CONCLUIDA')  # não passa pelo save()
+        self.assertContadores(self.projeto, 1, 0)
+        call_command('recalcular_projetos', stdout=StringIO())
+        self.assertContadores(self.projeto, 1, 1)
+        self.assertContadores(self.marco, 1, 1)
+
+
+# As contagens são da própria view: sem o cache de página do cache_por_usuario
+@override_settings(CACHE_PAGINAS_TIMEOUT=0)
+class ConsultasProjetoTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = Usuario.objects.create_user('membro')
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.usuario)
+
+    def criar_projetos(self, quantidade, tarefas=0):
+        for i in range(quantidade):
+            projeto = Projeto.objects.create(nome=f'Projeto {Projeto.objects.count():03d}',
+                                             responsavel=self.usuario)
+            MembroProjeto.objects.create(projeto=projeto, usuario=self.usuario)
+            marco = Marco.objects.create(projeto=projeto, titulo='Entrega')
+            for j in range(tarefas):
+                Tarefa.objects.create(projeto=projeto, marco=marco, titulo=f'Tarefa {j}',
+                                      responsavel=self.usuario)
+        return projeto
+
+    def consultas(self, url):
+        with CaptureQueriesContext(connection) as consultas:
+            resposta = self.client.get(url)
+        self.assertEqual(resposta.status_code, 200)
+        return len(consultas)
+
+    def test_listagem_com_consultas_constantes(self):
+        self.criar_projetos(2, tarefas=1)
+        poucos = self.consultas(reverse('projetos:home'))
+        self.criar_projetos(20, tarefas=3)
+        self.assertEqual(self.consultas(reverse('projetos:home')), poucos)
+        self.assertEqual(self.consultas(reverse('projetos:home') + '?meus=1'), poucos)
+
+    def test_detalhe_com_consultas_constantes(self):
+        pequeno = self.criar_projetos(1, tarefas=1)
+        grande = self.criar_projetos(1, tarefas=15)
+        self.assertEqual(self.consultas(reverse('projetos:detalhe', args=[pequeno.pk])),
+                         self.consultas(reverse('projetos:detalhe', args=[grande.pk])))
+
+
+class CachePaginaProjetosTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.membro = Usuario.objects.create_user('membro')
+        cls.outro = Usuario.objects.create_user('outro')
+        projeto = Projeto.objects.create(nome='Jogo de plataforma', responsavel=cls.membro)
+        MembroProjeto.objects.create(projeto=projeto, usuario=cls.membro)
+
+    def setUp(self):
+        cache.clear()
+
+    def get(self, usuario, url):
+        self.client.force_login(usuario)
+        with CaptureQueriesContext(connection) as consultas:
+            resposta = self.client.get(url)
+        self.assertEqual(resposta.status_code, 200)
+        return resposta, len(consultas)
+
+    def test_cada_usuario_tem_a_sua_copia(self):
+        url = reverse('projetos:home') + '?meus=1'
+        resposta, sem_cache = self.get(self.membro, url)
+        self.assertContains(resposta, 'Jogo de plataforma')
+        self.assertNotContains(self.get(self.outro, url)[0], 'Jogo de plataforma')
+        resposta, com_cache = self.get(self.membro, url)
+        self.assertContains(resposta, 'Jogo de plataforma')
+        self.assertLess(com_cache, sem_cache)
+
+    def test_alteracao_no_modulo_invalida_a_pagina(self):
+        url = reverse('projetos:home')
+        self.get(self.membro, url)
+        with self.captureOnCommitCallbacks(execute=True):
+            Projeto.objects.create(nome='Jogo de corrida', responsavel=self.outro)
+        self.assertContains(self.get(self.membro, url)[0], 'Jogo de corrida')
@@ -5,4 +5,5 @@ app_name = 'projetos'
 
 urlpatterns = [
     path('', views.home_view, name='home'),
+    path('<int:pk>/', views.detalhe_view, name='detalhe'),
 ]
@@ -1,6 +1,47 @@
 from django.shortcuts import render
 from django.contrib.auth.decorators import login_required
+from django.db.models import Prefetch
+from django.http import Http404
+from core.cache import cache_por_usuario
+from core.paginacao import PaginadorKeyset
+from .models import MembroProjeto, Projeto, Tarefa
+
+POR_PAGINA = 30
+
+@login_required
+@cache_por_usuario('projetos')
+async def home_view(request):
+    # Contadores vêm na própria linha do projeto: nenhuma consulta extra por projeto
+    projetos = Projeto.objects.select_related('empresa', 'responsavel')
+    status = request.GET.get('status', '')
+    if status:
+        projetos = projetos.filter(status=status)
+    if request.GET.get('meus') == '1':
+        projetos = projetos.filter(membros_projeto__usuario=request.user)
+
+    paginador = PaginadorKeyset(projetos, ('nome', 'id'), POR_PAGINA)
+    pagina = await paginador.apagina(apos=request.GET.get('apos'), antes=request.GET.get('antes'))
+
+    filtros = request.GET.copy()
+    filtros.pop('apos', None)
+    filtros.pop('antes', None)
+    return render(request, 'projetos/home.html', {
+        'pagina': pagina,
+        'filtros': filtros.urlencode(),
+        'status': status,
+        'opcoes_status': Projeto.STATUS,
+    })
 
 @login_required
-def home_view(request):
-    return render(request, 'projetos/home.html')
+async def detalhe_view(request, pk):
+    # Projeto + três prefetches (membros, marcos, tarefas), qualquer que seja o tamanho do projeto
+    consulta = Projeto.objects.select_related('empresa', 'responsavel').prefetch_related(
+        Prefetch('membros_projeto', queryset=MembroProjeto.objects.select_related('usuario')),
+        'marcos',
+        Prefetch('tarefas', queryset=Tarefa.objects.select_related('responsavel', 'marco')),
+    )
+    try:
+        projeto = await consulta.aget(pk=pk)
+    except Projeto.DoesNotExist:
+        raise Http404
+    return render(request, 'projetos/detalhe.html', {'projeto': projeto})